@@ -28,10 +28,41 @@ class Settings:
     web_host: str = os.getenv("WEB_HOST", "0.0.0.0")
     web_port: int = int(os.getenv("WEB_PORT", "7070"))
     
+    # Storage
+    flush_interval: float = float(os.getenv("FLUSH_INTERVAL", "5"))  # seconds between debounced writes
+    
+    # Learned responses
+    fuzzy_match_threshold: float = float(os.getenv("FUZZY_MATCH_THRESHOLD", "0.8"))  # share of trigger trigrams found
+    fuzzy_match_budget_us: float = float(os.getenv("FUZZY_MATCH_BUDGET_US", "500"))  # time budget per lookup
+    near_duplicate_threshold: float = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85"))  # trigram Jaccard
+    recall_top_k: int = int(os.getenv("RECALL_TOP_K", "3"))  # past exchanges injected into the prompt
+    recall_token_budget: int = int(os.getenv("RECALL_TOKEN_BUDGET", "300"))  # words, like Message.tokens
+    semantic_memory: bool = os.getenv("SEMANTIC_MEMORY", "true").lower() == "true"
+    embedding_model: str = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")  # "hashing" = local, no Ollama
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    semantic_min_score: float = float(os.getenv("SEMANTIC_MIN_SCORE", "0.5"))  # cosine similarity
+    semantic_query_timeout: float = float(os.getenv("SEMANTIC_QUERY_TIMEOUT", "2"))  # seconds; slower → BM25 only
+    memory_block_size: int = int(os.getenv("MEMORY_BLOCK_SIZE", "5"))  # top memories always in the prompt
+    memory_cache_ttl: float = float(os.getenv("MEMORY_CACHE_TTL", "300"))  # seconds; writes invalidate immediately
+    learning_memory_budget_mb: float = float(os.getenv("LEARNING_MEMORY_BUDGET_MB", "256"))  # resident learned stores
+    
+    # Notifications
+    notification_poll_interval: float = float(os.getenv("NOTIFICATION_POLL_INTERVAL", "30"))  # max seconds between checks
+    notification_retention_days: int = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "30"))  # delivered ones are dropped after
+    notification_max_items: int = int(os.getenv("NOTIFICATION_MAX_ITEMS", "500"))  # compaction trigger
+    reminder_tick: float = float(os.getenv("REMINDER_TICK", "1"))  # seconds per timing-wheel tick
+    
+    # Startup
+    warm_up_on_start: bool = os.getenv("WARM_UP_ON_START", "true").lower() == "true"
+    warm_up_delay: float = float(os.getenv("WARM_UP_DELAY", "1"))  # seconds after startup
+    
     # External APIs (Optional)
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     anthropic_api_key: str = os.getenv("ANTHROPIC_API_KEY", "")
     google_api_key: str = os.getenv("GOOGLE_API_KEY", "")
+    multi_ai_deadline: float = float(os.getenv("MULTI_AI_DEADLINE", "20"))  # seconds per multi-provider turn
+    multi_ai_hedged: bool = os.getenv("MULTI_AI_HEDGED", "true").lower() == "true"  # first acceptable answer wins
+    multi_ai_accept_score: int = int(os.getenv("MULTI_AI_ACCEPT_SCORE", "300"))  # length + 2 per Persian char
 
 # Global settings instance
 settings = Settings()
@@ -1,8 +1,10 @@
 """
 AI Connector for External APIs
 """
+from functools import partial
 from typing import List, Dict, Optional
 from backend.config.settings import settings
+from backend.core.fan_out import fan_out, remaining_timeout, run_blocking, run_sync
 
 # Optional imports
 try:
@@ -31,10 +33,11 @@ class AIConnector:
         
         # Initialize clients if API keys and modules are available
         if OPENAI_AVAILABLE and settings.openai_api_key:
-            self.openai_client = openai.OpenAI(api_key=settings.openai_api_key)
+            self.openai_client = openai.OpenAI(api_key=settings.openai_api_key, timeout=settings.multi_ai_deadline)
         
         if ANTHROPIC_AVAILABLE and settings.anthropic_api_key:
-            self.anthropic_client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+            self.anthropic_client = anthropic.Anthropic(api_key=settings.anthropic_api_key,
+                                                        timeout=settings.multi_ai_deadline)
         
         if GEMINI_AVAILABLE and settings.google_api_key:
             genai.configure(api_key=settings.google_api_key)
@@ -65,7 +68,8 @@ class AIConnector:
                 model=model,
                 messages=messages,
                 max_tokens=1000,
-                temperature=0.7
+                temperature=0.7,
+                timeout=remaining_timeout(settings.multi_ai_deadline)
             )
             return response.choices[0].message.content
         except Exception as e:
@@ -91,7 +95,8 @@ class AIConnector:
                 model=model,
                 max_tokens=1000,
                 system=system_msg,
-                messages=user_messages
+                messages=user_messages,
+                timeout=remaining_timeout(settings.multi_ai_deadline)
             )
             return response.content[0].text
         except Exception as e:
@@ -109,22 +114,36 @@ class AIConnector:
                 role = "Human" if msg['role'] == 'user' else "Assistant"
                 prompt += f"{role}: {msg['content']}\n"
             
-            response = self.gemini_model.generate_content(prompt)
+            response = self.gemini_model.generate_content(
+                prompt, request_options={"timeout": remaining_timeout(settings.multi_ai_deadline)})
             return response.text
         except Exception as e:
             return f"Gemini Error: {str(e)}"
     
-    def compare_responses(self, messages: List[Dict]) -> Dict[str, str]:
-        """Get responses from multiple AI models for comparison"""
-        responses = {}
+    def compare_responses(self, messages: List[Dict], deadline: Optional[float] = None) -> Dict[str, str]:
+        """Get responses from multiple AI models for comparison (concurrently, with a shared deadline)"""
+        return run_sync(self.compare_responses_async(messages, deadline))
+    
+    async def compare_responses_async(self, messages: List[Dict], deadline: Optional[float] = None) -> Dict[str, str]:
+        """Fan out to all configured models; models that miss the deadline are cancelled and reported"""
+        calls = {}
         
         if self.openai_client:
-            responses['GPT-3.5'] = self.chat_with_openai(messages)
+            calls['GPT-3.5'] = partial(run_blocking, self.chat_with_openai, messages)
         
         if self.anthropic_client:
-            responses['Claude'] = self.chat_with_claude(messages)
+            calls['Claude'] = partial(run_blocking, self.chat_with_claude, messages)
         
         if self.gemini_model:
-            responses['Gemini'] = self.chat_with_gemini(messages)
+            calls['Gemini'] = partial(run_blocking, self.chat_with_gemini, messages)
         
+        if not calls:
+            return {}
+        deadline = settings.multi_ai_deadline if deadline is None else deadline
+        result = await fan_out(calls, deadline)
+        responses = dict(result.results)
+        for name, error in result.failed.items():
+            responses[name] = f"{name} Error: {error}"
+        for name in result.timed_out:
+            responses[name] = f"{name} Error: no response within {deadline:g}s"
         return responses
@@ -5,6 +5,11 @@
 import requests
 import json
 from abc import ABC, abstractmethod
+from collections import Counter
+from functools import partial
+from backend.core.fan_out import fan_out, remaining_timeout, run_blocking, run_sync
+from backend.core.lazy import lazy_singleton
+from backend.config.settings import settings
 
 class AIProvider(ABC):
     """کلاس پایه برای همه AI providers"""
@@ -13,6 +18,9 @@ class AIProvider(ABC):
         self.name = name
         self.api_key = api_key
         self.enabled = True
+        # سقف timeout؛ داخل fan-out درخواست‌ها با مهلت باقی‌مانده دور تمام می‌شوند
+        # (thread لغو نمی‌شود، پس فراخوانی رها شده بیشتر از دور زنده نمی‌ماند)
+        self.timeout = settings.multi_ai_deadline
     
     @abstractmethod
     def generate_response(self, prompt):
@@ -22,6 +30,13 @@ class AIProvider(ABC):
     def is_available(self):
         """بررسی در دسترس بودن API"""
         return self.enabled
+    
+    async def agenerate_response(self, prompt):
+        """نسخه async؛ پیش‌فرض: generate_response در thread pool ارائه‌دهنده‌ها
+
+        ارائه‌دهنده‌هایی که کلاینت async دارند می‌توانند override کنند تا لغو واقعی باشد.
+        """
+        return await run_blocking(self.generate_response, prompt)
 
 class OllamaProvider(AIProvider):
     """Ollama محلی"""
@@ -33,7 +48,7 @@ class OllamaProvider(AIProvider):
     def generate_response(self, prompt):
         try:
             response = requests.post(f"{self.base_url}/api/generate", 
-                json={"model": "qwen2:7b", "prompt": prompt, "stream": False})
+                json={"model": "qwen2:7b", "prompt": prompt, "stream": False}, timeout=remaining_timeout(self.timeout))
             return response.json().get("response", "")
         except:
             return None
@@ -51,7 +66,7 @@ class OpenAIProvider(AIProvider):
         try:
             response = requests.post(f"{self.base_url}/chat/completions",
                 headers={"Authorization": f"Bearer {self.api_key}"},
-                json={"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": prompt}]})
+                json={"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": prompt}]}, timeout=remaining_timeout(self.timeout))
             return response.json()["choices"][0]["message"]["content"]
         except:
             return None
@@ -70,7 +85,7 @@ class ClaudeProvider(AIProvider):
             response = requests.post(f"{self.base_url}/messages",
                 headers={"x-api-key": self.api_key, "anthropic-version": "2023-06-01"},
                 json={"model": "claude-3-sonnet-20240229", "max_tokens": 1000, 
-                      "messages": [{"role": "user", "content": prompt}]})
+                      "messages": [{"role": "user", "content": prompt}]}, timeout=remaining_timeout(self.timeout))
             return response.json()["content"][0]["text"]
         except:
             return None
@@ -88,7 +103,7 @@ class GeminiProvider(AIProvider):
         try:
             response = requests.post(f"{self.base_url}/models/gemini-pro:generateContent",
                 params={"key": self.api_key},
-                json={"contents": [{"parts": [{"text": prompt}]}]})
+                json={"contents": [{"parts": [{"text": prompt}]}]}, timeout=remaining_timeout(self.timeout))
             return response.json()["candidates"][0]["content"]["parts"][0]["text"]
         except:
             return None
@@ -113,7 +128,7 @@ class CustomProvider(AIProvider):
             payload = self.payload_template.copy()
             payload["prompt"] = prompt
             
-            response = requests.post(self.base_url, headers=headers, json=payload)
+            response = requests.post(self.base_url, headers=headers, json=payload, timeout=remaining_timeout(self.timeout))
             return response.json().get("response", response.text)
         except:
             return None
@@ -124,6 +139,8 @@ class AIProviderManager:
     def __init__(self):
         self.providers = {}
         self.config_file = "backend/config/ai_providers.json"
+        self.stats = {"turns": 0, "timed_out": Counter(), "failed": Counter()}
+        self.last_fan_out = None
         self.load_config()
     
     def load_config(self):
@@ -167,15 +184,36 @@ class AIProviderManager:
         """اضافه کردن provider جدید"""
         self.providers[provider.name.lower()] = provider
     
-    def get_responses(self, prompt):
-        """دریافت پاسخ از همه providers"""
-        responses = {}
-        for name, provider in self.providers.items():
-            if provider.is_available():
-                response = provider.generate_response(prompt)
-                if response:
-                    responses[name] = response
-        return responses
+    def get_responses(self, prompt, deadline=None):
+        """دریافت پاسخ از همه providers (هم‌زمان، با مهلت مشترک)"""
+        return run_sync(self.gather_responses(prompt, deadline))
+    
+    async def gather_responses(self, prompt, deadline=None):
+        """پاسخ providers به ترتیب رسیدن؛ آن‌هایی که تا مهلت نرسند لغو می‌شوند"""
+        return (await self.fan_out_responses(prompt, deadline)).results
+    
+    async def fan_out_responses(self, prompt, deadline=None, accept=None):
+        """FanOutResult کامل (زمان هر provider، برنده حالت hedged با accept(name, response))"""
+        result = await fan_out(
+            {name: partial(provider.agenerate_response, prompt)
+             for name, provider in self.providers.items() if provider.is_available()},
+            settings.multi_ai_deadline if deadline is None else deadline,
+            accept
+        )
+        self.stats["turns"] += 1
+        self.stats["timed_out"].update(result.timed_out)
+        self.stats["failed"].update(list(result.failed))
+        self.last_fan_out = result
+        return result
+    
+    def get_fan_out_stats(self):
+        """آمار fan-out: تعداد دورها و timeout/خطای هر provider"""
+        return {
+            "turns": self.stats["turns"],
+            "timed_out": dict(self.stats["timed_out"]),
+            "failed": dict(self.stats["failed"]),
+            "last_elapsed": round(self.last_fan_out.elapsed, 3) if self.last_fan_out else None
+        }
 
 # Instance سراسری
-ai_manager = AIProviderManager()
+ai_manager = lazy_singleton("ai_manager", AIProviderManager)
@@ -2,12 +2,47 @@
 📊 Analytics Dashboard - داشبورد تحلیلی Fox
 """
 
+import csv
+import io
 import json
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
+import time
+from datetime import datetime, timedelta, date
+from typing import Dict, Iterator, List, Any
 from collections import defaultdict, Counter
 import calendar
+from backend.core.flush_scheduler import flush_scheduler
+from backend.core.storage import load_json, save_json, dumps
+from backend.core.lazy import lazy_singleton
+from backend.core.event_store import event_store, NUMPY_AVAILABLE
+if NUMPY_AVAILABLE:
+    import numpy as np
+from backend.core.latency import latency_tracker
+
+# مجموعه داده خروجی → ستون‌ها (ترتیب ستون‌های CSV)
+EXPORT_DATASETS = {
+    "events": ("timestamp", "user", "topic", "response_time", "user_words", "ai_words"),
+    "daily": ("date", "conversations", "avg_response_time", "user_words", "ai_words",
+              "topics", "learning_sessions", "learning_success_rate"),
+}
+EXPORT_FORMATS = ("jsonl", "csv")
+
+def _local_isoformat(timestamps: "np.ndarray") -> List[str]:
+    """زمان‌های epoch → ISO محلی (ثانیه)؛ برداری وقتی کل تکه یک offset دارد
+
+    تکه‌ها از یک پارتیشن روزانه‌اند: در بازه کمتر از یک روز، offset یکسان دو سر
+    یعنی هیچ تغییر ساعتی در میانه نیست.
+    """
+    if not len(timestamps):
+        return []
+    first, last = timestamps.min(), timestamps.max()
+    offset = time.localtime(first).tm_gmtoff
+    if last - first < 86400 and offset == time.localtime(last).tm_gmtoff:
+        # مثل datetime: اول گرد کردن به میکروثانیه، بعد بریدن به ثانیه
+        seconds = np.floor(timestamps.round(6)).astype(np.int64) + offset
+        return seconds.astype("datetime64[s]").astype(str).tolist()
+    # تکه روی مرز تغییر ساعت تابستانی
+    return [datetime.fromtimestamp(ts).isoformat(timespec="seconds") for ts in timestamps.tolist()]
 
 class AnalyticsDashboard:
     def __init__(self):
@@ -16,10 +51,8 @@ class AnalyticsDashboard:
         
     def load_analytics(self):
         """بارگذاری داده‌های تحلیلی"""
-        if os.path.exists(self.analytics_file):
-            with open(self.analytics_file, 'r', encoding='utf-8') as f:
-                self.analytics = json.load(f)
-        else:
+        self.analytics = load_json(self.analytics_file)
+        if self.analytics is None:
             self.analytics = {
                 "daily_stats": {},
                 "weekly_stats": {},
@@ -28,21 +61,64 @@ class AnalyticsDashboard:
                 "performance_metrics": {},
                 "learning_progress": {}
             }
+        if "totals" not in self.analytics:
+            # فایل قدیمی: جمع‌های کل یک بار از تاریخچه ساخته می‌شوند
+            self.analytics["totals"] = self._rebuild_totals()
+    
+    def _rebuild_totals(self) -> Dict:
+        """ساخت جمع‌های کل از daily_stats و learning_progress (فقط برای مهاجرت)"""
+        totals = {
+            "conversations": 0,
+            "active_days": 0,
+            "first_conversation": None,
+            "topics": {},
+            "learning": {"sessions": 0, "duration": 0, "successes": 0}
+        }
+        for day, daily in self.analytics["daily_stats"].items():
+            totals["conversations"] += daily.get("conversations", 0)
+            if daily.get("conversations", 0) > 0:
+                totals["active_days"] += 1
+            if not totals["first_conversation"] or day < totals["first_conversation"]:
+                totals["first_conversation"] = day
+            for topic, count in daily.get("topics", {}).items():
+                totals["topics"][topic] = totals["topics"].get(topic, 0) + count
+        
+        learning = totals["learning"]
+        for data in self.analytics.get("learning_progress", {}).values():
+            sessions = data.get("sessions", [])
+            learning["sessions"] += len(sessions)
+            learning["duration"] += data.get("total_duration", 0)
+            learning["successes"] += sum(1 for s in sessions if s.get("success", False))
+        return totals
     
     def save_analytics(self):
         """ذخیره داده‌های تحلیلی"""
-        os.makedirs(os.path.dirname(self.analytics_file), exist_ok=True)
-        with open(self.analytics_file, 'w', encoding='utf-8') as f:
-            json.dump(self.analytics, f, ensure_ascii=False, indent=2)
+        save_json(self.analytics_file, self.analytics)
     
     def record_conversation(self, user_input: str, ai_response: str, 
-                          response_time: float, topic: str = None):
+                          response_time: float, topic: str = None, user: str = None):
         """ثبت مکالمه برای تحلیل"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        hour = datetime.now().hour
+        now = datetime.now()
+        user_words = len(user_input.split())
+        ai_words = len(ai_response.split())
+        # رویداد خام برای پرس‌وجوهای دلخواه (مثلاً p95 زمان پاسخ به تفکیک ساعت)
+        event_store.record(response_time, user, topic, user_words, ai_words, timestamp=now.timestamp())
+        today = now.strftime("%Y-%m-%d")
+        hour = now.hour
+        totals = self.analytics["totals"]
+        new_day = today not in self.analytics["daily_stats"]
+        
+        # جمع‌های کل (داشبورد کل دوره بدون پیمایش تاریخچه)
+        totals["conversations"] += 1
+        if new_day:
+            totals["active_days"] += 1
+            if not totals["first_conversation"] or today < totals["first_conversation"]:
+                totals["first_conversation"] = today
+        if topic:
+            totals["topics"][topic] = totals["topics"].get(topic, 0) + 1
         
         # آمار روزانه
-        if today not in self.analytics["daily_stats"]:
+        if new_day:
             self.analytics["daily_stats"][today] = {
                 "conversations": 0,
                 "total_response_time": 0,
@@ -56,14 +132,14 @@ class AnalyticsDashboard:
         daily["conversations"] += 1
         daily["total_response_time"] += response_time
         daily["hourly_distribution"][str(hour)] = daily["hourly_distribution"].get(str(hour), 0) + 1
-        daily["word_count"]["user"] += len(user_input.split())
-        daily["word_count"]["ai"] += len(ai_response.split())
+        daily["word_count"]["user"] += user_words
+        daily["word_count"]["ai"] += ai_words
         
         if topic:
             daily["topics"][topic] = daily["topics"].get(topic, 0) + 1
         
         # آمار هفتگی
-        week_key = datetime.now().strftime("%Y-W%U")
+        week_key = now.strftime("%Y-W%U")
         if week_key not in self.analytics["weekly_stats"]:
             self.analytics["weekly_stats"][week_key] = {
                 "conversations": 0,
@@ -80,7 +156,15 @@ class AnalyticsDashboard:
             weekly["top_topics"][topic] = weekly["top_topics"].get(topic, 0) + 1
         
         # آمار ماهانه
-        month_key = datetime.now().strftime("%Y-%m")
+        monthly = self._get_month_bucket(now)
+        monthly["conversations"] += 1
+        if new_day:
+            monthly["total_days_active"] += 1
+        
+        flush_scheduler.mark_dirty("analytics_dashboard", self.save_analytics)
+    
+    def _get_month_bucket(self, now: datetime) -> Dict:
+        month_key = now.strftime("%Y-%m")
         if month_key not in self.analytics["monthly_stats"]:
             self.analytics["monthly_stats"][month_key] = {
                 "conversations": 0,
@@ -88,15 +172,12 @@ class AnalyticsDashboard:
                 "learning_sessions": 0,
                 "achievements_unlocked": 0
             }
-        
-        monthly = self.analytics["monthly_stats"][month_key]
-        monthly["conversations"] += 1
-        
-        self.save_analytics()
+        return self.analytics["monthly_stats"][month_key]
     
     def record_learning_session(self, topic: str, success: bool, duration: int):
         """ثبت جلسه یادگیری"""
-        today = datetime.now().strftime("%Y-%m-%d")
+        now = datetime.now()
+        today = now.strftime("%Y-%m-%d")
         
         if "learning_progress" not in self.analytics:
             self.analytics["learning_progress"] = {}
@@ -105,25 +186,34 @@ class AnalyticsDashboard:
             self.analytics["learning_progress"][today] = {
                 "sessions": [],
                 "total_duration": 0,
-                "success_rate": 0
+                "success_rate": 0,
+                "success_count": 0
             }
         
         session = {
             "topic": topic,
             "success": success,
             "duration": duration,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now.isoformat()
         }
         
-        self.analytics["learning_progress"][today]["sessions"].append(session)
-        self.analytics["learning_progress"][today]["total_duration"] += duration
+        progress = self.analytics["learning_progress"][today]
+        progress["sessions"].append(session)
+        progress["total_duration"] += duration
         
-        # محاسبه نرخ موفقیت
-        sessions = self.analytics["learning_progress"][today]["sessions"]
-        success_count = sum(1 for s in sessions if s["success"])
-        self.analytics["learning_progress"][today]["success_rate"] = success_count / len(sessions) * 100
+        # محاسبه نرخ موفقیت (شمارنده موفقیت‌ها به جای پیمایش جلسات)
+        if "success_count" not in progress:
+            progress["success_count"] = sum(1 for s in progress["sessions"][:-1] if s["success"])
+        progress["success_count"] += bool(success)
+        progress["success_rate"] = progress["success_count"] / len(progress["sessions"]) * 100
         
-        self.save_analytics()
+        learning = self.analytics["totals"]["learning"]
+        learning["sessions"] += 1
+        learning["duration"] += duration
+        learning["successes"] += bool(success)
+        self._get_month_bucket(now)["learning_sessions"] += 1
+        
+        flush_scheduler.mark_dirty("analytics_dashboard", self.save_analytics)
     
     def get_dashboard_data(self, period: str = "week") -> Dict:
         """دریافت داده‌های داشبورد"""
@@ -138,6 +228,11 @@ class AnalyticsDashboard:
         else:
             return self._get_overall_stats()
     
+    def query_events(self, metric: str = "response_time", stat: str = "p95",
+                     group_by: str = "hour", days: int = 90, **filters) -> Dict:
+        """پرس‌وجوی تجمیعی روی رویدادهای خام (event_store)"""
+        return event_store.query(metric, stat, group_by, days, **filters)
+    
     def _get_today_stats(self) -> Dict:
         """آمار امروز"""
         today = datetime.now().strftime("%Y-%m-%d")
@@ -155,16 +250,21 @@ class AnalyticsDashboard:
             "top_topics": dict(sorted(daily_data.get("topics", {}).items(), 
                                     key=lambda x: x[1], reverse=True)[:5]),
             "hourly_activity": daily_data.get("hourly_distribution", {}),
-            "word_stats": daily_data.get("word_count", {"user": 0, "ai": 0})
+            "word_stats": daily_data.get("word_count", {"user": 0, "ai": 0}),
+            "latency": latency_tracker.get_percentiles("day", 1)
         }
     
+    def _recent_days(self, count: int) -> List[str]:
+        """کلید `count` روز اخیر، از امروز به عقب"""
+        today = date.today().toordinal()
+        return [date.fromordinal(today - i).isoformat() for i in range(count)]
+    
     def _get_week_stats(self) -> Dict:
         """آمار هفته"""
         # 7 روز گذشته
         week_data = {"conversations": 0, "topics": {}, "daily_breakdown": {}}
         
-        for i in range(7):
-            date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
+        for date in self._recent_days(7):
             daily = self.analytics["daily_stats"].get(date, {})
             
             week_data["conversations"] += daily.get("conversations", 0)
@@ -181,7 +281,8 @@ class AnalyticsDashboard:
             "top_topics": dict(sorted(week_data["topics"].items(), 
                                     key=lambda x: x[1], reverse=True)[:5]),
             "daily_breakdown": week_data["daily_breakdown"],
-            "trend": self._calculate_trend("week")
+            "trend": self._calculate_trend("week"),
+            "latency": latency_tracker.get_percentiles("day", 7)
         }
     
     def _get_month_stats(self) -> Dict:
@@ -190,12 +291,11 @@ class AnalyticsDashboard:
         month_data = {"conversations": 0, "topics": {}, "weekly_breakdown": {}}
         
         # 4 هفته گذشته
+        days = self._recent_days(28)
         for week in range(4):
-            week_start = datetime.now() - timedelta(weeks=week)
             week_conversations = 0
             
-            for day in range(7):
-                date = (week_start - timedelta(days=day)).strftime("%Y-%m-%d")
+            for date in days[week * 7:(week + 1) * 7]:
                 daily = self.analytics["daily_stats"].get(date, {})
                 week_conversations += daily.get("conversations", 0)
                 
@@ -213,35 +313,23 @@ class AnalyticsDashboard:
             "top_topics": dict(sorted(month_data["topics"].items(), 
                                     key=lambda x: x[1], reverse=True)[:5]),
             "weekly_breakdown": month_data["weekly_breakdown"],
-            "learning_progress": self._get_learning_stats()
+            "learning_progress": self._get_learning_stats(),
+            "latency": latency_tracker.get_percentiles("day", 28)
         }
     
     def _get_overall_stats(self) -> Dict:
         """آمار کلی"""
-        total_conversations = 0
-        all_topics = {}
-        first_conversation = None
-        
-        for date, daily in self.analytics["daily_stats"].items():
-            total_conversations += daily.get("conversations", 0)
-            
-            if not first_conversation or date < first_conversation:
-                first_conversation = date
-                
-            for topic, count in daily.get("topics", {}).items():
-                all_topics[topic] = all_topics.get(topic, 0) + count
-        
-        # محاسبه روزهای فعال
-        active_days = len([d for d, data in self.analytics["daily_stats"].items() 
-                          if data.get("conversations", 0) > 0])
+        totals = self.analytics["totals"]
+        total_conversations = totals["conversations"]
+        active_days = totals["active_days"]
         
         return {
             "period": "کل دوره",
             "total_conversations": total_conversations,
             "active_days": active_days,
             "avg_per_day": round(total_conversations / max(active_days, 1), 1),
-            "first_conversation": first_conversation,
-            "top_topics": dict(sorted(all_topics.items(), 
+            "first_conversation": totals["first_conversation"],
+            "top_topics": dict(sorted(totals["topics"].items(), 
                                     key=lambda x: x[1], reverse=True)[:10]),
             "user_engagement": self._calculate_engagement()
         }
@@ -250,15 +338,10 @@ class AnalyticsDashboard:
         """محاسبه روند"""
         if period == "week":
             # مقایسه این هفته با هفته قبل
-            this_week = 0
-            last_week = 0
-            
-            for i in range(7):
-                date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-                this_week += self.analytics["daily_stats"].get(date, {}).get("conversations", 0)
-                
-                date_last_week = (datetime.now() - timedelta(days=i+7)).strftime("%Y-%m-%d")
-                last_week += self.analytics["daily_stats"].get(date_last_week, {}).get("conversations", 0)
+            daily_stats = self.analytics["daily_stats"]
+            counts = [daily_stats.get(date, {}).get("conversations", 0) for date in self._recent_days(14)]
+            this_week = sum(counts[:7])
+            last_week = sum(counts[7:])
             
             if last_week == 0:
                 return "جدید"
@@ -276,35 +359,24 @@ class AnalyticsDashboard:
     
     def _get_learning_stats(self) -> Dict:
         """آمار یادگیری"""
-        total_sessions = 0
-        total_duration = 0
-        success_count = 0
-        
-        for date, data in self.analytics.get("learning_progress", {}).items():
-            sessions = data.get("sessions", [])
-            total_sessions += len(sessions)
-            total_duration += data.get("total_duration", 0)
-            success_count += sum(1 for s in sessions if s.get("success", False))
+        learning = self.analytics["totals"]["learning"]
+        total_sessions = learning["sessions"]
+        total_duration = learning["duration"]
         
         return {
             "total_sessions": total_sessions,
             "total_duration_minutes": total_duration,
-            "success_rate": round(success_count / max(total_sessions, 1) * 100, 1),
+            "success_rate": round(learning["successes"] / max(total_sessions, 1) * 100, 1),
             "avg_session_duration": round(total_duration / max(total_sessions, 1), 1)
         }
     
     def _calculate_engagement(self) -> Dict:
         """محاسبه میزان تعامل"""
         # محاسبه بر اساس تعداد روزهای فعال، طول مکالمات، و تنوع موضوعات
-        active_days = len([d for d, data in self.analytics["daily_stats"].items() 
-                          if data.get("conversations", 0) > 0])
-        
-        total_conversations = sum(data.get("conversations", 0) 
-                                for data in self.analytics["daily_stats"].values())
-        
-        unique_topics = set()
-        for data in self.analytics["daily_stats"].values():
-            unique_topics.update(data.get("topics", {}).keys())
+        totals = self.analytics["totals"]
+        active_days = totals["active_days"]
+        total_conversations = totals["conversations"]
+        unique_topics = totals["topics"]
         
         # امتیاز تعامل (0-100)
         engagement_score = min(100, 
@@ -348,5 +420,97 @@ class AnalyticsDashboard:
         # TODO: اضافه کردن فرمت‌های دیگر (PDF, HTML)
         return str(report_data)
 
+    def stream_export(self, dataset: str = "events", format: str = "jsonl",
+                      start: str = None, end: str = None, chunk_rows: int = 5000) -> Iterator[bytes]:
+        """خروجی جریانی (JSONL یا CSV) در تکه‌های حداکثر chunk_rows سطری
+        
+        start/end تاریخ ISO (شامل) هستند و فقط پارتیشن‌های همان روزها خوانده
+        می‌شوند. ورودی‌ها همین‌جا بررسی می‌شوند (ValueError)، نه وسط جریان.
+        """
+        if dataset not in EXPORT_DATASETS:
+            raise ValueError(f"dataset نامعتبر: {dataset} (یکی از {list(EXPORT_DATASETS)})")
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"format نامعتبر: {format} (یکی از {list(EXPORT_FORMATS)})")
+        start_day = date.fromisoformat(start) if start else None
+        end_day = date.fromisoformat(end) if end else None
+        if start_day and end_day and start_day > end_day:
+            raise ValueError("start بعد از end است")
+        
+        if dataset == "events":
+            if not NUMPY_AVAILABLE:
+                raise RuntimeError("خروجی رویدادها به NumPy نیاز دارد")
+            chunks = self._iter_event_rows(start_day, end_day, chunk_rows)
+        else:
+            chunks = self._iter_daily_rows(start_day, end_day, chunk_rows)
+        return self._encode_chunks(chunks, EXPORT_DATASETS[dataset], format)
+    
+    def _iter_event_rows(self, start: date, end: date, chunk_rows: int) -> Iterator[List[Dict]]:
+        """سطرهای رویداد خام از event_store"""
+        for chunk in event_store.iter_events(start, end, chunk_rows):
+            yield [
+                {
+                    "timestamp": timestamp,
+                    "user": user or None,
+                    "topic": topic or None,
+                    "response_time": response_time,
+                    "user_words": user_words,
+                    "ai_words": ai_words
+                }
+                for timestamp, user, topic, response_time, user_words, ai_words in zip(
+                    _local_isoformat(chunk["timestamp"]), chunk["user"].tolist(), chunk["topic"].tolist(),
+                    chunk["response_time"].tolist(), chunk["user_words"].tolist(), chunk["ai_words"].tolist())
+            ]
+    
+    def _iter_daily_rows(self, start: date, end: date, chunk_rows: int) -> Iterator[List[Dict]]:
+        """سطرهای آمار روزانه (daily_stats + learning_progress)"""
+        first = start.isoformat() if start else ""
+        last = end.isoformat() if end else "9999-12-31"
+        daily_stats = self.analytics["daily_stats"]
+        learning_progress = self.analytics.get("learning_progress", {})
+        days = sorted(day for day in list(daily_stats) if first <= day <= last)
+        
+        for offset in range(0, len(days), chunk_rows):
+            rows = []
+            for day in days[offset:offset + chunk_rows]:
+                daily = daily_stats[day]
+                progress = learning_progress.get(day, {})
+                conversations = daily.get("conversations", 0)
+                words = daily.get("word_count", {})
+                rows.append({
+                    "date": day,
+                    "conversations": conversations,
+                    "avg_response_time": round(daily.get("total_response_time", 0) / conversations, 4)
+                                         if conversations else 0,
+                    "user_words": words.get("user", 0),
+                    "ai_words": words.get("ai", 0),
+                    "topics": dict(daily.get("topics", {})),
+                    "learning_sessions": len(progress.get("sessions", [])),
+                    "learning_success_rate": round(progress.get("success_rate", 0), 2)
+                })
+            yield rows
+    
+    def _encode_chunks(self, chunks: Iterator[List[Dict]], fields: tuple, format: str) -> Iterator[bytes]:
+        """تبدیل هر تکه سطر به یک تکه بایت"""
+        if format == "jsonl":
+            for rows in chunks:
+                yield b"".join(dumps(row) + b"\n" for row in rows)
+            return
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for rows in chunks:
+            writer.writerows(
+                [json.dumps(row[field], ensure_ascii=False) if isinstance(row[field], dict) else row[field]
+                 for field in fields]
+                for row in rows
+            )
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            # فقط سرستون (بازه خالی)
+            yield buffer.getvalue().encode("utf-8")
+
 # نمونه استفاده
-analytics_dashboard = AnalyticsDashboard()
+analytics_dashboard = lazy_singleton("analytics_dashboard", AnalyticsDashboard)
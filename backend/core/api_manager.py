@@ -6,6 +6,7 @@ import os
 from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
 import requests
+from backend.core.lazy import lazy_singleton
 
 @dataclass
 class APIConfig:
@@ -222,4 +223,4 @@ class APIManager:
                 self.add_api(**api)
 
 # Global instance
-api_manager = APIManager()
+api_manager = lazy_singleton("api_manager", APIManager)
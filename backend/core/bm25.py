@@ -0,0 +1,151 @@
+"""
+📈 BM25 Index - بازیابی مرتبط‌ترین پیام‌ها
+آمار واژه‌ها به صورت افزایشی نگه داشته می‌شود و امتیازدهی با NumPy برداری است
+"""
+
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Iterable, List, Tuple
+from backend.core.persian_text import normalize_persian
+
+# Optional imports
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+_TOKEN = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    """واژه‌های یکسان‌سازی شده (حداقل دو حرف)"""
+    return [token for token in _TOKEN.findall(normalize_persian(text)) if len(token) > 1]
+
+class BM25Index:
+    """ایندکس معکوس با شمارش واژه برای امتیازدهی Okapi BM25
+
+    هر سند یک جایگاه دارد؛ برای هر واژه جایگاه‌ها و تکرارها در array
+    نگه داشته می‌شوند تا NumPy بدون کپی روی آنها محاسبه کند.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._doc_ids = array('q')
+        self._doc_lengths = array('i')
+        self._positions = {}   # واژه → array('i') جایگاه سندها
+        self._freqs = {}       # واژه → array('i') تعداد تکرار در هر سند
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_ids)
+
+    def add(self, doc_id: int, text: str):
+        """افزودن یک سند"""
+        terms = tokenize(text)
+        with self._lock:
+            position = len(self._doc_ids)
+            self._doc_ids.append(doc_id)
+            self._doc_lengths.append(len(terms))
+            self._total_length += len(terms)
+            for term, count in Counter(terms).items():
+                positions = self._positions.get(term)
+                if positions is None:
+                    positions = self._positions[term] = array('i')
+                    self._freqs[term] = array('i')
+                positions.append(position)
+                self._freqs[term].append(count)
+
+    def add_many(self, documents: Iterable[Tuple[int, str]]):
+        """افزودن دسته‌ای (doc_id, text)"""
+        for doc_id, text in documents:
+            self.add(doc_id, text)
+
+    def search(self, query: str, limit: int = 5, exclude=()) -> List[Tuple[int, float]]:
+        """مرتبط‌ترین سندها به صورت (doc_id, امتیاز)؛ در امتیاز برابر، جدیدتر"""
+        terms = set(tokenize(query))
+        if not terms or limit <= 0:
+            return []
+
+        with self._lock:
+            if not self._doc_ids:
+                return []
+            wanted = limit + len(exclude)
+            if NUMPY_AVAILABLE:
+                ranked = self._search_numpy(terms, wanted)
+            else:
+                ranked = self._search_python(terms, wanted)
+            doc_ids = self._doc_ids
+            results = [(doc_ids[position], score) for position, score in ranked]
+
+        return [(doc_id, score) for doc_id, score in results if doc_id not in exclude][:limit]
+
+    def _idf(self, document_frequency: int) -> float:
+        total = len(self._doc_ids)
+        return math.log(1 + (total - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def _search_numpy(self, terms, limit: int) -> List[Tuple[int, float]]:
+        """امتیازدهی برداری روی لیست‌های واژه‌های پرسش"""
+        average_length = self._total_length / len(self._doc_ids) or 1.0
+        lengths = np.frombuffer(self._doc_lengths, dtype=np.int32)
+
+        all_positions = []
+        all_scores = []
+        for term in terms:
+            positions = self._positions.get(term)
+            if positions is None:
+                continue
+            positions = np.frombuffer(positions, dtype=np.int32)
+            freqs = np.frombuffer(self._freqs[term], dtype=np.int32).astype(np.float32)
+            norm = self.k1 * (1 - self.b + self.b * lengths[positions] / average_length)
+            all_positions.append(positions)
+            all_scores.append(self._idf(len(positions)) * freqs * (self.k1 + 1) / (freqs + norm))
+
+        if not all_positions:
+            return []
+
+        positions = np.concatenate(all_positions)
+        scores = np.concatenate(all_scores)
+        if len(all_positions) > 1:
+            # جمع امتیاز واژه‌ها برای هر سند (آرایه متراکم تا بزرگ‌ترین جایگاه)
+            dense = np.bincount(positions, weights=scores)
+            positions = np.flatnonzero(dense).astype(np.int32)
+            scores = dense[positions]
+
+        if len(positions) > limit:
+            # همه هم‌امتیازهای مرز نگه داشته می‌شوند تا ترتیب قطعی باشد
+            kth = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            keep = scores >= kth
+            positions, scores = positions[keep], scores[keep]
+        order = np.lexsort((-positions, -scores))[:limit]
+        return [(int(positions[i]), float(scores[i])) for i in order]
+
+    def _search_python(self, terms, limit: int) -> List[Tuple[int, float]]:
+        """امتیازدهی بدون NumPy"""
+        average_length = self._total_length / len(self._doc_ids) or 1.0
+        lengths = self._doc_lengths
+        scores = {}
+        for term in terms:
+            positions = self._positions.get(term)
+            if positions is None:
+                continue
+            idf = self._idf(len(positions))
+            for position, freq in zip(positions, self._freqs[term]):
+                norm = self.k1 * (1 - self.b + self.b * lengths[position] / average_length)
+                scores[position] = scores.get(position, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return ranked[:limit]
+
+    def get_stats(self) -> dict:
+        """آمار ایندکس"""
+        return {
+            "documents": len(self._doc_ids),
+            "terms": len(self._positions),
+            "postings": sum(len(positions) for positions in self._positions.values()),
+            "numpy": NUMPY_AVAILABLE
+        }
@@ -4,7 +4,8 @@ Enhanced Conversation Management
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 from datetime import datetime
-from backend.core.memory import MemoryManager
+from backend.core.memory import MemoryManager, MEMORY_BLOCK_HEADER, render_memory_lines
+from backend.config.settings import settings
 
 @dataclass
 class ChatMessage:
@@ -40,14 +41,18 @@ class ConversationManager:
     
     def get_context_messages(self) -> List[ChatMessage]:
         """Get recent messages for LLM context"""
+        return self._to_chat_messages(self._get_context_history())
+    
+    def _get_context_history(self) -> List[Dict]:
         if not self.current_session:
             return []
         
-        history = self.memory.get_conversation_history(
+        return self.memory.get_conversation_history(
             self.current_session, 
             limit=self.context_limit
         )
-        
+    
+    def _to_chat_messages(self, history: List[Dict]) -> List[ChatMessage]:
         return [
             ChatMessage(
                 role=msg["role"],
@@ -59,15 +64,27 @@ class ConversationManager:
     
     def get_enhanced_context(self) -> List[ChatMessage]:
         """Get context with relevant memories"""
-        messages = self.get_context_messages()
+        history = self._get_context_history()
+        messages = self._to_chat_messages(history)
         
-        # Add system message with relevant memories
-        memories = self.memory.get_memories(limit=5)
-        if memories:
-            memory_text = "اطلاعات مهم که باید به خاطر داشته باشی:\n"
-            for mem in memories:
-                memory_text += f"- {mem['key']}: {mem['value']}\n"
-            
+        # Add relevant past exchanges (BM25 + semantic) under the token budget
+        recall_text = self._get_recall_text(history)
+        if recall_text:
+            messages.insert(0, ChatMessage(role="system", content=recall_text))
+        
+        # Add system message with relevant memories (بلوک پیش‌ساخته و کش شده)
+        memory_block = self.memory.get_memory_block()
+        memory_text = memory_block["text"]
+        query = self._last_user_message(history)
+        if query:
+            # حافظه‌های مرتبط با پیام فعلی حتی اگر اهمیت کمتری داشته باشند
+            extra = [
+                mem for mem in self.memory.get_relevant_memories(query)
+                if mem["key"] not in memory_block["keys"]
+            ]
+            if extra:
+                memory_text = (memory_text or MEMORY_BLOCK_HEADER) + render_memory_lines(extra)
+        if memory_text:
             system_message = ChatMessage(
                 role="system",
                 content=memory_text
@@ -76,6 +93,35 @@ class ConversationManager:
         
         return messages
     
+    def _last_user_message(self, history: List[Dict]) -> Optional[str]:
+        return next((msg["content"] for msg in reversed(history) if msg["role"] == "user"), None)
+    
+    def _get_recall_text(self, history: List[Dict]) -> Optional[str]:
+        """Relevant older exchanges for the last user message"""
+        query = self._last_user_message(history)
+        if not query or settings.recall_top_k <= 0:
+            return None
+        
+        exchanges = self.memory.search_relevant(
+            query,
+            limit=settings.recall_top_k,
+            exclude_ids=[msg["id"] for msg in history]
+        )
+        
+        lines = []
+        budget = settings.recall_token_budget
+        for exchange in exchanges:
+            line = f"- کاربر: {exchange['question']}\n  Fox: {exchange['answer']}"
+            tokens = len(line.split())
+            if tokens > budget:
+                continue
+            budget -= tokens
+            lines.append(line)
+        
+        if not lines:
+            return None
+        return "مکالمات مرتبط قبلی:\n" + "\n".join(lines)
+    
     def get_conversations_list(self) -> List[Dict]:
         """Get list of recent conversations"""
         return self.memory.get_recent_conversations()
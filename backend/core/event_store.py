@@ -0,0 +1,411 @@
+"""
+🗃️ Event Store - لاگ ستونی رویدادهای مکالمه برای تحلیل
+هر رویداد (زمان، کاربر، موضوع، زمان پاسخ، تعداد کلمات) در فایل‌های ستونی
+فقط-افزودنی هر روز ذخیره می‌شود؛ پرس‌وجوها ستون‌های لازم را memmap می‌کنند و
+با NumPy به صورت برداری تجمیع می‌شوند (مثلاً p95 زمان پاسخ به تفکیک ساعت).
+"""
+
+import os
+import threading
+import time
+from array import array
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+from backend.core.flush_scheduler import flush_scheduler
+from backend.core.storage import load_json, save_json
+from backend.core.lazy import lazy_singleton
+
+# Optional imports
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# ستون → typecode آرایه (همان dtype در NumPy)
+COLUMNS = {
+    "timestamp": "d",      # ثانیه‌های epoch
+    "user": "I",           # کد در دیکشنری کاربران
+    "topic": "I",          # کد در دیکشنری موضوعات
+    "response_time": "f",  # ثانیه
+    "user_words": "I",
+    "ai_words": "I",
+}
+# پارتیشن‌های بدون layout.json کاربر/موضوع را uint16 نوشته‌اند (سرریز بعد از ۶۵۵۳۵ کد)
+LEGACY_COLUMNS = {**COLUMNS, "user": "H", "topic": "H"}
+LAYOUT_FILE = "layout.json"
+DICTIONARY_COLUMNS = ("user", "topic")
+METRICS = ("response_time", "user_words", "ai_words")
+GROUPS = ("hour", "day", "weekday", "topic", "user", None)
+
+class EventStore:
+    """رویدادها در پوشه‌های روزانه، هر ستون یک فایل خام
+
+    نوشتن‌ها در حافظه جمع و با flush_scheduler یک‌جا به انتهای فایل‌ها
+    اضافه می‌شوند. کاربر و موضوع با دیکشنری مشترک به کد عددی تبدیل می‌شوند.
+    """
+
+    def __init__(self, root: str = "data/analytics/events"):
+        self.root = root
+        self.dictionary_file = os.path.join(root, "dictionary.json")
+        self._dictionary: Dict[str, List[str]] = load_json(self.dictionary_file) or {
+            column: [""] for column in DICTIONARY_COLUMNS
+        }
+        self._codes = {
+            column: {value: code for code, value in enumerate(values)}
+            for column, values in self._dictionary.items()
+        }
+        self._dictionary_dirty = False
+        self._pending: Dict[str, Dict[str, array]] = {}
+        self._partitions: Dict[str, dict] = {}   # روز → سطرها، ستون‌های memmap، مرز ساعت‌ها
+        self._current_layouts = set()            # پوشه‌هایی که با COLUMNS نوشته شده‌اند
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def encode(self, column: str, value: Optional[str]) -> int:
+        """کد عددی یک کاربر/موضوع (مقدار جدید به دیکشنری اضافه می‌شود)"""
+        value = value or ""
+        codes = self._codes[column]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._dictionary[column])
+            self._dictionary[column].append(value)
+            self._dictionary_dirty = True
+        return code
+
+    def record(self, response_time: float, user: str = None, topic: str = None,
+               user_words: int = 0, ai_words: int = 0, timestamp: float = None):
+        """ثبت یک رویداد مکالمه"""
+        timestamp = time.time() if timestamp is None else timestamp
+        day = date.fromtimestamp(timestamp).isoformat()
+        with self._lock:
+            columns = self._pending.get(day)
+            if columns is None:
+                columns = self._pending[day] = {name: array(code) for name, code in COLUMNS.items()}
+            columns["timestamp"].append(timestamp)
+            columns["user"].append(self.encode("user", user))
+            columns["topic"].append(self.encode("topic", topic))
+            columns["response_time"].append(response_time)
+            columns["user_words"].append(user_words)
+            columns["ai_words"].append(ai_words)
+        flush_scheduler.mark_dirty("event_store", self.flush)
+
+    def append_columns(self, day: str, columns: Dict[str, Sequence]):
+        """افزودن دسته‌ای رویدادهای یک روز (ورود داده؛ user/topic کد شده با encode)"""
+        self._save_dictionary()
+        self._write_partition(day, columns)
+
+    def flush(self):
+        """نوشتن رویدادهای در انتظار در انتهای فایل‌های ستونی"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        # کدهای جدید قبل از سطرهایی که به آن‌ها اشاره می‌کنند ذخیره می‌شوند
+        self._save_dictionary()
+        for day, columns in pending.items():
+            self._write_partition(day, columns)
+
+    def _save_dictionary(self):
+        with self._lock:
+            if not self._dictionary_dirty:
+                return
+            snapshot = {column: list(values) for column, values in self._dictionary.items()}
+            self._dictionary_dirty = False
+        save_json(self.dictionary_file, snapshot)
+
+    def _write_partition(self, day: str, columns: Dict[str, Sequence]):
+        directory = os.path.join(self.root, day)
+        with self._write_lock:
+            os.makedirs(directory, exist_ok=True)
+            self._ensure_layout(directory)
+            for name, code in COLUMNS.items():
+                values = columns[name]
+                if not isinstance(values, array):
+                    values = np.asarray(values, dtype=code) if NUMPY_AVAILABLE else array(code, values)
+                with open(os.path.join(directory, name + ".col"), 'ab') as f:
+                    f.write(values.tobytes())
+            self._partitions.pop(day, None)
+
+    def _ensure_layout(self, directory: str):
+        """ارتقای ستون‌های پارتیشن به typecodeهای COLUMNS (زیر _write_lock)
+
+        پارتیشن قدیمی یک بار بازنویسی می‌شود؛ layout.json بعد از هر ستون به‌روز
+        می‌شود تا قطع شدن وسط ارتقا ستونی را دو بار تبدیل نکند.
+        """
+        if directory in self._current_layouts:
+            return
+        layout_file = os.path.join(directory, LAYOUT_FILE)
+        layout = load_json(layout_file)
+        if layout is None:
+            if any(os.path.exists(os.path.join(directory, name + ".col")) for name in COLUMNS):
+                layout = dict(LEGACY_COLUMNS)
+            else:
+                layout = dict(COLUMNS)
+                save_json(layout_file, layout)
+        for name, code in COLUMNS.items():
+            old_code = layout.get(name, code)
+            if old_code == code:
+                continue
+            path = os.path.join(directory, name + ".col")
+            if os.path.exists(path):
+                old_values = array(old_code)
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                old_values.frombytes(raw[:len(raw) - len(raw) % old_values.itemsize])
+                with open(path + ".tmp", 'wb') as f:
+                    f.write(array(code, old_values).tobytes())
+                os.replace(path + ".tmp", path)
+            layout[name] = code
+            save_json(layout_file, layout)
+        self._current_layouts.add(directory)
+
+    def _load_partition(self, day: str):
+        """ستون‌های memmap یک روز؛ دنباله ناقص (قطع وسط نوشتن) بریده می‌شود"""
+        cached = self._partitions.get(day)
+        if cached is not None:
+            return cached
+        directory = os.path.join(self.root, day)
+        if not os.path.isdir(directory):
+            return None
+
+        with self._write_lock:
+            paths = {name: os.path.join(directory, name + ".col") for name in COLUMNS}
+            if not all(os.path.exists(path) for path in paths.values()):
+                return None
+            self._ensure_layout(directory)
+            itemsize = {name: np.dtype(code).itemsize for name, code in COLUMNS.items()}
+            rows = min(os.path.getsize(paths[name]) // itemsize[name] for name in COLUMNS)
+            for name, path in paths.items():
+                if os.path.getsize(path) != rows * itemsize[name]:
+                    with open(path, 'r+b') as f:
+                        f.truncate(rows * itemsize[name])
+            if rows == 0:
+                return None
+            # نمای ndarray ساده روی memmap (بدون سربار زیرکلاس در برش/فیلتر)
+            columns = {
+                name: np.memmap(path, dtype=COLUMNS[name], mode='r', shape=(rows,)).view(np.ndarray)
+                for name, path in paths.items()
+            }
+            partition = {"rows": rows, "columns": columns}
+            self._partitions[day] = partition
+        return partition
+
+    def _days(self, days: int) -> List[str]:
+        today = date.today().toordinal()
+        return [date.fromordinal(today - i).isoformat() for i in range(days - 1, -1, -1)]
+
+    def _hour_bounds(self, day: str, partition: dict):
+        """مرز ساعت‌ها در ستون زمان (اگر به ترتیب زمان نوشته شده باشد)، کش شده"""
+        if "hour_bounds" not in partition:
+            timestamps = partition["columns"]["timestamp"]
+            bounds = None
+            if bool(np.all(timestamps[1:] >= timestamps[:-1])):
+                midnight = time.mktime(date.fromisoformat(day).timetuple())
+                bounds = np.searchsorted(timestamps, midnight + np.arange(25) * 3600.0)
+                bounds[0], bounds[-1] = 0, partition["rows"]
+            partition["hour_bounds"] = bounds
+        return partition["hour_bounds"]
+
+    def _segments(self, day: str, partition: dict, metric: str, group_by: str, selected, day_key: int):
+        """بخش‌های یک پارتیشن: (کلید، مقادیر، None) یا (None، مقادیر، کلیدها)
+
+        selected: اندیس سطرهای منطبق با فیلترها (None = همه سطرها)
+        """
+        columns = partition["columns"]
+        values = columns[metric]
+        if group_by == "hour":
+            bounds = self._hour_bounds(day, partition)
+            if bounds is not None:
+                # ستون زمان مرتب است: هر ساعت یک برش پیوسته
+                for hour in range(24):
+                    start, end = bounds[hour], bounds[hour + 1]
+                    if selected is not None:
+                        first, last = np.searchsorted(selected, (start, end))
+                        yield hour, values.take(selected[first:last]), None
+                    elif start < end:
+                        yield hour, values[start:end], None
+                return
+            midnight = time.mktime(date.fromisoformat(day).timetuple())
+            keys = np.clip((columns["timestamp"] - midnight) * (1 / 3600), 0, 23).astype(np.uint16)
+        elif group_by in ("topic", "user"):
+            keys = columns[group_by]
+        else:
+            if group_by == "day":
+                key = day_key
+            elif group_by == "weekday":
+                key = date.fromisoformat(day).weekday()
+            else:
+                key = 0
+            yield key, values if selected is None else values.take(selected), None
+            return
+        if selected is not None:
+            values, keys = values.take(selected), keys.take(selected)
+        yield None, values, keys
+
+    def query(self, metric: str = "response_time", stat: str = "p95", group_by: str = "hour",
+              days: int = 90, user: str = None, topic: str = None) -> Dict:
+        """تجمیع یک معیار روی `days` روز اخیر
+
+        stat: count، sum، mean، min، max، median یا pNN (مثلاً p95)
+        group_by: hour، day، weekday، topic، user یا None (کل)
+        """
+        if not NUMPY_AVAILABLE:
+            return {"error": "NumPy نصب نیست"}
+        if metric not in METRICS or group_by not in GROUPS:
+            raise ValueError(f"metric یا group_by نامعتبر: {metric}, {group_by}")
+        quantile = self._quantile(stat)
+        self.flush()
+
+        filters = [
+            (column, self._codes[column].get(value or ""))
+            for column, value in (("user", user), ("topic", topic)) if value is not None
+        ]
+        if any(code is None for _, code in filters):
+            return {}
+
+        # count/sum/mean پارتیشن به پارتیشن جمع می‌شوند؛ صدک‌ها مقادیر را جمع‌آوری می‌کنند
+        counts: Dict[int, int] = {}
+        sums: Dict[int, float] = {}
+        grouped: Dict[int, list] = {}
+        keyed = []
+        labels = []
+        for day in self._days(days):
+            partition = self._load_partition(day)
+            if partition is None:
+                continue
+            selected = None
+            if filters:
+                # اندیس‌ها به جای ماسک بولی (take سریع‌تر از فیلتر بولی است)
+                mask = np.logical_and.reduce([partition["columns"][column] == code for column, code in filters])
+                selected = np.flatnonzero(mask)
+            day_key = len(labels)
+            labels.append(day)
+
+            for key, values, keys in self._segments(day, partition, metric, group_by, selected, day_key):
+                if quantile is not None:
+                    if keys is None:
+                        grouped.setdefault(key, []).append(values)
+                    else:
+                        keyed.append((keys, values))
+                elif keys is None:
+                    if len(values):
+                        counts[key] = counts.get(key, 0) + len(values)
+                        if stat != "count":
+                            sums[key] = sums.get(key, 0.0) + float(values.sum(dtype=np.float64))
+                else:
+                    key_counts = np.bincount(keys)
+                    key_sums = np.bincount(keys, weights=values) if stat != "count" else None
+                    for key in np.flatnonzero(key_counts):
+                        counts[int(key)] = counts.get(int(key), 0) + int(key_counts[key])
+                        if key_sums is not None:
+                            sums[int(key)] = sums.get(int(key), 0.0) + float(key_sums[key])
+
+        if quantile is not None:
+            if keyed:
+                for key, values in self._split_by_key(keyed).items():
+                    grouped.setdefault(key, []).append(values)
+            result = {}
+            for key, parts in grouped.items():
+                values = np.concatenate(parts)
+                if len(values):
+                    result[key] = round(float(np.percentile(values, quantile)), 4)
+        elif stat == "count":
+            result = counts
+        elif stat == "sum":
+            result = {key: round(value, 4) for key, value in sums.items()}
+        else:
+            result = {key: round(sums[key] / counts[key], 4) for key in counts}
+
+        if group_by in ("hour", "weekday"):
+            return {int(key): result[key] for key in sorted(result)}
+        if group_by == "day":
+            return {labels[key]: result[key] for key in sorted(result)}
+        if group_by in ("topic", "user"):
+            names = self._dictionary[group_by]
+            return {names[key] or "نامشخص": result[key] for key in sorted(result)}
+        return {"all": result.get(0, 0)}
+
+    def _partition_days(self, start: date = None, end: date = None) -> List[str]:
+        """روزهای دارای پارتیشن در بازه [start, end] (بدون باز کردن پارتیشن‌ها)"""
+        if not os.path.isdir(self.root):
+            return []
+        first = start.isoformat() if start else ""
+        last = end.isoformat() if end else "9999-12-31"
+        return sorted(
+            name for name in os.listdir(self.root)
+            if first <= name <= last and os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def iter_events(self, start: date = None, end: date = None,
+                    chunk_rows: int = 10_000) -> Iterator[Dict[str, "np.ndarray"]]:
+        """رویدادهای بازه [start, end] به ترتیب روز، در تکه‌های حداکثر chunk_rows سطری
+
+        فقط پارتیشن روزهای داخل بازه memmap می‌شوند؛ هر تکه دیکشنری ستون → آرایه
+        است و کاربر/موضوع به نام (آرایه object) برگردانده شده‌اند.
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy نصب نیست")
+        self.flush()
+        names = {column: np.array(self._dictionary[column], dtype=object) for column in DICTIONARY_COLUMNS}
+        for day in self._partition_days(start, end):
+            partition = self._load_partition(day)
+            if partition is None:
+                continue
+            columns = partition["columns"]
+            for offset in range(0, partition["rows"], chunk_rows):
+                chunk = {}
+                for name in COLUMNS:
+                    values = columns[name][offset:offset + chunk_rows]
+                    if name in DICTIONARY_COLUMNS:
+                        values = names[name].take(values)
+                    elif name == "response_time":
+                        # float32 → اعشار کوتاه (0.8 به جای 0.800000011920929)
+                        values = values.astype(np.float64).round(4)
+                    chunk[name] = values
+                yield chunk
+
+    def _quantile(self, stat: str) -> Optional[float]:
+        """صدک متناظر stat (None برای count/sum/mean)"""
+        if stat in ("count", "sum", "mean"):
+            return None
+        if stat in ("min", "max", "median"):
+            return {"min": 0.0, "max": 100.0, "median": 50.0}[stat]
+        if stat.startswith("p") and stat[1:].replace(".", "", 1).isdigit() and float(stat[1:]) <= 100:
+            return float(stat[1:])
+        raise ValueError(f"stat نامعتبر: {stat}")
+
+    def _split_by_key(self, keyed: list) -> Dict[int, "np.ndarray"]:
+        """گروه‌بندی مقادیر بر اساس کد (مرتب‌سازی پایدار روی کلیدهای عددی)"""
+        keys = np.concatenate([keys for keys, _ in keyed])
+        values = np.concatenate([values for _, values in keyed])
+        counts = np.bincount(keys)
+        ordered = values[np.argsort(keys, kind="stable")]
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+        return {int(key): ordered[bounds[key]:bounds[key + 1]] for key in np.flatnonzero(counts)}
+
+    def get_stats(self) -> Dict:
+        """آمار فروشگاه رویدادها"""
+        partitions = self._partition_days()
+        disk_bytes = 0
+        events = 0
+        for day in partitions:
+            directory = os.path.join(self.root, day)
+            disk_bytes += sum(os.path.getsize(os.path.join(directory, name + ".col"))
+                              for name in COLUMNS if os.path.exists(os.path.join(directory, name + ".col")))
+            # ستون زمان در همه layoutها یکسان است (پارتیشن‌های ارتقا نیافته هم درست شمرده می‌شوند)
+            timestamp_path = os.path.join(directory, "timestamp.col")
+            if os.path.exists(timestamp_path):
+                events += os.path.getsize(timestamp_path) // array(COLUMNS["timestamp"]).itemsize
+        with self._lock:
+            pending = sum(len(columns["timestamp"]) for columns in self._pending.values())
+        return {
+            "partitions": len(partitions),
+            "first_day": partitions[0] if partitions else None,
+            "events": events,
+            "pending": pending,
+            "disk_mb": round(disk_bytes / 1024 / 1024, 2),
+            "users": len(self._dictionary["user"]) - 1,
+            "topics": len(self._dictionary["topic"]) - 1,
+        }
+
+# نمونه سراسری
+event_store = lazy_singleton("event_store", EventStore)
@@ -0,0 +1,133 @@
+"""
+🌐 Fan-out - اجرای هم‌زمان چند ارائه‌دهنده با یک مهلت مشترک
+همه فراخوانی‌ها با هم شروع می‌شوند؛ با رسیدن مهلت (یا اولین نتیجه قابل قبول
+در حالت hedged) نتایج رسیده برگردانده و بقیه لغو می‌شوند.
+
+thread در حال اجرا لغو نمی‌شود، پس فراخوانی‌های blocking (مثل requests) هر
+دور در executor خود آن دور (یک thread برای هر فراخوانی) اجرا می‌شوند و
+timeout درخواستشان از مهلت باقی‌مانده دور می‌آید (remaining_timeout): فراخوانی
+رها شده حداکثر تا مهلت دور زنده می‌ماند و جای دورهای بعدی را نمی‌گیرد.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# برای run_blocking بیرون از fan_out؛ thread pool جدا تا ارائه‌دهنده‌های کند
+# executor پیش‌فرض event loop را اشغال نکنند
+provider_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ai-provider")
+
+MIN_CALL_TIMEOUT = 0.1  # timeout صفر در requests/کلاینت‌ها خطاست
+
+class _Turn:
+    """executor و مهلت یک دور fan-out، به همراه تعداد threadهای در حال اجرا"""
+
+    def __init__(self, size: int, end: Optional[float]):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, size), thread_name_prefix="ai-provider")
+        self.end = end   # time.monotonic() پایان مهلت
+        self.running = 0
+        self.lock = threading.Lock()
+
+    def call(self, fn: Callable, *args) -> Any:
+        with self.lock:
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+_current_turn: contextvars.ContextVar = contextvars.ContextVar("fan_out_turn", default=None)
+
+@dataclass
+class FanOutResult:
+    results: Dict[str, Any] = field(default_factory=dict)    # به ترتیب رسیدن
+    timed_out: List[str] = field(default_factory=list)       # لغو شده با رسیدن مهلت
+    cancelled: List[str] = field(default_factory=list)       # لغو شده بعد از نتیجه قابل قبول
+    failed: Dict[str, str] = field(default_factory=dict)     # نام → پیام خطا
+    latencies: Dict[str, float] = field(default_factory=dict)  # نام → ثانیه تا پایان (تمام شده‌ها)
+    winner: Optional[str] = None                              # اولین نتیجه‌ای که accept پذیرفت
+    elapsed: float = 0.0
+    abandoned: int = 0    # threadهای blocking هنوز در حال اجرا هنگام برگشت (تا مهلت دور تمام می‌شوند)
+
+def remaining_timeout(default: float) -> float:
+    """timeout یک درخواست: مهلت باقی‌مانده دور fan-out جاری (بیرون از fan-out همان default)"""
+    turn = _current_turn.get()
+    if turn is None or turn.end is None:
+        return default
+    return max(MIN_CALL_TIMEOUT, min(default, turn.end - time.monotonic()))
+
+async def run_blocking(fn: Callable, *args) -> Any:
+    """اجرای تابع blocking در executor دور fan-out جاری (بیرون از fan-out: thread pool مشترک)
+
+    context کپی می‌شود تا remaining_timeout داخل thread هم مهلت دور را ببیند.
+    """
+    loop = asyncio.get_running_loop()
+    turn = _current_turn.get()
+    context = contextvars.copy_context()
+    if turn is None:
+        return await loop.run_in_executor(provider_executor, partial(context.run, fn, *args))
+    return await loop.run_in_executor(turn.executor, partial(context.run, turn.call, fn, *args))
+
+async def fan_out(calls: Dict[str, Callable[[], Awaitable]], deadline: Optional[float] = None,
+                  accept: Optional[Callable[[str, Any], bool]] = None) -> FanOutResult:
+    """اجرای هم‌زمان calls (نام → تابع بدون آرگومان که awaitable برمی‌گرداند)
+
+    نتیجه‌های خالی (None یا رشته خالی) کنار گذاشته می‌شوند. اگر accept داده شود
+    هر نتیجه به محض رسیدن بررسی می‌شود و اولین نتیجه پذیرفته شده بقیه را لغو می‌کند.
+    """
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    end = None if deadline is None else loop.time() + deadline
+    turn = _Turn(len(calls), None if deadline is None else time.monotonic() + deadline)
+    # taskها context را هنگام ساخت کپی می‌کنند، پس فقط همین‌جا دور جاری را می‌بینند
+    token = _current_turn.set(turn)
+    try:
+        tasks = {asyncio.ensure_future(call()): name for name, call in calls.items()}
+    finally:
+        _current_turn.reset(token)
+    result = FanOutResult()
+
+    pending = set(tasks)
+    while pending and result.winner is None:
+        timeout = None if end is None else end - loop.time()
+        if timeout is not None and timeout <= 0:
+            break
+        done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            name = tasks[task]
+            result.latencies[name] = time.perf_counter() - start
+            try:
+                value = task.result()
+            except Exception as e:
+                result.failed[name] = str(e)
+                continue
+            if value:
+                result.results[name] = value
+                if result.winner is None and accept is not None and accept(name, value):
+                    result.winner = name
+
+    for task in pending:
+        # thread در حال اجرا متوقف نمی‌شود (timeout درخواست تا مهلت دور محدودش می‌کند)؛ نتیجه‌اش دور ریخته می‌شود
+        task.cancel()
+        (result.timed_out if result.winner is None else result.cancelled).append(tasks[task])
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    result.abandoned = turn.running
+    turn.executor.shutdown(wait=False)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def run_sync(coro: Awaitable) -> Any:
+    """اجرای coroutine از کد sync (داخل event loop در حال اجرا: در یک thread جدا)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
@@ -0,0 +1,111 @@
+"""
+💾 Flush Scheduler - زمان‌بندی ذخیره‌سازی تأخیری
+ماژول‌ها خودشان را dirty علامت می‌زنند و نوشتن روی دیسک حداکثر هر N ثانیه انجام می‌شود
+(فقط تسک دوره‌ای، flush/unregister صریح و هنگام خروج؛ mark_dirty هیچ‌وقت نمی‌نویسد)
+"""
+
+import asyncio
+import atexit
+import threading
+from typing import Callable, Dict, Optional
+from backend.config.settings import settings
+
+class FlushScheduler:
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._savers: Dict[str, Callable] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()   # mark_dirty از threadهای مختلف صدا زده می‌شود
+        self.stats = {
+            "marks": 0,           # تعداد درخواست‌های ذخیره
+            "writes": 0,          # تعداد نوشتن واقعی روی دیسک
+            "writes_avoided": 0,  # درخواست‌هایی که با نوشتن بعدی ادغام شدند
+            "errors": 0
+        }
+        atexit.register(self.shutdown)
+
+    def register(self, name: str, save_fn: Callable):
+        """ثبت تابع ذخیره برای یک ماژول"""
+        with self._lock:
+            self._savers[name] = save_fn
+
+    def unregister(self, name: str):
+        """ذخیره تغییرات باقی‌مانده و حذف تابع ذخیره"""
+        self.flush(name)
+        with self._lock:
+            self._savers.pop(name, None)
+
+    def mark_dirty(self, name: str, save_fn: Callable = None):
+        """علامت‌گذاری ماژول برای ذخیره در نوبت بعدی
+
+        فقط علامت می‌زند و هیچ‌وقت در همین فراخوانی روی دیسک نمی‌نویسد (مسیرهای
+        پرتکرار مثل ثبت حالت روحی یا تأخیر)؛ ذخیره با تسک دوره‌ای یا هنگام خروج.
+        """
+        with self._lock:
+            if save_fn is not None:
+                self._savers[name] = save_fn
+            self.stats["marks"] += 1
+            if name in self._dirty:
+                self.stats["writes_avoided"] += 1
+            else:
+                self._dirty.add(name)
+
+    def is_dirty(self, name: str) -> bool:
+        """آیا تغییرات ذخیره نشده دارد؟"""
+        return name in self._dirty
+
+    def flush(self, name: Optional[str] = None) -> int:
+        """ذخیره فوری همه (یا یک) ماژول dirty"""
+        # علامت‌ها زیر قفل برداشته و ذخیره بیرون قفل انجام می‌شود تا mark_dirty
+        # (حتی از داخل خود تابع ذخیره) منتظر نوشتن روی دیسک نماند
+        with self._lock:
+            if name is None:
+                names = list(self._dirty)
+                self._dirty.clear()
+            elif name in self._dirty:
+                names = [name]
+                self._dirty.discard(name)
+            else:
+                names = []
+            savers = [(dirty_name, self._savers.get(dirty_name)) for dirty_name in names]
+
+        written = 0
+        for dirty_name, save_fn in savers:
+            if not save_fn:
+                continue
+            try:
+                save_fn()
+                written += 1
+                with self._lock:
+                    self.stats["writes"] += 1
+            except Exception as e:
+                # در نوبت بعدی دوباره تلاش می‌شود
+                with self._lock:
+                    self._dirty.add(dirty_name)
+                    self.stats["errors"] += 1
+                print(f"❌ خطا در ذخیره {dirty_name}: {e}")
+
+        return written
+
+    async def run(self):
+        """تسک پس‌زمینه: ذخیره دوره‌ای تغییرات"""
+        while True:
+            await asyncio.sleep(self.interval)
+            if self._dirty:
+                self.flush()
+
+    def shutdown(self):
+        """ذخیره همه تغییرات هنگام خروج"""
+        self.flush()
+
+    def get_stats(self) -> Dict:
+        """آمار ذخیره‌سازی"""
+        with self._lock:
+            return {
+                **self.stats,
+                "pending": sorted(self._dirty),
+                "interval": self.interval
+            }
+
+# Instance سراسری
+flush_scheduler = FlushScheduler(settings.flush_interval)
@@ -3,6 +3,9 @@ Fox Pre-trained Knowledge Dataset
 دیتاست دانش از پیش آموزش دیده Fox
 """
 
+import random
+from backend.core.text_automaton import AhoCorasick
+
 PERSIAN_CONVERSATIONS = [
     # مکالمات روزمره
     {"user": "سلام", "fox": "سلام! چطوری؟ چه خبر؟"},
@@ -129,32 +132,77 @@ COMMON_QUESTIONS = {
     "what_is_ai": "هوش مصنوعی تکنولوژی‌ایه که به کامپیوترها کمک می‌کنه مثل انسان فکر و یاد بگیرن"
 }
 
+GREETING_WORDS = ["سلام", "hello", "hi"]
+THANKS_WORDS = ["ممنون", "تشکر", "مرسی", "thanks"]
+GOODBYE_WORDS = ["خداحافظ", "بای", "فعلاً", "goodbye"]
+
+_CONVERSATION, _KEYWORD, _KNOWLEDGE = 0, 1, 2
+
+class CompiledDataset:
+    """دیتاست کامپایل شده برای get_response_for_input (یک بار هنگام import)
+
+    همه الگوها (متن مکالمات، کلمات کلیدی، بخش‌های کلید دانش) در یک اتوماتا
+    با برچسب (نوع، ترتیب) هستند تا ورودی فقط یک بار پیمایش شود.
+    """
+
+    def __init__(self):
+        self.automaton = AhoCorasick()
+        # ورودی داخل conv["user"]: همه زیررشته‌ها → کمترین اندیس مکالمه
+        self.conversation_substrings = {}
+        for index, conv in enumerate(PERSIAN_CONVERSATIONS):
+            text = conv["user"].lower()
+            self._add(text, _CONVERSATION, index)
+            for start in range(len(text) + 1):
+                for end in range(start, len(text) + 1):
+                    self.conversation_substrings.setdefault(text[start:end], index)
+
+        self.keyword_responses = [
+            PERSONALITY_RESPONSES["greetings"],
+            PERSONALITY_RESPONSES["thanks"],
+            PERSONALITY_RESPONSES["goodbye"],
+        ]
+        for group, words in enumerate([GREETING_WORDS, THANKS_WORDS, GOODBYE_WORDS]):
+            for word in words:
+                self._add(word, _KEYWORD, group)
+
+        # هر بخش کلید دانش (split روی "_") → ترتیب کلید
+        self.knowledge_items = []
+        for items in KNOWLEDGE_BASE.values():
+            for key, value in items.items():
+                order = len(self.knowledge_items)
+                self.knowledge_items.append(f"راجع به {key}: {value}")
+                for part in key.split("_"):
+                    self._add(part, _KNOWLEDGE, order)
+
+        self.automaton.build()
+
+    def _add(self, pattern: str, kind: int, order: int):
+        """افزودن الگو؛ برای هر نوع فقط کمترین ترتیب نگه داشته می‌شود"""
+        tags = self.automaton.get(pattern)
+        if tags is None:
+            self.automaton.add(pattern, {kind: order})
+        elif kind not in tags:
+            tags[kind] = order
+
+    def get_response(self, user_input_lower: str):
+        """پاسخ با همان اولویت حلقه‌های قبلی"""
+        best = [self.conversation_substrings.get(user_input_lower), None, None]
+        for tags in self.automaton.find_all(user_input_lower).values():
+            for kind, order in tags.items():
+                if best[kind] is None or order < best[kind]:
+                    best[kind] = order
+
+        conversation, keyword, knowledge = best
+        if conversation is not None:
+            return PERSIAN_CONVERSATIONS[conversation]["fox"]
+        if keyword is not None:
+            return random.choice(self.keyword_responses[keyword])
+        if knowledge is not None:
+            return self.knowledge_items[knowledge]
+        return None
+
+_compiled = CompiledDataset()
+
 def get_response_for_input(user_input: str) -> str:
     """پیدا کردن پاسخ مناسب از دیتاست"""
-    user_input_lower = user_input.lower().strip()
-    
-    # جستجو در مکالمات آماده
-    for conv in PERSIAN_CONVERSATIONS:
-        if conv["user"].lower() in user_input_lower or user_input_lower in conv["user"].lower():
-            return conv["fox"]
-    
-    # جستجو در پاسخ‌های شخصیتی
-    if any(word in user_input_lower for word in ["سلام", "hello", "hi"]):
-        import random
-        return random.choice(PERSONALITY_RESPONSES["greetings"])
-    
-    if any(word in user_input_lower for word in ["ممنون", "تشکر", "مرسی", "thanks"]):
-        import random
-        return random.choice(PERSONALITY_RESPONSES["thanks"])
-    
-    if any(word in user_input_lower for word in ["خداحافظ", "بای", "فعلاً", "goodbye"]):
-        import random
-        return random.choice(PERSONALITY_RESPONSES["goodbye"])
-    
-    # جستجو در دانش عمومی
-    for category, items in KNOWLEDGE_BASE.items():
-        for key, value in items.items():
-            if key in user_input_lower or any(word in user_input_lower for word in key.split("_")):
-                return f"راجع به {key}: {value}"
-    
-    return None
+    return _compiled.get_response(user_input.lower().strip())
@@ -6,6 +6,9 @@ import json
 import os
 from datetime import datetime
 import random
+from backend.core.flush_scheduler import flush_scheduler
+from backend.core.storage import load_json, save_json
+from backend.core.lazy import lazy_singleton
 
 class FoxGamification:
     def __init__(self):
@@ -16,19 +19,18 @@ class FoxGamification:
         """بارگذاری داده‌های بازی"""
         if os.path.exists(self.game_file):
             try:
-                with open(self.game_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.fox_level = data.get("fox_level", 1)
-                    self.experience = data.get("experience", 0)
-                    self.achievements = data.get("achievements", [])
-                    self.stats = data.get("stats", {
-                        "conversations": 0,
-                        "questions_answered": 0,
-                        "things_learned": 0,
-                        "days_active": 0,
-                        "friendship_points": 0
-                    })
-                    return
+                data = load_json(self.game_file)
+                self.fox_level = data.get("fox_level", 1)
+                self.experience = data.get("experience", 0)
+                self.achievements = data.get("achievements", [])
+                self.stats = data.get("stats", {
+                    "conversations": 0,
+                    "questions_answered": 0,
+                    "things_learned": 0,
+                    "days_active": 0,
+                    "friendship_points": 0
+                })
+                return
             except:
                 pass
         
@@ -46,8 +48,6 @@ class FoxGamification:
     
     def save_game_data(self):
         """ذخیره داده‌های بازی"""
-        os.makedirs(os.path.dirname(self.game_file), exist_ok=True)
-        
         data = {
             "fox_level": self.fox_level,
             "experience": self.experience,
@@ -56,8 +56,7 @@ class FoxGamification:
             "last_updated": datetime.now().isoformat()
         }
         
-        with open(self.game_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        save_json(self.game_file, data)
     
     def gain_experience(self, interaction_type, amount=None):
         """کسب تجربه"""
@@ -87,7 +86,7 @@ class FoxGamification:
         # بررسی achievements جدید
         new_achievements = self.check_achievements()
         
-        self.save_game_data()
+        flush_scheduler.mark_dirty("fox_game", self.save_game_data)
         
         result = f"✨ +{exp_gained} XP ({interaction_type})"
         if level_up_message:
@@ -203,4 +202,4 @@ class FoxGamification:
             return "😐 Fox منتظر بیشتر حرف زدن"
 
 # Instance سراسری
-fox_game = FoxGamification()
+fox_game = lazy_singleton("fox_game", FoxGamification)
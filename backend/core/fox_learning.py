@@ -5,26 +5,56 @@ Fox Learning & Teaching System
 
 import json
 import os
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
 from datetime import datetime
 from typing import List, Dict
 from backend.core.user_profile import UserProfile
+from backend.core.flush_scheduler import flush_scheduler
+from backend.core.storage import load_json, save_json
+from backend.core.text_automaton import AhoCorasick, TrigramIndex
+from backend.core.persian_text import normalize_persian
+from backend.core.near_duplicates import MinHashLSH, group_near_duplicates
+from backend.config.settings import settings
+
+def get_learning_user_name(user_profile) -> str:
+    """نام کاربر برای فایل‌های یادگیری"""
+    # Handle both dict and UserProfile object
+    if isinstance(user_profile, dict):
+        return user_profile.get('name', 'حامد')
+    return user_profile.get_name()
+
+def deep_sizeof(obj) -> int:
+    """تخمین حافظه یک ساختار JSON مانند (بایت)"""
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return size
 
 class FoxLearningSystem:
     def __init__(self, user_profile):
         self.user_profile = user_profile
-        # Handle both dict and UserProfile object
-        if isinstance(user_profile, dict):
-            user_name = user_profile.get('name', 'حامد')
-        else:
-            user_name = user_profile.get_name()
+        user_name = get_learning_user_name(user_profile)
         self.learning_file = f"data/profiles/{user_name}_learning.json"
+        self.usage_file = f"data/profiles/{user_name}_usage.json"
         self.learned_data = self.load_learned_data()
+        self.build_trigger_index()
+        self.usage_counts = self.load_usage_counts()
     
     def load_learned_data(self) -> Dict:
         """بارگذاری اطلاعات یادگیری شده"""
         if os.path.exists(self.learning_file):
-            with open(self.learning_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_json(self.learning_file)
         return {
             "custom_responses": {},
             "learned_facts": {},
@@ -35,11 +65,49 @@ class FoxLearningSystem:
             "learned_phrases": []
         }
     
+    def load_usage_counts(self) -> Dict[str, int]:
+        """بارگذاری شمارنده‌های استفاده (فایل کوچک جدا از داده یادگیری)"""
+        if os.path.exists(self.usage_file):
+            return load_json(self.usage_file, {})
+        # مهاجرت از usage_count قدیمی داخل custom_responses
+        return {
+            trigger: data["usage_count"]
+            for trigger, data in self.learned_data["custom_responses"].items()
+            if data.get("usage_count")
+        }
+    
+    def save_usage_counts(self):
+        """ذخیره شمارنده‌های استفاده"""
+        save_json(self.usage_file, self.usage_counts)
+    
+    def build_trigger_index(self):
+        """ساخت اتوماتای همه triggerها، موضوعات و کشورها و ایندکس تقریبی triggerها"""
+        self.trigger_index = AhoCorasick()
+        self.fuzzy_index = TrigramIndex()
+        for category in ("custom_responses", "learned_facts", "cultural_knowledge"):
+            for key in self.learned_data.get(category, {}):
+                self._index_key(key, fuzzy=category == "custom_responses")
+        self.trigger_index.build()
+    
+    def _index_key(self, key: str, fuzzy: bool = False):
+        """افزودن کلید یکسان‌سازی شده به ایندکس‌ها (مقدار: کلیدهای اصلی)"""
+        pattern = normalize_persian(key)
+        keys = self.trigger_index.get(pattern)
+        if keys is None:
+            self.trigger_index.add(pattern, [key])
+        elif key not in keys:
+            keys.append(key)
+        if fuzzy:
+            self.fuzzy_index.add(pattern, key)
+    
+    def _record_usage(self, trigger: str):
+        """افزایش تعداد استفاده فقط در حافظه؛ ذخیره دسته‌ای با flush_scheduler"""
+        self.usage_counts[trigger] = self.usage_counts.get(trigger, 0) + 1
+        flush_scheduler.mark_dirty(f"usage:{self.usage_file}", self.save_usage_counts)
+    
     def save_learned_data(self):
         """ذخیره اطلاعات یادگیری"""
-        os.makedirs(os.path.dirname(self.learning_file), exist_ok=True)
-        with open(self.learning_file, 'w', encoding='utf-8') as f:
-            json.dump(self.learned_data, f, ensure_ascii=False, indent=2)
+        save_json(self.learning_file, self.learned_data)
     
     def teach_response(self, trigger: str, response: str):
         """آموزش پاسخ خاص"""
@@ -48,9 +116,102 @@ class FoxLearningSystem:
             "taught_at": datetime.now().isoformat(),
             "usage_count": 0
         }
+        self._index_key(trigger.lower(), fuzzy=True)
+        if self.usage_counts.pop(trigger.lower(), None) is not None:
+            flush_scheduler.mark_dirty(f"usage:{self.usage_file}", self.save_usage_counts)
         self.save_learned_data()
         return f"✅ یاد گرفتم! وقتی '{trigger}' گفتی، '{response}' جواب بدم"
     
+    def teach_many(self, pairs, dedupe: bool = True) -> Dict[str, int]:
+        """آموزش دسته‌ای پاسخ‌ها: یک بار ذخیره و یک بار ساخت اتوماتا
+
+        pairs: مجموعه‌ای از (trigger, response)؛ موارد نامعتبر رد و
+        triggerهای تکراری در دسته ادغام می‌شوند (آخرین پاسخ می‌ماند).
+        با dedupe، trigger جدیدی که تقریباً تکراری یک trigger موجود (یا زودتر
+        در همین دسته) است و جستجویش همین حالا همان پاسخ را می‌دهد اضافه نمی‌شود.
+        اگر پاسخ فرق کند یا پیدا نشود (مثلاً نسخه کوتاه‌تر) trigger اضافه می‌شود.
+        """
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "duplicates": 0,
+                 "near_duplicates": 0, "invalid": 0}
+        batch = {}
+        for pair in pairs:
+            try:
+                trigger, response = pair
+            except (TypeError, ValueError):
+                stats["invalid"] += 1
+                continue
+            if not isinstance(trigger, str) or not isinstance(response, str):
+                stats["invalid"] += 1
+                continue
+            trigger = trigger.strip().lower()
+            response = response.strip()
+            if not trigger or not response:
+                stats["invalid"] += 1
+                continue
+            if trigger in batch:
+                stats["duplicates"] += 1
+            batch[trigger] = response
+        
+        custom_responses = self.learned_data["custom_responses"]
+        near_index = None
+        if dedupe and any(trigger not in custom_responses for trigger in batch):
+            near_index = MinHashLSH(settings.near_duplicate_threshold)
+            for trigger in custom_responses:
+                near_index.add(trigger)
+        
+        taught_at = datetime.now().isoformat()
+        usage_reset = False
+        # نامزدهای تقریباً تکراری با همان پاسخ آخر بررسی می‌شوند تا جستجویشان اتوماتای
+        # ساخته شده را ببیند، نه لیست انتظار بلند یک دسته بزرگ
+        near_candidates = []
+        for trigger, response in batch.items():
+            existing = custom_responses.get(trigger)
+            if existing is None and near_index is not None:
+                match = near_index.find_or_add(trigger)
+                if match is not None:
+                    if custom_responses[match[0]]["response"] == response:
+                        near_candidates.append((trigger, response))
+                        continue
+                    near_index.add(trigger)
+            if existing is not None:
+                if existing["response"] == response:
+                    stats["unchanged"] += 1
+                    continue
+                stats["updated"] += 1
+                usage_reset = self.usage_counts.pop(trigger, None) is not None or usage_reset
+            else:
+                stats["added"] += 1
+                self._index_key(trigger, fuzzy=True)
+            custom_responses[trigger] = {
+                "response": response,
+                "taught_at": taught_at,
+                "usage_count": 0
+            }
+        
+        if near_candidates:
+            self.trigger_index.build()
+        for trigger, response in near_candidates:
+            # MinHash فقط نامزد می‌دهد؛ trigger وقتی کنار گذاشته می‌شود که جستجوی خودش
+            # همین حالا همان پاسخ را برگرداند (مثلاً نسخه کوتاه‌تر نگه داشته می‌شود)
+            if self._lookup(trigger)[0] == response:
+                stats["near_duplicates"] += 1
+                continue
+            near_index.add(trigger)
+            stats["added"] += 1
+            self._index_key(trigger, fuzzy=True)
+            custom_responses[trigger] = {
+                "response": response,
+                "taught_at": taught_at,
+                "usage_count": 0
+            }
+        
+        if stats["added"] or stats["updated"]:
+            self.save_learned_data()
+            self.trigger_index.build()
+        if usage_reset:
+            flush_scheduler.mark_dirty(f"usage:{self.usage_file}", self.save_usage_counts)
+        return stats
+    
     def teach_fact(self, topic: str, fact: str):
         """آموزش حقیقت جدید"""
         if topic not in self.learned_data["learned_facts"]:
@@ -60,6 +221,7 @@ class FoxLearningSystem:
             "fact": fact,
             "taught_at": datetime.now().isoformat()
         })
+        self._index_key(topic)
         self.save_learned_data()
         return f"✅ حقیقت جدید درباره '{topic}' یاد گرفتم!"
     
@@ -69,6 +231,7 @@ class FoxLearningSystem:
             "info": culture_info,
             "taught_at": datetime.now().isoformat()
         }
+        self._index_key(country)
         self.save_learned_data()
         return f"✅ فرهنگ {country} رو یاد گرفتم!"
     
@@ -92,28 +255,129 @@ class FoxLearningSystem:
     
     def get_learned_response(self, user_input: str) -> str:
         """دریافت پاسخ یادگیری شده"""
-        user_input_lower = user_input.lower()
+        response, trigger = self._lookup(user_input)
+        if trigger is not None:
+            self._record_usage(trigger)
+        return response
+    
+    def _lookup(self, user_input: str):
+        """جستجوی پاسخ بدون ثبت استفاده: (پاسخ، trigger پاسخ آموزش داده شده یا None)"""
+        normalized_input = normalize_persian(user_input)
+        
+        # یک پیمایش متن برای همه الگوها؛ طولانی‌ترین تطابق (و در تساوی، زودتر در متن) اول
+        first_end = {}
+        for end, pattern in self.trigger_index.iter_matches(normalized_input):
+            first_end.setdefault(pattern, end)
+        matches = [
+            key
+            for pattern in sorted(first_end, key=lambda pattern: (-len(pattern), first_end[pattern]))
+            for key in self.trigger_index.get(pattern)
+        ]
         
         # جستجو در پاسخ‌های آموزش داده شده
-        for trigger, data in self.learned_data["custom_responses"].items():
-            if trigger in user_input_lower:
-                # افزایش تعداد استفاده
-                data["usage_count"] += 1
-                self.save_learned_data()
-                return data["response"]
+        custom_responses = self.learned_data["custom_responses"]
+        for trigger in matches:
+            data = custom_responses.get(trigger)
+            if data is not None:
+                return data["response"], trigger
         
         # جستجو در حقایق یادگیری شده
-        for topic, facts in self.learned_data["learned_facts"].items():
-            if topic in user_input_lower:
-                if facts:
-                    return f"راجع به {topic}: {facts[-1]['fact']}"
+        learned_facts = self.learned_data["learned_facts"]
+        for topic in matches:
+            facts = learned_facts.get(topic)
+            if facts:
+                return f"راجع به {topic}: {facts[-1]['fact']}", None
         
         # جستجو در اطلاعات فرهنگی
-        for country, info in self.learned_data["cultural_knowledge"].items():
-            if country in user_input_lower:
-                return f"فرهنگ {country}: {info['info']}"
+        cultural_knowledge = self.learned_data["cultural_knowledge"]
+        for country in matches:
+            info = cultural_knowledge.get(country)
+            if info is not None:
+                return f"فرهنگ {country}: {info['info']}", None
+        
+        # تطابق تقریبی triggerها (غلط املایی) با بودجه زمانی محدود
+        fuzzy = self.fuzzy_index.best_match(normalized_input, settings.fuzzy_match_threshold,
+                                            settings.fuzzy_match_budget_us)
+        if fuzzy is not None:
+            trigger = fuzzy[1]
+            return custom_responses[trigger]["response"], trigger
         
-        return None
+        return None, None
+    
+    def find_near_duplicates(self) -> List[Dict]:
+        """گزارش triggerهای تقریباً تکراری
+
+        از هر گروه پراستفاده‌ترین trigger می‌ماند و در تساوی کوتاه‌ترین، چون
+        معمولاً زیررشته بقیه است و ورودی‌های حذف شده با همان پیمایش اتوماتا پیدا می‌شوند.
+        """
+        triggers = sorted(
+            self.learned_data["custom_responses"],
+            key=lambda trigger: (-self.usage_counts.get(trigger, 0), len(trigger))
+        )
+        return group_near_duplicates(triggers, settings.near_duplicate_threshold)
+    
+    def merge_near_duplicates(self, sample_size: int = 500) -> Dict:
+        """حذف triggerهای تقریباً تکراری و گزارش تعداد، حافظه و سرعت جستجو"""
+        custom_responses = self.learned_data["custom_responses"]
+        groups = self.find_near_duplicates()
+        removed = [trigger for group in groups for trigger, _ in group["duplicates"]]
+        
+        # ورودی‌های نمونه: همان متن‌هایی که کاربر می‌فرستد، شامل triggerهای حذف شونده
+        sample = (removed + list(custom_responses))[:sample_size]
+        report = {
+            "groups": len(groups),
+            "removed": len(removed),
+            "triggers_before": len(custom_responses),
+            "memory_before_mb": round(self.estimate_memory() / (1024 * 1024), 2),
+            "lookup_us_before": self._time_lookups(sample)
+        }
+        
+        if removed:
+            for group in groups:
+                keep = group["keep"]
+                for trigger, _ in group["duplicates"]:
+                    del custom_responses[trigger]
+                    count = self.usage_counts.pop(trigger, 0)
+                    if count:
+                        self.usage_counts[keep] = self.usage_counts.get(keep, 0) + count
+            self.save_learned_data()
+            flush_scheduler.mark_dirty(f"usage:{self.usage_file}", self.save_usage_counts)
+            self.build_trigger_index()
+        
+        report["triggers_after"] = len(custom_responses)
+        report["memory_after_mb"] = round(self.estimate_memory() / (1024 * 1024), 2)
+        report["lookup_us_after"] = self._time_lookups(sample)
+        report["speedup"] = round(report["lookup_us_before"] / report["lookup_us_after"], 2) \
+            if report["lookup_us_after"] else 1.0
+        return report
+    
+    def _time_lookups(self, inputs: List[str]) -> float:
+        """میانگین زمان جستجو (میکروثانیه) بدون ثبت استفاده"""
+        if not inputs:
+            return 0.0
+        start = time.perf_counter()
+        for text in inputs:
+            self._lookup(text)
+        return round((time.perf_counter() - start) / len(inputs) * 1e6, 1)
+    
+    def get_usage_ranking(self, limit: int = 10) -> List[Dict]:
+        """پراستفاده‌ترین پاسخ‌های آموزش داده شده"""
+        custom_responses = self.learned_data["custom_responses"]
+        ranking = sorted(
+            ((count, trigger) for trigger, count in self.usage_counts.items() if trigger in custom_responses),
+            reverse=True
+        )[:limit]
+        return [
+            {"trigger": trigger, "response": custom_responses[trigger]["response"], "usage_count": count}
+            for count, trigger in ranking
+        ]
+    
+    def estimate_memory(self) -> int:
+        """تخمین حافظه داده یادگیری و ایندکس‌ها (بایت)"""
+        return (
+            deep_sizeof(self.learned_data) + deep_sizeof(self.usage_counts)
+            + self.trigger_index.memory_usage() + self.fuzzy_index.memory_usage()
+        )
     
     def get_learning_stats(self) -> Dict:
         """آمار یادگیری"""
@@ -123,5 +387,87 @@ class FoxLearningSystem:
             "cultural_knowledge": len(self.learned_data["cultural_knowledge"]),
             "personal_preferences": len(self.learned_data["personal_preferences"]),
             "daily_routines": len(self.learned_data["daily_routines"]),
-            "total_teachings": len(self.learned_data["teaching_sessions"])
+            "total_teachings": len(self.learned_data["teaching_sessions"]),
+            "total_usage": sum(self.usage_counts.values())
         }
+
+class LearningRegistry:
+    """نمونه‌های FoxLearningSystem هر کاربر با بودجه حافظه LRU
+
+    همه اتصال‌های یک کاربر یک نمونه (و یک ایندکس) مشترک می‌گیرند؛ وقتی مجموع
+    حافظه از بودجه بیشتر شود، کم‌استفاده‌ترین کاربران (بعد از ذخیره) کنار می‌روند.
+    نمونه کنار رفته فقط با weakref نگه داشته می‌شود: تا وقتی کسی هنوز به آن
+    ارجاع دارد همان نمونه برگردانده می‌شود، پس دو نمونه از یک کاربر روی
+    فایل‌های هم نمی‌نویسند.
+    """
+
+    def __init__(self, memory_budget_mb: float = 256):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self._systems: "OrderedDict[str, FoxLearningSystem]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._evicted: "weakref.WeakValueDictionary[str, FoxLearningSystem]" = weakref.WeakValueDictionary()
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "loads": 0, "evictions": 0, "revivals": 0}
+
+    def get(self, user_profile) -> FoxLearningSystem:
+        """سیستم یادگیری کاربر (بارگذاری در صورت نیاز)"""
+        user_name = get_learning_user_name(user_profile)
+        with self._lock:
+            system = self._systems.get(user_name)
+            if system is not None:
+                self._systems.move_to_end(user_name)
+                self.stats["hits"] += 1
+                return system
+
+            system = self._evicted.pop(user_name, None)
+            if system is not None:
+                self.stats["revivals"] += 1
+            else:
+                system = FoxLearningSystem(user_profile)
+                self.stats["loads"] += 1
+            self._systems[user_name] = system
+            self._sizes[user_name] = system.estimate_memory()
+            self._evict()
+            return system
+
+    def refresh(self, system: FoxLearningSystem):
+        """به‌روزرسانی تخمین حافظه بعد از آموزش دسته‌ای"""
+        user_name = get_learning_user_name(system.user_profile)
+        with self._lock:
+            if self._systems.get(user_name) is system:
+                self._sizes[user_name] = system.estimate_memory()
+                self._evict()
+
+    def _evict(self):
+        """کنار گذاشتن کاربران قدیمی تا رسیدن به بودجه (آخرین کاربر می‌ماند)"""
+        while len(self._systems) > 1 and sum(self._sizes.values()) > self.memory_budget:
+            user_name, system = self._systems.popitem(last=False)
+            self._release(user_name, system)
+
+    def _release(self, user_name: str, system: FoxLearningSystem):
+        del self._sizes[user_name]
+        flush_scheduler.unregister(f"usage:{system.usage_file}")
+        self._evicted[user_name] = system
+        self.stats["evictions"] += 1
+
+    def evict(self, user_name: str):
+        """کنار گذاشتن دستی یک کاربر"""
+        with self._lock:
+            system = self._systems.pop(user_name, None)
+            if system is not None:
+                self._release(user_name, system)
+
+    def get_stats(self) -> Dict:
+        """حافظه هر کاربر ساکن و آمار کش"""
+        with self._lock:
+            users = {name: round(size / 1024 / 1024, 2) for name, size in self._sizes.items()}
+            return {
+                **self.stats,
+                "resident_users": list(self._systems),
+                "memory_mb": users,
+                "total_mb": round(sum(self._sizes.values()) / 1024 / 1024, 2),
+                "budget_mb": round(self.memory_budget / 1024 / 1024, 2)
+            }
+
+# Instance سراسری
+learning_registry = LearningRegistry(settings.learning_memory_budget_mb)
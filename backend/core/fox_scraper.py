@@ -6,8 +6,9 @@ import json
 import os
 import time
 from bs4 import BeautifulSoup
-from backend.core.fox_learning import FoxLearningSystem
+from backend.core.fox_learning import learning_registry
 from backend.core.user_profiles import user_manager
+from backend.core.lazy import lazy_singleton
 
 class FoxDataScraper:
     def __init__(self):
@@ -241,24 +242,16 @@ class FoxDataScraper:
         
         # دریافت سیستم یادگیری
         profile = user_manager.get_current_user_profile()
-        fox_learning = FoxLearningSystem(profile)
+        fox_learning = learning_registry.get(profile)
         
-        saved_count = 0
+        # آموزش دسته‌ای پاسخ‌ها به Fox
+        stats = fox_learning.teach_many((conv.get("user"), conv.get("response")) for conv in conversations)
+        saved_count = stats["added"] + stats["updated"]
+        learning_registry.refresh(fox_learning)
         
-        for conv in conversations:
-            try:
-                # آموزش پاسخ به Fox
-                fox_learning.teach_response(conv["user"], conv["response"])
-                saved_count += 1
-                
-                # نمایش پیشرفت
-                if saved_count % 10 == 0:
-                    print(f"✅ {saved_count} مکالمه ذخیره شد...")
-                    
-            except Exception as e:
-                print(f"❌ خطا در ذخیره: {e}")
-                
-        print(f"🎉 مجموع {saved_count} مکالمه ذخیره شد!")
+        print(f"🎉 مجموع {saved_count} مکالمه ذخیره شد! "
+              f"(تکراری: {stats['duplicates'] + stats['unchanged']}, "
+              f"تقریباً تکراری: {stats['near_duplicates']}, نامعتبر: {stats['invalid']})")
         return saved_count
         
     def download_and_save_all(self):
@@ -290,4 +283,4 @@ class FoxDataScraper:
         }
 
 # Global instance
-fox_scraper = FoxDataScraper()
+fox_scraper = lazy_singleton("fox_scraper", FoxDataScraper)
@@ -5,8 +5,30 @@ Fox AI - Introduction & First Meeting System
 
 from typing import List, Dict
 from backend.core.user_profile import UserProfile
+from backend.core.text_analyzer import text_analyzer
 import random
 
+text_analyzer.register("interests", {
+    "برنامه‌نویسی": ["برنامه", "کد", "programming", "python", "javascript", "برنامهنویسی"],
+    "موسیقی": ["موسیقی", "آهنگ", "music", "گوش دادن"],
+    "ورزش": ["ورزش", "فوتبال", "بسکتبال", "دویدن", "sport"],
+    "مطالعه": ["کتاب", "مطالعه", "خواندن", "study"],
+    "بازی": ["بازی", "game", "gaming", "گیم"],
+    "فیلم": ["فیلم", "سینما", "movie", "film"],
+    "سفر": ["سفر", "travel", "گردش"],
+    "آشپزی": ["آشپزی", "غذا", "cooking", "پختن"]
+})
+text_analyzer.register("personality_traits", {
+    "شوخ‌طبع": ["شوخ", "خنده", "funny", "humor", "شوخطبع"],
+    "جدی": ["جدی", "serious", "متین"],
+    "کنجکاو": ["کنجکاو", "curious", "سوال"],
+    "صمیمی": ["صمیمی", "friendly", "دوستانه"],
+    "آرام": ["آرام", "calm", "quiet"],
+    "پرانرژی": ["پرانرژی", "energetic", "فعال"],
+    "خلاق": ["خلاق", "creative", "هنری"],
+    "منطقی": ["منطقی", "logical", "تحلیلی"]
+})
+
 class FoxIntroduction:
     def __init__(self, user_profile: UserProfile):
         self.user = user_profile
@@ -172,45 +194,11 @@ class FoxIntroduction:
     
     def extract_interests(self, text: str) -> List[str]:
         """استخراج علایق از متن"""
-        interests = []
-        keywords = {
-            "برنامه‌نویسی": ["برنامه", "کد", "programming", "python", "javascript", "برنامهنویسی"],
-            "موسیقی": ["موسیقی", "آهنگ", "music", "گوش دادن"],
-            "ورزش": ["ورزش", "فوتبال", "بسکتبال", "دویدن", "sport"],
-            "مطالعه": ["کتاب", "مطالعه", "خواندن", "study"],
-            "بازی": ["بازی", "game", "gaming", "گیم"],
-            "فیلم": ["فیلم", "سینما", "movie", "film"],
-            "سفر": ["سفر", "travel", "گردش"],
-            "آشپزی": ["آشپزی", "غذا", "cooking", "پختن"]
-        }
-        
-        text_lower = text.lower()
-        for interest, words in keywords.items():
-            if any(word in text_lower for word in words):
-                interests.append(interest)
-        
-        return interests
+        return text_analyzer.analyze(text).categories("interests")
     
     def extract_personality_traits(self, text: str) -> List[str]:
         """استخراج ویژگی‌های شخصیتی"""
-        traits = []
-        keywords = {
-            "شوخ‌طبع": ["شوخ", "خنده", "funny", "humor", "شوخطبع"],
-            "جدی": ["جدی", "serious", "متین"],
-            "کنجکاو": ["کنجکاو", "curious", "سوال"],
-            "صمیمی": ["صمیمی", "friendly", "دوستانه"],
-            "آرام": ["آرام", "calm", "quiet"],
-            "پرانرژی": ["پرانرژی", "energetic", "فعال"],
-            "خلاق": ["خلاق", "creative", "هنری"],
-            "منطقی": ["منطقی", "logical", "تحلیلی"]
-        }
-        
-        text_lower = text.lower()
-        for trait, words in keywords.items():
-            if any(word in text_lower for word in words):
-                traits.append(trait)
-        
-        return traits
+        return text_analyzer.analyze(text).categories("personality_traits")
     
     def complete_introduction(self) -> str:
         """تکمیل معرفی"""
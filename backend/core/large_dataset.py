@@ -5,7 +5,7 @@ Large Persian Dataset Downloader
 import requests
 import json
 import os
-from backend.core.fox_learning import FoxLearningSystem
+from backend.core.fox_learning import learning_registry
 from backend.core.user_profiles import user_manager
 
 class LargeDatasetDownloader:
@@ -143,22 +143,15 @@ class LargeDatasetDownloader:
         print("🧠 ذخیره در مغز Fox...")
         
         profile = user_manager.get_current_user_profile()
-        fox_learning = FoxLearningSystem(profile)
-        
-        saved_count = 0
-        
-        for item in data:
-            try:
-                fox_learning.teach_response(item["q"], item["a"])
-                saved_count += 1
-                
-                if saved_count % 20 == 0:
-                    print(f"✅ {saved_count} مکالمه ذخیره شد...")
-                    
-            except Exception as e:
-                print(f"❌ خطا: {e}")
-                
-        print(f"🎉 مجموع {saved_count} مکالمه در مغز Fox ذخیره شد!")
+        fox_learning = learning_registry.get(profile)
+        
+        stats = fox_learning.teach_many((item.get("q"), item.get("a")) for item in data)
+        saved_count = stats["added"] + stats["updated"]
+        learning_registry.refresh(fox_learning)
+        
+        print(f"🎉 مجموع {saved_count} مکالمه در مغز Fox ذخیره شد! "
+              f"(تکراری: {stats['duplicates'] + stats['unchanged']}, "
+              f"تقریباً تکراری: {stats['near_duplicates']}, نامعتبر: {stats['invalid']})")
         return saved_count
         
     def run_full_download(self):
@@ -0,0 +1,236 @@
+"""
+⏱️ Latency - هیستوگرام تأخیر هر مرحله پردازش پیام
+برای هر مرحله (جستجوی پاسخ یادگرفته، ساخت context، جستجوی وب، LLM، پردازش
+نهایی، ذخیره‌سازی) و هر مدل یک هیستوگرام لگاریتمی با حافظه ثابت در
+پنجره‌های دقیقه‌ای، ساعتی و روزانه نگه داشته می‌شود؛ p50/p95/p99 از ادغام
+پنجره‌ها به دست می‌آیند.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from backend.core.flush_scheduler import flush_scheduler
+from backend.core.storage import load_json, save_json
+from backend.core.lazy import lazy_singleton
+
+STAGES = ("learned_lookup", "context_build", "web_search", "llm_first_token", "llm", "post_processing",
+          "persistence", "total")
+
+# پنجره → (طول به ثانیه، تعداد پنجره‌های نگه‌داشته)
+WINDOWS = {
+    "minute": (60, 60),
+    "hour": (3600, 48),
+    "day": (86400, 30),
+}
+
+class LatencyHistogram:
+    """هیستوگرام لگاریتمی (شبیه HDR) با خطای نسبی حدود ۱٪
+
+    سطل i بازه [MIN_MS·BASE^(i-1), MIN_MS·BASE^i) میلی‌ثانیه را می‌شمارد؛
+    تعداد سطل‌ها محدود است (۰.۰۱ms تا یک ساعت) و دو هیستوگرام با جمع
+    شمارنده‌ها ادغام می‌شوند.
+    """
+
+    MIN_MS = 0.01
+    BASE = 1.02
+    MAX_INDEX = int(math.log(3_600_000 / MIN_MS) / math.log(BASE)) + 1
+    _INV_LOG_BASE = 1 / math.log(BASE)
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, ms: float):
+        if ms <= self.MIN_MS:
+            index = 0
+        else:
+            index = min(self.MAX_INDEX, int(math.log(ms / self.MIN_MS) * self._INV_LOG_BASE) + 1)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += ms
+        if ms < self.min:
+            self.min = ms
+        if ms > self.max:
+            self.max = ms
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """مقدار صدک q (۰ تا ۱۰۰) به میلی‌ثانیه"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                # میانه هندسی سطل، محدود به کمینه و بیشینه واقعی
+                value = self.MIN_MS * self.BASE ** (index - 0.5) if index else self.MIN_MS
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 2),
+            "p95_ms": round(self.percentile(95), 2),
+            "p99_ms": round(self.percentile(99), 2),
+            "max_ms": round(self.max, 2),
+        }
+
+    def to_dict(self) -> Dict:
+        indexes = sorted(self.counts)
+        return {
+            "buckets": indexes,
+            "counts": [self.counts[index] for index in indexes],
+            "total": self.total,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.counts = dict(zip(data["buckets"], data["counts"]))
+        histogram.count = sum(data["counts"])
+        histogram.total = data["total"]
+        histogram.min = data["min"] if histogram.count else math.inf
+        histogram.max = data["max"]
+        return histogram
+
+class LatencyTracker:
+    """ثبت تأخیر هر (مرحله، مدل) در پنجره‌های زمانی"""
+
+    def __init__(self):
+        self.latency_file = "data/analytics/latency.json"
+        # (مرحله، مدل) → پنجره → شروع پنجره → هیستوگرام
+        self._series: Dict[Tuple[str, str], Dict[str, Dict[int, LatencyHistogram]]] = {}
+        self._starts = None   # (شروع دقیقه، پایان دقیقه، شروع پنجره‌ها)
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """بارگذاری هیستوگرام‌های ذخیره شده"""
+        data = load_json(self.latency_file, {})
+        for name, windows in data.items():
+            stage, _, model = name.partition("|")
+            self._series[(stage, model)] = {
+                window: {int(start): LatencyHistogram.from_dict(histogram)
+                         for start, histogram in periods.items()}
+                for window, periods in windows.items() if window in WINDOWS
+            }
+
+    def save(self):
+        """ذخیره هیستوگرام‌ها"""
+        with self._lock:
+            data = {
+                f"{stage}|{model}": {
+                    window: {str(start): histogram.to_dict() for start, histogram in periods.items()}
+                    for window, periods in windows.items()
+                }
+                for (stage, model), windows in self._series.items()
+            }
+        save_json(self.latency_file, data)
+
+    def _period_start(self, now: float, window: str) -> int:
+        size = WINDOWS[window][0]
+        # پنجره روزانه/ساعتی به وقت محلی
+        offset = time.localtime(now).tm_gmtoff
+        return int((now + offset) // size * size - offset)
+
+    def _period_starts(self, now: float) -> Dict[str, int]:
+        """شروع همه پنجره‌ها برای now (تا مرز دقیقه بعد کش می‌شود)"""
+        cached = self._starts
+        if cached is not None and cached[0] <= now < cached[1]:
+            return cached[2]
+        starts = {window: self._period_start(now, window) for window in WINDOWS}
+        self._starts = (starts["minute"], starts["minute"] + WINDOWS["minute"][0], starts)
+        return starts
+
+    def record(self, stage: str, ms: float, model: str = None, now: float = None):
+        """ثبت یک اندازه‌گیری (میلی‌ثانیه)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            starts = self._period_starts(now)
+            windows = self._series.get((stage, model or ""))
+            if windows is None:
+                windows = self._series[(stage, model or "")] = {window: {} for window in WINDOWS}
+            for window, (_, keep) in WINDOWS.items():
+                periods = windows[window]
+                start = starts[window]
+                histogram = periods.get(start)
+                if histogram is None:
+                    histogram = periods[start] = LatencyHistogram()
+                    while len(periods) > keep:
+                        del periods[min(periods)]
+                histogram.record(ms)
+        flush_scheduler.mark_dirty("latency", self.save)
+
+    @contextmanager
+    def track(self, stage: str, model: str = None):
+        """زمان‌سنجی یک بلوک کد"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000, model)
+
+    def get_percentiles(self, window: str = "hour", periods: int = 1,
+                        stage: str = None, model: str = None, now: float = None) -> Dict:
+        """p50/p95/p99 هر مرحله روی `periods` پنجره اخیر (با تفکیک مدل)"""
+        if window not in WINDOWS:
+            raise ValueError(f"پنجره نامعتبر: {window}")
+        now = time.time() if now is None else now
+        since = self._period_start(now, window) - (periods - 1) * WINDOWS[window][0]
+
+        merged: Dict[str, LatencyHistogram] = {}
+        by_model: Dict[str, Dict[str, LatencyHistogram]] = {}
+        with self._lock:
+            for (series_stage, series_model), windows in self._series.items():
+                if stage and series_stage != stage or model and series_model != model:
+                    continue
+                for start, histogram in windows[window].items():
+                    if start < since:
+                        continue
+                    merged.setdefault(series_stage, LatencyHistogram()).merge(histogram)
+                    if series_model:
+                        by_model.setdefault(series_stage, {}).setdefault(
+                            series_model, LatencyHistogram()).merge(histogram)
+
+        result = {}
+        for series_stage in sorted(merged, key=lambda name: STAGES.index(name) if name in STAGES else len(STAGES)):
+            summary = merged[series_stage].summary()
+            if series_stage in by_model:
+                summary["models"] = {name: histogram.summary() for name, histogram in by_model[series_stage].items()}
+            result[series_stage] = summary
+        return result
+
+    def get_timeline(self, stage: str, window: str = "minute", model: str = None) -> List[Dict]:
+        """خلاصه هر پنجره برای نمودار (قدیمی به جدید)"""
+        if window not in WINDOWS:
+            raise ValueError(f"پنجره نامعتبر: {window}")
+        periods: Dict[int, LatencyHistogram] = {}
+        with self._lock:
+            for (series_stage, series_model), windows in self._series.items():
+                if series_stage != stage or model and series_model != model:
+                    continue
+                for start, histogram in windows[window].items():
+                    periods.setdefault(start, LatencyHistogram()).merge(histogram)
+        return [dict(start=start, **periods[start].summary()) for start in sorted(periods)]
+
+# نمونه سراسری
+latency_tracker = lazy_singleton("latency_tracker", LatencyTracker)
@@ -0,0 +1,125 @@
+"""
+💤 Lazy Singletons - ساخت تنبل نمونه‌های سراسری
+نمونه‌های سراسری در اولین استفاده ساخته می‌شوند، نه هنگام import
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+_registry: Dict[str, "LazySingleton"] = {}
+
+class LazySingleton:
+    """Proxy که شیء واقعی را در اولین دسترسی می‌سازد"""
+
+    def __init__(self, name: str, factory: Callable):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_init_time", None)
+        object.__setattr__(self, "_lock", threading.RLock())
+
+    def _get_instance(self):
+        instance = object.__getattribute__(self, "_instance")
+        if instance is not None:
+            return instance
+
+        with object.__getattribute__(self, "_lock"):
+            instance = object.__getattribute__(self, "_instance")
+            if instance is None:
+                start = time.perf_counter()
+                instance = object.__getattribute__(self, "_factory")()
+                object.__setattr__(self, "_init_time", time.perf_counter() - start)
+                object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def is_initialized(self) -> bool:
+        return object.__getattribute__(self, "_instance") is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._get_instance(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._get_instance(), attr, value)
+
+    # پروتکل‌های dunder از __getattr__ رد نمی‌شوند (Python آن‌ها را روی کلاس
+    # جستجو می‌کند)، پس صریحاً به شیء واقعی فرستاده می‌شوند
+    def __len__(self):
+        return len(self._get_instance())
+
+    def __bool__(self):
+        return bool(self._get_instance())
+
+    def __iter__(self):
+        return iter(self._get_instance())
+
+    def __contains__(self, item):
+        return item in self._get_instance()
+
+    def __getitem__(self, key):
+        return self._get_instance()[key]
+
+    def __setitem__(self, key, value):
+        self._get_instance()[key] = value
+
+    def __delitem__(self, key):
+        del self._get_instance()[key]
+
+    def __call__(self, *args, **kwargs):
+        return self._get_instance()(*args, **kwargs)
+
+    def __eq__(self, other):
+        if isinstance(other, LazySingleton):
+            other = other._get_instance()
+        return self._get_instance() == other
+
+    def __hash__(self):
+        return hash(self._get_instance())
+
+    def __str__(self):
+        return str(self._get_instance())
+
+    def __repr__(self):
+        name = object.__getattribute__(self, "_name")
+        if self.is_initialized():
+            return f"<lazy {name}: {self._get_instance()!r}>"
+        return f"<lazy {name} (not initialized)>"
+
+def lazy_singleton(name: str, factory: Callable) -> LazySingleton:
+    """ثبت یک نمونه سراسری تنبل"""
+    proxy = LazySingleton(name, factory)
+    _registry[name] = proxy
+    return proxy
+
+def warm_up(names: Optional[List[str]] = None) -> Dict[str, float]:
+    """ساخت همه (یا چند) نمونه از پیش، مثلاً بعد از بالا آمدن سرور"""
+    timings = {}
+    for name in names or list(_registry):
+        proxy = _registry.get(name)
+        if proxy is None or proxy.is_initialized():
+            continue
+        try:
+            proxy._get_instance()
+            timings[name] = object.__getattribute__(proxy, "_init_time")
+        except Exception as e:
+            print(f"⚠️ warm-up {name} ناموفق بود: {e}")
+    return timings
+
+def start_background_warm_up(names: Optional[List[str]] = None) -> threading.Thread:
+    """warm-up در یک thread پس‌زمینه"""
+    thread = threading.Thread(target=warm_up, args=(names,), daemon=True)
+    thread.start()
+    return thread
+
+def get_init_report() -> List[Dict]:
+    """گزارش زمان ساخت هر نمونه (کندترین اول)"""
+    report = []
+    for name, proxy in _registry.items():
+        init_time = object.__getattribute__(proxy, "_init_time")
+        report.append({
+            "name": name,
+            "initialized": proxy.is_initialized(),
+            "init_ms": round(init_time * 1000, 2) if init_time is not None else None
+        })
+    report.sort(key=lambda item: item["init_ms"] or 0, reverse=True)
+    return report
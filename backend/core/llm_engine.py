@@ -3,11 +3,53 @@ Core LLM Engine - Ollama Integration with Personalized Responses
 """
 import ollama
 import logging
+import time
 from typing import Dict, List, Optional, AsyncGenerator
 from dataclasses import dataclass
+from backend.core.latency import latency_tracker
+from backend.core.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+llm_requests = metrics.counter("fox_llm_requests_total", "Chat requests by model and outcome", ("model", "outcome"))
+llm_in_flight = metrics.gauge("fox_llm_generations_in_flight", "Ollama generations currently running", ("model",))
+llm_tokens = metrics.counter("fox_llm_tokens_total", "Tokens processed by Ollama", ("model", "kind"))
+llm_tokens_per_second = metrics.histogram(
+    "fox_llm_tokens_per_second", "Ollama generation speed (eval_count / eval_duration)", ("model",),
+    buckets=(1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 200))
+
+def record_generation_metrics(model: str, response) -> None:
+    """ثبت تعداد توکن و سرعت تولید از پاسخ نهایی Ollama"""
+    try:
+        prompt_tokens = response.get("prompt_eval_count") or 0
+        eval_tokens = response.get("eval_count") or 0
+        eval_duration = response.get("eval_duration") or 0   # نانوثانیه
+    except Exception:
+        return
+    llm_tokens.labels(model, "prompt").inc(prompt_tokens)
+    llm_tokens.labels(model, "completion").inc(eval_tokens)
+    if eval_tokens and eval_duration:
+        llm_tokens_per_second.labels(model).observe(eval_tokens / (eval_duration / 1e9))
+
+def timed_stream(model: str, stream, start: float):
+    """زمان‌سنجی پاسخ stream تا مصرف کامل آن
+
+    client.chat(stream=True) فوراً generator برمی‌گرداند، پس مرحله llm تا آخرین
+    chunk و llm_first_token تا اولین chunk اندازه گرفته می‌شود (stream نیمه‌کاره
+    رها شده ثبت نمی‌شود).
+    """
+    first_chunk = True
+    with llm_in_flight.labels(model).track_inprogress():
+        for chunk in stream:
+            if first_chunk:
+                latency_tracker.record("llm_first_token", (time.perf_counter() - start) * 1000, model)
+                first_chunk = False
+            if chunk.get("done"):
+                # آمار توکن فقط در chunk آخر می‌آید
+                record_generation_metrics(model, chunk)
+            yield chunk
+    latency_tracker.record("llm", (time.perf_counter() - start) * 1000, model)
+
 @dataclass
 class ChatMessage:
     role: str  # 'user', 'assistant', 'system'
@@ -62,8 +104,10 @@ class LLMEngine:
                         break
                 
                 if last_user_message:
-                    learned_response = fox_learning.get_learned_response(last_user_message)
+                    with latency_tracker.track("learned_lookup"):
+                        learned_response = fox_learning.get_learned_response(last_user_message)
                     if learned_response:
+                        llm_requests.labels(self.model_name, "learned").inc()
                         return learned_response
             
             # بررسی پروفایل کاربر برای شخصی‌سازی
@@ -125,18 +169,28 @@ class LLMEngine:
                         "content": msg.content
                     })
             
-            response = self.client.chat(
-                model=self.model_name,
-                messages=ollama_messages,
-                stream=stream
-            )
-            
             if stream:
-                return response
-            else:
-                return response['message']['content']
+                start = time.perf_counter()
+                response = self.client.chat(
+                    model=self.model_name,
+                    messages=ollama_messages,
+                    stream=True
+                )
+                llm_requests.labels(self.model_name, "ollama").inc()
+                return timed_stream(self.model_name, response, start)
+            
+            with latency_tracker.track("llm", self.model_name), llm_in_flight.labels(self.model_name).track_inprogress():
+                response = self.client.chat(
+                    model=self.model_name,
+                    messages=ollama_messages,
+                    stream=False
+                )
+            llm_requests.labels(self.model_name, "ollama").inc()
+            record_generation_metrics(self.model_name, response)
+            return response['message']['content']
                 
         except Exception as e:
+            llm_requests.labels(self.model_name, "error").inc()
             logger.error(f"Error in chat: {e}")
             return f"متأسفم، خطایی رخ داد: {str(e)}"
     
@@ -152,8 +206,10 @@ class LLMEngine:
                         break
                 
                 if last_user_message:
-                    learned_response = fox_learning.get_learned_response(last_user_message)
+                    with latency_tracker.track("learned_lookup"):
+                        learned_response = fox_learning.get_learned_response(last_user_message)
                     if learned_response:
+                        llm_requests.labels(self.model_name, "learned").inc()
                         yield learned_response
                         return
             
@@ -213,16 +269,19 @@ class LLMEngine:
                         "content": msg.content
                     })
             
+            start = time.perf_counter()
             stream = self.client.chat(
                 model=self.model_name,
                 messages=ollama_messages,
                 stream=True
             )
             
-            for chunk in stream:
+            for chunk in timed_stream(self.model_name, stream, start):
                 if 'message' in chunk and 'content' in chunk['message']:
                     yield chunk['message']['content']
+            llm_requests.labels(self.model_name, "ollama").inc()
                     
         except Exception as e:
+            llm_requests.labels(self.model_name, "error").inc()
             logger.error(f"Error in stream chat: {e}")
             yield f"متأسفم، خطایی رخ داد: {str(e)}"
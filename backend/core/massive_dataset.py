@@ -6,7 +6,7 @@ import requests
 import json
 import os
 import time
-from backend.core.fox_learning import FoxLearningSystem
+from backend.core.fox_learning import learning_registry
 from backend.core.user_profiles import user_manager
 
 class MassiveDatasetDownloader:
@@ -133,18 +133,13 @@ class MassiveDatasetDownloader:
         for dataset in datasets:
             all_data.extend(dataset)
             
-        # تولید تنوع بیشتر
-        variations = []
-        for item in all_data[:20]:  # فقط 20 تا اول
-            # تنوع در سلام
-            if "سلام" in item["q"]:
-                variations.extend([
-                    {"q": "سلام علیکم", "a": "علیکم سلام! چطوری؟"},
-                    {"q": "سلام دوست عزیز", "a": "سلام عزیز دل! خوش اومدی"},
-                    {"q": "سلام جان", "a": "سلام جونم! حالت چطوره؟"},
-                ])
-                
-        all_data.extend(variations)
+        # تنوع در سلام (یک بار، نه به ازای هر مکالمه سلام)
+        if any("سلام" in item["q"] for item in all_data[:20]):
+            all_data.extend([
+                {"q": "سلام علیکم", "a": "علیکم سلام! چطوری؟"},
+                {"q": "سلام دوست عزیز", "a": "سلام عزیز دل! خوش اومدی"},
+                {"q": "سلام جان", "a": "سلام جونم! حالت چطوره؟"},
+            ])
         
         print(f"📊 مجموع {len(all_data)} مکالمه تولید شد")
         return all_data
@@ -161,21 +156,14 @@ class MassiveDatasetDownloader:
         
         # ذخیره در مغز Fox
         profile = user_manager.get_current_user_profile()
-        fox_learning = FoxLearningSystem(profile)
+        fox_learning = learning_registry.get(profile)
         
-        saved_count = 0
-        for item in data:
-            try:
-                fox_learning.teach_response(item["q"], item["a"])
-                saved_count += 1
-                
-                if saved_count % 25 == 0:
-                    print(f"✅ {saved_count} مکالمه ذخیره شد...")
-                    
-            except Exception as e:
-                continue
-                
-        print(f"🎉 {saved_count} مکالمه در مغز Fox ذخیره شد!")
+        stats = fox_learning.teach_many((item.get("q"), item.get("a")) for item in data)
+        saved_count = stats["added"] + stats["updated"]
+        learning_registry.refresh(fox_learning)
+        
+        print(f"🎉 {saved_count} مکالمه در مغز Fox ذخیره شد! "
+              f"(تقریباً تکراری: {stats['near_duplicates']})")
         return saved_count
         
     def run_massive_download(self):
@@ -3,15 +3,119 @@ Memory Management System
 """
 import uuid
 import json
+import time
+import threading
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+from sqlalchemy import event
 from sqlalchemy.orm import Session
-from backend.database.models import Conversation, Message, Memory, get_db, create_tables
+from backend.database.models import Conversation, Message, Memory, get_db, create_tables, engine
+from backend.core.bm25 import BM25Index
+from backend.core.semantic_memory import semantic_memory
+from backend.core.metrics import metrics
+from backend.config.settings import settings
+
+MEMORY_BLOCK_HEADER = "اطلاعات مهم که باید به خاطر داشته باشی:\n"
+
+db_query_seconds = metrics.histogram(
+    "fox_db_query_seconds", "SQLite statement latency by statement type", ("statement",),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+
+# زمان هر کوئری روی engine مشترک (همه sessionهای get_db)
+@event.listens_for(engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(engine, "after_cursor_execute")
+def _observe_query_time(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    verb = statement.split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    db_query_seconds.labels(verb).observe(elapsed)
+
+@event.listens_for(engine, "handle_error")
+def _discard_query_timer(context):
+    # کوئری ناموفق به after_cursor_execute نمی‌رسد
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+
+# تصویر کش شده جدول memories؛ بین همه MemoryManagerها (و همه اتصال‌ها) مشترک است
+_memory_snapshot = None
+_memory_version = 0
+_memory_lock = threading.Lock()
+memory_cache_stats = {"hits": 0, "misses": 0}
+
+# ایندکس BM25 پیام‌ها؛ یک بار در هر پروسه (warm-up سرور یا اولین جستجو) از جدول
+# messages ساخته می‌شود و بین همه MemoryManagerها مشترک است
+search_index = BM25Index()
+_search_index_loaded = False
+_search_index_lock = threading.Lock()
+# پیام‌هایی که حین ساخت اولیه ذخیره می‌شوند در صف می‌مانند و بعد از ساخت اضافه
+# می‌شوند؛ پیام‌های تا بالاترین id خوانده شده در ساخت، خودشان در ایندکس‌اند
+_search_index_queue = None
+_search_index_max_id = 0
+_search_index_queue_lock = threading.Lock()
+
+def render_memory_lines(memories: List[Dict]) -> str:
+    return "".join(f"- {mem['key']}: {mem['value']}\n" for mem in memories)
+
+def ensure_search_index():
+    """ساخت ایندکس BM25 مشترک از همه پیام‌های ذخیره شده (یک بار در پروسه)
+
+    فقط پیام‌ها و حافظه‌هایی که هنوز بردار ندارند برای embed پس‌زمینه صف می‌شوند.
+    """
+    global _search_index_loaded, _search_index_queue, _search_index_max_id
+    if _search_index_loaded:
+        return
+    with _search_index_lock:
+        if _search_index_loaded:
+            return
+        with _search_index_queue_lock:
+            _search_index_queue = []
+        db = next(get_db())
+        try:
+            rows = db.query(Message.id, Message.content).order_by(Message.id).yield_per(10000)
+            store = semantic_memory.store if semantic_memory.available else None
+            missing_vectors = []
+            max_id = 0
+            for row in rows:
+                search_index.add(row.id, row.content or "")
+                max_id = row.id
+                if store is not None and f"message:{row.id}" not in store:
+                    missing_vectors.append((f"message:{row.id}", row.content or ""))
+            with _search_index_queue_lock:
+                for message_id, content in _search_index_queue:
+                    if message_id > max_id:
+                        search_index.add(message_id, content)
+                _search_index_queue = None
+                _search_index_max_id = max_id
+                _search_index_loaded = True
+            
+            if store is not None:
+                missing_vectors.extend(
+                    (f"memory:{mem.key}", f"{mem.key}: {mem.value}")
+                    for mem in db.query(Memory.key, Memory.value)
+                    if f"memory:{mem.key}" not in store
+                )
+                semantic_memory.backfill(missing_vectors)
+        finally:
+            # ساخت ناموفق: صف رها می‌شود و ساخت بعدی همه را از جدول می‌خواند
+            with _search_index_queue_lock:
+                _search_index_queue = None
+            db.close()
+
+def _index_message(message_id: int, content: str):
+    """افزودن پیام تازه ذخیره شده به ایندکس مشترک (حین ساخت اولیه: در صف)"""
+    with _search_index_queue_lock:
+        if _search_index_queue is not None:
+            _search_index_queue.append((message_id, content))
+        elif _search_index_loaded and message_id > _search_index_max_id:
+            search_index.add(message_id, content)
 
 class MemoryManager:
     def __init__(self):
         create_tables()
         self.db = next(get_db())  # Keep database session
+        self.search_index = search_index
     
     def create_session(self) -> str:
         """Create new conversation session"""
@@ -61,6 +165,8 @@ class MemoryManager:
             conversation.title = self._generate_title(content)
         
         db.commit()
+        _index_message(message.id, content)
+        semantic_memory.enqueue(f"message:{message.id}", content)
         db.close()
     
     def get_conversation_history(self, session_id: str, limit: int = 50) -> List[Dict]:
@@ -81,6 +187,7 @@ class MemoryManager:
         
         result = [
             {
+                "id": msg.id,
                 "role": msg.role,
                 "content": msg.content,
                 "timestamp": msg.timestamp.isoformat()
@@ -136,6 +243,73 @@ class MemoryManager:
         
         db.commit()
         db.close()
+        self.invalidate_memory_cache()
+        # بردار جدید جای بردار مقدار قبلی همین کلید را می‌گیرد
+        semantic_memory.enqueue(f"memory:{key}", f"{key}: {value}")
+    
+    def invalidate_memory_cache(self) -> None:
+        """باطل کردن تصویر کش شده حافظه‌ها (بعد از هر نوشتن)"""
+        global _memory_snapshot, _memory_version
+        with _memory_lock:
+            _memory_version += 1
+            _memory_snapshot = None
+    
+    def _get_memory_snapshot(self) -> Dict:
+        """همه حافظه‌های منقضی نشده به ترتیب اهمیت + بلوک آماده پرامپت
+        
+        تا save_memory بعدی، انقضای اولین حافظه یا memory_cache_ttl از کش
+        خوانده می‌شود؛ در حالت پایدار ساخت context هیچ کوئری نمی‌زند.
+        """
+        global _memory_snapshot
+        snapshot = _memory_snapshot
+        if snapshot is not None and time.monotonic() < snapshot["deadline"]:
+            memory_cache_stats["hits"] += 1
+            return snapshot
+        
+        memory_cache_stats["misses"] += 1
+        version = _memory_version
+        now = datetime.utcnow()
+        db = next(get_db())
+        rows = db.query(Memory).filter(
+            (Memory.expires_at == None) | (Memory.expires_at > now)  # noqa: E711
+        ).order_by(
+            Memory.importance.desc(),
+            Memory.created_at.desc()
+        ).all()
+        memories = [
+            {
+                "key": mem.key,
+                "value": mem.value,
+                "category": mem.category,
+                "importance": mem.importance
+            }
+            for mem in rows
+        ]
+        expiries = [mem.expires_at for mem in rows if mem.expires_at is not None]
+        db.close()
+        
+        ttl = settings.memory_cache_ttl
+        if expiries:
+            ttl = min(ttl, (min(expiries) - now).total_seconds())
+        block = memories[:settings.memory_block_size]
+        snapshot = {
+            "deadline": time.monotonic() + ttl,
+            "memories": memories,
+            "by_key": {mem["key"]: mem for mem in memories},
+            "block_keys": {mem["key"] for mem in block},
+            "block_text": MEMORY_BLOCK_HEADER + render_memory_lines(block) if block else "",
+        }
+        
+        with _memory_lock:
+            # اگر وسط ساخت چیزی نوشته شده، این تصویر کهنه است و کش نمی‌شود
+            if version == _memory_version:
+                _memory_snapshot = snapshot
+        return snapshot
+    
+    def get_memory_block(self) -> Dict:
+        """بلوک «اطلاعات مهم» پرامپت (پیش‌ساخته) و کلیدهای داخل آن"""
+        snapshot = self._get_memory_snapshot()
+        return {"text": snapshot["block_text"], "keys": snapshot["block_keys"]}
     
     def get_memories(self, category: Optional[str] = None, limit: int = 20) -> List[Dict]:
         """Get stored memories"""
@@ -187,6 +361,88 @@ class MemoryManager:
         db.close()
         return result
     
+    def _ensure_search_index(self):
+        ensure_search_index()
+    
+    def search_relevant(self, query: str, limit: int = 5, exclude_ids=()) -> List[Dict]:
+        """مرتبط‌ترین تبادل‌های قبلی (سوال کاربر + پاسخ)
+
+        رتبه‌بندی BM25 و شباهت معنایی با reciprocal rank fusion ترکیب می‌شوند
+        تا بازنویسی‌ها (paraphrase) هم پیدا شوند.
+        """
+        self._ensure_search_index()
+        exclude = set(exclude_ids)
+        hits = self.search_index.search(query, limit * 2, exclude=exclude)
+        semantic_hits = [
+            (int(doc_id), score)
+            for doc_id, score in semantic_memory.search(query, limit * 2 + len(exclude), kind="message")
+            if int(doc_id) not in exclude
+        ]
+        if semantic_hits:
+            hits = self._fuse_rankings(hits, semantic_hits)
+        if not hits:
+            return []
+        
+        db = next(get_db())
+        messages = {
+            msg.id: msg
+            for msg in db.query(Message).filter(Message.id.in_([doc_id for doc_id, _ in hits])).all()
+        }
+        
+        exchanges = []
+        seen = set()
+        for doc_id, score in hits:
+            msg = messages.get(doc_id)
+            if msg is None:
+                continue
+            
+            # پیام طرف مقابل در همان مکالمه
+            partner_query = db.query(Message).filter(Message.conversation_id == msg.conversation_id)
+            if msg.role == "user":
+                partner = partner_query.filter(Message.id > msg.id).order_by(Message.id).first()
+                question, answer = msg, partner
+            else:
+                partner = partner_query.filter(Message.id < msg.id).order_by(Message.id.desc()).first()
+                question, answer = partner, msg
+            
+            key = (question.id if question else None, answer.id if answer else None)
+            if key in seen:
+                continue
+            seen.add(key)
+            exchanges.append({
+                "message_id": msg.id,
+                "question": question.content if question else "",
+                "answer": answer.content if answer else "",
+                "timestamp": msg.timestamp.isoformat(),
+                "score": round(score, 3)
+            })
+            if len(exchanges) >= limit:
+                break
+        
+        db.close()
+        return exchanges
+    
+    def _fuse_rankings(self, *rankings, k: int = 60) -> List:
+        """ترکیب چند رتبه‌بندی (doc_id, امتیاز) با RRF: مجموع 1/(k + رتبه)"""
+        fused = {}
+        for ranking in rankings:
+            for rank, (doc_id, _) in enumerate(ranking, 1):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+        return sorted(fused.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    
+    def get_relevant_memories(self, query: str, limit: int = 3) -> List[Dict]:
+        """حافظه‌های از نظر معنایی نزدیک به متن"""
+        hits = semantic_memory.search(query, limit, kind="memory")
+        if not hits:
+            return []
+        
+        memories = self._get_memory_snapshot()["by_key"]
+        return [
+            dict(memories[key], similarity=round(score, 3))
+            for key, score in hits
+            if key in memories
+        ]
+    
     def _generate_title(self, content: str) -> str:
         """Generate conversation title from first message"""
         words = content.split()[:5]
@@ -0,0 +1,311 @@
+"""
+📈 Metrics - رجیستری سبک متریک‌ها (بدون وابستگی) با خروجی Prometheus
+شمارنده، gauge و هیستوگرام با برچسب؛ متریک‌هایی که از قبل در stats ماژول‌ها
+شمرده می‌شوند (مثل نرخ کش) با callback و فقط هنگام scrape خوانده می‌شوند.
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# مرزهای پیش‌فرض هیستوگرام (ثانیه)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def track_inprogress(self) -> "_InProgress":
+        """+۱ تا پایان بلوک (مثلاً تولیدهای در حال اجرا)"""
+        return _InProgress(self)
+
+class _InProgress:
+    # کلاس ساده به جای contextmanager (روی مسیر هر تولید است)
+    __slots__ = ("gauge",)
+
+    def __init__(self, gauge: _GaugeChild):
+        self.gauge = gauge
+
+    def __enter__(self):
+        self.gauge.inc()
+
+    def __exit__(self, *exc_info):
+        self.gauge.dec()
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # آخری: +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """زمان‌سنجی یک بلوک به ثانیه"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """فرزند مربوط به مقادیر برچسب (به ترتیب labelnames)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: برچسب‌های {self.labelnames} لازم است")
+            with self._lock:
+                child = self._children.setdefault(tuple(str(value) for value in values), self._new_child())
+                self._children[values] = child
+        return child
+
+    def _series(self) -> List[Tuple[Tuple[str, ...], object]]:
+        # کلیدهای غیررشته‌ای نام مستعار همان فرزند هستند
+        with self._lock:
+            return sorted((values, child) for values, child in self._children.items()
+                          if all(isinstance(value, str) for value in values))
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for values, child in self._series():
+            yield self.name, _format_labels(self.labelnames, values), child.value
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def track_inprogress(self):
+        return self._default.track_inprogress()
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(float(bound) for bound in buckets if bound != math.inf))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for values, child in self._series():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), counts):
+                cumulative += count
+                yield (f"{self.name}_bucket",
+                       _format_labels(self.labelnames + ("le",), values + (_format_value(bound),)), cumulative)
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+class CallbackMetric:
+    """متریکی که مقدارش هنگام scrape از یک تابع خوانده می‌شود
+
+    fn یک عدد یا دیکشنری {مقادیر برچسب: عدد} برمی‌گرداند.
+    """
+
+    def __init__(self, name: str, kind: str, documentation: str, fn: Callable,
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.kind = kind
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        result = self.fn()
+        if result is None:
+            return
+        if not isinstance(result, dict):
+            result = {(): result}
+        for values, value in sorted(result.items()):
+            if not isinstance(values, tuple):
+                values = (values,)
+            yield self.name, _format_labels(self.labelnames, values), value
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self.stats = {"scrapes": 0, "scrape_errors": 0}
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # ثبت دوباره (مثلاً import دوباره ماژول) همان متریک را برمی‌گرداند
+                if existing.kind != metric.kind:
+                    raise ValueError(f"متریک {metric.name} قبلاً با نوع {existing.kind} ثبت شده")
+                if isinstance(metric, CallbackMetric):
+                    existing.fn = metric.fn
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_callback(self, name: str, kind: str, documentation: str, fn: Callable,
+                          labelnames: Sequence[str] = ()) -> CallbackMetric:
+        """ثبت متریکی که از stats موجود یک ماژول خوانده می‌شود (بدون هزینه روی مسیر اصلی)"""
+        return self._register(CallbackMetric(name, kind, documentation, fn, labelnames))
+
+    def render(self) -> str:
+        """همه متریک‌ها در قالب متنی Prometheus (نسخه 0.0.4)"""
+        self.stats["scrapes"] += 1
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                # یک callback خراب نباید کل scrape را از کار بیندازد
+                self.stats["scrape_errors"] += 1
+                print(f"⚠️ خطا در خواندن متریک {metric.name}: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation.replace(chr(10), ' ')}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+class HTTPMetricsMiddleware:
+    """middleware خام ASGI: تعداد و زمان درخواست‌های HTTP به تفکیک مسیر
+
+    برچسب مسیر الگوی route است (مثلاً /api/latency) نه URL خام، تا تعداد
+    سری‌ها محدود بماند؛ درخواست‌های بدون route (فایل‌های static، 404) «other» می‌شوند.
+    """
+
+    def __init__(self, app, registry: "MetricsRegistry" = None):
+        self.app = app
+        registry = registry or metrics
+        self.requests = registry.counter("fox_http_requests_total", "HTTP requests by method, route and status",
+                                         ("method", "route", "status"))
+        self.duration = registry.histogram("fox_http_request_duration_seconds", "HTTP request latency by route",
+                                           ("route",))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # router بعد از تطبیق، route را در همین scope می‌گذارد
+            route = getattr(scope.get("route"), "path", "other")
+            self.requests.labels(scope["method"], route, status).inc()
+            self.duration.labels(route).observe(time.perf_counter() - start)
+
+# نمونه سراسری
+metrics = MetricsRegistry()
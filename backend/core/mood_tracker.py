@@ -5,42 +5,47 @@
 import json
 import os
 from datetime import datetime
+from backend.core.flush_scheduler import flush_scheduler
+from backend.core.storage import load_json, save_json
+from backend.core.lazy import lazy_singleton
+from backend.core.text_analyzer import text_analyzer
+
+POSITIVE_WORDS = [
+    "خوب", "عالی", "خوشحال", "شاد", "راضی", "خندیدم", "لذت", 
+    "موفق", "بهتر", "آرام", "راحت", "خوشگذران"
+]
+NEGATIVE_WORDS = [
+    "بد", "ناراحت", "خسته", "غمگین", "عصبانی", "استرس", "نگران",
+    "افسرده", "بیحال", "کسل", "درد", "مشکل"
+]
+text_analyzer.register("mood", {"positive": POSITIVE_WORDS, "negative": NEGATIVE_WORDS})
 
 class MoodTracker:
     def __init__(self):
         self.mood_file = "data/profiles/حامد_mood.json"
-        self.positive_words = [
-            "خوب", "عالی", "خوشحال", "شاد", "راضی", "خندیدم", "لذت", 
-            "موفق", "بهتر", "آرام", "راحت", "خوشگذران"
-        ]
-        self.negative_words = [
-            "بد", "ناراحت", "خسته", "غمگین", "عصبانی", "استرس", "نگران",
-            "افسرده", "بیحال", "کسل", "درد", "مشکل"
-        ]
+        self.positive_words = POSITIVE_WORDS
+        self.negative_words = NEGATIVE_WORDS
         self.mood_history = self.load_mood_history()
     
     def load_mood_history(self):
         """بارگذاری تاریخچه حالات"""
         if os.path.exists(self.mood_file):
             try:
-                with open(self.mood_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return load_json(self.mood_file)
             except:
                 pass
         return {"daily_moods": [], "overall_trend": "neutral"}
     
     def save_mood_history(self):
         """ذخیره تاریخچه حالات"""
-        os.makedirs(os.path.dirname(self.mood_file), exist_ok=True)
-        with open(self.mood_file, 'w', encoding='utf-8') as f:
-            json.dump(self.mood_history, f, ensure_ascii=False, indent=2)
+        save_json(self.mood_file, self.mood_history)
     
     def analyze_mood(self, message):
         """تحلیل حالت از پیام"""
-        message_lower = message.lower()
+        analysis = text_analyzer.analyze(message)
         
-        positive_score = sum(1 for word in self.positive_words if word in message_lower)
-        negative_score = sum(1 for word in self.negative_words if word in message_lower)
+        positive_score = analysis.count("mood", "positive")
+        negative_score = analysis.count("mood", "negative")
         
         if positive_score > negative_score:
             mood = "positive"
@@ -64,7 +69,7 @@ class MoodTracker:
         if len(self.mood_history["daily_moods"]) > 30:
             self.mood_history["daily_moods"] = self.mood_history["daily_moods"][-30:]
         
-        self.save_mood_history()
+        flush_scheduler.mark_dirty("mood_tracker", self.save_mood_history)
         return mood
     
     def get_mood_response(self, mood):
@@ -109,4 +114,4 @@ class MoodTracker:
 📈 کل: {total} مورد"""
 
 # Instance سراسری
-mood_tracker = MoodTracker()
+mood_tracker = lazy_singleton("mood_tracker", MoodTracker)
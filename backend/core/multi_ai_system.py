@@ -1,16 +1,31 @@
 """
 🤖 Multi-AI System - مشورت با چند AI
+در حالت hedged پاسخ‌ها به محض رسیدن امتیاز می‌گیرند و اولین پاسخ بالای
+آستانه کیفیت برگردانده می‌شود (بقیه درخواست‌ها لغو می‌شوند)؛ با رسیدن مهلت
+بهترین پاسخ رسیده تا آن لحظه انتخاب می‌شود.
 """
 
 from backend.core.ai_providers import ai_manager
+from backend.core.fan_out import run_sync
+from backend.config.settings import settings
+from collections import Counter
 import json
 import os
+from backend.core.lazy import lazy_singleton
+
+# وزن میانگین متحرک زمان پاسخ هر provider (برای تخمین زمان صرفه‌جویی شده)
+LATENCY_EMA_ALPHA = 0.3
 
 class MultiAISystem:
     def __init__(self):
         self.enabled = False
         self.config_file = "data/multi_ai_enabled.json"
         self.min_responses = 1  # حداقل تعداد پاسخ برای مقایسه
+        self.hedged = settings.multi_ai_hedged
+        self.accept_score = settings.multi_ai_accept_score
+        self.latency_ema = {}  # provider → ثانیه
+        self.stats = {"turns": 0, "hedged_wins": 0, "deadline_fallbacks": 0, "no_response": 0,
+                      "time_saved": 0.0, "abandoned_calls": 0, "wins": Counter()}
         self.load_status()
     
     def load_status(self):
@@ -51,36 +66,87 @@ class MultiAISystem:
         status = "🟢 فعال" if self.enabled else "🔴 غیرفعال"
         providers = ai_manager.get_available_providers()
         provider_names = [p.name for p in providers]
-        return f"🤖 Multi-AI: {status}\n📡 AI های موجود: {', '.join(provider_names)}"
+        lines = [f"🤖 Multi-AI: {status}", f"📡 AI های موجود: {', '.join(provider_names)}"]
+        if self.stats["turns"]:
+            stats = self.get_hedge_stats()
+            wins = ", ".join(f"{name}: {count}" for name, count in stats["wins"].items())
+            lines.append(f"🏁 برنده‌ها: {wins or '-'} | ⏱️ صرفه‌جویی: {stats['time_saved']:.1f}s "
+                         f"در {stats['turns']} دور | 🧵 فراخوانی رها شده: {stats['abandoned_calls']}")
+        return "\n".join(lines)
+    
+    @staticmethod
+    def score_response(response):
+        """امتیاز ساده پاسخ: طول، با ترجیح متن فارسی (پاسخ‌های خیلی کوتاه صفر)"""
+        if not response or len(response.strip()) <= 10:
+            return 0
+        persian_chars = sum(1 for c in response if '\u0600' <= c <= '\u06FF')
+        return len(response) + persian_chars * 2
     
     def get_best_response(self, prompt):
         """دریافت بهترین پاسخ از چند AI"""
+        return run_sync(self.get_best_response_async(prompt))
+    
+    async def get_best_response_async(self, prompt, deadline=None):
+        """بهترین پاسخ؛ در حالت hedged اولین پاسخ بالای accept_score بدون انتظار برای بقیه"""
         if not self.enabled:
             return None
         
-        # دریافت پاسخ از همه AI ها
-        responses = ai_manager.get_responses(prompt)
+        deadline = settings.multi_ai_deadline if deadline is None else deadline
+        accept = None
+        if self.hedged:
+            accept = lambda name, response: self.score_response(response) >= self.accept_score
+        result = await ai_manager.fan_out_responses(prompt, deadline, accept)
+        self._record_turn(result, deadline)
         
-        if len(responses) < self.min_responses:
+        if len(result.results) < self.min_responses:
             return None
         
-        # انتخاب بهترین پاسخ
-        best_response = None
-        best_score = 0
+        if result.winner is not None:
+            provider_name = result.winner
+        else:
+            # بدون برنده زودهنگام (یا حالت کامل): بهترین پاسخ رسیده
+            provider_name = max(result.results, key=lambda name: self.score_response(result.results[name]))
+            if not self.score_response(result.results[provider_name]):
+                return None
         
-        for provider_name, response in responses.items():
-            if response and len(response.strip()) > 10:
-                # امتیازدهی ساده
-                score = len(response)
-                # ترجیح متن فارسی
-                persian_chars = sum(1 for c in response if '\u0600' <= c <= '\u06FF')
-                score += persian_chars * 2
-                
-                if score > best_score:
-                    best_score = score
-                    best_response = f"{response}\n\n💡 *از {provider_name}*"
+        self.stats["wins"][provider_name] += 1
+        return f"{result.results[provider_name]}\n\n💡 *از {provider_name}*"
+    
+    def _record_turn(self, result, deadline):
+        """آمار دور: زمان پاسخ providerها و زمان صرفه‌جویی شده با لغو زودهنگام"""
+        self.stats["turns"] += 1
+        for name, latency in result.latencies.items():
+            previous = self.latency_ema.get(name)
+            self.latency_ema[name] = latency if previous is None else (
+                previous + LATENCY_EMA_ALPHA * (latency - previous))
         
-        return best_response
+        # فراخوانی‌های blocking لغو شده در executor همان دور تا مهلت ادامه می‌دهند؛
+        # جای دورهای بعدی را نمی‌گیرند (پس زمان‌ها صف انتظار ندارند) ولی هزینه‌شان شمرده می‌شود
+        self.stats["abandoned_calls"] += result.abandoned
+        if result.winner is not None:
+            self.stats["hedged_wins"] += 1
+            # تخمین: لغو شده‌ها حدوداً در میانگین زمان قبلی‌شان تمام می‌شدند؛ providerی
+            # که هیچ‌وقت تمام نشده حساب نمی‌شود، پس این عدد حد پایین است
+            full_wait = max([result.elapsed] + [self.latency_ema[name] for name in result.cancelled
+                                                if name in self.latency_ema])
+            self.stats["time_saved"] += min(full_wait, deadline) - result.elapsed
+        elif result.timed_out:
+            self.stats["deadline_fallbacks"] += 1
+        if not result.results:
+            self.stats["no_response"] += 1
+    
+    def get_hedge_stats(self):
+        """آمار حالت hedged: توزیع برنده‌ها و زمان صرفه‌جویی شده"""
+        return {
+            "turns": self.stats["turns"],
+            "hedged_wins": self.stats["hedged_wins"],
+            "deadline_fallbacks": self.stats["deadline_fallbacks"],
+            "no_response": self.stats["no_response"],
+            "time_saved": round(self.stats["time_saved"], 3),
+            "abandoned_calls": self.stats["abandoned_calls"],
+            "wins": dict(self.stats["wins"].most_common()),
+            "latency_ema": {name: round(latency, 3) for name, latency in self.latency_ema.items()},
+        }
 
 # Instance سراسری
-multi_ai_system = MultiAISystem()
+multi_ai_system = lazy_singleton("multi_ai_system", MultiAISystem)
@@ -9,6 +9,13 @@ from typing import Dict, List, Optional
 from datetime import datetime
 from backend.core.user_profile import UserProfile
 from backend.core.introduction import FoxIntroduction
+from backend.core.storage import load_json, save_json
+from backend.core.text_analyzer import text_analyzer
+
+text_analyzer.register("writing_style", {
+    "formal": ["شما", "جناب", "سرکار", "محترم"],
+    "informal": ["تو", "داداش", "رفیق", "یارو"]
+})
 
 class MultiUserManager:
     def __init__(self, db_session):
@@ -25,15 +32,11 @@ class MultiUserManager:
     
     def get_users_index(self) -> Dict:
         """دریافت فهرست کاربران"""
-        if os.path.exists(self.users_index_file):
-            with open(self.users_index_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"users": [], "last_user": None}
+        return load_json(self.users_index_file, {"users": [], "last_user": None})
     
     def save_users_index(self, index: Dict):
         """ذخیره فهرست کاربران"""
-        with open(self.users_index_file, 'w', encoding='utf-8') as f:
-            json.dump(index, f, ensure_ascii=False, indent=2)
+        save_json(self.users_index_file, index)
     
     def detect_user_change(self, user_input: str) -> Optional[str]:
         """تشخیص تغییر کاربر از متن"""
@@ -71,11 +74,9 @@ class MultiUserManager:
         current_traits = self.current_user.profile.get('personality_traits', [])
         
         # اگر متن خیلی رسمی باشه ولی کاربر فعلی غیررسمی باشه
-        formal_words = ["شما", "جناب", "سرکار", "محترم"]
-        informal_words = ["تو", "داداش", "رفیق", "یارو"]
-        
-        is_formal = any(word in text for word in formal_words)
-        is_informal = any(word in text for word in informal_words)
+        analysis = text_analyzer.analyze(text)
+        is_formal = analysis.has("writing_style", "formal")
+        is_informal = analysis.has("writing_style", "informal")
         
         if "صمیمی" in current_traits and is_formal:
             return True
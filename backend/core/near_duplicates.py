@@ -0,0 +1,149 @@
+"""
+🧬 Near-Duplicate Detection - تشخیص متن‌های تقریباً تکراری با MinHash/LSH
+امضای MinHash روی سه‌حرفی‌های متن یکسان‌سازی شده ساخته می‌شود و باندهای
+LSH فقط جفت‌های محتمل را کنار هم می‌گذارند؛ هر نامزد با Jaccard دقیق تأیید می‌شود.
+"""
+
+import random
+import re
+import zlib
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from backend.core.persian_text import normalize_persian
+
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d+")
+_PRIME = (1 << 31) - 1
+
+def shingles(text: str, size: int = 3) -> FrozenSet[str]:
+    """سه‌حرفی‌های واژه‌ها (بدون علائم نگارشی) در متن یکسان‌سازی شده"""
+    padded = " " + " ".join(_WORD.findall(normalize_persian(text))) + " "
+    if len(padded) <= size:
+        return frozenset([padded.strip()]) if padded.strip() else frozenset()
+    return frozenset(padded[i:i + size] for i in range(len(padded) - size + 1))
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class MinHashLSH:
+    """ایندکس LSH برای یافتن کلیدهایی که Jaccard سه‌حرفی‌هایشان ≥ آستانه است
+
+    num_perm = bands × rows؛ با 8 باند 6 سطری احتمال کشف جفت‌های
+    با شباهت 0.8 حدود 91% و برای 0.9 بیش از 99% است.
+    """
+
+    def __init__(self, threshold: float = 0.85, bands: int = 8, rows: int = 6, seed: int = 1):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(bands * rows)]
+        self._shingle_hashes: Dict[str, Tuple[int, ...]] = {}
+        # هش باند → کلید (یا لیست کلیدها وقتی بیش از یکی باشد) تا حافظه کم بماند
+        self._buckets: List[Dict[int, object]] = [{} for _ in range(bands)]
+        self._keys = set()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key: str):
+        return key in self._keys
+
+    def _hashes(self, shingle: str) -> Tuple[int, ...]:
+        """مقدار همه جایگشت‌ها برای یک سه‌حرفی (کش می‌شود؛ الفبای سه‌حرفی‌ها کوچک است)"""
+        hashes = self._shingle_hashes.get(shingle)
+        if hashes is None:
+            if len(self._shingle_hashes) > 200000:
+                self._shingle_hashes.clear()
+            value = zlib.crc32(shingle.encode('utf-8'))
+            hashes = tuple((a * value + b) % _PRIME for a, b in self._perms)
+            self._shingle_hashes[shingle] = hashes
+        return hashes
+
+    def signature(self, grams: FrozenSet[str]) -> Tuple[int, ...]:
+        """امضای MinHash: کمینه هر جایگشت روی سه‌حرفی‌ها"""
+        if not grams:
+            return tuple([_PRIME] * len(self._perms))
+        if len(grams) == 1:
+            return self._hashes(next(iter(grams)))
+        return tuple(map(min, *[self._hashes(gram) for gram in grams]))
+
+    def _bands(self, signature: Tuple[int, ...], numbers: Tuple[str, ...]):
+        """(سطل‌های باند، هش باند)؛ اعداد متن هم در هش هستند چون باید دقیقاً یکی باشند"""
+        rows = self.rows
+        for band in range(self.bands):
+            yield self._buckets[band], hash((signature[band * rows:(band + 1) * rows], numbers))
+
+    def add(self, key: str):
+        """افزودن یک کلید"""
+        if key not in self._keys:
+            self._insert(key, self._bands(self.signature(shingles(key)), tuple(_NUMBER.findall(key))))
+
+    def _insert(self, key: str, bands):
+        self._keys.add(key)
+        for buckets, band_hash in bands:
+            existing = buckets.get(band_hash)
+            if existing is None:
+                buckets[band_hash] = key
+            elif isinstance(existing, list):
+                existing.append(key)
+            else:
+                buckets[band_hash] = [existing, key]
+
+    def query(self, text: str) -> List[Tuple[str, float]]:
+        """کلیدهای تقریباً تکراری به صورت (کلید، Jaccard)، شبیه‌ترین اول"""
+        return self._query(text)[0]
+
+    def _query(self, text: str):
+        grams = shingles(text)
+        numbers = tuple(_NUMBER.findall(text))
+        bands = list(self._bands(self.signature(grams), numbers))
+        candidates = set()
+        for buckets, band_hash in bands:
+            bucket = buckets.get(band_hash)
+            if isinstance(bucket, list):
+                candidates.update(bucket)
+            elif bucket is not None:
+                candidates.add(bucket)
+
+        matches = []
+        for key in candidates:
+            # «جدول ضرب 7» و «جدول ضرب 8» تکراری نیستند
+            if tuple(_NUMBER.findall(key)) != numbers:
+                continue
+            similarity = jaccard(grams, shingles(key))
+            if similarity >= self.threshold:
+                matches.append((key, similarity))
+        matches.sort(key=lambda item: (-item[1], item[0]))
+        return matches, bands
+
+    def find_or_add(self, key: str) -> Optional[Tuple[str, float]]:
+        """شبیه‌ترین کلید تقریباً تکراری؛ اگر نبود کلید اضافه می‌شود و None برمی‌گردد"""
+        matches, bands = self._query(key)
+        if matches:
+            return matches[0]
+        if key not in self._keys:
+            self._insert(key, bands)
+        return None
+
+    def find_duplicate(self, text: str) -> Optional[Tuple[str, float]]:
+        """شبیه‌ترین کلید تقریباً تکراری به صورت (کلید، Jaccard) یا None"""
+        matches = self.query(text)
+        return matches[0] if matches else None
+
+def group_near_duplicates(keys: Iterable[str], threshold: float = 0.85) -> List[Dict]:
+    """گروه‌بندی کلیدها؛ اولین کلید هر گروه نماینده است
+
+    خروجی: [{"keep": کلید, "duplicates": [(کلید، Jaccard)، ...]}]
+    """
+    index = MinHashLSH(threshold)
+    groups: Dict[str, List[Tuple[str, float]]] = {}
+    for key in keys:
+        match = index.find_or_add(key)
+        if match is None:
+            groups[key] = []
+        else:
+            canonical, similarity = match
+            groups[canonical].append((key, round(similarity, 3)))
+    return [{"keep": keep, "duplicates": duplicates} for keep, duplicates in groups.items() if duplicates]
@@ -0,0 +1,33 @@
+"""
+🔤 Persian Text - یکسان‌سازی متن فارسی
+برای مقایسه متن‌هایی که فقط در نگارش تفاوت دارند (ي/ی، ك/ک، نیم‌فاصله، اعراب، کشیدگی)
+"""
+
+import re
+
+# حروف عربی → فارسی، نیم‌فاصله → فاصله (با str.replace که برای چند حرف از translate سریع‌تر است)
+_CHAR_MAP = (
+    ("ي", "ی"),
+    ("ى", "ی"),
+    ("ك", "ک"),
+    ("\u200c", " "),   # ZWNJ
+)
+# اعراب (U+064B تا U+0652)، الف کوچک بالانویس و کشیده (ـ) حذف می‌شوند
+_MARKS = re.compile("[\u064B-\u0652\u0670\u0640]")
+# فقط حروف فارسی/عربی کشیده می‌شوند؛ ارقام ("1000") و لاتین ("www") دست نمی‌خورند
+_REPEATED = re.compile(r"([\u0620-\u064A\u0671-\u06D3])\1{2,}")
+# فقط دنباله‌های فاصله و فاصله‌های غیر از space جایگزین می‌شوند (نتیجه مثل \s+ → " ")
+_SPACES = re.compile(r"\s{2,}|[^\S ]")
+
+def normalize_persian(text: str) -> str:
+    """یکسان‌سازی متن: حروف فارسی، حذف اعراب، فشرده‌سازی حروف کشیده ("سلاااام" → "سلام")"""
+    for old, new in _CHAR_MAP:
+        if old in text:
+            text = text.replace(old, new)
+    text = _MARKS.sub("", text).lower()
+    text = _REPEATED.sub(r"\1", text)
+    # مسیر سریع: همه فاصله‌های غیر از space غیرقابل چاپ‌اند، پس متن قابل چاپ بدون
+    # دو فاصله پشت سر هم چیزی برای جایگزینی ندارد
+    if "  " not in text and text.isprintable():
+        return text
+    return _SPACES.sub(" ", text)
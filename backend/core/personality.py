@@ -6,6 +6,14 @@ import random
 from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime
+from backend.core.text_analyzer import text_analyzer
+
+text_analyzer.register("emotion", {
+    "positive": ["عالی", "خوب", "دوست دارم", "خوشحال", "شاد", "خنده", "بامزه"],
+    "negative": ["بد", "ناراحت", "غمگین", "عصبانی", "متنفر", "خسته"],
+    "humor": ["خنده", "شوخی", "بامزه", "طنز", "😄", "😂", "🤣"],
+    "serious": ["مهم", "جدی", "کار", "مسئله", "مشکل"]
+})
 
 @dataclass
 class EmotionState:
@@ -103,30 +111,26 @@ class PersonalitySystem:
     
     def analyze_user_input(self, text: str) -> Dict:
         """Analyze user input and adjust emotions accordingly"""
-        text_lower = text.lower()
+        analysis = text_analyzer.analyze(text)
         adjustments = {}
         
         # Positive words
-        positive_words = ["عالی", "خوب", "دوست دارم", "خوشحال", "شاد", "خنده", "بامزه"]
-        if any(word in text_lower for word in positive_words):
+        if analysis.has("emotion", "positive"):
             adjustments["happiness"] = 0.5
             adjustments["friendliness"] = 0.3
         
         # Negative words  
-        negative_words = ["بد", "ناراحت", "غمگین", "عصبانی", "متنفر", "خسته"]
-        if any(word in text_lower for word in negative_words):
+        if analysis.has("emotion", "negative"):
             adjustments["sadness"] = 0.3
             adjustments["happiness"] = -0.2
         
         # Humor indicators
-        humor_words = ["خنده", "شوخی", "بامزه", "طنز", "😄", "😂", "🤣"]
-        if any(word in text_lower for word in humor_words):
+        if analysis.has("emotion", "humor"):
             adjustments["humor"] = 0.5
             adjustments["happiness"] = 0.3
         
         # Serious topics
-        serious_words = ["مهم", "جدی", "کار", "مسئله", "مشکل"]
-        if any(word in text_lower for word in serious_words):
+        if analysis.has("emotion", "serious"):
             adjustments["seriousness"] = 0.5
             adjustments["humor"] = -0.2
         
@@ -1,43 +1,89 @@
 """
 🔔 Proactive Assistant - دستیار پیشگام
+یادآوری‌ها در یک چرخ زمان‌بندی سلسله‌مراتبی (TimingWheel) نگه داشته می‌شوند:
+افزودن و سررسید O(1) است و تسک پس‌زمینه وب هر ثانیه یک بار tick را صدا می‌زند؛
+یادآوری‌های سررسیده تا تحویل به websocket صاحبشان در صف fired می‌مانند.
 """
 
 import json
 import os
+import time
 from datetime import datetime, timedelta
 import random
+from typing import Dict, Iterable, List, Optional
+from backend.core.flush_scheduler import flush_scheduler
+from backend.core.storage import load_json, save_json
+from backend.core.timing_wheel import TimingWheel
+from backend.core.lazy import lazy_singleton
+from backend.config.settings import settings
+
+# نسخه قالب ستونی reminders.json (قالب قدیمی: {"reminders": [dict, ...]})
+REMINDERS_FORMAT = 2
 
 class ProactiveAssistant:
-    def __init__(self):
+    def __init__(self, tick: float = None):
         self.suggestions_file = "data/proactive/suggestions.json"
         self.reminders_file = "data/proactive/reminders.json"
+        self.wheel = TimingWheel(tick or settings.reminder_tick)
+        # صاحب → {id: یادآوری سررسیده و تحویل نشده}؛ صاحب "" = هر کلاینت متصل
+        self._fired: Dict[str, Dict[int, tuple]] = {}
+        self.stats = {"fired": 0, "delivered": 0, "cancelled": 0}
         self.load_data()
         
     def load_data(self):
         """بارگذاری داده‌ها"""
         self.suggestions = self.load_json(self.suggestions_file, {"last_suggestions": []})
-        self.reminders = self.load_json(self.reminders_file, {"reminders": []})
+        self._next_id = 1
+        data = self.load_json(self.reminders_file, {})
+        if data.get("version") == REMINDERS_FORMAT:
+            owners = data["owners"]
+            for reminder_id, due, created, owner, text in zip(data["id"], data["due"], data["created"],
+                                                              data["owner"], data["text"]):
+                # سررسیده‌های تحویل نشده در tick بعدی دوباره fire می‌شوند
+                self.wheel.add(reminder_id, due, (due, owners[owner], text, created))
+            self._next_id = data["next_id"]
+        else:
+            # مهاجرت قالب قدیمی: فقط یادآوری‌های انجام نشده
+            for reminder in data.get("reminders", []):
+                if reminder.get("completed"):
+                    continue
+                due = datetime.fromisoformat(reminder["remind_time"]).timestamp()
+                created = datetime.fromisoformat(reminder["created"]).timestamp()
+                self.wheel.add(reminder["id"], due, (due, "", reminder["text"], created))
+                self._next_id = max(self._next_id, reminder["id"] + 1)
     
     def load_json(self, file_path, default):
         """بارگذاری فایل JSON"""
         if os.path.exists(file_path):
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return load_json(file_path)
             except:
                 pass
         return default
     
     def save_data(self):
         """ذخیره داده‌ها"""
-        os.makedirs(os.path.dirname(self.suggestions_file), exist_ok=True)
-        os.makedirs(os.path.dirname(self.reminders_file), exist_ok=True)
-        
-        with open(self.suggestions_file, 'w', encoding='utf-8') as f:
-            json.dump(self.suggestions, f, ensure_ascii=False, indent=2)
-        
-        with open(self.reminders_file, 'w', encoding='utf-8') as f:
-            json.dump(self.reminders, f, ensure_ascii=False, indent=2)
+        self.save_suggestions()
+        self.save_reminders()
+    
+    def save_suggestions(self):
+        save_json(self.suggestions_file, self.suggestions)
+    
+    def save_reminders(self):
+        """ذخیره ستونی یادآوری‌های تحویل نشده (صاحب‌ها یک بار، زمان‌ها epoch صحیح)"""
+        owners: Dict[str, int] = {}
+        columns = {"id": [], "due": [], "created": [], "owner": [], "text": []}
+        pending = list(self.wheel.items())
+        for fired in self._fired.values():
+            pending.extend(fired.items())
+        for reminder_id, (due, owner, text, created) in pending:
+            columns["id"].append(reminder_id)
+            columns["due"].append(round(due))
+            columns["created"].append(round(created))
+            columns["owner"].append(owners.setdefault(owner, len(owners)))
+            columns["text"].append(text)
+        save_json(self.reminders_file, {"version": REMINDERS_FORMAT, "next_id": self._next_id,
+                                        "owners": list(owners), **columns})
     
     def get_time_based_suggestions(self):
         """پیشنهادات بر اساس زمان"""
@@ -104,33 +150,80 @@ class ProactiveAssistant:
         ]
         return random.choice(productivity_tips)
     
-    def add_reminder(self, text, remind_time):
-        """اضافه کردن یادآوری"""
-        reminder = {
-            "id": len(self.reminders["reminders"]) + 1,
+    def add_reminder(self, text, remind_time, owner: Optional[str] = None):
+        """اضافه کردن یادآوری (remind_time: رشته ISO؛ owner: نام کاربر صاحب)"""
+        reminder_id = self._next_id
+        self._next_id += 1
+        due = datetime.fromisoformat(remind_time).timestamp()
+        self.wheel.add(reminder_id, due, (due, owner or "", text, time.time()))
+        flush_scheduler.mark_dirty("proactive_reminders", self.save_reminders)
+        return f"✅ یادآوری اضافه شد: {text}"
+    
+    def cancel_reminder(self, reminder_id: int) -> bool:
+        """حذف یادآوری (زمان‌بندی شده یا سررسیده و تحویل نشده)"""
+        removed = self.wheel.cancel(reminder_id) is not None
+        if not removed:
+            for fired in self._fired.values():
+                if fired.pop(reminder_id, None) is not None:
+                    removed = True
+                    break
+        if removed:
+            self.stats["cancelled"] += 1
+            flush_scheduler.mark_dirty("proactive_reminders", self.save_reminders)
+        return removed
+    
+    def tick(self, now: float = None) -> int:
+        """جلو بردن چرخ؛ سررسیده‌ها به صف fired صاحبشان می‌روند (تعداد را برمی‌گرداند)"""
+        fired = self.wheel.advance(now)
+        for reminder_id, reminder in fired:
+            self._fired.setdefault(reminder[1], {})[reminder_id] = reminder
+        self.stats["fired"] += len(fired)
+        return len(fired)
+    
+    def fired_owners(self) -> List[str]:
+        """صاحبانی که یادآوری سررسیده تحویل نشده دارند"""
+        return [owner for owner, fired in self._fired.items() if fired]
+    
+    def take_fired(self, owners: Iterable[str]) -> List[Dict]:
+        """برداشتن یادآوری‌های سررسیده این صاحبان (و بی‌صاحب‌ها) برای تحویل"""
+        taken = []
+        for owner in set(owners) | {""}:
+            fired = self._fired.pop(owner, None)
+            if fired:
+                taken.extend(self._to_dict(reminder_id, reminder) for reminder_id, reminder in fired.items())
+        if taken:
+            taken.sort(key=lambda reminder: reminder["remind_time"])
+            self.stats["delivered"] += len(taken)
+            flush_scheduler.mark_dirty("proactive_reminders", self.save_reminders)
+        return taken
+    
+    @staticmethod
+    def _to_dict(reminder_id: int, reminder: tuple) -> Dict:
+        due, owner, text, created = reminder
+        return {
+            "id": reminder_id,
             "text": text,
-            "remind_time": remind_time,
-            "created": datetime.now().isoformat(),
-            "completed": False
+            "owner": owner or None,
+            "remind_time": datetime.fromtimestamp(due).isoformat(),
+            "created": datetime.fromtimestamp(created).isoformat(),
         }
-        
-        self.reminders["reminders"].append(reminder)
-        self.save_data()
-        return f"✅ یادآوری اضافه شد: {text}"
     
     def check_reminders(self):
-        """بررسی یادآوری‌ها"""
-        now = datetime.now()
-        active_reminders = []
-        
-        for reminder in self.reminders["reminders"]:
-            if not reminder["completed"]:
-                remind_time = datetime.fromisoformat(reminder["remind_time"])
-                if now >= remind_time:
-                    active_reminders.append(reminder)
-        
+        """بررسی یادآوری‌ها: سررسیده‌های تحویل نشده (بدون برداشتن از صف)"""
+        self.tick()
+        active_reminders = [self._to_dict(reminder_id, reminder)
+                            for fired in self._fired.values() for reminder_id, reminder in fired.items()]
+        active_reminders.sort(key=lambda reminder: reminder["remind_time"])
         return active_reminders
     
+    def get_reminder_stats(self) -> Dict:
+        """آمار چرخ یادآوری"""
+        return {
+            "scheduled": len(self.wheel),
+            "awaiting_delivery": sum(len(fired) for fired in self._fired.values()),
+            **self.stats,
+        }
+    
     def get_random_suggestion(self):
         """پیشنهاد تصادفی"""
         suggestion_types = [
@@ -170,10 +263,10 @@ class ProactiveAssistant:
             if len(self.suggestions["last_suggestions"]) > 10:
                 self.suggestions["last_suggestions"] = self.suggestions["last_suggestions"][-10:]
             
-            self.save_data()
+            self.save_suggestions()
             return f"💡 {suggestion}"
         
         return None
 
 # Instance سراسری
-proactive_assistant = ProactiveAssistant()
+proactive_assistant = lazy_singleton("proactive_assistant", ProactiveAssistant)
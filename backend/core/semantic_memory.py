@@ -0,0 +1,391 @@
+"""
+🧭 Semantic Memory - بازیابی معنایی پیام‌ها و حافظه‌ها
+متن‌ها در پس‌زمینه به صورت دسته‌ای embed می‌شوند (Ollama) و بردارها در یک
+فایل float32 فقط-افزودنی نگه داشته می‌شوند که با memmap و ضرب ماتریسی جستجو می‌شود.
+"""
+
+import os
+import queue
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+from backend.config.settings import settings
+from backend.core.bm25 import tokenize
+from backend.core.storage import load_json, save_json
+from backend.core.lazy import lazy_singleton
+
+# Optional imports
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import ollama
+    OLLAMA_AVAILABLE = True
+except ImportError:
+    OLLAMA_AVAILABLE = False
+
+class OllamaEmbedder:
+    """embedding دسته‌ای با endpoint ‏embed در Ollama"""
+
+    def __init__(self, model: str, host: str, timeout: float = 30, query_timeout: float = 2):
+        self.name = f"ollama:{model}"
+        self.model = model
+        self.client = ollama.Client(host=host, timeout=timeout)
+        # پرسش کاربر منتظر جواب است؛ embedder کند یعنی فقط BM25
+        self.query_client = ollama.Client(host=host, timeout=query_timeout)
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        response = self.client.embed(model=self.model, input=texts)
+        return np.asarray(response["embeddings"], dtype=np.float32)
+
+    def embed_query(self, text: str) -> "np.ndarray":
+        response = self.query_client.embed(model=self.model, input=[text])
+        return np.asarray(response["embeddings"][0], dtype=np.float32)
+
+class HashingEmbedder:
+    """embedding قطعی و محلی (hashing trick روی واژه‌ها و سه‌حرفی‌ها)
+
+    بدون شبکه؛ برای تست‌ها و وقتی Ollama در دسترس نیست.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.name = f"hashing:{dim}"
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                padded = f" {token} "
+                features = [token] + [padded[i:i + 3] for i in range(len(padded) - 2)]
+                for feature in features:
+                    digest = zlib.crc32(feature.encode('utf-8'))
+                    sign = 1.0 if digest & 0x80000000 else -1.0
+                    vectors[row, digest % self.dim] += sign
+        return vectors
+
+    def embed_query(self, text: str) -> "np.ndarray":
+        return self.embed([text])[0]
+
+class VectorStore:
+    """بردارهای نرمال شده در فایل فقط-افزودنی ‎.f32 با فایل شناسه‌های کنار آن
+
+    هر سطر یک کلید «نوع:شناسه» دارد؛ افزودن دوباره همان کلید سطر قبلی را
+    بی‌اعتبار می‌کند (مثلاً حافظه‌ای که مقدارش عوض شده).
+    """
+
+    def __init__(self, path: str, model: str):
+        self.path = path
+        self.model = model
+        self.vectors_file = path + ".f32"
+        self.ids_file = path + ".ids"
+        self.meta_file = path + ".json"
+        self.dim = 0
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}   # کلید → آخرین سطر
+        self._live = array('b')
+        self._kind_codes: Dict[str, int] = {}
+        self._kinds = array('B')
+        self._map = None
+        self._lock = threading.Lock()
+        self.load()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, key: str):
+        return key in self._rows
+
+    def load(self):
+        """بازخوانی فایل‌ها؛ دنباله ناقص (قطع وسط نوشتن) بریده می‌شود"""
+        meta = load_json(self.meta_file)
+        missing = not (os.path.exists(self.vectors_file) and os.path.exists(self.ids_file))
+        if meta is None or meta.get("model") != self.model or missing:
+            # مدل embedding عوض شده؛ بردارهای قبلی قابل مقایسه نیستند
+            self.reset()
+            return
+
+        self.dim = meta["dim"]
+        if self.dim == 0:
+            return
+        with open(self.ids_file, 'r', encoding='utf-8') as f:
+            keys = [line.rstrip("\n") for line in f if line.endswith("\n")]
+        rows = min(len(keys), os.path.getsize(self.vectors_file) // (self.dim * 4))
+        if rows < len(keys) or os.path.getsize(self.vectors_file) != rows * self.dim * 4:
+            with open(self.vectors_file, 'r+b') as f:
+                f.truncate(rows * self.dim * 4)
+            with open(self.ids_file, 'w', encoding='utf-8') as f:
+                f.writelines(key + "\n" for key in keys[:rows])
+        for key in keys[:rows]:
+            self._index_key(key)
+
+    def reset(self):
+        """شروع یک فروشگاه خالی"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        for path in (self.vectors_file, self.ids_file):
+            open(path, 'wb').close()
+        save_json(self.meta_file, {"model": self.model, "dim": 0})
+        self.dim = 0
+        self._keys = []
+        self._rows = {}
+        self._live = array('b')
+        self._kinds = array('B')
+        self._map = None
+
+    def _index_key(self, key: str):
+        previous = self._rows.get(key)
+        if previous is not None:
+            self._live[previous] = 0
+        kind = key.split(":", 1)[0]
+        code = self._kind_codes.setdefault(kind, len(self._kind_codes))
+        self._rows[key] = len(self._keys)
+        self._keys.append(key)
+        self._live.append(1)
+        self._kinds.append(code)
+
+    def append(self, keys: List[str], vectors: "np.ndarray"):
+        """افزودن بردارها (نرمال می‌شوند تا ضرب داخلی = شباهت کسینوسی)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1)
+
+        with self._lock:
+            if self.dim == 0:
+                self.dim = vectors.shape[1]
+                save_json(self.meta_file, {"model": self.model, "dim": self.dim})
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"بعد بردار {vectors.shape[1]} با فروشگاه ({self.dim}) یکی نیست")
+
+            # اول بردارها، بعد شناسه‌ها؛ شناسه بدون بردار هنگام load بریده می‌شود
+            with open(self.vectors_file, 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self.ids_file, 'a', encoding='utf-8') as f:
+                f.writelines(key + "\n" for key in keys)
+            for key in keys:
+                self._index_key(key)
+
+    def _matrix(self, rows: int):
+        """نگاشت حافظه‌ای سطرهای نوشته شده (فقط وقتی تعداد سطرها عوض شود)"""
+        if self._map is None or self._map.shape[0] != rows:
+            self._map = np.memmap(self.vectors_file, dtype=np.float32, mode='r', shape=(rows, self.dim))
+        return self._map
+
+    def search(self, vector, limit: int = 5, kind: Optional[str] = None) -> List[Tuple[str, float]]:
+        """نزدیک‌ترین کلیدها به صورت (کلید، شباهت کسینوسی)"""
+        with self._lock:
+            rows = len(self._keys)
+            if rows == 0 or limit <= 0:
+                return []
+            if kind is not None and kind not in self._kind_codes:
+                return []
+            matrix = self._matrix(rows)
+            live = np.frombuffer(self._live, dtype=np.int8)[:rows].astype(bool)
+            if kind is not None:
+                live &= np.frombuffer(self._kinds, dtype=np.uint8)[:rows] == self._kind_codes[kind]
+            keys = self._keys
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        scores = matrix @ (query / norm)
+        scores[~live] = -np.inf
+
+        count = int(live.sum())
+        limit = min(limit, count)
+        if limit == 0:
+            return []
+        if limit < rows:
+            top = np.argpartition(scores, rows - limit)[rows - limit:]
+        else:
+            top = np.arange(rows)
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(keys[i], float(scores[i])) for i in top if live[i]]
+
+    def get_stats(self) -> Dict:
+        return {
+            "vectors": len(self._rows),
+            "rows": len(self._keys),
+            "dim": self.dim,
+            "model": self.model,
+            "size_mb": round(len(self._keys) * self.dim * 4 / (1024 * 1024), 2)
+        }
+
+class SemanticMemory:
+    """صف embedding پس‌زمینه + فروشگاه بردار"""
+
+    query_cache_size = 32
+
+    def __init__(self, embedder, path: str = "data/vectors/semantic",
+                 batch_size: int = 32, batch_delay: float = 0.5, retry_after: float = 60,
+                 max_deferred: int = 10_000):
+        self.embedder = embedder
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.retry_after = retry_after
+        self.available = NUMPY_AVAILABLE and embedder is not None
+        self.store = VectorStore(path, embedder.name) if self.available else None
+        self._queue: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._retry_at = 0.0
+        # متن‌هایی که حین backoff رسیدند یا embedشان خطا داد؛ بعد از backoff دوباره
+        # امتحان می‌شوند (با سقف: قدیمی‌ترها کنار می‌روند و backfill بعدی برشان می‌دارد)
+        self._deferred: "deque[Tuple[str, str]]" = deque(maxlen=max_deferred)
+        # بردار پرسش‌های اخیر: یک پیام در هر نوبت چند بار جستجو می‌شود (پیام‌ها، حافظه‌ها، smart)
+        self._query_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_lock = threading.Lock()
+        self.stats = {"embedded": 0, "batches": 0, "failed": 0, "queries": 0, "query_cache_hits": 0}
+
+    def is_ready(self) -> bool:
+        """آماده جستجو: embedder کار می‌کند و برداری ذخیره شده"""
+        return self.available and len(self.store) > 0 and time.time() >= self._retry_at
+
+    def enqueue(self, key: str, text: str):
+        """زمان‌بندی embed یک متن با کلید «نوع:شناسه» (بدون انتظار)"""
+        if not self.available or not text or not text.strip():
+            return
+        self._queue.put((key, text))
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, daemon=True)
+                    self._worker.start()
+
+    def backfill(self, items: Iterable[Tuple[str, str]]) -> int:
+        """زمان‌بندی متن‌هایی که هنوز بردار ندارند"""
+        if not self.available:
+            return 0
+        count = 0
+        for key, text in items:
+            if key not in self.store:
+                self.enqueue(key, text)
+                count += 1
+        return count
+
+    def _run(self):
+        while True:
+            # با موارد عقب افتاده فقط تا پایان backoff منتظر پیام تازه می‌ماند
+            timeout = max(0.0, self._retry_at - time.time()) if self._deferred else None
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            queued = len(batch)
+            deadline = time.time() + self.batch_delay
+            while queued and len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            queued = len(batch)
+            try:
+                if time.time() >= self._retry_at:
+                    while self._deferred and len(batch) < self.batch_size:
+                        batch.append(self._deferred.popleft())
+                if batch:
+                    self._embed_batch(batch)
+            finally:
+                for _ in range(queued):
+                    self._queue.task_done()
+
+    def _embed_batch(self, batch: List[Tuple[str, str]]):
+        if time.time() < self._retry_at:
+            self._defer(batch)
+            return
+        try:
+            vectors = self.embedder.embed([text for _, text in batch])
+            self.store.append([key for key, _ in batch], vectors)
+            self.stats["embedded"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:
+            # سرویس embedding در دسترس نیست؛ تا مدتی تلاش نکن
+            self._retry_at = time.time() + self.retry_after
+            self._defer(batch)
+            print(f"⚠️ خطا در embedding: {e}")
+
+    def _defer(self, batch: List[Tuple[str, str]]):
+        """نگه داشتن دسته برای تلاش بعد از backoff؛ با پر شدن سقف قدیمی‌ترین‌ها کنار می‌روند"""
+        overflow = len(self._deferred) + len(batch) - self._deferred.maxlen
+        if overflow > 0:
+            self.stats["failed"] += overflow
+        self._deferred.extend(batch)
+
+    def flush(self):
+        """انتظار تا خالی شدن صف"""
+        self._queue.join()
+
+    def embed_query(self, text: str) -> Optional["np.ndarray"]:
+        """بردار پرسش (کش شده)؛ None اگر embedder آماده نیست یا جواب نداد
+
+        مسیرهای async می‌توانند این را با asyncio.to_thread از قبل صدا بزنند
+        تا جستجوهای بعدی همان نوبت بدون انتظار از کش بخوانند.
+        """
+        if not self.is_ready() or not text.strip():
+            return None
+        with self._query_lock:
+            vector = self._query_vectors.get(text)
+            if vector is not None:
+                self._query_vectors.move_to_end(text)
+                self.stats["query_cache_hits"] += 1
+                return vector
+        try:
+            vector = self.embedder.embed_query(text)
+        except Exception as e:
+            # timeout کوتاه پرسش: تا retry_after فقط BM25
+            self._retry_at = time.time() + self.retry_after
+            print(f"⚠️ خطا در embedding پرسش: {e}")
+            return None
+        with self._query_lock:
+            self._query_vectors[text] = vector
+            if len(self._query_vectors) > self.query_cache_size:
+                self._query_vectors.popitem(last=False)
+        return vector
+
+    def search(self, text: str, limit: int = 5, kind: Optional[str] = None,
+               min_score: Optional[float] = None) -> List[Tuple[str, float]]:
+        """نزدیک‌ترین متن‌های ذخیره شده به صورت (شناسه، شباهت)"""
+        vector = self.embed_query(text)
+        if vector is None:
+            return []
+        self.stats["queries"] += 1
+
+        if min_score is None:
+            min_score = settings.semantic_min_score
+        hits = self.store.search(vector, limit, kind)
+        return [(key.split(":", 1)[1], score) for key, score in hits if score >= min_score]
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["available"] = self.available
+        stats["pending"] = self._queue.qsize()
+        stats["deferred"] = len(self._deferred)
+        if self.store is not None:
+            stats.update(self.store.get_stats())
+        return stats
+
+def create_embedder():
+    """embedder پیکربندی شده؛ None اگر بازیابی معنایی غیرفعال باشد"""
+    if not settings.semantic_memory or not NUMPY_AVAILABLE:
+        return None
+    if settings.embedding_model == "hashing":
+        return HashingEmbedder()
+    if not OLLAMA_AVAILABLE:
+        return None
+    return OllamaEmbedder(settings.embedding_model, settings.ollama_host,
+                          query_timeout=settings.semantic_query_timeout)
+
+# نمونه سراسری
+semantic_memory = lazy_singleton("semantic_memory", lambda: SemanticMemory(
+    create_embedder(), batch_size=settings.embedding_batch_size
+))
@@ -4,23 +4,45 @@
 
 import json
 import os
+import heapq
+import threading
+from array import array
+from bisect import bisect_left
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
-import re
 from collections import defaultdict
+from backend.core.storage import load_json, save_json
+from backend.core.lazy import lazy_singleton
+from backend.core.semantic_memory import semantic_memory
+from backend.core.text_analyzer import text_analyzer
+
+STOP_WORDS = {'که', 'در', 'از', 'به', 'با', 'را', 'و', 'یا', 'این', 'آن', 'چه', 'چی', 'کی', 'کجا'}
+
+text_analyzer.register("topic", {
+    'برنامه‌نویسی': ['کد', 'برنامه', 'پایتون', 'جاوا', 'اسکریپت', 'api', 'database'],
+    'تکنولوژی': ['کامپیوتر', 'موبایل', 'اینترنت', 'سایت', 'اپلیکیشن'],
+    'علم': ['ریاضی', 'فیزیک', 'شیمی', 'زیست', 'علمی'],
+    'زندگی': ['کار', 'خانواده', 'دوست', 'زندگی', 'روزانه'],
+    'سرگرمی': ['فیلم', 'موزیک', 'بازی', 'کتاب', 'ورزش']
+})
+text_analyzer.register("request", {"درخواست": ['لطفا', 'میشه', 'کمک']})
 
 class SmartMemory:
     def __init__(self):
         self.memory_file = "data/context/smart_memory.json"
         self.patterns_file = "data/context/user_patterns.json"
+        # ژورنال فقط-افزودنی: هر مکالمه یک خط، snapshot به صورت دوره‌ای فشرده می‌شود
+        self.journal_file = "data/context/smart_memory.journal"
+        self.compact_every = 200  # تعداد رویداد ژورنال قبل از فشرده‌سازی
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._compacting = False
         self.load_memory()
         
     def load_memory(self):
-        """بارگذاری حافظه هوشمند"""
-        if os.path.exists(self.memory_file):
-            with open(self.memory_file, 'r', encoding='utf-8') as f:
-                self.memory = json.load(f)
-        else:
+        """بارگذاری حافظه هوشمند (snapshot + بازپخش ژورنال)"""
+        self.memory = load_json(self.memory_file)
+        if self.memory is None:
             self.memory = {
                 "conversations": [],
                 "topics": {},
@@ -29,25 +51,153 @@ class SmartMemory:
                 "context_links": []
             }
             
-        if os.path.exists(self.patterns_file):
-            with open(self.patterns_file, 'r', encoding='utf-8') as f:
-                self.patterns = json.load(f)
-        else:
+        self.patterns = load_json(self.patterns_file)
+        if self.patterns is None:
             self.patterns = {
                 "frequent_topics": {},
                 "time_patterns": {},
                 "mood_patterns": {},
                 "question_types": {}
             }
+        
+        self._journal_seq = max(self.memory.get("journal_seq", 0), self.patterns.get("journal_seq", 0))
+        self._journal_count = 0
+        self.build_index()
+        self.replay_journal()
     
-    def save_memory(self):
-        """ذخیره حافظه"""
-        os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
-        with open(self.memory_file, 'w', encoding='utf-8') as f:
-            json.dump(self.memory, f, ensure_ascii=False, indent=2)
+    def build_index(self):
+        """ساخت ایندکس معکوس کلمه کلیدی/موضوع → شناسه مکالمه
+
+        شناسه مکالمه = first_id + جایگاه در memory["conversations"]؛
+        لیست‌های ایندکس صعودی هستند و زمان هر مکالمه به صورت epoch نگه داشته می‌شود.
+        """
+        self._first_id = 0
+        self._epochs = array('d')
+        self._keyword_postings: Dict[str, List[int]] = {}
+        self._topic_postings: Dict[str, List[int]] = {}
+        self._seq_ids: Dict[int, int] = {}  # شماره ژورنال → شناسه مکالمه (برای نتایج معنایی)
+        for position, conversation in enumerate(self.memory["conversations"]):
+            self._index_conversation(conversation, position)
+    
+    def _index_conversation(self, conversation: Dict, conv_id: int):
+        """افزودن یک مکالمه به ایندکس"""
+        self._epochs.append(datetime.fromisoformat(conversation["timestamp"]).timestamp())
+        for keyword in set(conversation["keywords"]):
+            self._keyword_postings.setdefault(keyword, []).append(conv_id)
+        self._topic_postings.setdefault(conversation["topic"], []).append(conv_id)
+        if "seq" in conversation:
+            self._seq_ids[conversation["seq"]] = conv_id
+    
+    def _drop_oldest(self):
+        """حذف قدیمی‌ترین مکالمه از حافظه و ایندکس"""
+        conversation = self.memory["conversations"].pop(0)
+        for postings, keys in ((self._keyword_postings, set(conversation["keywords"])),
+                               (self._topic_postings, [conversation["topic"]])):
+            for key in keys:
+                ids = postings[key]
+                del ids[0]
+                if not ids:
+                    del postings[key]
+        del self._epochs[0]
+        self._seq_ids.pop(conversation.get("seq"), None)
+        self._first_id += 1
+    
+    def replay_journal(self):
+        """بازپخش رویدادهایی که هنوز در snapshot نیستند"""
+        for path in (self.journal_file + ".old", self.journal_file):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # خط ناقص (مثلاً قطع برق وسط نوشتن)
+                        continue
+                    if event.get("type") == "conversation":
+                        self._apply_conversation(event["data"], event["seq"])
+                        self._journal_count += 1
+    
+    def _apply_conversation(self, conversation: Dict, seq: int):
+        """اعمال یک رویداد مکالمه روی وضعیت حافظه"""
+        if seq > self.memory.get("journal_seq", 0):
+            self.memory["conversations"].append(conversation)
+            self._index_conversation(conversation, self._first_id + len(self.memory["conversations"]) - 1)
+            
+            # آپدیت آمار موضوعات
+            topic = conversation["topic"]
+            if topic:
+                self.memory["topics"][topic] = self.memory["topics"].get(topic, 0) + 1
+                
+            # آپدیت کلمات کلیدی
+            for keyword in conversation["keywords"]:
+                self.memory["keywords"][keyword] = self.memory["keywords"].get(keyword, 0) + 1
             
-        with open(self.patterns_file, 'w', encoding='utf-8') as f:
-            json.dump(self.patterns, f, ensure_ascii=False, indent=2)
+            # نگهداری فقط 1000 مکالمه اخیر
+            while len(self.memory["conversations"]) > 1000:
+                self._drop_oldest()
+            
+            self.memory["journal_seq"] = seq
+        
+        if seq > self.patterns.get("journal_seq", 0):
+            # تحلیل الگوها
+            self.analyze_patterns(conversation["user_input"], conversation["timestamp"])
+            self.patterns["journal_seq"] = seq
+        
+        self._journal_seq = max(self._journal_seq, seq)
+    
+    def save_memory(self):
+        """ذخیره کامل حافظه (snapshot) و خالی کردن ژورنال"""
+        with self._write_lock:
+            with self._lock:
+                memory, patterns = self._rotate_journal()
+            self._write_snapshot(memory, patterns)
+    
+    def _rotate_journal(self):
+        """کپی سبک از وضعیت و کنار گذاشتن ژورنال فعلی (زیر قفل)"""
+        memory = dict(self.memory)
+        memory["conversations"] = list(self.memory["conversations"])
+        memory["topics"] = dict(self.memory["topics"])
+        memory["keywords"] = dict(self.memory["keywords"])
+        patterns = {k: dict(v) if isinstance(v, dict) else v for k, v in self.patterns.items()}
+        
+        old_file = self.journal_file + ".old"
+        if os.path.exists(self.journal_file):
+            if os.path.exists(old_file):
+                # فشرده‌سازی قبلی کامل نشده؛ ژورنال را به انتهای آن اضافه کن
+                with open(self.journal_file, 'r', encoding='utf-8') as src, \
+                        open(old_file, 'a', encoding='utf-8') as dst:
+                    dst.write(src.read())
+                os.remove(self.journal_file)
+            else:
+                os.replace(self.journal_file, old_file)
+        self._journal_count = 0
+        return memory, patterns
+    
+    def _write_snapshot(self, memory: Dict, patterns: Dict):
+        """نوشتن اتمیک snapshot و حذف ژورنال فشرده شده"""
+        save_json(self.memory_file, memory)
+        save_json(self.patterns_file, patterns)
+        
+        old_file = self.journal_file + ".old"
+        if os.path.exists(old_file):
+            os.remove(old_file)
+    
+    def compact(self):
+        """فشرده‌سازی ژورنال در snapshot"""
+        try:
+            self.save_memory()
+        except Exception as e:
+            print(f"❌ خطا در فشرده‌سازی حافظه: {e}")
+        finally:
+            self._compacting = False
+    
+    def _append_journal(self, event: Dict):
+        """افزودن یک رویداد به ژورنال - هزینه O(1)"""
+        os.makedirs(os.path.dirname(self.journal_file), exist_ok=True)
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._journal_count += 1
     
     def add_conversation(self, user_input: str, ai_response: str, context: Dict = None):
         """اضافه کردن مکالمه جدید"""
@@ -66,52 +216,37 @@ class SmartMemory:
             "context": context or {}
         }
         
-        self.memory["conversations"].append(conversation)
-        
-        # آپدیت آمار موضوعات
-        if topic:
-            self.memory["topics"][topic] = self.memory["topics"].get(topic, 0) + 1
+        with self._lock:
+            seq = self._journal_seq + 1
+            conversation["seq"] = seq
+            self._apply_conversation(conversation, seq)
+            self._append_journal({"seq": seq, "type": "conversation", "data": conversation})
             
-        # آپدیت کلمات کلیدی
-        for keyword in keywords:
-            self.memory["keywords"][keyword] = self.memory["keywords"].get(keyword, 0) + 1
-            
-        # تحلیل الگوها
-        self.analyze_patterns(user_input, timestamp)
+            # فشرده‌سازی در پس‌زمینه
+            if self._journal_count >= self.compact_every and not self._compacting:
+                self._compacting = True
+                threading.Thread(target=self.compact, daemon=True).start()
         
-        # نگهداری فقط 1000 مکالمه اخیر
-        if len(self.memory["conversations"]) > 1000:
-            self.memory["conversations"] = self.memory["conversations"][-1000:]
-            
-        self.save_memory()
+        semantic_memory.enqueue(f"smart:{seq}", user_input)
+    
+    def backfill_vectors(self) -> int:
+        """زمان‌بندی embed مکالمه‌هایی که هنوز بردار ندارند (مثلاً embedder خاموش بوده)"""
+        with self._lock:
+            items = [(f"smart:{conversation['seq']}", conversation["user_input"])
+                     for conversation in self.memory["conversations"] if "seq" in conversation]
+        return semantic_memory.backfill(items)
     
     def extract_keywords(self, text: str) -> List[str]:
-        """استخراج کلمات کلیدی"""
-        # حذف کلمات رایج
-        stop_words = {'که', 'در', 'از', 'به', 'با', 'را', 'و', 'یا', 'این', 'آن', 'چه', 'چی', 'کی', 'کجا'}
-        
-        # استخراج کلمات
-        words = re.findall(r'\b\w+\b', text.lower())
-        keywords = [w for w in words if len(w) > 2 and w not in stop_words]
+        """استخراج کلمات کلیدی (واژه‌های یکسان‌سازی شده بدون کلمات رایج)"""
+        tokens = text_analyzer.analyze(text).tokens
+        keywords = [w for w in tokens if len(w) > 2 and w not in STOP_WORDS]
         
         return keywords[:10]  # حداکثر 10 کلمه
     
     def detect_topic(self, text: str) -> str:
-        """تشخیص موضوع"""
-        topics = {
-            'برنامه‌نویسی': ['کد', 'برنامه', 'پایتون', 'جاوا', 'اسکریپت', 'api', 'database'],
-            'تکنولوژی': ['کامپیوتر', 'موبایل', 'اینترنت', 'سایت', 'اپلیکیشن'],
-            'علم': ['ریاضی', 'فیزیک', 'شیمی', 'زیست', 'علمی'],
-            'زندگی': ['کار', 'خانواده', 'دوست', 'زندگی', 'روزانه'],
-            'سرگرمی': ['فیلم', 'موزیک', 'بازی', 'کتاب', 'ورزش']
-        }
-        
-        text_lower = text.lower()
-        for topic, keywords in topics.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return topic
-                
-        return 'عمومی'
+        """تشخیص موضوع (اولین موضوع منطبق به ترتیب ثبت)"""
+        topics = text_analyzer.analyze(text).categories("topic")
+        return topics[0] if topics else 'عمومی'
     
     def analyze_patterns(self, user_input: str, timestamp: str):
         """تحلیل الگوهای کاربر"""
@@ -124,7 +259,7 @@ class SmartMemory:
         # نوع سوال
         if '؟' in user_input:
             question_type = 'سوال'
-        elif any(word in user_input.lower() for word in ['لطفا', 'میشه', 'کمک']):
+        elif text_analyzer.analyze(user_input).has("request"):
             question_type = 'درخواست'
         else:
             question_type = 'گفتگو'
@@ -132,40 +267,74 @@ class SmartMemory:
         self.patterns["question_types"][question_type] = self.patterns["question_types"].get(question_type, 0) + 1
     
     def get_relevant_context(self, current_input: str, limit: int = 5) -> List[Dict]:
-        """یافتن مکالمات مرتبط"""
+        """یافتن مکالمات مرتبط در کل تاریخچه با ایندکس معکوس
+
+        امتیاز: 2 به ازای هر کلمه کلیدی مشترک، 3 برای موضوع مشترک،
+        2 برای کمتر از 7 روز و 1 برای کمتر از 30 روز؛ در امتیاز برابر، جدیدتر.
+        اگر بازیابی معنایی فعال باشد مکالمات هم‌معنی (بدون کلمه مشترک) هم
+        نامزد می‌شوند و 4 × شباهت کسینوسی امتیاز می‌گیرند.
+        """
         current_keywords = set(self.extract_keywords(current_input))
         current_topic = self.detect_topic(current_input)
+        semantic_hits = semantic_memory.search(current_input, limit, kind="smart")
         
-        relevant_conversations = []
-        
-        for conv in reversed(self.memory["conversations"][-100:]):  # 100 مکالمه اخیر
-            score = 0
+        with self._lock:
+            first_id = self._first_id
+            epochs = self._epochs
+            now = datetime.now().timestamp()
+            week_ago = now - 7 * 86400
+            month_ago = now - 30 * 86400
             
-            # امتیاز بر اساس کلمات مشترک
-            common_keywords = set(conv["keywords"]) & current_keywords
-            score += len(common_keywords) * 2
+            # مکالماتی که کلمه کلیدی مشترک دارند
+            keyword_hits = defaultdict(int)
+            for keyword in current_keywords:
+                for conv_id in self._keyword_postings.get(keyword, ()):
+                    keyword_hits[conv_id] += 1
             
-            # امتیاز بر اساس موضوع مشترک
-            if conv["topic"] == current_topic:
-                score += 3
-                
-            # امتیاز بر اساس زمان (مکالمات اخیر بیشتر)
-            days_ago = (datetime.now() - datetime.fromisoformat(conv["timestamp"])).days
-            if days_ago < 7:
-                score += 2
-            elif days_ago < 30:
-                score += 1
-                
-            if score > 0:
-                relevant_conversations.append({
-                    "conversation": conv,
-                    "score": score
-                })
-        
-        # مرتب‌سازی بر اساس امتیاز
-        relevant_conversations.sort(key=lambda x: x["score"], reverse=True)
+            # بقیه فقط امتیاز موضوع و زمان می‌گیرند که با جدیدتر بودن بیشتر می‌شود،
+            # پس از هر گروه فقط limit مکالمه جدیدتر می‌توانند در نتیجه باشند
+            candidates = dict(keyword_hits)
+            similarities = {}
+            for seq, similarity in semantic_hits:
+                conv_id = self._seq_ids.get(int(seq))
+                if conv_id is not None:
+                    similarities[conv_id] = similarity
+                    candidates.setdefault(conv_id, 0)
+            topic_ids = self._topic_postings.get(current_topic, [])
+            taken = 0
+            for conv_id in reversed(topic_ids):
+                if taken >= limit:
+                    break
+                if conv_id not in candidates:
+                    candidates[conv_id] = 0
+                    taken += 1
+            
+            recent_start = first_id + bisect_left(epochs, month_ago)
+            taken = 0
+            for conv_id in range(first_id + len(epochs) - 1, recent_start - 1, -1):
+                if taken >= limit:
+                    break
+                if conv_id not in candidates:
+                    candidates[conv_id] = 0
+                    taken += 1
+            
+            scored = []
+            conversations = self.memory["conversations"]
+            for conv_id, common_keywords in candidates.items():
+                conversation = conversations[conv_id - first_id]
+                score = common_keywords * 2 + 4 * similarities.get(conv_id, 0)
+                if conversation["topic"] == current_topic:
+                    score += 3
+                epoch = epochs[conv_id - first_id]
+                if epoch > week_ago:
+                    score += 2
+                elif epoch > month_ago:
+                    score += 1
+                if score > 0:
+                    scored.append((score, conv_id, conversation))
         
-        return [item["conversation"] for item in relevant_conversations[:limit]]
+        best = heapq.nlargest(limit, scored, key=lambda item: (item[0], item[1]))
+        return [conversation for _, _, conversation in best]
     
     def get_user_insights(self) -> Dict:
         """تحلیل رفتار کاربر"""
@@ -214,4 +383,4 @@ class SmartMemory:
         return suggestions[:5]
 
 # نمونه استفاده
-smart_memory = SmartMemory()
+smart_memory = lazy_singleton("smart_memory", SmartMemory)
@@ -1,13 +1,38 @@
 """
 🔔 Smart Notifications - اعلان‌های هوشمند Fox
+اعلان‌های ارسال نشده در یک min-heap بر اساس زمان برنامه‌ریزی (epoch از پیش
+پارس شده) نگه داشته می‌شوند؛ تسک پس‌زمینه وب اعلان‌های سررسیده را با
+deliver_due برمی‌دارد و به websocketهای متصل می‌فرستد. اعلان‌های قدیمی با
+compact به صورت خودکار پاک می‌شوند.
 """
 
+import heapq
+import itertools
 import json
 import os
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import asyncio
 from dataclasses import dataclass
+from backend.core.flush_scheduler import flush_scheduler
+from backend.core.storage import load_json, save_json
+from backend.core.lazy import lazy_singleton
+from backend.config.settings import settings
+
+# نوع اعلان → کلید تنظیمات notification_types
+TYPE_SETTINGS = {
+    "reminder": "reminders",
+    "suggestion": "suggestions",
+    "follow_up": "follow_ups",
+    "achievement": "achievements",
+}
+
+def _parse_clock(value: str) -> int:
+    """"HH:MM" → ثانیه از نیمه‌شب"""
+    hour, minute = value.split(":")
+    return int(hour) * 3600 + int(minute) * 60
 
 @dataclass
 class Notification:
@@ -23,25 +48,30 @@ class Notification:
     user_id: str = "default"
 
 class SmartNotifications:
-    def __init__(self):
+    def __init__(self, retention_days: int = None, max_items: int = None):
         self.notifications_file = "data/notifications/notifications.json"
         self.settings_file = "data/notifications/settings.json"
+        self.retention_days = settings.notification_retention_days if retention_days is None else retention_days
+        self.max_items = settings.notification_max_items if max_items is None else max_items
+        # (زمان سررسید epoch، ترتیب، اعلان) برای اعلان‌های ارسال نشده
+        self._heap: List[Tuple[float, int, Notification]] = []
+        self._by_id: Dict[str, Notification] = {}
+        self._seq = itertools.count()
+        self.stats = {"delivered": 0, "compacted": 0}
         self.load_data()
         
     def load_data(self):
         """بارگذاری اعلان‌ها و تنظیمات"""
         # بارگذاری اعلان‌ها
         if os.path.exists(self.notifications_file):
-            with open(self.notifications_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.notifications = [Notification(**notif) for notif in data]
+            data = load_json(self.notifications_file)
+            self.notifications = [Notification(**notif) for notif in data]
         else:
             self.notifications = []
             
         # بارگذاری تنظیمات
         if os.path.exists(self.settings_file):
-            with open(self.settings_file, 'r', encoding='utf-8') as f:
-                self.settings = json.load(f)
+            self.settings = load_json(self.settings_file)
         else:
             self.settings = {
                 "enabled": True,
@@ -58,11 +88,37 @@ class SmartNotifications:
                     "learning_reminders": True
                 }
             }
+        self._parse_settings()
+        self._rebuild_index()
+        self._compact_at = self.max_items
+    
+    def _parse_settings(self):
+        """ساعات سکوت یک بار پارس می‌شوند (نه برای هر اعلان)"""
+        quiet_hours = self.settings["quiet_hours"]
+        self._quiet = (_parse_clock(quiet_hours["start"]), _parse_clock(quiet_hours["end"]))
+    
+    def _rebuild_index(self):
+        """ساخت دوباره heap اعلان‌های ارسال نشده و نگاشت id"""
+        self._by_id = {n.id: n for n in self.notifications}
+        # نوع → آخرین اعلان ارسال نشده (مثلاً follow-up در انتظار، بدون پیمایش heap)
+        self._pending_by_type = {n.type: n for n in self.notifications if not n.is_sent}
+        self._heap = [
+            (datetime.fromisoformat(n.scheduled_time).timestamp(), next(self._seq), n)
+            for n in self.notifications if not n.is_sent
+        ]
+        heapq.heapify(self._heap)
+    
+    def _schedule(self, notification: Notification, due: float):
+        self.notifications.append(notification)
+        self._by_id[notification.id] = notification
+        self._pending_by_type[notification.type] = notification
+        heapq.heappush(self._heap, (due, next(self._seq), notification))
+        if len(self.notifications) > self._compact_at:
+            self.compact()
+        flush_scheduler.mark_dirty("smart_notifications", self.save_data)
     
     def save_data(self):
         """ذخیره اعلان‌ها و تنظیمات"""
-        os.makedirs(os.path.dirname(self.notifications_file), exist_ok=True)
-        
         # ذخیره اعلان‌ها
         notifications_data = [
             {
@@ -80,19 +136,19 @@ class SmartNotifications:
             for n in self.notifications
         ]
         
-        with open(self.notifications_file, 'w', encoding='utf-8') as f:
-            json.dump(notifications_data, f, ensure_ascii=False, indent=2)
+        save_json(self.notifications_file, notifications_data)
             
         # ذخیره تنظیمات
-        with open(self.settings_file, 'w', encoding='utf-8') as f:
-            json.dump(self.settings, f, ensure_ascii=False, indent=2)
+        save_json(self.settings_file, self.settings)
     
     def create_notification(self, title: str, message: str, notif_type: str, 
                           priority: int = 2, schedule_after_minutes: int = 0) -> str:
         """ایجاد اعلان جدید"""
-        notification_id = f"notif_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        now = datetime.now()
+        # پسوند تصادفی: چند اعلان در یک ثانیه id یکسان نمی‌گیرند
+        notification_id = f"notif_{now.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
         
-        scheduled_time = datetime.now() + timedelta(minutes=schedule_after_minutes)
+        scheduled_time = now + timedelta(minutes=schedule_after_minutes)
         
         notification = Notification(
             id=notification_id,
@@ -101,11 +157,10 @@ class SmartNotifications:
             type=notif_type,
             priority=priority,
             scheduled_time=scheduled_time.isoformat(),
-            created_time=datetime.now().isoformat()
+            created_time=now.isoformat()
         )
         
-        self.notifications.append(notification)
-        self.save_data()
+        self._schedule(notification, scheduled_time.timestamp())
         
         return notification_id
     
@@ -121,6 +176,13 @@ class SmartNotifications:
         import random
         message = random.choice(follow_ups)
         
+        # هر پیام طولانی follow-up جدید نمی‌سازد: پیام follow-up در انتظار به‌روز می‌شود
+        pending = self._pending_by_type.get("follow_up")
+        if pending is not None and not pending.is_sent:
+            pending.message = message
+            flush_scheduler.mark_dirty("smart_notifications", self.save_data)
+            return
+        
         self.create_notification(
             title="🤔 سوال تکمیلی",
             message=message,
@@ -172,8 +234,9 @@ class SmartNotifications:
                 created_time=datetime.now().isoformat()
             )
             
-            self.notifications.append(notification)
-            self.save_data()
+            if notification.id in self._by_id:
+                return  # خلاصه امروز قبلاً برنامه‌ریزی شده
+            self._schedule(notification, tomorrow_morning.timestamp())
     
     def create_achievement_notification(self, achievement: str, description: str):
         """اعلان دستاورد"""
@@ -185,78 +248,144 @@ class SmartNotifications:
             schedule_after_minutes=0  # فوری
         )
     
-    def get_pending_notifications(self) -> List[Notification]:
-        """دریافت اعلان‌های در انتظار"""
-        now = datetime.now()
-        pending = []
+    def get_pending_notifications(self, now: datetime = None) -> List[Notification]:
+        """دریافت اعلان‌های در انتظار (سررسیده و مجاز، به ترتیب زمان)"""
+        now = now or datetime.now()
+        now_ts = now.timestamp()
+        # حالت معمول: نزدیک‌ترین اعلان هنوز سررسید نشده
+        if not self._heap or self._heap[0][0] > now_ts:
+            return []
+        
+        # فقط سررسیده‌ها از heap برداشته و برگردانده می‌شوند: O(k log n) به جای مرتب‌سازی کل heap
+        due = []
+        while self._heap and self._heap[0][0] <= now_ts:
+            entry = heapq.heappop(self._heap)
+            if not entry[2].is_sent:  # ارسال شده‌ها همین‌جا کنار گذاشته می‌شوند
+                due.append(entry)
+        for entry in due:
+            heapq.heappush(self._heap, entry)
+        return [notification for _, _, notification in due if self.should_send_notification(notification, now)]
+    
+    def next_due_in(self, now: float = None) -> Optional[float]:
+        """ثانیه تا سررسید نزدیک‌ترین اعلان ارسال نشده (None = هیچ)"""
+        now = time.time() if now is None else now
+        while self._heap and self._heap[0][2].is_sent:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - now)
+    
+    def deliver_due(self, now: datetime = None) -> List[Notification]:
+        """برداشتن اعلان‌های سررسیده از heap و علامت‌گذاری به عنوان ارسال شده
         
-        for notification in self.notifications:
-            if (not notification.is_sent and 
-                datetime.fromisoformat(notification.scheduled_time) <= now and
-                self.should_send_notification(notification)):
-                pending.append(notification)
-                
-        return pending
+        در ساعات سکوت (یا وقتی اعلان‌ها خاموش است) چیزی برداشته نمی‌شود؛
+        اعلان‌های نوع غیرفعال کنار گذاشته می‌شوند و با update_settings برمی‌گردند.
+        """
+        now = now or datetime.now()
+        now_ts = now.timestamp()
+        if not self._heap or self._heap[0][0] > now_ts:
+            return []
+        if not self.settings["enabled"] or self._in_quiet_hours(now):
+            return []
+        
+        delivered = []
+        while self._heap and self._heap[0][0] <= now_ts:
+            _, _, notification = heapq.heappop(self._heap)
+            if notification.is_sent or not self._type_enabled(notification):
+                continue
+            notification.is_sent = True
+            delivered.append(notification)
+        
+        if delivered:
+            self.stats["delivered"] += len(delivered)
+            flush_scheduler.mark_dirty("smart_notifications", self.save_data)
+        return delivered
+    
+    def _type_enabled(self, notification: Notification) -> bool:
+        key = TYPE_SETTINGS.get(notification.type, notification.type)
+        return self.settings["notification_types"].get(key, True)
+    
+    def _in_quiet_hours(self, now: datetime) -> bool:
+        quiet_start, quiet_end = self._quiet
+        current = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+        if quiet_start > quiet_end:  # شب تا صبح
+            return current >= quiet_start or current <= quiet_end
+        return quiet_start <= current <= quiet_end  # روز عادی
     
-    def should_send_notification(self, notification: Notification) -> bool:
+    def should_send_notification(self, notification: Notification, now: datetime = None) -> bool:
         """بررسی اینکه آیا اعلان باید ارسال شود"""
         if not self.settings["enabled"]:
             return False
             
-        if not self.settings["notification_types"].get(notification.type, True):
+        if not self._type_enabled(notification):
             return False
             
         # بررسی ساعات سکوت
-        now = datetime.now()
-        quiet_start = datetime.strptime(self.settings["quiet_hours"]["start"], "%H:%M").time()
-        quiet_end = datetime.strptime(self.settings["quiet_hours"]["end"], "%H:%M").time()
-        
-        current_time = now.time()
-        
-        if quiet_start > quiet_end:  # شب تا صبح
-            if current_time >= quiet_start or current_time <= quiet_end:
-                return False
-        else:  # روز عادی
-            if quiet_start <= current_time <= quiet_end:
-                return False
-                
-        return True
+        return not self._in_quiet_hours(now or datetime.now())
     
     def mark_as_sent(self, notification_id: str):
-        """علامت‌گذاری به عنوان ارسال شده"""
-        for notification in self.notifications:
-            if notification.id == notification_id:
-                notification.is_sent = True
-                break
-        self.save_data()
+        """علامت‌گذاری به عنوان ارسال شده (ورودی heap بعداً کنار گذاشته می‌شود)"""
+        notification = self._by_id.get(notification_id)
+        if notification is not None:
+            notification.is_sent = True
+            flush_scheduler.mark_dirty("smart_notifications", self.save_data)
     
     def mark_as_read(self, notification_id: str):
         """علامت‌گذاری به عنوان خوانده شده"""
-        for notification in self.notifications:
-            if notification.id == notification_id:
-                notification.is_read = True
-                break
-        self.save_data()
+        notification = self._by_id.get(notification_id)
+        if notification is not None:
+            notification.is_read = True
+            flush_scheduler.mark_dirty("smart_notifications", self.save_data)
     
     def get_unread_notifications(self) -> List[Notification]:
         """دریافت اعلان‌های خوانده نشده"""
         return [n for n in self.notifications if n.is_sent and not n.is_read]
     
-    def cleanup_old_notifications(self, days: int = 30):
-        """پاک‌سازی اعلان‌های قدیمی"""
-        cutoff_date = datetime.now() - timedelta(days=days)
+    def compact(self, now: datetime = None, retention_days: int = None) -> int:
+        """پاک‌سازی خودکار: اعلان‌های قدیمی‌تر از دوره نگهداری و مازاد max_items
+        
+        اعلان‌های ارسال شده بعد از retention_days (از زمان ساخت) و اعلان‌های
+        ارسال نشده‌ای که سررسیدشان بیش از retention_days گذشته حذف می‌شوند؛ اگر
+        هنوز بیش از max_items مانده باشد، قدیمی‌ترین ارسال شده‌ها (اول خوانده
+        شده‌ها) حذف می‌شوند. اعلان‌های آینده هیچ‌وقت حذف نمی‌شوند.
+        """
+        now = now or datetime.now()
+        retention_days = self.retention_days if retention_days is None else retention_days
+        cutoff = (now - timedelta(days=retention_days)).isoformat()
+        before = len(self.notifications)
         
-        self.notifications = [
-            n for n in self.notifications 
-            if datetime.fromisoformat(n.created_time) > cutoff_date
+        # رشته‌های ISO محلی به ترتیب زمان مرتب می‌شوند (بدون پارس)
+        kept = [
+            n for n in self.notifications
+            if (n.created_time if n.is_sent else n.scheduled_time) > cutoff
         ]
+        excess = len(kept) - self.max_items
+        if excess > 0:
+            delivered = sorted((n for n in kept if n.is_sent), key=lambda n: (not n.is_read, n.created_time))
+            dropped = {id(n) for n in delivered[:excess]}
+            kept = [n for n in kept if id(n) not in dropped]
         
-        self.save_data()
+        self.notifications = kept
+        removed = before - len(kept)
+        if removed:
+            self._rebuild_index()
+            self.stats["compacted"] += removed
+            flush_scheduler.mark_dirty("smart_notifications", self.save_data)
+        # اگر اعلان‌های آینده بیش از سقف باشند، در هر ساخت دوباره compact نمی‌شود
+        self._compact_at = max(self.max_items, int(len(kept) * 1.25))
+        return removed
+    
+    def cleanup_old_notifications(self, days: int = 30):
+        """پاک‌سازی اعلان‌های قدیمی"""
+        return self.compact(retention_days=days)
     
     def update_settings(self, new_settings: Dict):
         """آپدیت تنظیمات"""
         self.settings.update(new_settings)
-        self.save_data()
+        self._parse_settings()
+        # اعلان‌های نوع تازه فعال شده دوباره در heap قرار می‌گیرند
+        self._rebuild_index()
+        flush_scheduler.mark_dirty("smart_notifications", self.save_data)
     
     def get_notification_stats(self) -> Dict:
         """آمار اعلان‌ها"""
@@ -270,8 +399,10 @@ class SmartNotifications:
             "sent": sent,
             "read": read,
             "pending": pending,
-            "read_rate": (read / sent * 100) if sent > 0 else 0
+            "scheduled": len(self._heap),
+            "read_rate": (read / sent * 100) if sent > 0 else 0,
+            **self.stats
         }
 
 # نمونه استفاده
-smart_notifications = SmartNotifications()
+smart_notifications = lazy_singleton("smart_notifications", SmartNotifications)
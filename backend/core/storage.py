@@ -0,0 +1,122 @@
+"""
+💽 Compact Storage - ذخیره‌سازی فشرده داده‌های data/
+همه وضعیت‌ها به صورت JSON فشرده (بدون indent) ذخیره می‌شوند؛
+فایل‌های قدیمی indent=2 در اولین خواندن خودکار مهاجرت داده می‌شوند.
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Any, Dict
+from backend.core.metrics import metrics
+
+# Optional imports
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+storage_stats = {
+    "reads": 0,
+    "writes": 0,
+    "bytes_written": 0,
+    "migrated_files": 0,
+    "migrated_bytes_saved": 0
+}
+
+file_writes = metrics.counter("fox_file_writes_total", "JSON store writes by directory", ("store",))
+file_write_bytes = metrics.counter("fox_file_write_bytes_total", "Bytes written to JSON stores by directory", ("store",))
+
+def dumps(data: Any) -> bytes:
+    """سریال‌سازی فشرده"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def loads(raw: bytes) -> Any:
+    """بازخوانی داده فشرده یا قدیمی"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
+
+def is_legacy_format(raw: bytes) -> bool:
+    """فایل قدیمی indent=2 است؟
+
+    فقط ابتدای فایل بررسی می‌شود: json.dump با indent بعد از اولین براکت
+    newline می‌گذارد و خروجی فشرده هیچ‌وقت بعد از آن فاصله ندارد (محتوای
+    رشته‌ها، هر چه باشد، در تشخیص نقشی ندارد).
+    """
+    return raw[:1] in (b"{", b"[") and raw[1:2].isspace()
+
+def save_json(path: str, data: Any):
+    """ذخیره اتمیک داده در فرمت فشرده"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    raw = dumps(data)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(raw)
+    os.replace(tmp_path, path)
+
+    storage_stats["writes"] += 1
+    storage_stats["bytes_written"] += len(raw)
+    # برچسب پوشه است (نه فایل) تا تعداد سری‌ها محدود بماند
+    file_writes.labels(directory).inc()
+    file_write_bytes.labels(directory).inc(len(raw))
+
+def load_json(path: str, default: Any = None) -> Any:
+    """بارگذاری داده؛ فایل‌های قدیمی در همان لحظه مهاجرت داده می‌شوند"""
+    if not os.path.exists(path):
+        return default
+
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = loads(raw)
+    storage_stats["reads"] += 1
+
+    if is_legacy_format(raw):
+        try:
+            save_json(path, data)
+            storage_stats["migrated_files"] += 1
+            storage_stats["migrated_bytes_saved"] += len(raw) - os.path.getsize(path)
+        except OSError as e:
+            print(f"⚠️ مهاجرت {path} انجام نشد: {e}")
+
+    return data
+
+def export_readable(src_dir: str = "data", dest_dir: str = "data_export") -> Dict:
+    """خروجی خوانا (indent=2) از همه فایل‌های JSON"""
+    exported = 0
+    for root, _, files in os.walk(src_dir):
+        for name in files:
+            if not name.endswith(".json"):
+                continue
+            src_path = os.path.join(root, name)
+            dest_path = os.path.join(dest_dir, os.path.relpath(src_path, src_dir))
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+
+            with open(src_path, 'rb') as f:
+                data = loads(f.read())
+            with open(dest_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            exported += 1
+
+    return {"exported": exported, "directory": dest_dir}
+
+def get_storage_stats() -> Dict:
+    """آمار ذخیره‌سازی"""
+    return {**storage_stats, "backend": "orjson" if ORJSON_AVAILABLE else "json"}
+
+if __name__ == "__main__":
+    # python -m backend.core.storage export [src_dir] [dest_dir]
+    if len(sys.argv) >= 2 and sys.argv[1] == "export":
+        start = time.perf_counter()
+        result = export_readable(*sys.argv[2:4])
+        print(f"✅ {result['exported']} فایل در {result['directory']} خروجی گرفته شد "
+              f"({time.perf_counter() - start:.2f}s)")
+    else:
+        print("استفاده: python -m backend.core.storage export [data] [data_export]")
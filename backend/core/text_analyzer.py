@@ -0,0 +1,161 @@
+"""
+🔬 Text Analyzer - تحلیل یک‌باره هر پیام برای همه ماژول‌ها
+متن یک بار یکسان‌سازی و واژه‌بندی می‌شود و همه واژه‌نامه‌های ثبت شده
+(موضوع، حالت روحی، احساسات، سبک نوشتار، علایق، ...) با ایندکس واژه‌ها در یک
+پیمایش تطبیق داده می‌شوند؛ نتیجه برای پیام‌های اخیر کش می‌شود.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from itertools import chain
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set
+from backend.core.persian_text import normalize_persian
+
+_WORD = re.compile(r"\w+")
+
+@dataclass
+class MessageAnalysis:
+    """نتیجه تحلیل یک پیام (فقط-خواندنی؛ بین ماژول‌ها مشترک است)"""
+    text: str
+    normalized: str
+    tokens: List[str]
+    # واژه‌نامه → دسته → واژه‌های پیدا شده (دسته‌ها به ترتیب ثبت)
+    matches: Dict[str, Dict[str, Set[str]]] = field(default_factory=dict)
+
+    def has(self, lexicon: str, category: str = None) -> bool:
+        """آیا واژه‌ای از واژه‌نامه (یا یک دسته آن) در متن هست"""
+        categories = self.matches.get(lexicon)
+        if not categories:
+            return False
+        return category is None or category in categories
+
+    def count(self, lexicon: str, category: str) -> int:
+        """تعداد واژه‌های متفاوت یک دسته که در متن آمده‌اند"""
+        return len(self.matches.get(lexicon, {}).get(category, ()))
+
+    def categories(self, lexicon: str) -> List[str]:
+        """دسته‌های پیدا شده به ترتیب ثبت"""
+        return list(self.matches.get(lexicon, ()))
+
+class _TokenTargets(dict):
+    """کش واژه → اندیس هدف‌های الگوهای تک‌واژه‌ای داخل آن (با حد اندازه)"""
+
+    def __init__(self, by_first: Dict[str, list], max_size: int):
+        super().__init__()
+        self.by_first = by_first
+        self.max_size = max_size
+
+    def __missing__(self, token: str) -> tuple:
+        # فقط الگوهایی که حرف اولشان در واژه هست بررسی می‌شوند
+        found = []
+        for char in set(token):
+            for pattern, pattern_indices in self.by_first.get(char, ()):
+                if pattern in token:
+                    found.extend(pattern_indices)
+        if len(self) >= self.max_size:
+            self.clear()
+        self[token] = found = tuple(found)
+        return found
+
+class TextAnalyzer:
+    """ثبت واژه‌نامه‌ها و تحلیل کش شده پیام‌ها
+
+    تطبیق زیررشته‌ای است (همان رفتار `word in text`) ولی روی متن یکسان‌سازی
+    شده، پس «ي/ی»، نیم‌فاصله و حروف کشیده هم پیدا می‌شوند. الگوی تک‌واژه‌ای فقط
+    داخل یک واژه متن می‌تواند بیاید، پس الگوهای هر واژه یک بار حساب و کش
+    می‌شوند (واژه‌های پیام‌ها بیشتر تکراری‌اند)؛ عبارت‌های چندواژه‌ای و
+    نمادها (ایموجی) جدا با `in` بررسی می‌شوند.
+    """
+
+    token_cache_size = 50_000
+
+    def __init__(self, cache_size: int = 256):
+        self.cache_size = cache_size
+        self._lexicons: Dict[str, Dict[str, List[str]]] = {}
+        self._compiled = None
+        self._cache: "OrderedDict[str, MessageAnalysis]" = OrderedDict()
+        self._last: MessageAnalysis = None
+        self._lock = threading.Lock()
+        self.stats = {"analyses": 0, "cache_hits": 0}
+
+    def register(self, lexicon: str, categories: Dict[str, Iterable[str]]):
+        """ثبت (یا جایگزینی) یک واژه‌نامه: دسته → واژه‌ها"""
+        with self._lock:
+            self._lexicons[lexicon] = {category: list(words) for category, words in categories.items()}
+            self._compiled = None
+            self._cache.clear()
+            self._last = None
+
+    def _build(self):
+        """(واژه‌نامه، دسته، واژه)ها به ترتیب ثبت و اندیس‌هایشان برای هر الگو"""
+        targets = []
+        indices: Dict[str, List[int]] = {}
+        for lexicon, categories in self._lexicons.items():
+            for category, words in categories.items():
+                for word in words:
+                    pattern = normalize_persian(word)
+                    if pattern:
+                        indices.setdefault(pattern, []).append(len(targets))
+                        targets.append((lexicon, category, word))
+        by_first: Dict[str, list] = {}
+        phrases = []
+        for pattern, pattern_indices in indices.items():
+            if _WORD.fullmatch(pattern):
+                by_first.setdefault(pattern[0], []).append((pattern, pattern_indices))
+            else:
+                phrases.append((pattern, pattern_indices))
+        return targets, phrases, _TokenTargets(by_first, self.token_cache_size)
+
+    def analyze(self, text: str) -> MessageAnalysis:
+        """تحلیل پیام (از کش اگر همین متن اخیراً تحلیل شده)"""
+        # ماژول‌های یک پیام پشت سر هم همان متن را می‌خواهند
+        last = self._last
+        if last is not None and last.text == text:
+            self.stats["cache_hits"] += 1
+            return last
+
+        with self._lock:
+            analysis = self._cache.get(text)
+            if analysis is not None:
+                self._cache.move_to_end(text)
+                self.stats["cache_hits"] += 1
+                self._last = analysis
+                return analysis
+            if self._compiled is None:
+                self._compiled = self._build()
+            targets, phrases, token_cache = self._compiled
+
+        normalized = normalize_persian(text)
+        tokens = _WORD.findall(normalized)
+        found = set(chain.from_iterable(map(token_cache.__getitem__, set(tokens))))
+        for phrase, phrase_indices in phrases:
+            if phrase in normalized:
+                found.update(phrase_indices)
+
+        # اندیس‌ها به ترتیب ثبت‌اند، پس دسته‌ها هم به ترتیب ثبت اضافه می‌شوند
+        # (مثلاً اولین موضوع منطبق برنده است)
+        matches: Dict[str, Dict[str, Set[str]]] = {}
+        for index in sorted(found):
+            lexicon, category, word = targets[index]
+            categories = matches.get(lexicon)
+            if categories is None:
+                categories = matches[lexicon] = {}
+            words = categories.get(category)
+            if words is None:
+                categories[category] = {word}
+            else:
+                words.add(word)
+        analysis = MessageAnalysis(text, normalized, tokens, matches)
+
+        with self._lock:
+            self.stats["analyses"] += 1
+            self._cache[text] = analysis
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self._last = analysis
+        return analysis
+
+# نمونه سراسری
+text_analyzer = TextAnalyzer()
@@ -0,0 +1,337 @@
+"""
+🔎 Text Automaton - اتوماتای Aho–Corasick برای جستجوی هم‌زمان چند الگو
+معادل `any(pattern in text for pattern in patterns)` ولی با یک پیمایش متن؛
+به همراه ایندکس سه‌حرفی (trigram) برای تطابق تقریبی
+"""
+
+import sys
+import time
+import threading
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+class AhoCorasick:
+    """اتوماتای چندالگویی با درج افزایشی
+
+    الگوهای تازه اول در لیست انتظار می‌مانند و با `find` بررسی می‌شوند؛ وقتی
+    تعدادشان از pending_limit بیشتر شود، اولین جستجو نسخه تازه trie را در
+    پس‌زمینه می‌سازد و بعد جایگزین می‌کند. تا آن موقع جستجوها با trie قبلی و
+    لیست انتظار (بدون سقف) جواب می‌دهند. حذف فقط گره پایانی را خالی می‌کند.
+    """
+
+    pending_limit = 64
+
+    def __init__(self, patterns=None):
+        # (goto, children, terminal, fail, output) یکجا جایگزین می‌شود تا جستجوی
+        # هم‌زمان نسخه نیمه ساخته را نبیند. انتقال‌ها در یک dict با کلید
+        # (node << 21) | ord(char) برای صرفه‌جویی در حافظه؛ terminal الگوی پایان
+        # یافته در هر گره و output نزدیک‌ترین گره پایانی در زنجیره شکست است.
+        self._trie: Tuple[Dict[int, int], List[List[int]], List[Any], array, array] = (
+            {}, [[]], [None], array('i', [0]), array('i', [-1]))
+        self._values: Dict[str, Any] = {}
+        self._has_empty = False
+        self._pending: List[str] = []   # الگوهای هنوز وارد نشده در trie (حذف و ساخت لیست را جایگزین می‌کنند)
+        self._removed: List[str] = []   # حذف‌های حین بازسازی
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+
+        for pattern in patterns or ():
+            self.add(pattern)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, pattern):
+        return pattern in self._values
+
+    def get(self, pattern, default=None):
+        return self._values.get(pattern, default)
+
+    def add(self, pattern: str, value: Any = None):
+        """افزودن (یا به‌روزرسانی) یک الگو"""
+        if pattern in self._values:
+            self._values[pattern] = value
+            return
+        self._values[pattern] = value
+
+        if pattern == "":
+            self._has_empty = True
+            return
+
+        with self._lock:
+            self._pending.append(pattern)
+
+    @staticmethod
+    def _insert(goto, children, terminal, pattern: str):
+        """درج الگو در trie"""
+        node = 0
+        for char in pattern:
+            key = (node << 21) | ord(char)
+            child = goto.get(key)
+            if child is None:
+                child = len(terminal)
+                goto[key] = child
+                children[node].append(key)
+                children.append([])
+                terminal.append(None)
+            node = child
+        terminal[node] = pattern
+
+    @staticmethod
+    def _clear(trie, pattern: str):
+        """خالی کردن گره پایانی الگو (زنجیره‌های خروجی از رویش رد می‌شوند)"""
+        goto, _, terminal, _, _ = trie
+        node = 0
+        for char in pattern:
+            node = goto.get((node << 21) | ord(char))
+            if node is None:
+                return
+        if terminal[node] == pattern:
+            terminal[node] = None
+
+    def remove(self, pattern: str):
+        """حذف یک الگو (گره‌های trie باقی می‌مانند)"""
+        if pattern not in self._values:
+            return
+        del self._values[pattern]
+        if pattern == "":
+            self._has_empty = False
+            return
+        with self._lock:
+            if pattern in self._pending:
+                self._pending = [other for other in self._pending if other != pattern]
+            else:
+                self._clear(self._trie, pattern)
+            if self._build_lock.locked():
+                self._removed.append(pattern)
+
+    def build(self):
+        """درج الگوهای در انتظار و ساخت لینک‌های شکست و خروجی با BFS"""
+        with self._build_lock:
+            with self._lock:
+                goto, children, terminal, _, _ = self._trie
+                pending = list(self._pending)
+                self._removed = []
+            # کپی تا جستجوهای هم‌زمان تا لحظه جایگزینی همان نسخه قبلی را ببینند
+            # (حذف‌های حین کپی در _removed ثبت و موقع جایگزینی اعمال می‌شوند)
+            goto = dict(goto)
+            children = [list(keys) for keys in children]
+            terminal = list(terminal)
+            for pattern in pending:
+                self._insert(goto, children, terminal, pattern)
+
+            node_count = len(terminal)
+            fail = array('i', bytes(4 * node_count))
+            output = array('i', [-1]) * node_count
+
+            queue = []
+            for key in children[0]:
+                queue.append(goto[key])
+
+            head = 0
+            while head < len(queue):
+                node = queue[head]
+                head += 1
+                for key in children[node]:
+                    child = goto[key]
+                    char_code = key & 0x1FFFFF
+
+                    state = fail[node]
+                    while True:
+                        target = goto.get((state << 21) | char_code)
+                        if target is not None:
+                            fail[child] = target
+                            break
+                        if state == 0:
+                            fail[child] = 0
+                            break
+                        state = fail[state]
+
+                    link = fail[child]
+                    output[child] = link if terminal[link] is not None else output[link]
+                    queue.append(child)
+
+            trie = (goto, children, terminal, fail, output)
+            with self._lock:
+                inserted = set(pending)
+                for pattern in self._removed:
+                    if pattern not in self._values:
+                        self._clear(trie, pattern)
+                self._removed = []
+                self._trie = trie
+                self._pending = [pattern for pattern in self._pending if pattern not in inserted]
+
+    def _rebuild_in_background(self):
+        with self._lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(target=self.build, name="aho-corasick-build", daemon=True)
+            self._rebuild_thread.start()
+
+    def wait_for_rebuild(self, timeout: float = None):
+        """منتظر ماندن برای بازسازی پس‌زمینه در حال اجرا (اگر هست)"""
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """همه رخدادها به صورت (اندیس پایان، الگو)
+
+        رخدادهای الگوهای در انتظار بعد از رخدادهای trie می‌آیند.
+        """
+        pending = self._pending
+        if len(pending) > self.pending_limit:
+            if len(self._trie[2]) == 1:
+                # اولین ساخت: trie قبلی خالی است، پس صبر کردن ارزان‌تر از اسکن لیست است
+                self.build()
+                pending = self._pending
+            else:
+                self._rebuild_in_background()
+        if self._has_empty:
+            yield (0, "")
+
+        goto, _, terminal, fail, output = self._trie
+
+        node = 0
+        for index, char in enumerate(text):
+            char_code = ord(char)
+            while True:
+                target = goto.get((node << 21) | char_code)
+                if target is not None:
+                    node = target
+                    break
+                if node == 0:
+                    break
+                node = fail[node]
+
+            match = node if terminal[node] is not None else output[node]
+            while match > 0:
+                pattern = terminal[match]
+                if pattern is not None:
+                    yield (index, pattern)
+                match = output[match]
+
+        for pattern in pending:
+            start = text.find(pattern)
+            while start != -1:
+                yield (start + len(pattern) - 1, pattern)
+                start = text.find(pattern, start + 1)
+
+    def memory_usage(self) -> int:
+        """تخمین حافظه ساختارهای اتوماتا (بایت، بدون خود الگوها)"""
+        goto, children, terminal, fail, output = self._trie
+        node_count = len(terminal)
+        return (
+            sys.getsizeof(goto) + len(goto) * 2 * sys.getsizeof(node_count << 21)
+            + sys.getsizeof(children) + sum(map(sys.getsizeof, children))
+            + sys.getsizeof(terminal) + sys.getsizeof(self._values)
+            + fail.itemsize * len(fail) + output.itemsize * len(output)
+        )
+
+    def find_all(self, text: str) -> Dict[str, Any]:
+        """الگوهای موجود در متن به همراه مقدارشان"""
+        return {pattern: self._values[pattern] for _, pattern in self.iter_matches(text)}
+
+    def contains_any(self, text: str) -> bool:
+        """آیا حداقل یک الگو در متن هست؟"""
+        for _ in self.iter_matches(text):
+            return True
+        return False
+
+class TrigramIndex:
+    """ایندکس سه‌حرفی برای پیدا کردن کلیدی که تقریباً داخل متن آمده است
+
+    امتیاز هر کلید = نسبت سه‌حرفی‌های کلید که در متن هم هستند.
+    """
+
+    verify_limit = 16   # تعداد نامزدهایی که دقیق امتیازدهی می‌شوند
+
+    def __init__(self, max_postings: int = 1000):
+        self.max_postings = max_postings   # سه‌حرفی‌های رایج‌تر از این شمرده نمی‌شوند
+        self._postings: Dict[str, List[int]] = {}
+        self._ids: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._values: List[Any] = []
+        self._sizes = array('i')
+
+    def __len__(self):
+        return len(self._keys)
+
+    @staticmethod
+    def trigrams(text: str) -> Set[str]:
+        """سه‌حرفی‌های هر کلمه با فاصله در دو طرف"""
+        grams = set()
+        for word in text.split():
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                grams.add(padded[i:i + 3])
+        return grams
+
+    def add(self, key: str, value: Any = None):
+        """افزودن (یا به‌روزرسانی مقدار) یک کلید"""
+        key_id = self._ids.get(key)
+        if key_id is not None:
+            self._values[key_id] = value
+            return
+
+        key_id = len(self._keys)
+        self._ids[key] = key_id
+        self._keys.append(key)
+        self._values.append(value)
+        grams = self.trigrams(key)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(key_id)
+
+    def memory_usage(self) -> int:
+        """تخمین حافظه ایندکس (بایت، بدون خود کلیدها)"""
+        return (
+            sys.getsizeof(self._postings) + sum(map(sys.getsizeof, self._postings.values()))
+            + len(self._postings) * 60   # رشته‌های سه‌حرفی
+            + sys.getsizeof(self._ids) + sys.getsizeof(self._keys) + sys.getsizeof(self._values)
+            + self._sizes.itemsize * len(self._sizes)
+        )
+
+    def best_match(self, text: str, threshold: float = 0.8,
+                   budget_us: float = 500) -> Optional[Tuple[str, Any, float]]:
+        """بهترین کلید با امتیاز >= threshold به صورت (کلید، مقدار، امتیاز)
+
+        شمارش از کم‌تکرارترین سه‌حرفی شروع می‌شود و با تمام شدن budget_us
+        میکروثانیه متوقف می‌شود؛ سه‌حرفی‌های خیلی رایج برای همه نامزدها
+        حساب و چند نامزد برتر در پایان دقیق امتیازدهی می‌شوند.
+        """
+        deadline = time.perf_counter() + budget_us / 1_000_000
+        postings = self._postings
+        text_grams = self.trigrams(text)
+        posting_lists = sorted(
+            (postings[gram] for gram in text_grams if gram in postings), key=len
+        )
+
+        counts: Dict[int, int] = {}
+        common = 0
+        for posting in posting_lists:
+            if len(posting) > self.max_postings or time.perf_counter() > deadline:
+                common += 1
+                continue
+            for key_id in posting:
+                counts[key_id] = counts.get(key_id, 0) + 1
+
+        sizes = self._sizes
+        candidates = sorted(
+            ((count + common) / sizes[key_id], key_id) for key_id, count in counts.items()
+        )
+        best = None
+        best_rank = (threshold, -1)
+        for upper_bound, key_id in reversed(candidates[-self.verify_limit:]):
+            if upper_bound < best_rank[0]:
+                break
+            # امتیاز دقیق؛ در امتیاز برابر، کلید طولانی‌تر
+            score = len(self.trigrams(self._keys[key_id]) & text_grams) / sizes[key_id]
+            rank = (score, sizes[key_id])
+            if rank > best_rank:
+                best, best_rank = key_id, rank
+
+        if best is None:
+            return None
+        return self._keys[best], self._values[best], best_rank[0]
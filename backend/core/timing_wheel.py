@@ -0,0 +1,144 @@
+"""
+⏲️ Timing Wheel - چرخ زمان‌بندی سلسله‌مراتبی
+هر سطح `size` خانه دارد و هر خانه سطح l معادل size^l تیک است؛ افزودن و حذف
+O(1) است و هر تیک فقط یک خانه سطح صفر را خالی می‌کند (خانه‌های سطح بالاتر
+وقتی نوبتشان برسد یک بار به سطح پایین‌تر ریخته می‌شوند).
+"""
+
+import math
+import time
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+class TimingWheel:
+    """زمان‌سنج‌های کلید دار روی تیک‌های صحیح (epoch / tick)
+
+    با bits=6 و levels=5 و tick یک ثانیه، افق حدود ۳۴ سال است؛ موارد دورتر
+    در overflow می‌مانند تا افق به آن‌ها برسد.
+    """
+
+    def __init__(self, tick: float = 1.0, bits: int = 6, levels: int = 5, now: float = None):
+        self.tick = tick
+        self.bits = bits
+        self.size = 1 << bits
+        self.mask = self.size - 1
+        self.levels = levels
+        # سطح → خانه → {کلید: (تیک سررسید، مقدار)} (خانه‌های خالی None)
+        self._wheels: List[List[Optional[Dict]]] = [[None] * self.size for _ in range(levels)]
+        self._overflow: Dict[Hashable, Tuple[int, Any]] = {}
+        self._where: Dict[Hashable, Tuple[int, int]] = {}   # کلید → (سطح، خانه)؛ سطح -1 = overflow
+        self.current = int((time.time() if now is None else now) // tick)
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def add(self, key: Hashable, when: float, item: Any = None):
+        """زمان‌بندی (یا جابه‌جایی) کلید برای زمان epoch `when`"""
+        if key in self._where:
+            self.cancel(key)
+        # حداقل تیک بعدی: خانه تیک جاری قبلاً خالی شده است
+        self._place(key, max(math.ceil(when / self.tick), self.current + 1), item)
+
+    def cancel(self, key: Hashable) -> Optional[Any]:
+        """حذف کلید؛ مقدارش را برمی‌گرداند (None اگر نبود)"""
+        location = self._where.pop(key, None)
+        if location is None:
+            return None
+        level, slot = location
+        if level < 0:
+            return self._overflow.pop(key)[1]
+        bucket = self._wheels[level][slot]
+        item = bucket.pop(key)[1]
+        if not bucket:
+            self._wheels[level][slot] = None
+        return item
+
+    def _place(self, key: Hashable, expiry: int, item: Any):
+        # سطح = تعداد رقم‌های مبنای size فاصله تا سررسید، منهای یک
+        level = max(expiry - self.current, 1).bit_length() - 1
+        level //= self.bits
+        if level >= self.levels:
+            self._overflow[key] = (expiry, item)
+            self._where[key] = (-1, 0)
+            return
+        slot = (expiry >> (self.bits * level)) & self.mask
+        bucket = self._wheels[level][slot]
+        if bucket is None:
+            bucket = self._wheels[level][slot] = {}
+        bucket[key] = (expiry, item)
+        self._where[key] = (level, slot)
+
+    def _cascade(self, level: int, slot: int):
+        bucket = self._wheels[level][slot]
+        if bucket is None:
+            return
+        self._wheels[level][slot] = None
+        for key, (expiry, item) in bucket.items():
+            self._place(key, expiry, item)
+
+    def advance(self, now: float = None) -> List[Tuple[Hashable, Any]]:
+        """جلو بردن چرخ تا now؛ (کلید، مقدار) موارد سررسیده به ترتیب زمان"""
+        target = int((time.time() if now is None else now) // self.tick)
+        if target <= self.current:
+            return []
+        if target - self.current > self.size ** 2 or not self._where:
+            # پرش بلند (مثلاً بعد از خاموشی سرور): یک بار بازچینی به جای تیک به تیک
+            return self._jump(target)
+
+        fired = []
+        for tick in range(self.current + 1, target + 1):
+            self.current = tick
+            # سطوح بالاتر اول، تا مواردی که به سطح پایین‌تر می‌ریزند در همین تیک هم پردازش شوند
+            for level in range(self.levels - 1, 0, -1):
+                if tick & ((1 << (self.bits * level)) - 1) == 0:
+                    self._cascade(level, (tick >> (self.bits * level)) & self.mask)
+            if self._overflow and tick & ((1 << (self.bits * (self.levels - 1))) - 1) == 0:
+                overflow, self._overflow = self._overflow, {}
+                for key, (expiry, item) in overflow.items():
+                    self._place(key, expiry, item)
+
+            slot = tick & self.mask
+            bucket = self._wheels[0][slot]
+            if bucket is not None:
+                self._wheels[0][slot] = None
+                for key, (_, item) in bucket.items():
+                    del self._where[key]
+                    fired.append((key, item))
+        return fired
+
+    def _jump(self, target: int) -> List[Tuple[Hashable, Any]]:
+        entries = list(self._entries())
+        self._wheels = [[None] * self.size for _ in range(self.levels)]
+        self._overflow = {}
+        self._where = {}
+        self.current = target
+
+        due = []
+        for key, expiry, item in entries:
+            if expiry <= target:
+                due.append((expiry, key, item))
+            else:
+                self._place(key, expiry, item)
+        due.sort(key=lambda entry: entry[0])
+        return [(key, item) for _, key, item in due]
+
+    def _entries(self) -> Iterator[Tuple[Hashable, int, Any]]:
+        for wheel in self._wheels:
+            for bucket in wheel:
+                if bucket:
+                    for key, (expiry, item) in bucket.items():
+                        yield key, expiry, item
+        for key, (expiry, item) in self._overflow.items():
+            yield key, expiry, item
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """همه (کلید، مقدار)های زمان‌بندی شده (بدون ترتیب)"""
+        for key, _, item in self._entries():
+            yield key, item
+
+    def next_expiry(self) -> Optional[float]:
+        """زمان epoch نزدیک‌ترین سررسید (O(n)؛ برای گزارش، نه مسیر اصلی)"""
+        expiries = [expiry for _, expiry, _ in self._entries()]
+        return min(expiries) * self.tick if expiries else None
@@ -6,7 +6,7 @@ import requests
 import json
 import csv
 import os
-from backend.core.fox_learning import FoxLearningSystem
+from backend.core.fox_learning import learning_registry
 from backend.core.user_profiles import user_manager
 
 class URLDatasetDownloader:
@@ -145,22 +145,14 @@ class URLDatasetDownloader:
         print("🧠 ذخیره در مغز Fox...")
         
         profile = user_manager.get_current_user_profile()
-        fox_learning = FoxLearningSystem(profile)
+        fox_learning = learning_registry.get(profile)
         
-        saved_count = 0
+        stats = fox_learning.teach_many(
+            (item["q"], item["a"]) for item in data if "q" in item and "a" in item
+        )
+        saved_count = stats["added"] + stats["updated"]
+        learning_registry.refresh(fox_learning)
         
-        for item in data:
-            try:
-                if "q" in item and "a" in item:
-                    fox_learning.teach_response(item["q"], item["a"])
-                    saved_count += 1
-                    
-                    if saved_count % 10 == 0:
-                        print(f"✅ {saved_count} مکالمه ذخیره شد...")
-                        
-            except Exception as e:
-                continue
-                
         # ذخیره در فایل
         filename = url.split('/')[-1] or "dataset"
         json_file = os.path.join(self.data_dir, f"{filename}.json")
@@ -168,7 +160,7 @@ class URLDatasetDownloader:
         with open(json_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
             
-        print(f"🎉 {saved_count} مکالمه ذخیره شد!")
+        print(f"🎉 {saved_count} مکالمه ذخیره شد! (تقریباً تکراری: {stats['near_duplicates']})")
         print(f"📁 فایل: {json_file}")
         
         return saved_count
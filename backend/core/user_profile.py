@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from backend.database.models import Memory
+from backend.core.storage import load_json, save_json
 
 class UserProfile:
     def __init__(self, db_session: Session):
@@ -19,8 +20,7 @@ class UserProfile:
     def load_profile(self) -> Dict:
         """بارگذاری پروفایل کاربر"""
         if os.path.exists(self.profile_file):
-            with open(self.profile_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_json(self.profile_file)
         return {
             "is_first_time": True,
             "name": "",
@@ -37,9 +37,7 @@ class UserProfile:
     
     def save_profile(self):
         """ذخیره پروفایل"""
-        os.makedirs(os.path.dirname(self.profile_file), exist_ok=True)
-        with open(self.profile_file, 'w', encoding='utf-8') as f:
-            json.dump(self.profile, f, ensure_ascii=False, indent=2)
+        save_json(self.profile_file, self.profile)
     
     def is_first_time(self) -> bool:
         """آیا اولین بار است؟"""
@@ -5,6 +5,8 @@ import json
 import os
 from datetime import datetime
 from typing import Dict, Optional, List
+from backend.core.storage import load_json, save_json
+from backend.core.lazy import lazy_singleton
 
 class UserProfileManager:
     def __init__(self, data_dir: str = "data/profiles"):
@@ -50,18 +52,14 @@ class UserProfileManager:
         }
         
         # Save profile
-        with open(self.get_user_file(username), 'w', encoding='utf-8') as f:
-            json.dump(profile, f, ensure_ascii=False, indent=2)
+        save_json(self.get_user_file(username), profile)
             
         return profile
         
     def get_user_profile(self, username: str) -> Optional[Dict]:
         """Get user profile"""
         file_path = self.get_user_file(username)
-        if os.path.exists(file_path):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return None
+        return load_json(file_path)
         
     def update_user_profile(self, username: str, updates: Dict):
         """Update user profile"""
@@ -70,8 +68,7 @@ class UserProfileManager:
             profile.update(updates)
             profile["last_active"] = datetime.now().isoformat()
             
-            with open(self.get_user_file(username), 'w', encoding='utf-8') as f:
-                json.dump(profile, f, ensure_ascii=False, indent=2)
+            save_json(self.get_user_file(username), profile)
                 
     def detect_new_user(self, message: str) -> Optional[str]:
         """Detect if someone is introducing themselves"""
@@ -175,4 +172,4 @@ class UserProfileManager:
             self.update_user_profile(username, profile)
 
 # Global instance
-user_manager = UserProfileManager()
+user_manager = lazy_singleton("user_manager", UserProfileManager)
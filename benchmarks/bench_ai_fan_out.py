@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fan-out هم‌زمان ارائه‌دهنده‌ها در برابر فراخوانی پشت سر هم
+ارائه‌دهنده‌های آزمایشی با تأخیر تزریقی (blocking مثل requests)؛ یک دور
+Multi-AI قبلاً مجموع تأخیرها طول می‌کشید، حالا کندترین (یا مهلت)، و در
+حالت hedged اولین پاسخ قابل قبول
+"""
+import sys
+import time
+import random
+sys.path.append('.')
+
+from backend.core.ai_providers import AIProvider, AIProviderManager
+from backend.core.ai_connector import AIConnector
+from backend.core.fan_out import remaining_timeout
+
+# تأخیرهای معمول (ثانیه، تقسیم بر SCALE برای کوتاه ماندن اجرا)
+SCALE = 4
+LATENCIES = {"Ollama": 2.4, "OpenAI": 1.6, "Claude": 2.0, "Gemini": 3.2, "Custom": 6.0}
+DEADLINE = 4.0 / SCALE
+
+# کیفیت پاسخ هر ارائه‌دهنده (تعداد تکرار یک جمله فارسی ۲۰ حرفی)
+ANSWER_LENGTHS = {"Ollama": 3, "OpenAI": 8, "Claude": 10, "Gemini": 9, "Custom": 12}
+HEDGE_TURNS = 12
+
+class StubProvider(AIProvider):
+    def __init__(self, name, latency, answer=None, jitter=0.0):
+        super().__init__(name)
+        self.latency = latency
+        self.answer = answer or f"پاسخ {name}"
+        self.jitter = jitter
+
+    def generate_response(self, prompt):
+        # مثل requests: حداکثر تا timeout (مهلت باقی‌مانده دور) منتظر می‌ماند
+        latency = self.latency * random.uniform(1 - self.jitter, 1 + self.jitter)
+        timeout = remaining_timeout(self.timeout)
+        time.sleep(min(latency, timeout))
+        return self.answer if latency <= timeout else None
+
+def sequential(manager: AIProviderManager, prompt: str) -> dict:
+    # حلقه قبلی get_responses
+    responses = {}
+    for name, provider in manager.providers.items():
+        if provider.is_available():
+            response = provider.generate_response(prompt)
+            if response:
+                responses[name] = response
+    return responses
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+def bench_manager():
+    manager = AIProviderManager()
+    manager.providers = {name.lower(): StubProvider(name, latency / SCALE) for name, latency in LATENCIES.items()}
+
+    seq_s, seq = timed(sequential, manager, "سلام")
+    all_s, everything = timed(manager.get_responses, "سلام", 60)
+    cut_s, partial = timed(manager.get_responses, "سلام", DEADLINE)
+    print(f"📊 {'پشت سر هم (قبلی)':<30} {seq_s:6.2f}s، {len(seq)} پاسخ")
+    print(f"📊 {'هم‌زمان بدون مهلت':<30} {all_s:6.2f}s، {len(everything)} پاسخ")
+    print(f"📊 {'هم‌زمان با مهلت ' + format(DEADLINE, 'g') + 's':<30} {cut_s:6.2f}s، {len(partial)} پاسخ "
+          f"(لغو: {', '.join(manager.last_fan_out.timed_out)})")
+    return seq_s, cut_s
+
+def bench_connector():
+    connector = AIConnector()
+    delays = {"openai": LATENCIES["OpenAI"], "anthropic": LATENCIES["Claude"], "gemini": LATENCIES["Gemini"]}
+
+    def stub(delay):
+        def chat(messages):
+            time.sleep(delay / SCALE)
+            return "پاسخ"
+        return chat
+
+    connector.openai_client = connector.anthropic_client = connector.gemini_model = object()
+    connector.chat_with_openai = stub(delays["openai"])
+    connector.chat_with_claude = stub(delays["anthropic"])
+    connector.chat_with_gemini = stub(delays["gemini"])
+    messages = [{"role": "user", "content": "سلام"}]
+
+    baseline = sum(delays.values()) / SCALE
+    elapsed, responses = timed(connector.compare_responses, messages, 60)
+    print(f"📊 {'compare_responses':<30} {elapsed:6.2f}s (پشت سر هم {baseline:.2f}s)، {len(responses)} پاسخ")
+
+def bench_hedged():
+    from backend.core import multi_ai_system as module
+
+    original_manager = module.ai_manager
+    module.ai_manager = AIProviderManager()
+    module.ai_manager.providers = {
+        name.lower(): StubProvider(name, latency / SCALE, "پاسخ کامل فارسی به سوال " * ANSWER_LENGTHS[name], 0.3)
+        for name, latency in LATENCIES.items()
+    }
+    timings, stats = {}, {}
+    try:
+        for hedged in (False, True):
+            system = module.MultiAISystem()
+            system.enabled = True
+            system.hedged = hedged
+            start = time.perf_counter()
+            for _ in range(HEDGE_TURNS):
+                system.get_best_response("سلام")
+            timings[hedged] = (time.perf_counter() - start) / HEDGE_TURNS
+            stats[hedged] = system.get_hedge_stats()
+    finally:
+        module.ai_manager = original_manager
+
+    def wins(hedged):
+        return ", ".join(f"{name}: {count}" for name, count in stats[hedged]["wins"].items())
+
+    print(f"📊 {'بهترین پاسخ (منتظر همه)':<30} {timings[False]:6.2f}s میانگین هر دور (برنده‌ها: {wins(False)})")
+    print(f"📊 {'hedged (آستانه ' + str(system.accept_score) + ')':<30} {timings[True]:6.2f}s میانگین هر دور "
+          f"(برنده‌ها: {wins(True)})")
+    print(f"📊 {'صرفه‌جویی ثبت شده (حد پایین)':<30} {stats[True]['time_saved']:6.2f}s در {HEDGE_TURNS} دور، "
+          f"{stats[True]['hedged_wins']} برد زودهنگام، {stats[True]['abandoned_calls']} فراخوانی رها شده تا مهلت")
+    return timings
+
+def run():
+    random.seed(7)
+    seq_s, cut_s = bench_manager()
+    bench_connector()
+    timings = bench_hedged()
+    status = "✅" if cut_s <= DEADLINE * 1.2 else "❌"
+    print(f"{status} یک دور Multi-AI: {cut_s:.2f}s به جای {seq_s:.2f}s ({seq_s / cut_s:.1f}x)")
+    status = "✅" if timings[True] < timings[False] else "❌"
+    print(f"{status} hedged: {timings[True]:.2f}s به جای {timings[False]:.2f}s در هر دور")
+
+if __name__ == "__main__":
+    run()
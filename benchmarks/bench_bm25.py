@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark: تأخیر جستجوی BM25 روی ۱ میلیون پیام
+استفاده: python benchmarks/bench_bm25.py [تعداد پیام]
+"""
+import sys
+import time
+import random
+sys.path.append('.')
+
+from backend.core import bm25
+
+def make_vocabulary(size: int = 20_000) -> list:
+    rng = random.Random(0)
+    letters = "ابپتجچحخدرزسشصطعغفقکگلمنوهی"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 8))) for _ in range(size)]
+
+def zipf_sampler(vocabulary, rng):
+    # توزیع تقریباً Zipf: واژه‌های اول خیلی پرتکرارترند
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return lambda count: rng.choices(vocabulary, cum_weights=cumulative, k=count)
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run(message_count: int = 1_000_000, query_count: int = 200):
+    rng = random.Random(1)
+    vocabulary = make_vocabulary()
+    sample = zipf_sampler(vocabulary, rng)
+
+    index = bm25.BM25Index()
+    start = time.perf_counter()
+    for doc_id in range(message_count):
+        index.add(doc_id, " ".join(sample(rng.randint(4, 20))))
+    build_s = time.perf_counter() - start
+    stats = index.get_stats()
+
+    queries = [" ".join(sample(rng.randint(2, 5))) for _ in range(query_count)]
+
+    print(f"📊 {message_count:,} پیام: ساخت ایندکس {build_s:.1f}s، "
+          f"{stats['terms']:,} واژه، {stats['postings']:,} posting")
+    for label, use_numpy, count in (("NumPy", True, query_count), ("Python", False, query_count // 10)):
+        if use_numpy and not bm25.NUMPY_AVAILABLE:
+            continue
+        bm25.NUMPY_AVAILABLE = use_numpy
+        latencies = []
+        for query in queries[:count]:
+            start = time.perf_counter()
+            index.search(query, limit=5)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"   {label:6}: p50 {percentile(latencies, 0.5):7.1f}ms   p95 {percentile(latencies, 0.95):7.1f}ms"
+              f"   ({count} پرسش)")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: پرس‌وجوهای تحلیلی روی لاگ ستونی رویدادها
+یک سال رویداد (پیش‌فرض ۳۰ میلیون) در پارتیشن‌های روزانه؛ زمان ثبت تکی و
+زمان پرس‌وجوهای برداری (p95 به تفکیک ساعت، میانگین روزانه، ...)
+"""
+import sys
+import os
+import time
+import tempfile
+from datetime import date, datetime
+sys.path.append('.')
+
+import numpy as np
+from backend.core.event_store import EventStore
+from backend.core.flush_scheduler import flush_scheduler
+
+TOPICS = ["برنامه‌نویسی", "تکنولوژی", "علم", "زندگی", "سرگرمی", "عمومی"]
+USERS = ["حامد", "سارا", "علی", "رادین"]
+
+def fill(store: EventStore, events: int, days: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    per_day = events // days
+    users = [store.encode("user", name) for name in USERS]
+    topics = [store.encode("topic", name) for name in TOPICS]
+    today = date.today().toordinal()
+    for i in range(days):
+        day = date.fromordinal(today - i)
+        midnight = time.mktime(day.timetuple())
+        store.append_columns(day.isoformat(), {
+            "timestamp": np.sort(midnight + rng.uniform(0, 86400, per_day)),
+            "user": rng.choice(users, per_day).astype(np.uint32),
+            "topic": rng.choice(topics, per_day).astype(np.uint32),
+            "response_time": rng.lognormal(0, 0.6, per_day).astype(np.float32),
+            "user_words": rng.integers(1, 40, per_day, dtype=np.uint32),
+            "ai_words": rng.integers(5, 300, per_day, dtype=np.uint32),
+        })
+    return per_day * days
+
+def timed(label: str, func, repeat: int = 3):
+    func()  # گرم کردن page cache و memmapها
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print(f"📊 {label:<42} {elapsed:8.1f}ms  ({len(result)} گروه)")
+
+def run(events: int = 30_000_000, days: int = 365):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EventStore(os.path.join(tmp, "events"))
+        start = time.perf_counter()
+        total = fill(store, events, days)
+        print(f"📥 {total:,} رویداد در {days} پارتیشن ({time.perf_counter() - start:.1f}s)")
+
+        start = time.perf_counter()
+        for i in range(100_000):
+            store.record(0.8, "حامد", TOPICS[i % len(TOPICS)], 12, 80)
+        record_us = (time.perf_counter() - start) / 100_000 * 1e6
+        start = time.perf_counter()
+        store.flush()
+        print(f"📝 record: {record_us:.2f}µs / رویداد، flush ۱۰۰ هزار: {(time.perf_counter() - start) * 1000:.1f}ms")
+        flush_scheduler.unregister("event_store")
+
+        timed("p95 زمان پاسخ به تفکیک ساعت (۹۰ روز)", lambda: store.query("response_time", "p95", "hour", 90))
+        timed("میانگین زمان پاسخ روزانه (۳۶۵ روز)", lambda: store.query("response_time", "mean", "day", 365))
+        timed("تعداد رویداد به تفکیک موضوع (۳۶۵ روز)", lambda: store.query("response_time", "count", "topic", 365))
+        timed("میانه کلمات کاربر «سارا» به تفکیک موضوع (۹۰ روز)",
+              lambda: store.query("user_words", "median", "topic", 90, user="سارا"))
+        timed("p99 کل (۳۰ روز)", lambda: store.query("response_time", "p99", None, 30))
+        stats = store.get_stats()
+        print(f"💾 {stats['events']:,} رویداد، {stats['partitions']} پارتیشن، {stats['disk_mb']}MB")
+
+if __name__ == "__main__":
+    run()
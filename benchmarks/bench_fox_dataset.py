@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Benchmark: get_response_for_input با دیتاست کامپایل شده vs حلقه خطی قبلی
+"""
+import sys
+import time
+sys.path.append('.')
+
+from backend.core.fox_dataset import get_response_for_input
+from test_fox_dataset import reference_response_for_input, make_inputs
+
+def timed(fn, inputs, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in inputs:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(inputs) * 1e6
+
+if __name__ == "__main__":
+    inputs = make_inputs()
+    reference_us = timed(reference_response_for_input, inputs)
+    compiled_us = timed(get_response_for_input, inputs)
+    print(f"📊 {len(inputs):,} ورودی")
+    print(f"   حلقه خطی:        {reference_us:6.2f}µs / ورودی")
+    print(f"   دیتاست کامپایل:  {compiled_us:6.2f}µs / ورودی  ({reference_us / compiled_us:.1f}x)")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: جستجوی trigger با حلقه خطی vs اتوماتای Aho–Corasick
+معادل get_learned_response با 100k trigger آموزش داده شده
+"""
+import sys
+import time
+import random
+import tracemalloc
+sys.path.append('.')
+
+from backend.core.text_automaton import AhoCorasick
+
+WORDS = ["سلام", "پایتون", "فیلم", "موسیقی", "کتاب", "ورزش", "غذا", "سفر", "برنامه", "روباه"]
+
+def make_triggers(count: int) -> list:
+    rng = random.Random(42)
+    return [f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}" for i in range(count)]
+
+def make_messages(count: int) -> list:
+    rng = random.Random(1)
+    return [" ".join(rng.choice(WORDS) for _ in range(8)) + f" شماره {rng.randint(0, 10**6)}"
+            for _ in range(count)]
+
+def linear_lookup(triggers, text):
+    for trigger in triggers:
+        if trigger in text:
+            return trigger
+    return None
+
+def automaton_lookup(automaton, text):
+    matches = {}
+    for end, pattern in automaton.iter_matches(text):
+        matches.setdefault(pattern, end)
+    if not matches:
+        return None
+    return min(matches, key=lambda pattern: (-len(pattern), matches[pattern]))
+
+def run(trigger_count: int = 100_000, message_count: int = 200):
+    triggers = make_triggers(trigger_count)
+    messages = make_messages(message_count)
+    custom_responses = {trigger: {"response": "..."} for trigger in triggers}
+
+    start = time.perf_counter()
+    automaton = AhoCorasick(custom_responses)
+    automaton.build()
+    build_s = time.perf_counter() - start
+
+    tracemalloc.start()
+    measured = AhoCorasick(custom_responses)
+    measured.build()
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+    del measured
+
+    start = time.perf_counter()
+    for text in messages:
+        linear_lookup(custom_responses, text)
+    linear_us = (time.perf_counter() - start) / message_count * 1e6
+
+    start = time.perf_counter()
+    for text in messages:
+        automaton_lookup(automaton, text)
+    automaton_us = (time.perf_counter() - start) / message_count * 1e6
+
+    # triggerهای تازه بعد از ساخت: بیش از pending_limit، بازسازی در پس‌زمینه
+    taught = AhoCorasick.pending_limit * 4
+    worst = 0.0
+    start = time.perf_counter()
+    for i in range(taught):
+        lookup_start = time.perf_counter()
+        automaton.add(f"trigger جدید {i}")
+        automaton_lookup(automaton, messages[i % message_count])
+        worst = max(worst, time.perf_counter() - lookup_start)
+    teach_us = (time.perf_counter() - start) / taught * 1e6
+    automaton.wait_for_rebuild()
+    assert automaton_lookup(automaton, f"trigger جدید {taught - 1}") is not None
+
+    print(f"📊 {trigger_count:,} trigger, {message_count} پیام")
+    print(f"   ساخت اتوماتا:      {build_s:.2f}s  ({memory_mb:.1f}MB)")
+    print(f"   حلقه خطی:          {linear_us:10.1f}µs / پیام")
+    print(f"   Aho–Corasick:      {automaton_us:10.1f}µs / پیام  ({linear_us / automaton_us:.0f}x)")
+    print(f"   teach + جستجو:      {teach_us:10.1f}µs  ({taught} trigger، بدترین {worst * 1000:.1f}ms)")
+    status = "✅" if worst < build_s / 10 else "❌"
+    print(f"{status} بدترین teach + جستجو {worst * 1000:.1f}ms در برابر بازسازی کامل {build_s * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
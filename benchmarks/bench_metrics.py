@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: سربار متریک‌های Prometheus روی مسیر اصلی
+هزینه inc/observe، middleware HTTP، شنونده کوئری SQLite و زمان scrape
+بودجه: مجموع متریک‌های یک پیام چت (تخمین پایین) باید زیر ۱۰۰µs بماند
+"""
+import sys
+import time
+import asyncio
+sys.path.append('.')
+
+from types import SimpleNamespace
+from backend.core.metrics import MetricsRegistry, HTTPMetricsMiddleware
+from backend.core import memory
+
+BUDGET_PER_MESSAGE_US = 100
+# به‌روزرسانی‌های یک پیام: پیام websocket و درخواست/توکن‌های LLM (شمارنده)،
+# in-flight تولید، حدود ۶ کوئری SQLite و نوشتن‌های JSON
+PER_MESSAGE = {"counter": 6, "track": 1, "histogram": 1, "db_query": 6}
+
+def per_call_us(fn, n: int = 200_000) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+def bench_primitives(registry: MetricsRegistry) -> dict:
+    counter = registry.counter("bench_requests_total", "x", ("model", "outcome"))
+    gauge = registry.gauge("bench_in_flight", "x", ("model",))
+    histogram = registry.histogram("bench_seconds", "x", ("stage",))
+
+    def track():
+        with gauge.labels("qwen2:7b").track_inprogress():
+            pass
+
+    results = {
+        "counter": per_call_us(lambda: counter.labels("qwen2:7b", "ollama").inc()),
+        "track": per_call_us(track),
+        "histogram": per_call_us(lambda: histogram.labels("llm").observe(0.42)),
+    }
+    print(f"📊 {'counter.labels(...).inc()':<32} {results['counter']:6.2f}µs")
+    print(f"📊 {'gauge track_inprogress':<32} {results['track']:6.2f}µs")
+    print(f"📊 {'histogram.labels(...).observe()':<32} {results['histogram']:6.2f}µs")
+    return results
+
+def bench_middleware(registry: MetricsRegistry, n: int = 50_000):
+    route = type("Route", (), {"path": "/api/latency"})()
+
+    async def app(scope, receive, send):
+        scope["route"] = route
+        await send({"type": "http.response.start", "status": 200})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def send(message):
+        pass
+
+    async def run(handler):
+        start = time.perf_counter()
+        for _ in range(n):
+            await handler({"type": "http", "method": "GET", "path": "/api/latency"}, None, send)
+        return (time.perf_counter() - start) / n * 1e6
+
+    bare = asyncio.run(run(app))
+    wrapped = asyncio.run(run(HTTPMetricsMiddleware(app, registry)))
+    print(f"📊 {'HTTP middleware (per request)':<32} {wrapped - bare:6.2f}µs")
+
+def bench_db_listener() -> float:
+    # خود دو شنونده (بدون نویز اجرای کوئری)
+    conn = SimpleNamespace(info={})
+    statement = "SELECT memories.key, memories.value FROM memories WHERE memories.expires_at IS NULL"
+
+    def listeners():
+        memory._start_query_timer(conn, None, statement, None, None, False)
+        memory._observe_query_time(conn, None, statement, None, None, False)
+
+    us = per_call_us(listeners)
+    print(f"📊 {'SQLite listeners (per query)':<32} {us:6.2f}µs")
+    return us
+
+def bench_render(registry: MetricsRegistry):
+    # حدود اندازه واقعی: چند مدل، ده‌ها مسیر HTTP، چند نوع کوئری
+    requests = registry.counter("bench_http_total", "x", ("method", "route", "status"))
+    latency = registry.histogram("bench_http_seconds", "x", ("route",))
+    for i in range(40):
+        requests.labels("GET", f"/api/route{i}", 200).inc()
+        latency.labels(f"/api/route{i}").observe(0.01)
+    start = time.perf_counter()
+    body = registry.render()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"📊 {'render (' + str(len(body.splitlines())) + ' خط)':<32} {elapsed:6.2f}ms")
+
+def run():
+    registry = MetricsRegistry()
+    costs = bench_primitives(registry)
+    bench_middleware(registry)
+    costs["db_query"] = bench_db_listener()
+    bench_render(registry)
+    per_message = sum(costs[kind] * count for kind, count in PER_MESSAGE.items())
+    status = "✅" if per_message < BUDGET_PER_MESSAGE_US else "❌"
+    print(f"{status} سربار متریک هر پیام چت: {per_message:.1f}µs (بودجه {BUDGET_PER_MESSAGE_US}µs)")
+
+if __name__ == "__main__":
+    run()
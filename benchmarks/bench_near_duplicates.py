@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ادغام triggerهای تقریباً تکراری
+فروشگاهی شبیه خروجی چند importer (سلام/احوال‌پرسی با علائم و نویسه‌های مختلف)
+تعداد حذف شده، حافظه و زمان جستجو قبل و بعد از merge_near_duplicates
+"""
+import sys
+import os
+import random
+import time
+import tempfile
+sys.path.append('.')
+
+from backend.core.fox_learning import FoxLearningSystem
+from backend.core.flush_scheduler import flush_scheduler
+
+BASE = ["سلام", "سلام دوست عزیز", "حالت چطوره", "خوبی", "چه خبر", "خسته نباشی",
+        "ممنونم", "خداحافظ", "شب بخیر", "صبح بخیر", "ناراحتم", "خیلی خوشحالم",
+        "استرس دارم", "دلم گرفته", "حوصله‌ام سر رفته", "عصبانی هستم"]
+PUNCTUATION = ["", "!", "؟", "!!", "...", ".", " ؟", "!!!"]
+EMOJIS = ["", " 😊", " 🙂", " 👋", " 🦊", " ❤️", " 🌹", " 😀"]
+
+def make_store(unique: int, variations: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    pairs = [(f"سوال شماره {i} درباره موضوع {i % 97}", f"پاسخ {i}") for i in range(unique)]
+    for i in range(variations):
+        base = rng.choice(BASE)
+        text = base
+        if rng.random() < 0.3:
+            text = text.replace("ی", "ي").replace("ک", "ك")
+        pairs.append((text + rng.choice(PUNCTUATION) + rng.choice(EMOJIS), f"پاسخ {base}" if i % 2 else f"پاسخ احوال‌پرسی {i}"))
+    return pairs
+
+def run(unique: int = 5_000, variations: int = 20_000):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            pairs = make_store(unique, variations)
+
+            fox_learning = FoxLearningSystem({"name": "bench_plain"})
+            start = time.perf_counter()
+            plain = fox_learning.teach_many(pairs, dedupe=False)
+            plain_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            report = fox_learning.merge_near_duplicates(sample_size=2000)
+            merge_s = time.perf_counter() - start
+            flush_scheduler.unregister(f"usage:{fox_learning.usage_file}")
+
+            fox_learning = FoxLearningSystem({"name": "bench_dedupe"})
+            start = time.perf_counter()
+            deduped = fox_learning.teach_many(pairs)
+            dedupe_s = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+
+    print(f"📊 teach_many بدون dedupe: {plain['added']:,} trigger در {plain_s:.2f}s")
+    print(f"📊 teach_many با dedupe:   {deduped['added']:,} trigger "
+          f"({deduped['near_duplicates']:,} تقریباً تکراری) در {dedupe_s:.2f}s")
+    print(f"📊 merge_near_duplicates:  {report['removed']:,} حذف در {report['groups']} گروه ({merge_s:.2f}s)")
+    print(f"   triggerها: {report['triggers_before']:,} → {report['triggers_after']:,}")
+    print(f"   حافظه: {report['memory_before_mb']}MB → {report['memory_after_mb']}MB")
+    print(f"   جستجو: {report['lookup_us_before']}µs → {report['lookup_us_after']}µs ({report['speedup']}×)")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: indent=2 JSON vs compact storage
+حجم فایل و زمان parse روی داده مصنوعی بزرگ
+"""
+import sys
+import os
+import json
+import time
+import tempfile
+sys.path.append('.')
+
+from backend.core import storage
+
+def make_learning_data(pairs: int) -> dict:
+    """داده یادگیری مصنوعی شبیه <user>_learning.json"""
+    return {
+        "custom_responses": {
+            f"سوال شماره {i} درباره موضوع {i % 97}": {
+                "response": f"این پاسخ آموزش داده شده شماره {i} است 🦊",
+                "taught_at": "2024-01-01T12:00:00.000000",
+                "usage_count": i % 13
+            }
+            for i in range(pairs)
+        },
+        "learned_facts": {},
+        "cultural_knowledge": {},
+        "personal_preferences": {},
+        "daily_routines": {},
+        "teaching_sessions": [],
+        "learned_phrases": []
+    }
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench(pairs: int):
+    data = make_learning_data(pairs)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.json")
+        compact_path = os.path.join(tmp, "compact.json")
+
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        storage.save_json(compact_path, data)
+
+        def load_legacy():
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                json.load(f)
+
+        legacy_size = os.path.getsize(legacy_path)
+        compact_size = os.path.getsize(compact_path)
+        legacy_time = timed(load_legacy)
+        compact_time = timed(lambda: storage.load_json(compact_path))
+
+        print(f"📦 {pairs:>7} pairs | size: {legacy_size / 1e6:7.2f}MB -> {compact_size / 1e6:7.2f}MB "
+              f"({compact_size / legacy_size * 100:.0f}%) | parse: {legacy_time * 1000:8.1f}ms -> "
+              f"{compact_time * 1000:8.1f}ms ({legacy_time / compact_time:.1f}x)")
+
+if __name__ == "__main__":
+    print(f"🔧 backend: {storage.get_storage_stats()['backend']}")
+    for n in (1_000, 10_000, 100_000):
+        bench(n)
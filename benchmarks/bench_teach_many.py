@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Benchmark: teach_response در حلقه vs teach_many
+توان ورود دیتاست (جفت در ثانیه) به FoxLearningSystem
+"""
+import sys
+import os
+import time
+import tempfile
+sys.path.append('.')
+
+from backend.core.fox_learning import FoxLearningSystem
+
+def make_pairs(count: int) -> list:
+    return [(f"سوال شماره {i} درباره موضوع {i % 97}", f"این پاسخ شماره {i} است 🦊") for i in range(count)]
+
+def run(loop_pairs: int = 2_000, batch_pairs: int = 50_000):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            fox_learning = FoxLearningSystem({"name": "bench_loop"})
+            start = time.perf_counter()
+            for trigger, response in make_pairs(loop_pairs):
+                fox_learning.teach_response(trigger, response)
+            loop_s = time.perf_counter() - start
+
+            fox_learning = FoxLearningSystem({"name": "bench_batch"})
+            pairs = make_pairs(batch_pairs)
+            start = time.perf_counter()
+            stats = fox_learning.teach_many(pairs)
+            batch_s = time.perf_counter() - start
+            assert stats["added"] == batch_pairs
+        finally:
+            os.chdir(cwd)
+
+    print(f"📊 teach_response (حلقه، {loop_pairs:,} جفت): {loop_pairs / loop_s:10,.0f} جفت/ثانیه")
+    print(f"📊 teach_many     (دسته، {batch_pairs:,} جفت): {batch_pairs / batch_s:10,.0f} جفت/ثانیه")
+
+if __name__ == "__main__":
+    run()
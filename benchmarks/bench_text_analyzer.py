@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Benchmark: هزینه CPU همه heuristicهای هر پیام
+قبل: هر ماژول متن را جدا lower می‌کند و حلقه‌های any(word in text) می‌زند
+بعد: یک تحلیل مشترک text_analyzer (یک یکسان‌سازی، کش الگوهای هر واژه، کش پیام برای بقیه ماژول‌ها)
+هم کل کار هر پیام (با ثبت حالت روحی، احساسات و الگوها) و هم فقط بخش تطبیق واژه‌نامه‌ها اندازه‌گیری می‌شود
+"""
+import sys
+import os
+import re
+import random
+import time
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+sys.path.append('.')
+
+from backend.core.text_analyzer import text_analyzer
+from backend.core.flush_scheduler import flush_scheduler
+
+# ---- پیاده‌سازی قبلی (برای مقایسه) ----
+STOP_WORDS = {'که', 'در', 'از', 'به', 'با', 'را', 'و', 'یا', 'این', 'آن', 'چه', 'چی', 'کی', 'کجا'}
+TOPICS = {
+    'برنامه‌نویسی': ['کد', 'برنامه', 'پایتون', 'جاوا', 'اسکریپت', 'api', 'database'],
+    'تکنولوژی': ['کامپیوتر', 'موبایل', 'اینترنت', 'سایت', 'اپلیکیشن'],
+    'علم': ['ریاضی', 'فیزیک', 'شیمی', 'زیست', 'علمی'],
+    'زندگی': ['کار', 'خانواده', 'دوست', 'زندگی', 'روزانه'],
+    'سرگرمی': ['فیلم', 'موزیک', 'بازی', 'کتاب', 'ورزش']
+}
+MOOD_POSITIVE = ["خوب", "عالی", "خوشحال", "شاد", "راضی", "خندیدم", "لذت", "موفق", "بهتر", "آرام", "راحت", "خوشگذران"]
+MOOD_NEGATIVE = ["بد", "ناراحت", "خسته", "غمگین", "عصبانی", "استرس", "نگران", "افسرده", "بیحال", "کسل", "درد", "مشکل"]
+EMOTIONS = [
+    ["عالی", "خوب", "دوست دارم", "خوشحال", "شاد", "خنده", "بامزه"],
+    ["بد", "ناراحت", "غمگین", "عصبانی", "متنفر", "خسته"],
+    ["خنده", "شوخی", "بامزه", "طنز", "😄", "😂", "🤣"],
+    ["مهم", "جدی", "کار", "مسئله", "مشکل"],
+]
+INTERESTS = {
+    "برنامه‌نویسی": ["برنامه", "کد", "programming", "python", "javascript", "برنامهنویسی"],
+    "موسیقی": ["موسیقی", "آهنگ", "music", "گوش دادن"],
+    "ورزش": ["ورزش", "فوتبال", "بسکتبال", "دویدن", "sport"],
+    "مطالعه": ["کتاب", "مطالعه", "خواندن", "study"],
+    "بازی": ["بازی", "game", "gaming", "گیم"],
+    "فیلم": ["فیلم", "سینما", "movie", "film"],
+    "سفر": ["سفر", "travel", "گردش"],
+    "آشپزی": ["آشپزی", "غذا", "cooking", "پختن"]
+}
+
+def old_detect_topic(text):
+    text_lower = text.lower()
+    for topic, keywords in TOPICS.items():
+        if any(keyword in text_lower for keyword in keywords):
+            return topic
+    return 'عمومی'
+
+def old_analyze_user_input(personality, text):
+    text_lower = text.lower()
+    adjustments = {}
+    positive, negative, humor, serious = EMOTIONS
+    if any(word in text_lower for word in positive):
+        adjustments["happiness"] = 0.5
+        adjustments["friendliness"] = 0.3
+    if any(word in text_lower for word in negative):
+        adjustments["sadness"] = 0.3
+        adjustments["happiness"] = -0.2
+    if any(word in text_lower for word in humor):
+        adjustments["humor"] = 0.5
+        adjustments["happiness"] = 0.3
+    if any(word in text_lower for word in serious):
+        adjustments["seriousness"] = 0.5
+        adjustments["humor"] = -0.2
+    for emotion, change in adjustments.items():
+        personality.adjust_emotion(emotion, change, temporary=True)
+    return adjustments
+
+def old_analyze_mood(tracker, message):
+    message_lower = message.lower()
+    positive_score = sum(1 for word in MOOD_POSITIVE if word in message_lower)
+    negative_score = sum(1 for word in MOOD_NEGATIVE if word in message_lower)
+    if positive_score > negative_score:
+        mood = "positive"
+    elif negative_score > positive_score:
+        mood = "negative"
+    else:
+        mood = "neutral"
+    today = datetime.now().strftime("%Y-%m-%d")
+    tracker.mood_history["daily_moods"].append({
+        "date": today,
+        "time": datetime.now().strftime("%H:%M"),
+        "mood": mood,
+        "message": message[:50] + "..." if len(message) > 50 else message
+    })
+    if len(tracker.mood_history["daily_moods"]) > 30:
+        tracker.mood_history["daily_moods"] = tracker.mood_history["daily_moods"][-30:]
+    flush_scheduler.mark_dirty("mood_tracker", tracker.save_mood_history)
+    return mood
+
+def old_extract_keywords(text):
+    words = re.findall(r'\b\w+\b', text.lower())
+    return [w for w in words if len(w) > 2 and w not in STOP_WORDS][:10]
+
+def old_analyze_patterns(memory, user_input, timestamp):
+    hour = datetime.fromisoformat(timestamp).hour
+    time_slot = f"{hour:02d}:00"
+    memory.patterns["time_patterns"][time_slot] = memory.patterns["time_patterns"].get(time_slot, 0) + 1
+    if '؟' in user_input:
+        question_type = 'سوال'
+    elif any(word in user_input.lower() for word in ['لطفا', 'میشه', 'کمک']):
+        question_type = 'درخواست'
+    else:
+        question_type = 'گفتگو'
+    memory.patterns["question_types"][question_type] = memory.patterns["question_types"].get(question_type, 0) + 1
+
+def old_is_writing_style_different(manager, text):
+    current_traits = manager.current_user.profile.get('personality_traits', [])
+    is_formal = any(word in text for word in ["شما", "جناب", "سرکار", "محترم"])
+    is_informal = any(word in text for word in ["تو", "داداش", "رفیق", "یارو"])
+    return ("صمیمی" in current_traits and is_formal) or ("جدی" in current_traits and is_informal)
+
+def old_extract_interests(text):
+    text_lower = text.lower()
+    return [interest for interest, words in INTERESTS.items() if any(word in text_lower for word in words)]
+
+def old_matching(text):
+    """فقط بخش تطبیق واژه‌نامه‌های پیاده‌سازی قبلی"""
+    text_lower = text.lower()
+    any(p in text_lower for p in ["اسم من", "نام من", "من هستم", "صدام کن"])
+    for words in EMOTIONS:
+        any(word in text.lower() for word in words)
+    any(k in text.lower() for k in ['جستجو کن', 'search', 'اینترنت', 'آخرین اخبار', 'خبر', 'وضعیت آب و هوا'])
+    message_lower = text.lower()
+    sum(1 for word in MOOD_POSITIVE if word in message_lower)
+    sum(1 for word in MOOD_NEGATIVE if word in message_lower)
+    old_detect_topic(text)
+    old_extract_keywords(text)
+    old_detect_topic(text)
+    any(word in text.lower() for word in ['لطفا', 'میشه', 'کمک'])
+    any(word in text for word in ["شما", "جناب", "سرکار", "محترم"])
+    any(word in text for word in ["تو", "داداش", "رفیق", "یارو"])
+    old_extract_interests(text)
+
+def new_matching(text):
+    """همان پرسش‌ها از تحلیل مشترک"""
+    analysis = text_analyzer.analyze(text)
+    analysis.has("chat_intent", "introduction")
+    for category in ("positive", "negative", "humor", "serious"):
+        text_analyzer.analyze(text).has("emotion", category)
+    analysis.has("chat_intent", "web_search")
+    text_analyzer.analyze(text).count("mood", "positive")
+    text_analyzer.analyze(text).count("mood", "negative")
+    text_analyzer.analyze(text).categories("topic")
+    text_analyzer.analyze(text).tokens
+    text_analyzer.analyze(text).categories("topic")
+    text_analyzer.analyze(text).has("request")
+    text_analyzer.analyze(text).has("writing_style", "formal")
+    text_analyzer.analyze(text).has("writing_style", "informal")
+    text_analyzer.analyze(text).categories("interests")
+
+def old_per_message(modules, text, timestamp):
+    smart_memory, mood_tracker, personality, multi_user, _ = modules
+    # app: معرفی، احساسات، جستجوی وب
+    any(p in text.lower() for p in ["اسم من", "نام من", "من هستم", "صدام کن"])
+    old_analyze_user_input(personality, text)
+    any(k in text.lower() for k in ['جستجو کن', 'search', 'اینترنت', 'آخرین اخبار', 'خبر', 'وضعیت آب و هوا'])
+    old_analyze_mood(mood_tracker, text)
+    # smart_memory: detect_topic (app) + add_conversation (کلمات کلیدی، موضوع، الگوها)
+    old_detect_topic(text)
+    old_extract_keywords(text)
+    old_detect_topic(text)
+    old_analyze_patterns(smart_memory, text, timestamp)
+    old_is_writing_style_different(multi_user, text)
+    old_extract_interests(text)
+
+def new_per_message(modules, text, timestamp):
+    smart_memory, mood_tracker, personality, multi_user, introduction = modules
+    analysis = text_analyzer.analyze(text)
+    analysis.has("chat_intent", "introduction")
+    personality.analyze_user_input(text)
+    analysis.has("chat_intent", "web_search")
+    mood_tracker.analyze_mood(text)
+    smart_memory.detect_topic(text)
+    smart_memory.extract_keywords(text)
+    smart_memory.detect_topic(text)
+    smart_memory.analyze_patterns(text, timestamp)
+    multi_user.is_writing_style_different(text)
+    introduction.extract_interests(text)
+
+SAMPLES = [
+    "سلام! امروز خیلی خسته‌ام و کارهام زیاده، میشه کمکم کنی برنامه‌ریزی کنم؟",
+    "دیشب یه فیلم خیلی بامزه دیدم و کلی خندیدم 😂",
+    "می‌خوام پایتون یاد بگیرم، از کجا شروع کنم؟ کد نویسی برام جدیده",
+    "لطفا آخرین اخبار فوتبال رو برام جستجو کن",
+    "حالم خوب نیست، استرس امتحان ریاضی و فیزیک دارم",
+    "جناب‌عالی لطف کنید وضعیت آب و هوا را بفرمایید",
+    "داداش این بازی جدید رو دیدی؟ گرافیکش عالیه",
+    "به نظرت برای سفر به شمال چه غذاهایی ببرم؟",
+]
+
+def make_messages(count: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    # متن‌های متفاوت تا کش بین پیام‌ها کمکی نکند
+    return [f"{rng.choice(SAMPLES)} {i}" for i in range(count)]
+
+BUDGET_SPEEDUP = 1.5  # تطبیق واژه‌نامه‌ها باید دست‌کم این‌قدر سریع‌تر شود
+
+def time_per_message(per_message, messages) -> float:
+    start = time.perf_counter()
+    for text in messages:
+        per_message(text)
+    return (time.perf_counter() - start) / len(messages) * 1e6
+
+def run(count: int = 20_000):
+    # chat_intent در web/app.py ثبت می‌شود (fastapi اینجا لازم نیست)
+    text_analyzer.register("chat_intent", {
+        "introduction": ["اسم من", "نام من", "من هستم", "صدام کن"],
+        "web_search": ['جستجو کن', 'search', 'اینترنت', 'آخرین اخبار', 'خبر', 'وضعیت آب و هوا'],
+    })
+    messages = make_messages(count)
+    timestamp = "2024-01-01T12:00:00"
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            from backend.core.smart_memory import SmartMemory
+            from backend.core.mood_tracker import MoodTracker
+            from backend.core.personality import PersonalitySystem
+            from backend.core.multi_user import MultiUserManager
+            from backend.core.introduction import FoxIntroduction
+
+            multi_user = MultiUserManager.__new__(MultiUserManager)
+            multi_user.current_user = SimpleNamespace(profile={"personality_traits": ["صمیمی"]})
+            modules = (SmartMemory(), MoodTracker(), PersonalitySystem(), multi_user,
+                       FoxIntroduction.__new__(FoxIntroduction))
+
+            timings = {
+                "before": time_per_message(lambda text: old_per_message(modules, text, timestamp), messages),
+                "after": time_per_message(lambda text: new_per_message(modules, text, timestamp), messages),
+            }
+            # متن‌های تازه تا کش پیام‌های دور قبل کمکی نکند
+            fresh = [f"{text} ." for text in messages]
+            timings["old_matching"] = time_per_message(old_matching, fresh)
+            timings["new_matching"] = time_per_message(new_matching, fresh)
+            flush_scheduler.unregister("mood_tracker")
+        finally:
+            os.chdir(cwd)
+
+    before_us, after_us = timings["before"], timings["after"]
+    print(f"📊 قبل (هر ماژول جدا):       {before_us:7.1f}µs / پیام")
+    print(f"📊 بعد (تحلیل مشترک کش شده): {after_us:7.1f}µs / پیام  ({before_us / after_us:.1f}×)")
+    print(f"   تحلیل‌ها: {text_analyzer.stats['analyses']:,}، برداشت از کش: {text_analyzer.stats['cache_hits']:,}")
+    speedup = timings["old_matching"] / timings["new_matching"]
+    status = "✅" if speedup >= BUDGET_SPEEDUP else "❌"
+    print(f"{status} فقط تطبیق واژه‌نامه‌ها: {timings['new_matching']:.1f}µs به جای "
+          f"{timings['old_matching']:.1f}µs در هر پیام ({speedup:.1f}×)")
+
+if __name__ == "__main__":
+    run()
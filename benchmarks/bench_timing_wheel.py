@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: موتور یادآوری با چرخ زمان‌بندی در برابر اسکن کامل لیست
+۱۰۰ هزار یادآوری پخش شده در یک روز: افزودن، هزینه هر tick، سررسید همه،
+حافظه، و اندازه/زمان ذخیره و بارگذاری فایل ستونی
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import tracemalloc
+from datetime import datetime
+sys.path.append('.')
+
+from backend.core.timing_wheel import TimingWheel
+from backend.core.flush_scheduler import flush_scheduler
+from backend.core.storage import save_json
+
+N = 100_000
+BUDGET_TICK_US = 100
+DAY = 86400
+OWNERS = [f"user{i}" for i in range(50)]
+
+def bench_wheel(start: float, dues: list):
+    def fill() -> TimingWheel:
+        wheel = TimingWheel(now=start)
+        for key, due in enumerate(dues):
+            wheel.add(key, due, (due, OWNERS[key % len(OWNERS)], "یادآوری", start))
+        return wheel
+
+    tracemalloc.start()
+    filled = fill()
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    del filled
+    t0 = time.perf_counter()
+    wheel = fill()
+    insert_us = (time.perf_counter() - t0) / N * 1e6
+
+    # یک روز کامل، ثانیه به ثانیه (همان tick پس‌زمینه)
+    fired = 0
+    worst = 0.0
+    t0 = time.perf_counter()
+    for second in range(1, DAY + 2):
+        tick_start = time.perf_counter()
+        fired += len(wheel.advance(start + second))
+        worst = max(worst, time.perf_counter() - tick_start)
+    day_s = time.perf_counter() - t0
+    assert fired == N, fired
+
+    print(f"📊 {'wheel add':<28} {insert_us:8.2f}µs / یادآوری ({memory_mb:.1f}MB برای {N:,})")
+    print(f"📊 {'wheel tick':<28} {day_s / DAY * 1e6:8.2f}µs میانگین، {worst * 1000:.2f}ms بدترین")
+    print(f"📊 {'wheel یک روز کامل':<28} {day_s:8.2f}s برای {DAY:,} tick و {fired:,} سررسید")
+    return day_s / DAY * 1e6
+
+def bench_scan(start: float, dues: list, checks: int = 20):
+    # روش قبلی: هر check_reminders کل لیست را با fromisoformat پیمایش می‌کرد
+    reminders = [{"id": i + 1, "text": "یادآوری", "remind_time": datetime.fromtimestamp(due).isoformat(),
+                  "completed": False} for i, due in enumerate(dues)]
+    now = datetime.fromtimestamp(start + DAY / 2)
+    t0 = time.perf_counter()
+    for _ in range(checks):
+        active = [r for r in reminders if not r["completed"] and now >= datetime.fromisoformat(r["remind_time"])]
+    scan_ms = (time.perf_counter() - t0) / checks * 1000
+    print(f"📊 {'اسکن کامل (روش قبلی)':<28} {scan_ms:8.2f}ms برای هر بررسی ({len(active):,} سررسیده)")
+    return scan_ms
+
+def bench_persistence(start: float, dues: list):
+    from backend.core.proactive_assistant import ProactiveAssistant
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            assistant = ProactiveAssistant()
+            for i, due in enumerate(dues):
+                assistant.add_reminder(f"یادآوری {i}", datetime.fromtimestamp(due + DAY).isoformat(),
+                                       OWNERS[i % len(OWNERS)])
+            t0 = time.perf_counter()
+            assistant.save_reminders()
+            save_ms = (time.perf_counter() - t0) * 1000
+            size_mb = os.path.getsize(assistant.reminders_file) / 1e6
+            flush_scheduler.unregister("proactive_reminders")
+
+            # همان داده در قالب قدیمی (لیست دیکشنری)
+            legacy = {"reminders": [{"id": i + 1, "text": f"یادآوری {i}",
+                                     "remind_time": datetime.fromtimestamp(due + DAY).isoformat(),
+                                     "created": datetime.now().isoformat(), "completed": False}
+                                    for i, due in enumerate(dues)]}
+            save_json("legacy.json", legacy)
+            legacy_mb = os.path.getsize("legacy.json") / 1e6
+
+            t0 = time.perf_counter()
+            ProactiveAssistant()
+            load_ms = (time.perf_counter() - t0) * 1000
+        finally:
+            os.chdir(cwd)
+    print(f"📊 {'ذخیره ستونی':<28} {save_ms:8.1f}ms، {size_mb:.1f}MB (قالب قدیمی {legacy_mb:.1f}MB)")
+    print(f"📊 {'بارگذاری و ساخت چرخ':<28} {load_ms:8.1f}ms")
+
+def run():
+    rng = random.Random(42)
+    start = float(int(time.time()))
+    dues = [start + rng.uniform(1, DAY) for _ in range(N)]
+    tick_us = bench_wheel(start, dues)
+    scan_ms = bench_scan(start, dues)
+    bench_persistence(start, dues)
+    status = "✅" if tick_us < BUDGET_TICK_US else "❌"
+    print(f"{status} هر tick چرخ {tick_us:.1f}µs (بودجه {BUDGET_TICK_US}µs) در برابر اسکن کامل {scan_ms:.0f}ms")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Startup profile: زمان import ماژول‌ها و ساخت نمونه‌های سراسری
+استفاده: python benchmarks/startup_profile.py [module]   (پیش‌فرض: web.app)
+"""
+import sys
+import os
+import subprocess
+import time
+sys.path.append('.')
+
+def import_time_report(module: str, top: int = 15):
+    """اجرای python -X importtime و نمایش کندترین ماژول‌ها"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.getcwd()
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+
+    if not rows:
+        print(f"❌ import {module} ناموفق بود:\n{result.stderr[-1000:]}")
+        return
+
+    total = max(row[0] for row in rows)
+    print(f"📦 import {module}: {total / 1000:.1f}ms (cumulative)")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"   {cumulative_us / 1000:8.1f}ms  (self {self_us / 1000:6.1f}ms)  {name}")
+
+def singleton_report(module: str):
+    """ساخت همه نمونه‌های تنبل و نمایش زمان هرکدام"""
+    start = time.perf_counter()
+    __import__(module)
+    import_ms = (time.perf_counter() - start) * 1000
+
+    from backend.core.lazy import warm_up, get_init_report
+    warm_up()
+
+    print(f"\n🔥 ساخت نمونه‌های سراسری (import: {import_ms:.1f}ms):")
+    for item in get_init_report():
+        init_ms = f"{item['init_ms']:8.1f}ms" if item["init_ms"] is not None else "       -"
+        print(f"   {init_ms}  {item['name']}")
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "web.app"
+    import_time_report(target)
+    singleton_report(target)
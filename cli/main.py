@@ -22,7 +22,7 @@ from backend.core.user_profile import UserProfile, FoxPersonality
 from backend.core.introduction import FoxIntroduction
 from backend.core.multi_user import MultiUserManager
 from backend.core.fox_experience import FoxExperienceSystem
-from backend.core.fox_learning import FoxLearningSystem
+from backend.core.fox_learning import learning_registry
 from backend.commands.api_commands import handle_api_command
 from backend.config.settings import settings
 
@@ -52,15 +52,20 @@ class PersonalAI:
         if self.user_profile:
             self.fox_personality = FoxPersonality(self.user_profile)
             self.fox_experience = FoxExperienceSystem(self.user_profile)
-            self.fox_learning = FoxLearningSystem(self.user_profile)
             if self.user_profile.is_first_time():
                 self.introduction = FoxIntroduction(self.user_profile)
         else:
             # No users yet, will be handled in first interaction
             self.fox_experience = None
-            self.fox_learning = None
             pass
         
+    @property
+    def fox_learning(self):
+        """سیستم یادگیری کاربر فعلی؛ هر بار از رجیستری (نمونه نگه داشته نمی‌شود)"""
+        if self.user_profile is None:
+            return None
+        return learning_registry.get(self.user_profile)
+
     def display_welcome(self):        
         voice_status = self.voice.is_available()
         voice_info = ""
@@ -374,24 +379,19 @@ class PersonalAI:
                 if len(parts) > 1:
                     search_term = ' '.join(parts[1:])
                     try:
-                        from backend.database.models import get_db, Message
-                        from sqlalchemy import desc, or_
+                        from datetime import datetime
                         
-                        db = next(get_db())
-                        messages = db.query(Message).filter(
-                            or_(
-                                Message.content.contains(search_term),
-                                Message.content.like(f'%{search_term}%')
-                            )
-                        ).order_by(desc(Message.timestamp)).limit(10).all()
+                        # مرتبط‌ترین تبادل‌ها در کل تاریخچه (BM25)
+                        exchanges = self.conversation.memory.search_relevant(search_term, limit=3)
                         
-                        if messages:
+                        if exchanges:
                             console.print(f"\n🧠 یادم هست! در مورد '{search_term}' صحبت کردیم:", style="bold green")
-                            for msg in reversed(messages[-3:]):
-                                time_str = msg.timestamp.strftime("%Y/%m/%d %H:%M")
-                                role = "شما" if msg.role == "user" else "Fox"
-                                content = msg.content[:80] + "..." if len(msg.content) > 80 else msg.content
-                                console.print(f"📅 {time_str} - {role}: {content}", style="dim")
+                            for exchange in exchanges:
+                                time_str = datetime.fromisoformat(exchange["timestamp"]).strftime("%Y/%m/%d %H:%M")
+                                question = exchange["question"][:80] + "..." if len(exchange["question"]) > 80 else exchange["question"]
+                                answer = exchange["answer"][:80] + "..." if len(exchange["answer"]) > 80 else exchange["answer"]
+                                console.print(f"📅 {time_str} - شما: {question}", style="dim")
+                                console.print(f"   Fox: {answer}", style="dim")
                         else:
                             console.print(f"🤔 متأسفانه چیزی در مورد '{search_term}' یادم نیست", style="yellow")
                     except Exception as e:
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test Multi-Provider Fan-out
+"""
+import sys
+import time
+import asyncio
+import threading
+sys.path.append('.')
+
+from backend.core.ai_providers import AIProvider, AIProviderManager
+from backend.core.fan_out import remaining_timeout
+
+class StubProvider(AIProvider):
+    """ارائه‌دهنده آزمایشی با تأخیر تزریقی (blocking یا async)"""
+
+    def __init__(self, name, latency, answer=None, blocking=False):
+        super().__init__(name)
+        self.latency = latency
+        self.answer = answer if answer is not None else f"پاسخ {name}"
+        self.blocking = blocking
+        self.cancelled = False
+
+    def generate_response(self, prompt):
+        time.sleep(self.latency)
+        return self.answer
+
+    async def agenerate_response(self, prompt):
+        if self.blocking:
+            return await super().agenerate_response(prompt)
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.answer == "boom":
+            raise RuntimeError("boom")
+        return self.answer
+
+class HttpLikeProvider(StubProvider):
+    """ارائه‌دهنده blocking که مثل requests فقط تا timeout داده شده منتظر می‌ماند"""
+
+    def __init__(self, name, latency, answer=None):
+        super().__init__(name, latency, answer, blocking=True)
+        self.timeouts = []
+
+    def generate_response(self, prompt):
+        timeout = remaining_timeout(self.timeout)
+        self.timeouts.append(timeout)
+        time.sleep(min(self.latency, timeout))
+        return self.answer if self.latency <= timeout else None
+
+def make_manager(*providers):
+    manager = AIProviderManager()
+    manager.providers = {p.name.lower(): p for p in providers}
+    return manager
+
+def test_concurrent_with_deadline():
+    print("🌐 Testing provider fan-out")
+
+    slow = StubProvider("Slow", 5)
+    disabled = StubProvider("Off", 0.01)
+    disabled.enabled = False
+    manager = make_manager(StubProvider("Fast", 0.05), StubProvider("Blocking", 0.1, blocking=True),
+                           StubProvider("Empty", 0.02, answer=""), StubProvider("Broken", 0.02, answer="boom"),
+                           slow, disabled)
+
+    start = time.perf_counter()
+    responses = manager.get_responses("سلام", deadline=0.3)
+    elapsed = time.perf_counter() - start
+    # هم‌زمان: مجموع تأخیرها نه، فقط تا مهلت
+    assert elapsed < 0.6, elapsed
+    assert list(responses) == ["fast", "blocking"]
+    assert slow.cancelled
+    stats = manager.get_fan_out_stats()
+    assert stats["timed_out"] == {"slow": 1} and stats["failed"] == {"broken": 1}
+
+    # بدون کند: منتظر مهلت نمی‌ماند
+    manager = make_manager(StubProvider("A", 0.05), StubProvider("B", 0.1, blocking=True))
+    start = time.perf_counter()
+    assert set(manager.get_responses("سلام", deadline=5)) == {"a", "b"}
+    assert time.perf_counter() - start < 1
+
+    # فراخوانی sync از داخل یک event loop در حال اجرا (مثل handler وب)
+    async def from_loop():
+        return manager.get_responses("سلام", deadline=1)
+    assert set(asyncio.run(from_loop())) == {"a", "b"}
+
+    print("✅ Provider fan-out test passed!")
+
+def test_hedged_best_response():
+    print("🏁 Testing hedged Multi-AI mode")
+
+    from backend.core import multi_ai_system as module
+
+    good = "پاسخ کامل و مفصل فارسی " * 10
+    short = "پاسخ کوتاه ولی قابل قبول"
+    slow = StubProvider("Slow", 5, answer=good + good)
+    original_manager = module.ai_manager
+    module.ai_manager = make_manager(StubProvider("Quick", 0.02, answer=short),
+                                     StubProvider("Good", 0.1, answer=good), slow)
+    try:
+        system = module.MultiAISystem()
+        system.enabled = True
+        system.hedged = True
+        # اولین پاسخ بالای آستانه برنده است، کندتر لغو می‌شود
+        system.latency_ema["slow"] = 2.0
+        start = time.perf_counter()
+        assert system.get_best_response("سلام").startswith(good)
+        assert time.perf_counter() - start < 1
+        assert slow.cancelled
+        stats = system.get_hedge_stats()
+        assert stats["hedged_wins"] == 1 and stats["wins"] == {"good": 1}
+        assert 1.5 < stats["time_saved"] < 2
+
+        # هیچ پاسخی به آستانه نرسید: بهترین پاسخ رسیده تا مهلت
+        system.accept_score = 10_000
+        response = asyncio.run(system.get_best_response_async("سلام", deadline=0.3))
+        assert response.startswith(good) and response.endswith("*از good*")
+        stats = system.get_hedge_stats()
+        assert stats["deadline_fallbacks"] == 1 and stats["wins"] == {"good": 2}
+
+        # حالت کامل (غیر hedged) همچنان منتظر همه می‌ماند
+        system.hedged = False
+        slow.latency = 0.2
+        assert system.get_best_response("سلام").endswith("*از slow*")
+    finally:
+        module.ai_manager = original_manager
+
+    print("✅ Hedged Multi-AI test passed!")
+
+def test_back_to_back_hedged_turns():
+    print("🧵 Testing back-to-back hedged turns with slow providers")
+
+    from backend.core import multi_ai_system as module
+
+    good = "پاسخ کامل و مفصل فارسی " * 10
+    slow = [HttpLikeProvider(f"Slow{i}", 30, answer=good) for i in range(8)]
+    original_manager = module.ai_manager
+    module.ai_manager = make_manager(HttpLikeProvider("Fast", 0.05, answer=good), *slow)
+    try:
+        system = module.MultiAISystem()
+        system.enabled = True
+        system.hedged = True
+
+        async def turns():
+            elapsed = []
+            for _ in range(6):
+                start = time.perf_counter()
+                response = await system.get_best_response_async("سلام", deadline=0.6)
+                elapsed.append(time.perf_counter() - start)
+                assert response.endswith("*از fast*"), response
+            return elapsed
+
+        # فراخوانی‌های رها شده دورهای قبل جای provider سریع دور بعد را نمی‌گیرند
+        elapsed = asyncio.run(turns())
+        assert max(elapsed) < 0.4, elapsed
+        stats = system.get_hedge_stats()
+        assert stats["hedged_wins"] == 6 and stats["deadline_fallbacks"] == 0
+        assert stats["abandoned_calls"] == 6 * len(slow)
+
+        # timeout هر درخواست از مهلت دور می‌آید، نه سقف پیش‌فرض
+        assert all(timeout <= 0.6 for provider in slow for timeout in provider.timeouts)
+        # و threadهای رها شده تا مهلت دورشان تمام می‌شوند
+        time.sleep(0.8)
+        assert not [thread for thread in threading.enumerate() if thread.name.startswith("ai-provider")]
+    finally:
+        module.ai_manager = original_manager
+
+    print("✅ Back-to-back hedged turns test passed!")
+
+if __name__ == "__main__":
+    test_concurrent_with_deadline()
+    test_hedged_best_response()
+    test_back_to_back_hedged_turns()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test Analytics Dashboard Rollups
+"""
+import os
+import csv
+import io
+import sys
+import json
+import random
+import tempfile
+from datetime import date
+sys.path.append('.')
+
+from backend.core.analytics_dashboard import AnalyticsDashboard
+from backend.core.flush_scheduler import flush_scheduler
+from backend.core.storage import save_json
+
+TOPICS = ["برنامه‌نویسی", "علم", "زندگی", "سرگرمی"]
+
+def _legacy_history(days: int = 400, seed: int = 5) -> dict:
+    """داده‌های فایل قدیمی (بدون totals)"""
+    rng = random.Random(seed)
+    today = date.today().toordinal()
+    daily_stats, learning_progress = {}, {}
+    for i in range(days):
+        day = date.fromordinal(today - i).isoformat()
+        count = rng.randint(1, 9)
+        daily_stats[day] = {
+            "conversations": count,
+            "total_response_time": count * 1.5,
+            "topics": {rng.choice(TOPICS): count},
+            "hourly_distribution": {"10": count},
+            "user_satisfaction": [],
+            "word_count": {"user": count, "ai": count}
+        }
+        if i % 3 == 0:
+            sessions = [{"topic": "علم", "success": rng.random() < 0.5, "duration": 10, "timestamp": ""}
+                        for _ in range(rng.randint(1, 4))]
+            learning_progress[day] = {"sessions": sessions, "total_duration": 10 * len(sessions), "success_rate": 0}
+    return {"daily_stats": daily_stats, "weekly_stats": {}, "monthly_stats": {},
+            "user_behavior": {}, "performance_metrics": {}, "learning_progress": learning_progress}
+
+def test_rollups_match_history():
+    print("📊 Testing analytics rollups")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            # مهاجرت فایل قدیمی: جمع‌ها یک بار از تاریخچه ساخته می‌شوند
+            save_json("data/analytics/dashboard_data.json", _legacy_history())
+            dashboard = AnalyticsDashboard()
+            overall = dashboard.get_dashboard_data("all")
+            assert overall["active_days"] == 400
+            assert overall["first_conversation"] == date.fromordinal(date.today().toordinal() - 399).isoformat()
+
+            for i in range(50):
+                dashboard.record_conversation("سلام خوبی", "ممنون", 0.5, TOPICS[i % 4] if i % 5 else None)
+                dashboard.record_learning_session("علم", i % 2 == 0, 5)
+
+            # جمع‌های افزایشی = محاسبه کامل از تاریخچه
+            assert dashboard.analytics["totals"] == dashboard._rebuild_totals()
+            today = date.today().isoformat()
+            progress = dashboard.analytics["learning_progress"][today]
+            successes = sum(1 for s in progress["sessions"] if s["success"])
+            assert progress["success_rate"] == successes / len(progress["sessions"]) * 100
+
+            month = dashboard.get_dashboard_data("month")
+            assert sum(month["weekly_breakdown"].values()) == month["conversations"]
+            week = dashboard.get_dashboard_data("week")
+            assert list(week["daily_breakdown"])[0] == today
+            flush_scheduler.unregister("analytics_dashboard")
+            flush_scheduler.unregister("event_store")
+        finally:
+            os.chdir(cwd)
+
+    print("✅ Analytics rollups test passed!")
+
+def test_stream_export_daily():
+    print("📊 Testing streaming export")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            save_json("data/analytics/dashboard_data.json", _legacy_history(days=30))
+            dashboard = AnalyticsDashboard()
+            today = date.today().toordinal()
+            start = date.fromordinal(today - 20).isoformat()
+            end = date.fromordinal(today - 11).isoformat()
+
+            chunks = list(dashboard.stream_export("daily", "jsonl", start, end, chunk_rows=4))
+            assert len(chunks) == 3
+            rows = [json.loads(line) for chunk in chunks for line in chunk.decode("utf-8").splitlines()]
+            assert [row["date"] for row in rows] == sorted(
+                day for day in dashboard.analytics["daily_stats"] if start <= day <= end)
+            assert rows[0]["conversations"] == dashboard.analytics["daily_stats"][start]["conversations"]
+
+            table = list(csv.reader(io.StringIO(b"".join(dashboard.stream_export("daily", "csv", start, end)).decode("utf-8"))))
+            assert table[0][0] == "date" and len(table) == 11
+            assert json.loads(table[1][table[0].index("topics")]) == rows[0]["topics"]
+            # بازه خالی: فقط سرستون
+            assert b"".join(dashboard.stream_export("daily", "csv", "1990-01-01", "1990-01-02")).count(b"\n") == 1
+
+            for bad in (("weekly", "jsonl", None, None), ("daily", "xml", None, None), ("daily", "csv", end, start)):
+                try:
+                    dashboard.stream_export(*bad)
+                    assert False, bad
+                except ValueError:
+                    pass
+        finally:
+            os.chdir(cwd)
+
+    print("✅ Streaming export test passed!")
+
+if __name__ == "__main__":
+    test_rollups_match_history()
+    test_stream_export_daily()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test BM25 Retrieval
+"""
+import sys
+import random
+sys.path.append('.')
+
+from backend.core import bm25
+from backend.core.bm25 import BM25Index
+
+def test_bm25_ranking():
+    print("📈 Testing BM25 ranking")
+
+    index = BM25Index()
+    index.add(1, "امروز درباره پایتون و برنامه‌نویسی حرف زدیم")
+    index.add(2, "فیلم دیشب خیلی خوب بود")
+    index.add(3, "پایتون پایتون پایتون! عاشق پایتونم")
+    index.add(4, "علي كتاب خواند")
+
+    assert [doc_id for doc_id, _ in index.search("پایتون")] == [3, 1]
+    assert index.search("فیلم خوب")[0][0] == 2
+    # یکسان‌سازی فارسی در پرسش و سند
+    assert index.search("علی کتاب")[0][0] == 4
+    assert index.search("پایتون", exclude={3}) == index.search("پایتون", limit=1, exclude={3})
+    assert index.search("ناموجود") == []
+    assert index.search("") == []
+
+    print("✅ BM25 ranking test passed!")
+
+def test_numpy_matches_python():
+    if not bm25.NUMPY_AVAILABLE:
+        print("⏭️ NumPy نصب نیست")
+        return
+
+    rng = random.Random(1)
+    words = [f"w{i}" for i in range(50)]
+    index = BM25Index()
+    for doc_id in range(3000):
+        index.add(doc_id, " ".join(rng.choice(words) for _ in range(rng.randint(1, 12))))
+
+    try:
+        for _ in range(200):
+            query = " ".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+            bm25.NUMPY_AVAILABLE = True
+            vectorized = index.search(query, 7)
+            bm25.NUMPY_AVAILABLE = False
+            scalar = index.search(query, 7)
+            assert [doc_id for doc_id, _ in vectorized] == [doc_id for doc_id, _ in scalar], query
+            assert all(abs(a[1] - b[1]) < 1e-6 for a, b in zip(vectorized, scalar))
+    finally:
+        bm25.NUMPY_AVAILABLE = True
+
+if __name__ == "__main__":
+    test_bm25_ranking()
+    test_numpy_matches_python()
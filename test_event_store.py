@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test Columnar Event Store
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from datetime import date, datetime
+sys.path.append('.')
+
+import numpy as np
+from array import array
+from backend.core.event_store import COLUMNS, LEGACY_COLUMNS, EventStore
+from backend.core.flush_scheduler import flush_scheduler
+
+TOPICS = ["علم", "زندگی", None]
+USERS = ["حامد", "سارا"]
+
+def test_queries_match_brute_force():
+    print("🗃️ Testing event store queries")
+
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "events")
+        store = EventStore(root)
+        today = date.today().toordinal()
+        events = []
+        for day_offset in range(5):
+            midnight = time.mktime(date.fromordinal(today - day_offset).timetuple())
+            for _ in range(300):
+                event = (midnight + rng.uniform(0, 86399), rng.choice(USERS), rng.choice(TOPICS),
+                         round(rng.uniform(0.1, 5), 2), rng.randint(1, 30), rng.randint(1, 200))
+                events.append(event)
+        # امروز به ترتیب تصادفی: مسیر بدون مرز ساعت (ستون زمان نامرتب) هم آزمایش می‌شود
+        events.sort()
+        today_events = [event for event in events if date.fromtimestamp(event[0]) == date.today()]
+        rng.shuffle(today_events)
+        events = [event for event in events if date.fromtimestamp(event[0]) != date.today()] + today_events
+        for timestamp, user, topic, response_time, user_words, ai_words in events:
+            store.record(response_time, user, topic, user_words, ai_words, timestamp=timestamp)
+        flush_scheduler.unregister("event_store")
+
+        def expected(stat, key_of, user=None):
+            groups = {}
+            for event in events:
+                if user is None or event[1] == user:
+                    groups.setdefault(key_of(event), []).append(event[3])
+            if stat == "count":
+                return {key: len(values) for key, values in groups.items()}
+            if stat == "mean":
+                return {key: round(sum(values) / len(values), 4) for key, values in groups.items()}
+            return {key: round(float(np.percentile(np.float32(values), 95)), 4) for key, values in groups.items()}
+
+        hour = lambda event: datetime.fromtimestamp(event[0]).hour
+        day = lambda event: date.fromtimestamp(event[0]).isoformat()
+        topic = lambda event: event[2] or "نامشخص"
+        assert store.query("response_time", "p95", "hour", days=5) == expected("p95", hour)
+        assert store.query("response_time", "count", "day", days=5) == expected("count", day)
+        means = store.query("response_time", "mean", "topic", days=5, user="سارا")
+        assert means.keys() == expected("mean", topic, "سارا").keys()
+        for key, value in expected("mean", topic, "سارا").items():
+            assert abs(means[key] - value) < 1e-3
+        assert store.query("response_time", "p95", "topic", days=5, user="سارا") == expected("p95", topic, "سارا")
+        assert store.query("response_time", "count", None, days=2)["all"] == 600
+        assert store.query("response_time", "count", "user", days=5, user="ناشناس") == {}
+
+        # دنباله ناقص (قطع وسط نوشتن) هنگام بازخوانی بریده می‌شود
+        with open(os.path.join(root, date.today().isoformat(), "timestamp.col"), 'ab') as f:
+            f.write(b"\0\0\0")
+        reopened = EventStore(root)
+        assert reopened.query("response_time", "count", None, days=5)["all"] == 1500
+        assert reopened.get_stats()["users"] == 2
+
+    print("✅ Event store test passed!")
+
+def test_iter_events_reads_only_range():
+    print("🗃️ Testing event store range export")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EventStore(os.path.join(tmp, "events"))
+        today = date.today().toordinal()
+        for day_offset in range(10):
+            midnight = time.mktime(date.fromordinal(today - day_offset).timetuple())
+            for i in range(25):
+                store.record(0.8, "سارا", "علم" if i % 2 else None, i, 2 * i, timestamp=midnight + i * 60)
+        flush_scheduler.unregister("event_store")
+        store._partitions.clear()
+
+        start, end = date.fromordinal(today - 6), date.fromordinal(today - 4)
+        chunks = list(store.iter_events(start, end, chunk_rows=10))
+        assert [len(chunk["timestamp"]) for chunk in chunks] == [10, 10, 5] * 3
+        # فقط پارتیشن‌های داخل بازه باز شده‌اند
+        assert sorted(store._partitions) == [date.fromordinal(today - i).isoformat() for i in (6, 5, 4)]
+        first = chunks[0]
+        assert first["user"][0] == "سارا" and first["topic"][:2].tolist() == ["", "علم"]
+        assert first["response_time"][0] == 0.8 and first["ai_words"][3] == 6
+        assert sum(len(chunk["timestamp"]) for chunk in store.iter_events()) == 250
+
+    print("✅ Event store range export test passed!")
+
+def test_legacy_partition_and_wide_codes():
+    print("🗃️ Testing legacy uint16 partitions and codes past 65535")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "events")
+        store = EventStore(root)
+        midnight = time.mktime(date.today().timetuple())
+        # پارتیشن قدیمی: کاربر/موضوع uint16 و بدون layout.json
+        codes = [store.encode("user", "سارا"), store.encode("topic", "علم")]
+        store._save_dictionary()
+        directory = os.path.join(root, date.today().isoformat())
+        os.makedirs(directory)
+        legacy = {"timestamp": [midnight + 60, midnight + 120], "user": [codes[0]] * 2,
+                  "topic": [codes[1]] * 2, "response_time": [0.5, 1.5], "user_words": [3, 4], "ai_words": [5, 6]}
+        for name, code in LEGACY_COLUMNS.items():
+            with open(os.path.join(directory, name + ".col"), 'wb') as f:
+                f.write(array(code, legacy[name]).tobytes())
+
+        reopened = EventStore(root)
+        assert reopened.get_stats()["events"] == 2
+        for i in range(70_000):
+            reopened.encode("user", f"کاربر {i}")
+        reopened.record(2.5, "کاربر 69999", "علم", timestamp=midnight + 180)
+        flush_scheduler.unregister("event_store")
+
+        # سطرهای قدیمی ارتقا یافته و کد بزرگ‌تر از uint16 سرریز نکرده است
+        assert reopened.query("response_time", "count", "user", days=1) == {"سارا": 2, "کاربر 69999": 1}
+        assert reopened.query("response_time", "mean", "topic", days=1, topic="علم") == {"علم": 1.5}
+        assert os.path.getsize(os.path.join(directory, "user.col")) == 3 * array(COLUMNS["user"]).itemsize
+        assert EventStore(root).query("response_time", "count", None, days=1)["all"] == 3
+
+    print("✅ Legacy partition test passed!")
+
+if __name__ == "__main__":
+    test_queries_match_brute_force()
+    test_iter_events_reads_only_range()
+    test_legacy_partition_and_wide_codes()
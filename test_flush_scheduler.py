@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test Flush Scheduler
+"""
+import sys
+import threading
+import asyncio
+sys.path.append('.')
+
+from backend.core.flush_scheduler import FlushScheduler
+
+def test_debounce_without_writes_on_mark():
+    print("💾 Testing debounced flushes")
+
+    scheduler = FlushScheduler(interval=60)
+    writes = []
+    scheduler.mark_dirty("a", lambda: writes.append("a"))
+    scheduler.mark_dirty("a")
+    scheduler.mark_dirty("b", lambda: writes.append("b"))
+    # چیزی نوشته نمی‌شود و علامت‌های تکراری ادغام می‌شوند
+    assert writes == [] and scheduler.get_stats()["pending"] == ["a", "b"]
+    assert scheduler.stats["writes_avoided"] == 1
+
+    # mark_dirty حتی بعد از interval هم روی دیسک نمی‌نویسد؛ فقط flush
+    scheduler.interval = 0
+    scheduler.mark_dirty("a")
+    assert writes == []
+    assert scheduler.flush() == 2 and sorted(writes) == ["a", "b"] and not scheduler.is_dirty("a")
+
+    # علامت‌گذاری هم‌زمان از چند thread هیچ علامتی را گم نمی‌کند
+    def mark_many(prefix):
+        for i in range(500):
+            scheduler.mark_dirty(f"{prefix}{i % 50}", lambda: None)
+
+    threads = [threading.Thread(target=mark_many, args=(prefix,)) for prefix in "xyz"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(scheduler.get_stats()["pending"]) == 150
+    assert scheduler.stats["marks"] == 4 + 1500
+    assert scheduler.flush() == 150
+
+    # تابع ذخیره‌ای که خودش دوباره علامت می‌زند قفل را نمی‌بندد
+    scheduler.mark_dirty("again", lambda: scheduler.mark_dirty("again"))
+    assert scheduler.flush() == 1 and scheduler.is_dirty("again")
+    scheduler.unregister("again")
+
+    # خطای ذخیره: dirty می‌ماند و نوبت بعد دوباره تلاش می‌شود
+    failures = [RuntimeError("دیسک پر است")]
+
+    def flaky():
+        if failures:
+            raise failures.pop()
+        writes.append("c")
+
+    scheduler.mark_dirty("c", flaky)
+    assert scheduler.flush("c") == 0 and scheduler.is_dirty("c") and scheduler.stats["errors"] == 1
+    assert scheduler.flush("c") == 1 and writes[-1] == "c"
+
+    print("✅ Debounced flush test passed!")
+
+def test_unregister_and_background_task():
+    print("💾 Testing unregister and background flush")
+
+    scheduler = FlushScheduler(interval=60)
+    writes = []
+    scheduler.mark_dirty("user", lambda: writes.append("user"))
+    scheduler.register("other", lambda: writes.append("other"))
+
+    # unregister تغییرات باقی‌مانده را ذخیره و تابع را حذف می‌کند
+    scheduler.unregister("user")
+    assert writes == ["user"] and not scheduler.is_dirty("user")
+    scheduler.mark_dirty("user")
+    assert scheduler.flush() == 0 and writes == ["user"]
+    # unregister چیزی که dirty نیست فقط حذف می‌کند
+    scheduler.unregister("other")
+    scheduler.mark_dirty("other")
+    assert scheduler.flush() == 0
+
+    async def run_briefly():
+        background = FlushScheduler(interval=0.01)
+        background.mark_dirty("bg", lambda: writes.append("bg"))
+        task = asyncio.ensure_future(background.run())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return background
+
+    background = asyncio.run(run_briefly())
+    assert writes == ["user", "bg"] and background.get_stats()["pending"] == []
+
+    print("✅ Unregister/background flush test passed!")
+
+if __name__ == "__main__":
+    test_debounce_without_writes_on_mark()
+    test_unregister_and_background_task()
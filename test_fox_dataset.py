@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test Compiled Fox Dataset - هم‌ارزی با پیاده‌سازی قبلی get_response_for_input
+"""
+import sys
+import random
+sys.path.append('.')
+
+from backend.core.fox_dataset import (
+    PERSIAN_CONVERSATIONS, KNOWLEDGE_BASE, PERSONALITY_RESPONSES, get_response_for_input
+)
+
+def reference_response_for_input(user_input: str) -> str:
+    """پیاده‌سازی قبلی (حلقه خطی)"""
+    user_input_lower = user_input.lower().strip()
+
+    for conv in PERSIAN_CONVERSATIONS:
+        if conv["user"].lower() in user_input_lower or user_input_lower in conv["user"].lower():
+            return conv["fox"]
+
+    if any(word in user_input_lower for word in ["سلام", "hello", "hi"]):
+        return random.choice(PERSONALITY_RESPONSES["greetings"])
+
+    if any(word in user_input_lower for word in ["ممنون", "تشکر", "مرسی", "thanks"]):
+        return random.choice(PERSONALITY_RESPONSES["thanks"])
+
+    if any(word in user_input_lower for word in ["خداحافظ", "بای", "فعلاً", "goodbye"]):
+        return random.choice(PERSONALITY_RESPONSES["goodbye"])
+
+    for category, items in KNOWLEDGE_BASE.items():
+        for key, value in items.items():
+            if key in user_input_lower or any(word in user_input_lower for word in key.split("_")):
+                return f"راجع به {key}: {value}"
+
+    return None
+
+def make_inputs():
+    rng = random.Random(3)
+    words = [conv["user"] for conv in PERSIAN_CONVERSATIONS]
+    words += [key for items in KNOWLEDGE_BASE.values() for key in items]
+    words += ["سلام", "Hello", "HI", "ممنون", "مرسی", "خداحافظ", "بای", "فعلاً", "goodbye",
+              "Python", "TIME", "امروز", "هوا", "چطوره", "کد"]
+    inputs = ["", "   ", "!"] + words
+    for word in words:
+        inputs.append(word[: len(word) // 2])
+        inputs.append(word[len(word) // 2:])
+    for _ in range(2000):
+        inputs.append(" ".join(rng.choice(words) for _ in range(rng.randint(1, 4))))
+        word = rng.choice(words)
+        start = rng.randint(0, len(word))
+        inputs.append(word[start:rng.randint(start, len(word))])
+    return inputs
+
+def test_equivalence():
+    print("📚 Testing compiled dataset equivalence")
+
+    for text in make_inputs():
+        random.seed(text)
+        expected = reference_response_for_input(text)
+        random.seed(text)
+        assert get_response_for_input(text) == expected, text
+
+    print("✅ Compiled dataset test passed!")
+
+if __name__ == "__main__":
+    test_equivalence()
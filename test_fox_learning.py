@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test Fox Learning System
+"""
+import os
+import sys
+import tempfile
+sys.path.append('.')
+
+from backend.core.fox_learning import FoxLearningSystem
+from backend.core.flush_scheduler import flush_scheduler
+from backend.core.storage import save_json, load_json
+
+def test_usage_counts_stay_in_memory():
+    print("📈 Testing in-memory usage counts")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            # فایل قدیمی: usage_count داخل custom_responses
+            save_json("data/profiles/usage_test_learning.json", {
+                "custom_responses": {
+                    "سلام": {"response": "درود", "taught_at": "2024-01-01T00:00:00", "usage_count": 4},
+                    "خداحافظ": {"response": "بدرود", "taught_at": "2024-01-01T00:00:00", "usage_count": 0},
+                },
+                "learned_facts": {}, "cultural_knowledge": {}, "personal_preferences": {},
+                "daily_routines": {}, "teaching_sessions": [], "learned_phrases": []
+            })
+            fox_learning = FoxLearningSystem({"name": "usage_test"})
+            assert fox_learning.usage_counts == {"سلام": 4}
+
+            learning_file = fox_learning.learning_file
+            before = os.stat(learning_file).st_mtime_ns, open(learning_file, 'rb').read()
+            for _ in range(3):
+                assert fox_learning.get_learned_response("خداحافظ دوست من") == "بدرود"
+            # استفاده فایل بزرگ یادگیری را بازنویسی نمی‌کند و هنوز روی دیسک نرفته
+            assert (os.stat(learning_file).st_mtime_ns, open(learning_file, 'rb').read()) == before
+            assert flush_scheduler.is_dirty(f"usage:{fox_learning.usage_file}")
+            assert not os.path.exists(fox_learning.usage_file)
+
+            flush_scheduler.flush(f"usage:{fox_learning.usage_file}")
+            assert load_json(fox_learning.usage_file) == {"سلام": 4, "خداحافظ": 3}
+            assert [(item["trigger"], item["usage_count"]) for item in fox_learning.get_usage_ranking()] == \
+                [("سلام", 4), ("خداحافظ", 3)]
+
+            # آموزش دوباره شمارنده را صفر می‌کند؛ بارگذاری بعدی از فایل usage می‌خواند
+            fox_learning.teach_response("سلام", "سلام رفیق")
+            assert fox_learning.get_usage_ranking(1)[0]["trigger"] == "خداحافظ"
+            flush_scheduler.unregister(f"usage:{fox_learning.usage_file}")
+            assert FoxLearningSystem({"name": "usage_test"}).usage_counts == {"خداحافظ": 3}
+        finally:
+            os.chdir(cwd)
+
+    print("✅ Usage count test passed!")
+
+def test_teach_many_batches():
+    print("📚 Testing batch teaching")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            fox_learning = FoxLearningSystem({"name": "batch_test"})
+            fox_learning.teach_response("سلام", "درود")
+            fox_learning.teach_response("خداحافظ", "بدرود")
+            fox_learning.usage_counts["خداحافظ"] = 5
+            saves = []
+            original_save = fox_learning.save_learned_data
+            fox_learning.save_learned_data = lambda: (saves.append(1), original_save())
+
+            stats = fox_learning.teach_many([
+                ("سلام", "درود"),                 # بدون تغییر
+                ("خداحافظ", "فعلاً"),             # به‌روزرسانی
+                (" صبح بخیر ", "صبح شما هم بخیر"),
+                ("صبح بخیر", "صبح عالی"),         # تکراری در دسته: آخری می‌ماند
+                ("شب بخیر", ""), (None, "x"), ("تنها",),  # نامعتبر
+                ("یک سوال علمی", "جواب"),
+            ], dedupe=False)
+            assert stats == {"added": 2, "updated": 1, "unchanged": 1, "duplicates": 1,
+                             "near_duplicates": 0, "invalid": 3}
+            # یک بار ذخیره برای کل دسته
+            assert saves == [1]
+            assert load_json(fox_learning.learning_file)["custom_responses"]["صبح بخیر"]["response"] == "صبح عالی"
+            # پاسخ عوض شده شمارنده‌اش را از دست می‌دهد؛ اتوماتا triggerهای تازه را می‌شناسد
+            assert "خداحافظ" not in fox_learning.usage_counts
+            assert fox_learning.get_learned_response("خداحافظ تا فردا") == "فعلاً"
+            assert fox_learning.get_learned_response("یه سوال: صبح بخیر!") == "صبح عالی"
+
+            # دسته بدون تغییر روی دیسک نمی‌نویسد
+            assert fox_learning.teach_many([("سلام", "درود")])["unchanged"] == 1
+            assert saves == [1]
+            flush_scheduler.unregister(f"usage:{fox_learning.usage_file}")
+        finally:
+            os.chdir(cwd)
+
+    print("✅ Batch teaching test passed!")
+
+if __name__ == "__main__":
+    test_usage_counts_stay_in_memory()
+    test_teach_many_batches()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test Latency Histograms
+"""
+import os
+import sys
+import random
+import tempfile
+sys.path.append('.')
+
+import numpy as np
+from backend.core.latency import LatencyHistogram, LatencyTracker
+from backend.core.flush_scheduler import flush_scheduler
+
+def test_histogram_accuracy_and_merge():
+    print("⏱️ Testing latency histogram")
+
+    rng = random.Random(9)
+    values = [rng.lognormvariate(5, 1.2) for _ in range(20_000)]
+    first, second, whole = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, value in enumerate(values):
+        (first if i % 2 else second).record(value)
+        whole.record(value)
+    first.merge(second)
+    assert first.counts == whole.counts and first.count == len(values)
+
+    for q in (50, 95, 99):
+        exact = np.percentile(values, q, method="inverted_cdf")
+        assert abs(whole.percentile(q) - exact) / exact < 0.011, q
+    assert whole.percentile(100) == max(values)
+    # حافظه ثابت: تعداد سطل‌ها محدود است
+    assert len(whole.counts) <= LatencyHistogram.MAX_INDEX + 1
+    restored = LatencyHistogram.from_dict(whole.to_dict())
+    assert restored.summary() == whole.summary()
+
+    print("✅ Latency histogram test passed!")
+
+def test_tracker_windows():
+    print("⏱️ Testing latency windows")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            tracker = LatencyTracker()
+            now = 1_700_000_000.0
+            for minute in range(90):
+                tracker.record("llm", 1000 + minute, "qwen2:7b", now=now + minute * 60)
+                tracker.record("llm", 500, "gemma:2b", now=now + minute * 60)
+                tracker.record("context_build", 5, now=now + minute * 60)
+            end = now + 89 * 60
+
+            # فقط ۶۰ پنجره دقیقه‌ای نگه داشته می‌شود
+            assert len(tracker.get_timeline("llm", "minute")) == 60
+            last_minute = tracker.get_percentiles("minute", 1, now=end)
+            assert last_minute["llm"]["count"] == 2
+            assert set(last_minute["llm"]["models"]) == {"qwen2:7b", "gemma:2b"}
+            assert list(last_minute) == ["context_build", "llm"]
+
+            day = tracker.get_percentiles("day", 1, stage="llm", model="qwen2:7b", now=end)
+            assert day["llm"]["count"] == 90
+            assert abs(day["llm"]["p50_ms"] - 1044) / 1044 < 0.011
+
+            with tracker.track("web_search"):
+                pass
+            flush_scheduler.unregister("latency")
+            reloaded = LatencyTracker()
+            assert reloaded.get_percentiles("day", 1, now=end)["llm"] == tracker.get_percentiles("day", 1, now=end)["llm"]
+        finally:
+            os.chdir(cwd)
+
+    print("✅ Latency windows test passed!")
+
+if __name__ == "__main__":
+    test_histogram_accuracy_and_merge()
+    test_tracker_windows()
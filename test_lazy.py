@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test Lazy Singleton Proxy
+"""
+import sys
+sys.path.append('.')
+
+from backend.core import lazy
+from backend.core.lazy import LazySingleton, lazy_singleton, warm_up, get_init_report
+
+class Registry:
+    def __init__(self):
+        self.items = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def __getitem__(self, key):
+        return self.items[key]
+
+    def __setitem__(self, key, value):
+        self.items[key] = value
+
+    def __delitem__(self, key):
+        del self.items[key]
+
+def test_lazy_proxy_forwards_protocols():
+    print("💤 Testing lazy singleton proxy")
+
+    created = []
+    proxy = LazySingleton("test_registry", lambda: created.append(1) or Registry())
+    assert not proxy.is_initialized() and "not initialized" in repr(proxy)
+
+    # proxy خالی: bool و len مال شیء واقعی است، نه خود proxy
+    assert not proxy and len(proxy) == 0
+    assert created == [1]
+    proxy["a"] = 1
+    proxy.flag = True
+    assert proxy and len(proxy) == 1 and "a" in proxy and list(proxy) == ["a"]
+    assert proxy["a"] == 1 and proxy.flag is True
+    del proxy["a"]
+    assert "a" not in proxy
+    assert proxy == proxy._get_instance() and hash(proxy) == hash(proxy._get_instance())
+    assert created == [1]
+
+    counter = lazy_singleton("test_counter", lambda: (lambda x: x + 1))
+    assert counter(1) == 2
+    assert "test_counter" not in warm_up(["test_counter"])  # قبلاً ساخته شده
+    assert any(item["name"] == "test_counter" and item["initialized"] for item in get_init_report())
+    lazy._registry.pop("test_counter")
+
+    print("✅ Lazy singleton proxy test passed!")
+
+if __name__ == "__main__":
+    test_lazy_proxy_forwards_protocols()
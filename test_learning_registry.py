@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test Learning Registry Eviction
+"""
+import gc
+import os
+import sys
+import tempfile
+sys.path.append('.')
+
+from backend.core.fox_learning import LearningRegistry
+from backend.core.storage import load_json
+
+def test_eviction_keeps_one_instance_per_user():
+    print("🗂️ Testing learning registry eviction")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            # بودجه صفر: هر بارگذاری کاربر قبلی را کنار می‌گذارد
+            registry = LearningRegistry(memory_budget_mb=0)
+            first = registry.get({"name": "کاربر_یک"})
+            first.teach_response("سلام", "درود")
+            assert first.get_learned_response("سلام") == "درود"
+            second = registry.get({"name": "کاربر_دو"})
+            assert registry.get_stats()["resident_users"] == ["کاربر_دو"]
+            assert registry.stats["evictions"] == 1
+
+            # شمارنده‌های استفاده موقع کنار رفتن ذخیره شده‌اند
+            assert load_json(first.usage_file) == {"سلام": 1}
+
+            # هنوز ارجاع داریم: همان نمونه برمی‌گردد، نه یک نسخه دوم روی همان فایل‌ها
+            assert registry.get({"name": "کاربر_یک"}) is first
+            assert registry.stats["revivals"] == 1 and registry.stats["loads"] == 2
+
+            # بدون ارجاع: حافظه آزاد و بعداً از دیسک بارگذاری می‌شود
+            assert registry.get({"name": "کاربر_دو"}) is second
+            del first
+            gc.collect()
+            reloaded = registry.get({"name": "کاربر_یک"})
+            assert registry.stats["loads"] == 3
+            assert reloaded.get_learned_response("سلام") == "درود"
+
+            registry.evict("کاربر_یک")
+            registry.evict("کاربر_دو")
+            assert registry.get_stats()["resident_users"] == []
+        finally:
+            os.chdir(cwd)
+
+    print("✅ Learning registry test passed!")
+
+if __name__ == "__main__":
+    test_eviction_keeps_one_instance_per_user()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test Cached Memory Block
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+sys.path.append('.')
+
+from sqlalchemy import create_engine
+from backend.core import memory as memory_module
+from backend.core.memory import MemoryManager
+from backend.database import models
+from backend.database.models import Memory, SessionLocal, get_db
+
+KEY = "test_memory_block_key"
+
+def test_memory_block_cache():
+    print("🧠 Testing cached memory block")
+
+    # پایگاه داده موقت به جای data/database برنامه
+    tmp = tempfile.TemporaryDirectory()
+    original_engine = models.engine
+    test_engine = create_engine(f"sqlite:///{os.path.join(tmp.name, 'test.db')}")
+    models.engine = test_engine
+    SessionLocal.configure(bind=test_engine)
+    first = second = None
+    try:
+        first, second = MemoryManager(), MemoryManager()
+        first.invalidate_memory_cache()
+        first.save_memory(KEY, "مقدار اول", "fact", importance=10)
+        block = first.get_memory_block()
+        assert f"- {KEY}: مقدار اول" in block["text"] and KEY in block["keys"]
+        # تصویر مشترک: نمونه دیگر (اتصال دیگر) همان کش را بدون کوئری می‌خواند
+        snapshot = memory_module._memory_snapshot
+        assert second.get_memory_block()["text"] == block["text"]
+        assert memory_module._memory_snapshot is snapshot
+
+        # نوشتن از هر نمونه کش همه را باطل می‌کند
+        second.save_memory(KEY, "مقدار دوم", "fact", importance=10)
+        assert memory_module._memory_snapshot is None
+        assert f"- {KEY}: مقدار دوم" in first.get_memory_block()["text"]
+
+        # حافظه منقضی شده دیده نمی‌شود و مهلت کش تا اولین انقضا است
+        db = next(get_db())
+        db.add(Memory(key=f"{KEY}_old", value="کهنه", importance=10,
+                      expires_at=datetime.utcnow() - timedelta(minutes=1)))
+        db.add(Memory(key=f"{KEY}_soon", value="موقت", importance=10,
+                      expires_at=datetime.utcnow() + timedelta(seconds=30)))
+        db.commit()
+        db.close()
+        first.invalidate_memory_cache()
+        snapshot = first._get_memory_snapshot()
+        assert f"{KEY}_old" not in snapshot["by_key"] and f"{KEY}_soon" in snapshot["by_key"]
+        assert snapshot["deadline"] - memory_module.time.monotonic() <= 30
+    finally:
+        for manager in (first, second):
+            if manager is not None:
+                manager.db.close()
+                manager.invalidate_memory_cache()
+        SessionLocal.configure(bind=original_engine)
+        models.engine = original_engine
+        test_engine.dispose()
+        tmp.cleanup()
+
+    print("✅ Memory block cache test passed!")
+
+if __name__ == "__main__":
+    test_memory_block_cache()
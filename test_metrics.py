@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test Prometheus Metrics Registry
+"""
+import sys
+import asyncio
+sys.path.append('.')
+
+from backend.core.metrics import MetricsRegistry, HTTPMetricsMiddleware
+
+def test_text_format():
+    print("📈 Testing metrics text format")
+
+    registry = MetricsRegistry()
+    requests = registry.counter("fox_test_requests_total", "Requests", ("model", "outcome"))
+    requests.labels("qwen2:7b", "ollama").inc()
+    requests.labels("qwen2:7b", "ollama").inc(2)
+    requests.labels('we"ird\\', "error").inc()
+    in_flight = registry.gauge("fox_test_in_flight", "In flight")
+    with in_flight.track_inprogress():
+        assert "fox_test_in_flight 1" in registry.render()
+    latency = registry.histogram("fox_test_seconds", "Latency", ("stage",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.labels("llm").observe(value)
+    registry.register_callback("fox_test_cache_total", "counter", "Cache", lambda: {("hit",): 7, ("miss",): 3},
+                               ("result",))
+    # ثبت دوباره همان متریک را برمی‌گرداند
+    assert registry.counter("fox_test_requests_total", "Requests", ("model", "outcome")) is requests
+
+    lines = registry.render().splitlines()
+    assert "# TYPE fox_test_requests_total counter" in lines
+    assert 'fox_test_requests_total{model="qwen2:7b",outcome="ollama"} 3' in lines
+    assert 'fox_test_requests_total{model="we\\"ird\\\\",outcome="error"} 1' in lines
+    assert "fox_test_in_flight 0" in lines
+    assert 'fox_test_seconds_bucket{stage="llm",le="0.1"} 2' in lines
+    assert 'fox_test_seconds_bucket{stage="llm",le="1"} 3' in lines
+    assert 'fox_test_seconds_bucket{stage="llm",le="+Inf"} 4' in lines
+    assert 'fox_test_seconds_sum{stage="llm"} 3.65' in lines
+    assert 'fox_test_seconds_count{stage="llm"} 4' in lines
+    assert 'fox_test_cache_total{result="hit"} 7' in lines
+
+    print("✅ Metrics text format test passed!")
+
+def test_http_middleware():
+    print("📈 Testing HTTP metrics middleware")
+
+    registry = MetricsRegistry()
+
+    async def app(scope, receive, send):
+        # شبیه router: route تطبیق داده شده در scope گذاشته می‌شود
+        if scope["path"].startswith("/api/items/"):
+            scope["route"] = type("Route", (), {"path": "/api/items/{item_id}"})()
+        await send({"type": "http.response.start", "status": 200 if "route" in scope else 404})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    middleware = HTTPMetricsMiddleware(app, registry)
+    for path in ("/api/items/1", "/api/items/2", "/missing"):
+        asyncio.run(middleware({"type": "http", "method": "GET", "path": path}, None, send))
+
+    lines = registry.render().splitlines()
+    assert 'fox_http_requests_total{method="GET",route="/api/items/{item_id}",status="200"} 2' in lines
+    assert 'fox_http_requests_total{method="GET",route="other",status="404"} 1' in lines
+    assert 'fox_http_request_duration_seconds_count{route="/api/items/{item_id}"} 2' in lines
+
+    print("✅ HTTP metrics middleware test passed!")
+
+if __name__ == "__main__":
+    test_text_format()
+    test_http_middleware()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test Near-Duplicate Detection
+"""
+import os
+import sys
+import tempfile
+sys.path.append('.')
+
+from backend.core.near_duplicates import MinHashLSH, group_near_duplicates
+
+def test_minhash_lsh():
+    print("🧬 Testing MinHash/LSH")
+
+    index = MinHashLSH(threshold=0.85)
+    for key in ["سلام دوست عزیز", "جدول ضرب 7", "پایتخت فرانسه کجاست", "حالت چطوره"]:
+        index.add(key)
+
+    # علائم نگارشی، ی/ك عربی و حروف کشیده
+    assert index.find_duplicate("سلام دوست عزیز!!")[0] == "سلام دوست عزیز"
+    assert index.find_duplicate("حالت چطوره؟")[0] == "حالت چطوره"
+    assert index.find_duplicate("پايتخت فرانسه كجاست")[0] == "پایتخت فرانسه کجاست"
+    # عدد متفاوت = سوال متفاوت
+    assert index.find_duplicate("جدول ضرب 8") is None
+    assert index.find_duplicate("پایتخت فنلاند کجاست") is None
+    assert index.find_duplicate("سلام") is None
+    assert len(index) == 4
+
+    groups = group_near_duplicates(["سلام", "سلام!", "سلام!!!", "خداحافظ", "خداحافظ."])
+    assert [(group["keep"], len(group["duplicates"])) for group in groups] == [("سلام", 2), ("خداحافظ", 1)]
+
+    print("✅ MinHash/LSH test passed!")
+
+def test_teach_many_dedupe():
+    print("🧬 Testing teach_many near-duplicate merge")
+
+    from backend.core.fox_learning import FoxLearningSystem
+    from backend.core.flush_scheduler import flush_scheduler
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            fox_learning = FoxLearningSystem({"name": "dedupe_test"})
+            stats = fox_learning.teach_many([
+                ("سلام", "سلام! چطوری؟"),
+                ("سلام!", "سلام! چطوری؟"),
+                ("حالت چطوره", "خوبم"),
+                ("حالت چطوره؟", "خوبم"),
+                ("حالت چطوره؟؟", "عالی"),
+                ("جدول ضرب 7", "7، 14، 21"),
+                ("جدول ضرب 8", "8، 16، 24"),
+            ])
+            assert stats["added"] == 5 and stats["near_duplicates"] == 2
+            # متن حذف شده هنوز به پاسخ نسخه اصلی می‌رسد
+            assert fox_learning.get_learned_response("حالت چطوره؟") == "خوبم"
+            # تقریباً تکراری با پاسخ متفاوت حذف نمی‌شود
+            assert fox_learning.learned_data["custom_responses"]["حالت چطوره؟؟"]["response"] == "عالی"
+
+            # ادغام فروشگاه قدیمی که بدون dedupe پر شده
+            fox_learning.teach_many([("سلام!!", "هی"), ("خداحافظ", "بدرود"), ("خداحافظ.", "بای")], dedupe=False)
+            fox_learning.usage_counts["سلام!!"] = 3
+            assert len(fox_learning.find_near_duplicates()) == 3
+            report = fox_learning.merge_near_duplicates()
+            assert report["removed"] == 3
+            assert report["triggers_before"] == 8 and report["triggers_after"] == 5
+            # پراستفاده‌ترین عضو گروه می‌ماند و شمارش‌ها جمع می‌شوند
+            assert "سلام!!" in fox_learning.learned_data["custom_responses"]
+            assert "سلام" not in fox_learning.learned_data["custom_responses"]
+            assert fox_learning.get_learned_response("خداحافظ.") == "بدرود"
+            assert fox_learning.find_near_duplicates() == []
+
+            # نسخه کوتاه‌تر که بعداً آموزش داده شود نگه داشته می‌شود (نسخه بلندتر داخلش نیست)
+            stats = fox_learning.teach_many([("ساعت چنده؟", "نمی‌دونم"), ("ساعت چنده", "نمی‌دونم")])
+            assert stats["added"] == 2 and stats["near_duplicates"] == 0
+            assert fox_learning.get_learned_response("ساعت چنده") == "نمی‌دونم"
+            # ذخیره شمارنده‌ها داخل پوشه موقت
+            flush_scheduler.unregister(f"usage:{fox_learning.usage_file}")
+        finally:
+            os.chdir(cwd)
+
+    print("✅ teach_many near-duplicate test passed!")
+
+if __name__ == "__main__":
+    test_minhash_lsh()
+    test_teach_many_dedupe()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test Persian Normalization & Trigram Index
+"""
+import sys
+sys.path.append('.')
+
+from backend.core.persian_text import normalize_persian
+from backend.core.text_automaton import TrigramIndex
+
+def test_normalize_persian():
+    print("🔤 Testing Persian normalization")
+
+    assert normalize_persian("علي") == normalize_persian("علی")
+    assert normalize_persian("كتاب") == "کتاب"
+    assert normalize_persian("می‌خواهم") == "می خواهم"
+    assert normalize_persian("مَدرِسه") == "مدرسه"
+    assert normalize_persian("خوبـــی") == "خوبی"
+    assert normalize_persian("سلاااام") == "سلام"
+    assert normalize_persian("HELLO  World") == "hello world"
+    # دو حرف تکراری دست نمی‌خورد
+    assert normalize_persian("الله") == "الله"
+    # ارقام و حروف لاتین تکراری فشرده نمی‌شوند
+    assert normalize_persian("سال 1000") == "سال 1000"
+    assert normalize_persian("کد ۱۱۱ و 222") == "کد ۱۱۱ و 222"
+    assert normalize_persian("www.site") == "www.site"
+
+    print("✅ Persian normalization test passed!")
+
+def test_trigram_index():
+    print("🔎 Testing trigram index")
+
+    index = TrigramIndex()
+    index.add("پایتخت ایران کجاست", "capital")
+    index.add("سلام", "greeting")
+    index.add("هوا چطوره", "weather")
+
+    assert index.best_match("پایتخت ایران کجاس؟")[1] == "capital"
+    assert index.best_match("سلام دوست من")[1] == "greeting"
+    assert index.best_match("پایتخت فرانسه کجاست") is None
+    assert index.best_match("یک متن بی ربط") is None
+    assert index.best_match("") is None
+
+    print("✅ Trigram index test passed!")
+
+if __name__ == "__main__":
+    test_normalize_persian()
+    test_trigram_index()
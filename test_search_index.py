@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test Shared Message Search Index
+"""
+import os
+import sys
+import tempfile
+import threading
+sys.path.append('.')
+
+from sqlalchemy import create_engine
+from backend.core import memory as memory_module
+from backend.core.bm25 import BM25Index
+from backend.core.memory import MemoryManager, ensure_search_index
+from backend.core.semantic_memory import HashingEmbedder, SemanticMemory
+from backend.database import models
+from backend.database.models import SessionLocal
+
+class RecordingSemanticMemory(SemanticMemory):
+    """SemanticMemory محلی که کلیدهای backfill شده را نگه می‌دارد"""
+
+    def __init__(self, path):
+        super().__init__(HashingEmbedder(), path)
+        self.backfilled = []
+
+    def backfill(self, items):
+        items = list(items)
+        self.backfilled.extend(key for key, _ in items)
+        return super().backfill(items)
+
+class SavingDuringBuildIndex(BM25Index):
+    """ایندکسی که وسط ساخت اولیه از thread دیگر یک پیام تازه ذخیره می‌کند"""
+
+    def __init__(self, save):
+        super().__init__()
+        self.save = save
+
+    def add(self, doc_id, text):
+        super().add(doc_id, text)
+        save, self.save = self.save, None
+        if save is not None:
+            thread = threading.Thread(target=save)
+            thread.start()
+            thread.join()
+
+def test_search_index_built_once_per_process():
+    print("🔍 Testing shared message search index")
+
+    tmp = tempfile.TemporaryDirectory()
+    original_engine = models.engine
+    original_semantic = memory_module.semantic_memory
+    original_index = memory_module.search_index
+    test_engine = create_engine(f"sqlite:///{os.path.join(tmp.name, 'test.db')}")
+    models.engine = test_engine
+    SessionLocal.configure(bind=test_engine)
+    semantic = RecordingSemanticMemory(os.path.join(tmp.name, "semantic"))
+    memory_module.semantic_memory = semantic
+    memory_module.search_index = BM25Index()
+    memory_module._search_index_loaded = False
+    managers = []
+    try:
+        first = MemoryManager()
+        managers.append(first)
+        session_id = first.create_session()
+        first.save_message(session_id, "user", "بهترین کتاب برای یادگیری پایتون چیه؟")
+        first.save_message(session_id, "assistant", "کتاب آموزش پایتون برای مبتدی‌ها")
+        first.save_memory("favorite_food", "قورمه سبزی", "preference")
+        semantic.flush()
+
+        # پیامی که بردارش ساخته نشده (مثلاً embedder خاموش بوده)
+        semantic.store._rows.pop("message:2")
+        ensure_search_index()
+        assert semantic.backfilled == ["message:2"]
+        semantic.flush()
+
+        # نمونه‌های بعدی همان ایندکس را می‌بینند و دوباره نمی‌سازند
+        second = MemoryManager()
+        managers.append(second)
+        assert second.search_index is first.search_index
+        second.save_message(session_id, "user", "کتاب جاوا هم معرفی کن")
+        first.search_relevant("کتاب پایتون")
+        assert semantic.backfilled == ["message:2"]
+        assert len(memory_module.search_index) == 3
+        exchanges = second.search_relevant("یادگیری پایتون", limit=1)
+        assert exchanges[0]["answer"] == "کتاب آموزش پایتون برای مبتدی‌ها"
+        semantic.flush()
+    finally:
+        for manager in managers:
+            manager.db.close()
+            manager.invalidate_memory_cache()
+        memory_module.semantic_memory = original_semantic
+        memory_module.search_index = original_index
+        memory_module._search_index_loaded = False
+        SessionLocal.configure(bind=original_engine)
+        models.engine = original_engine
+        test_engine.dispose()
+        tmp.cleanup()
+
+    print("✅ Shared search index test passed!")
+
+def test_message_saved_during_build():
+    print("🔍 Testing messages saved while the search index is built")
+
+    tmp = tempfile.TemporaryDirectory()
+    original_engine = models.engine
+    original_semantic = memory_module.semantic_memory
+    original_index = memory_module.search_index
+    test_engine = create_engine(f"sqlite:///{os.path.join(tmp.name, 'test.db')}")
+    models.engine = test_engine
+    SessionLocal.configure(bind=test_engine)
+    memory_module.semantic_memory = SemanticMemory(HashingEmbedder(), os.path.join(tmp.name, "semantic"))
+    memory_module._search_index_loaded = False
+    manager = MemoryManager()
+    try:
+        session_id = manager.create_session()
+        manager.save_message(session_id, "user", "سوال قدیمی درباره پایتون")
+        manager.save_message(session_id, "assistant", "جواب قدیمی")
+
+        index = SavingDuringBuildIndex(
+            lambda: manager.save_message(session_id, "user", "پیام تازه درباره جاوا"))
+        memory_module.search_index = manager.search_index = index
+        ensure_search_index()
+        # پیام ذخیره شده حین ساخت گم نمی‌شود و دو بار هم اضافه نمی‌شود
+        assert len(index) == 3
+        assert [doc_id for doc_id, _ in index.search("جاوا")] == [3]
+
+        # بعد از ساخت، پیام‌های تازه مستقیم اضافه می‌شوند
+        manager.save_message(session_id, "assistant", "جاوا هم خوبه")
+        assert len(index) == 4
+        memory_module.semantic_memory.flush()
+    finally:
+        manager.db.close()
+        manager.invalidate_memory_cache()
+        memory_module.semantic_memory = original_semantic
+        memory_module.search_index = original_index
+        memory_module._search_index_loaded = False
+        SessionLocal.configure(bind=original_engine)
+        models.engine = original_engine
+        test_engine.dispose()
+        tmp.cleanup()
+
+    print("✅ Messages saved during build test passed!")
+
+if __name__ == "__main__":
+    test_search_index_built_once_per_process()
+    test_message_saved_during_build()
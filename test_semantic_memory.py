@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test Semantic Memory (بدون شبکه، با HashingEmbedder)
+"""
+import os
+import sys
+import tempfile
+import time
+sys.path.append('.')
+
+from backend.core import semantic_memory as semantic
+from backend.core.semantic_memory import HashingEmbedder, SemanticMemory, VectorStore
+
+def test_vector_store():
+    if not semantic.NUMPY_AVAILABLE:
+        print("⏭️ NumPy نصب نیست")
+        return
+    print("🧭 Testing vector store")
+
+    embedder = HashingEmbedder()
+    texts = {
+        "message:1": "من عاشق برنامه‌نویسی پایتون هستم",
+        "message:2": "فیلم دیشب خیلی خوب بود",
+        "memory:user_city": "user_city: من در تهران زندگی می‌کنم",
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vectors", "test")
+        store = VectorStore(path, embedder.name)
+        store.append(list(texts), embedder.embed(list(texts.values())))
+
+        query = embedder.embed(["برنامه‌نویسی با پایتون"])[0]
+        assert store.search(query, 1)[0][0] == "message:1"
+        assert [key for key, _ in store.search(query, 5, kind="memory")] == ["memory:user_city"]
+        assert store.search(query, 5, kind="smart") == []
+
+        # مقدار جدید همان کلید جای بردار قبلی را می‌گیرد
+        store.append(["memory:user_city"], embedder.embed(["user_city: برنامه‌نویسی پایتون"]))
+        assert len(store) == 3
+        assert len(store.search(query, 10)) == 3
+
+        # نوشتن ناقص (قطع وسط append) هنگام بازخوانی بریده می‌شود
+        with open(store.vectors_file, 'ab') as f:
+            f.write(b"\0" * 10)
+        with open(store.ids_file, 'a', encoding='utf-8') as f:
+            f.write("message:3\nmessage:")
+        reopened = VectorStore(path, embedder.name)
+        assert len(reopened) == 3
+        assert reopened.search(query, 10) == store.search(query, 10)
+
+        # مدل دیگر = فروشگاه تازه
+        assert len(VectorStore(path, "hashing:other")) == 0
+
+    print("✅ Vector store test passed!")
+
+def test_background_batches():
+    if not semantic.NUMPY_AVAILABLE:
+        print("⏭️ NumPy نصب نیست")
+        return
+    print("🧭 Testing background embedding")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = SemanticMemory(HashingEmbedder(), os.path.join(tmp, "semantic"), batch_size=8)
+        topics = ["فوتبال", "آشپزی", "نجوم", "موسیقی", "سفر"]
+        for i in range(20):
+            memory.enqueue(f"message:{i}", f"پیام {i + 10} درباره {topics[i % 5]}")
+        memory.enqueue("message:ignored", "   ")
+        memory.flush()
+
+        assert memory.stats["embedded"] == 20
+        assert memory.stats["batches"] >= 3
+        assert memory.backfill([("message:1", "تکراری"), ("message:99", "پیام جدید")]) == 1
+        memory.flush()
+
+        hits = memory.search("یک پیام درباره نجوم", limit=4)
+        assert sorted(doc_id for doc_id, _ in hits) == ["12", "17", "2", "7"]
+        assert memory.search("نجوم", limit=3, min_score=1.01) == []
+
+    print("✅ Background embedding test passed!")
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.queries = 0
+        self.fail = False
+
+    def embed_query(self, text):
+        self.queries += 1
+        if self.fail:
+            raise TimeoutError("timed out")
+        return super().embed_query(text)
+
+def test_query_embedded_once():
+    if not semantic.NUMPY_AVAILABLE:
+        print("⏭️ NumPy نصب نیست")
+        return
+    print("🧭 Testing query embedding cache")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        embedder = CountingEmbedder()
+        memory = SemanticMemory(embedder, os.path.join(tmp, "semantic"))
+        memory.enqueue("message:1", "یادگیری پایتون")
+        memory.enqueue("memory:lang", "lang: پایتون")
+        memory.flush()
+
+        # یک نوبت: پیام‌ها، حافظه‌ها و smart با یک embed
+        text = "پایتون یاد بگیرم"
+        vector = memory.embed_query(text)
+        assert memory.search(text, 5, kind="message", min_score=0)[0][0] == "1"
+        assert memory.search(text, 5, kind="memory", min_score=0)[0][0] == "lang"
+        assert memory.search(text, 5, kind="smart") == []
+        assert embedder.queries == 1 and memory.stats["query_cache_hits"] == 3
+        assert memory.embed_query(text) is vector
+
+        # embedder کند یا خاموش: بدون استثنا، فقط BM25 تا retry_after
+        embedder.fail = True
+        assert memory.search("پرسش تازه", 5) == []
+        assert not memory.is_ready()
+        assert memory.search(text, 5) == []
+        assert embedder.queries == 2
+
+    print("✅ Query embedding cache test passed!")
+
+class FlakyEmbedder(HashingEmbedder):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def embed(self, texts):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("ollama down")
+        return super().embed(texts)
+
+def test_batches_kept_during_backoff():
+    if not semantic.NUMPY_AVAILABLE:
+        print("⏭️ NumPy نصب نیست")
+        return
+    print("🧭 Testing embedding retry after backoff")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = SemanticMemory(FlakyEmbedder(1), os.path.join(tmp, "semantic"),
+                                batch_delay=0.01, retry_after=0.3)
+        for i in range(3):
+            memory.enqueue(f"message:{i}", f"پیام {i}")
+        memory.flush()
+        # دسته‌ای که حین backoff می‌رسد هم دور ریخته نمی‌شود
+        memory.enqueue("smart:1", "مکالمه هوشمند")
+        memory.flush()
+        assert memory.stats["embedded"] == 0 and memory.stats["failed"] == 0
+        assert memory.get_stats()["deferred"] == 4
+
+        # بعد از backoff بدون پیام تازه دوباره امتحان می‌شود
+        deadline = time.time() + 5
+        while memory.stats["embedded"] < 4 and time.time() < deadline:
+            time.sleep(0.05)
+        assert memory.stats["embedded"] == 4 and memory.get_stats()["deferred"] == 0
+        assert "message:0" in memory.store and "smart:1" in memory.store
+
+        # سقف: قدیمی‌ترین‌ها کنار می‌روند و شمرده می‌شوند
+        capped = SemanticMemory(FlakyEmbedder(100), os.path.join(tmp, "capped"),
+                                batch_delay=0.01, retry_after=60, max_deferred=2)
+        for i in range(5):
+            capped.enqueue(f"message:{i}", f"پیام {i}")
+        capped.flush()
+        assert capped.get_stats()["deferred"] == 2 and capped.stats["failed"] == 3
+
+    print("✅ Embedding retry test passed!")
+
+if __name__ == "__main__":
+    test_vector_store()
+    test_background_batches()
+    test_query_embedded_once()
+    test_batches_kept_during_backoff()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test Smart Memory Journal
+"""
+import sys
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+sys.path.append('.')
+
+from backend.core.smart_memory import SmartMemory
+
+def test_smart_memory_journal():
+    print("🧠 Testing Smart Memory Journal")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            memory = SmartMemory()
+            memory.compact_every = 1000  # فشرده‌سازی پس‌زمینه در این تست لازم نیست
+
+            memory.add_conversation("سلام کد پایتون دارم", "سلام!")
+            memory.add_conversation("لطفا کمک کن فیلم ببینم", "حتماً")
+
+            # هر مکالمه فقط یک خط به ژورنال اضافه می‌کند
+            assert not os.path.exists(memory.memory_file)
+            with open(memory.journal_file, encoding='utf-8') as f:
+                assert len(f.readlines()) == 2
+
+            # بازسازی وضعیت از روی ژورنال
+            reloaded = SmartMemory()
+            assert reloaded.memory["conversations"] == memory.memory["conversations"]
+            assert reloaded.memory["topics"] == memory.memory["topics"]
+            assert reloaded.patterns["question_types"] == memory.patterns["question_types"]
+            print(f"Topics after replay: {reloaded.memory['topics']}")
+
+            # فشرده‌سازی: snapshot نوشته و ژورنال خالی می‌شود
+            memory.compact()
+            assert os.path.exists(memory.memory_file)
+            assert not os.path.exists(memory.journal_file)
+
+            memory.add_conversation("یه سوال علمی درباره فیزیک؟", "بپرس")
+            reloaded = SmartMemory()
+            assert len(reloaded.memory["conversations"]) == 3
+            assert reloaded.memory["topics"] == memory.memory["topics"]
+            assert reloaded.patterns == memory.patterns
+
+            # فشرده‌سازی نیمه‌کاره نباید رویدادی را دوبار اعمال کند
+            os.replace(memory.journal_file, memory.journal_file + ".old")
+            memory.save_memory()
+            with open(memory.journal_file + ".old", 'w', encoding='utf-8') as f:
+                f.write('{"seq": 3, "type": "conversation", "data": {}}\n')
+            reloaded = SmartMemory()
+            assert len(reloaded.memory["conversations"]) == 3
+            print(f"Conversations after compaction: {len(reloaded.memory['conversations'])}")
+        finally:
+            os.chdir(cwd)
+
+def reference_relevant_context(memory, current_input, limit=5):
+    """امتیازدهی قبلی get_relevant_context روی کل تاریخچه (حلقه خطی)"""
+    current_keywords = set(memory.extract_keywords(current_input))
+    current_topic = memory.detect_topic(current_input)
+    relevant = []
+    for conv in reversed(memory.memory["conversations"]):
+        score = len(set(conv["keywords"]) & current_keywords) * 2
+        if conv["topic"] == current_topic:
+            score += 3
+        days_ago = (datetime.now() - datetime.fromisoformat(conv["timestamp"])).days
+        if days_ago < 7:
+            score += 2
+        elif days_ago < 30:
+            score += 1
+        if score > 0:
+            relevant.append({"conversation": conv, "score": score})
+    relevant.sort(key=lambda x: x["score"], reverse=True)
+    return [item["conversation"] for item in relevant[:limit]]
+
+def test_relevant_context_index():
+    print("🔎 Testing Smart Memory inverted index")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            memory = SmartMemory()
+            rng = random.Random(5)
+            words = ["پایتون", "فیلم", "کتاب", "فیزیک", "خانواده", "موبایل", "سفر", "غذا", "هوا", "بازی"]
+            start = datetime.now() - timedelta(days=90)
+            for seq in range(1, 1301):
+                text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+                memory._apply_conversation({
+                    "timestamp": (start + timedelta(hours=seq * 90 / 1300 * 24)).isoformat(),
+                    "user_input": text,
+                    "ai_response": "",
+                    "keywords": memory.extract_keywords(text),
+                    "topic": memory.detect_topic(text),
+                    "context": {}
+                }, seq)
+
+            # فقط 1000 مکالمه اخیر نگه داشته می‌شود و ایندکس هم‌گام می‌ماند
+            assert len(memory.memory["conversations"]) == 1000
+            for _ in range(200):
+                query = " ".join(rng.choice(words + ["سلام"]) for _ in range(rng.randint(1, 3)))
+                limit = rng.choice([1, 5, 20])
+                assert memory.get_relevant_context(query, limit) == \
+                    reference_relevant_context(memory, query, limit), query
+
+            # بعد از بارگذاری دوباره، ایندکس از snapshot ساخته می‌شود
+            memory.save_memory()
+            reloaded = SmartMemory()
+            assert reloaded.get_relevant_context("فیلم پایتون") == \
+                reference_relevant_context(reloaded, "فیلم پایتون")
+        finally:
+            os.chdir(cwd)
+
+    print("✅ Smart Memory index test passed!")
+
+def test_backfill_vectors():
+    from backend.core import semantic_memory as semantic
+    from backend.core import smart_memory as smart_module
+    from backend.core.semantic_memory import HashingEmbedder, SemanticMemory
+
+    if not semantic.NUMPY_AVAILABLE:
+        print("⏭️ NumPy نصب نیست")
+        return
+    print("🧭 Testing smart memory vector backfill")
+
+    cwd = os.getcwd()
+    original_semantic = smart_module.semantic_memory
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            vectors = SemanticMemory(HashingEmbedder(), os.path.join(tmp, "semantic"), batch_delay=0.01)
+            smart_module.semantic_memory = vectors
+            memory = SmartMemory()
+            memory.add_conversation("کتاب خوب برای پایتون", "این کتاب")
+            memory.add_conversation("فیلم امشب چی ببینم", "یه کمدی")
+            vectors.flush()
+
+            # مکالمه‌ای که بردارش ساخته نشده (مثلاً embedder خاموش بوده)
+            vectors.store._rows.pop("smart:1")
+            assert memory.backfill_vectors() == 1
+            vectors.flush()
+            assert "smart:1" in vectors.store and memory.backfill_vectors() == 0
+        finally:
+            smart_module.semantic_memory = original_semantic
+            os.chdir(cwd)
+
+    print("✅ Smart memory backfill test passed!")
+
+if __name__ == "__main__":
+    test_smart_memory_journal()
+    test_relevant_context_index()
+    test_backfill_vectors()
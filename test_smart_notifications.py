@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test Notification Scheduler
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+sys.path.append('.')
+
+from backend.core.smart_notifications import SmartNotifications
+from backend.core.flush_scheduler import flush_scheduler
+
+def test_heap_delivery_and_compaction():
+    print("🔔 Testing notification scheduler")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            notifications = SmartNotifications(retention_days=30, max_items=20)
+            # بدون ساعات سکوت (فقط لحظه نیمه‌شب)
+            no_quiet = {"start": "00:00", "end": "00:00"}
+            notifications.update_settings({"quiet_hours": no_quiet})
+            base = datetime.now()
+            ids = [notifications.create_notification(f"n{i}", "...", "reminder", schedule_after_minutes=m)
+                   for i, m in enumerate((90, 0, 30, 60))]
+            assert len(set(ids)) == 4
+
+            later = base + timedelta(minutes=45)
+            # سررسیده‌ها به ترتیب زمان، بقیه در heap می‌مانند
+            assert [n.title for n in notifications.get_pending_notifications(later)] == ["n1", "n2"]
+            assert [n.title for n in notifications.deliver_due(later)] == ["n1", "n2"]
+            assert notifications.deliver_due(later) == []
+            assert [n.title for n in notifications.get_unread_notifications()] == ["n1", "n2"]
+
+            # ساعات سکوت (بازه‌ای که از نیمه‌شب هم می‌تواند بگذرد): چیزی برداشته نمی‌شود
+            two_hours = base + timedelta(hours=2)
+            notifications.update_settings({"quiet_hours": {
+                "start": (two_hours - timedelta(minutes=10)).strftime("%H:%M"),
+                "end": (two_hours + timedelta(minutes=10)).strftime("%H:%M")}})
+            assert notifications.deliver_due(two_hours) == []
+            notifications.update_settings({"quiet_hours": no_quiet})
+            # نوع غیرفعال (کلید جمع تنظیمات)
+            notifications.update_settings({"notification_types": {"reminders": False}})
+            assert notifications.deliver_due(two_hours) == []
+            notifications.update_settings({"notification_types": {"reminders": True}})
+            assert [n.title for n in notifications.deliver_due(two_hours)] == ["n3", "n0"]
+            assert notifications.next_due_in() is None
+
+            # follow-upها روی هم جمع می‌شوند
+            for _ in range(5):
+                notifications.create_follow_up("یه سوال طولانی درباره برنامه‌نویسی پایتون و ساختار داده‌ها")
+            assert sum(1 for n in notifications.notifications if n.type == "follow_up") == 1
+            assert 1790 < notifications.next_due_in() <= 1800
+
+            # compaction خودکار: ارسال شده‌های قدیمی و مازاد سقف
+            old = (datetime.now() - timedelta(days=40)).isoformat()
+            for n in notifications.notifications[:2]:
+                n.created_time = old
+            for i in range(30):
+                notifications.create_achievement_notification(f"a{i}", "!")
+                notifications.deliver_due(datetime.now() + timedelta(seconds=1))
+            assert len(notifications.notifications) <= 25
+            assert all(n.created_time != old for n in notifications.notifications)
+            assert any(n.type == "follow_up" and not n.is_sent for n in notifications.notifications)
+
+            flush_scheduler.unregister("smart_notifications")
+            reloaded = SmartNotifications(retention_days=30, max_items=20)
+            assert len(reloaded.notifications) == len(notifications.notifications)
+            assert abs(reloaded.next_due_in() - notifications.next_due_in()) < 1
+        finally:
+            os.chdir(cwd)
+
+    print("✅ Notification scheduler test passed!")
+
+if __name__ == "__main__":
+    test_heap_delivery_and_compaction()
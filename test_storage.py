@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test Compact Storage Migration
+"""
+import sys
+import os
+import json
+import tempfile
+sys.path.append('.')
+
+from backend.core import storage
+from backend.core.storage import save_json, load_json, export_readable
+
+def test_legacy_migration():
+    print("💽 Testing compact storage migration")
+
+    data = {"متن": "خط اول\nخط دوم", "items": [1, 2, {"a": None}]}
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.json")
+        with open(legacy_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        legacy_size = os.path.getsize(legacy_path)
+
+        migrated = storage.storage_stats["migrated_files"]
+        assert load_json(legacy_path) == data
+        assert storage.storage_stats["migrated_files"] == migrated + 1
+        assert os.path.getsize(legacy_path) < legacy_size
+        with open(legacy_path, "rb") as f:
+            assert not storage.is_legacy_format(f.read())
+        # خواندن دوباره فایل فشرده مهاجرت نمی‌کند
+        assert load_json(legacy_path) == data
+        assert storage.storage_stats["migrated_files"] == migrated + 1
+
+        # فایل فشرده با newline داخل رشته‌ها قدیمی حساب نمی‌شود
+        compact_path = os.path.join(tmp, "compact.json")
+        save_json(compact_path, ["\n", {"x": "\n\n"}])
+        with open(compact_path, "rb") as f:
+            assert not storage.is_legacy_format(f.read())
+        assert storage.is_legacy_format(b'[\n  1\n]') and not storage.is_legacy_format(b"{}")
+
+        assert load_json(os.path.join(tmp, "missing.json"), {"default": True}) == {"default": True}
+        result = export_readable(tmp, os.path.join(tmp, "export"))
+        assert result["exported"] == 2
+        with open(os.path.join(tmp, "export", "legacy.json"), encoding="utf-8") as f:
+            assert json.load(f) == data
+
+    print("✅ Compact storage test passed!")
+
+if __name__ == "__main__":
+    test_legacy_migration()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test Shared Text Analyzer
+"""
+import sys
+import random
+sys.path.append('.')
+
+from backend.core.persian_text import normalize_persian
+from backend.core.text_analyzer import TextAnalyzer
+
+def test_analyzer_brute_force():
+    print("🔎 Testing TextAnalyzer against substring search")
+
+    rng = random.Random(11)
+    alphabet = "abسلامک😂 "
+    for _ in range(200):
+        words = list({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5)))
+                      for _ in range(rng.randint(1, 30))})
+        analyzer = TextAnalyzer()
+        # کش کوچک واژه‌ها تا پاک شدنش هم آزموده شود
+        analyzer.token_cache_size = 3
+        analyzer.register("x", {f"c{i}": [word] for i, word in enumerate(words)})
+        for _ in range(10):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            normalized = normalize_persian(text)
+            # الگوهای هم‌پوشان، پیشوندی، چندواژه‌ای و ایموجی همه مثل `in` روی متن یکسان‌سازی شده
+            expected = [f"c{i}" for i, word in enumerate(words)
+                        if normalize_persian(word) and normalize_persian(word) in normalized]
+            assert analyzer.analyze(text).categories("x") == expected, (words, text)
+
+    print("✅ TextAnalyzer brute force test passed!")
+
+def test_analyzer():
+    print("🔬 Testing TextAnalyzer")
+
+    analyzer = TextAnalyzer(cache_size=2)
+    analyzer.register("topic", {"علم": ["ریاضی", "فیزیک"], "سرگرمی": ["فیلم", "بازی"]})
+    analyzer.register("mood", {"positive": ["خوب", "عالی"], "negative": ["بد"]})
+
+    analysis = analyzer.analyze("یه فیلم عالي دیدم، ریاضی هم خوببببب بود")
+    # ترتیب دسته‌ها مثل ترتیب ثبت، نه ترتیب ظاهر شدن در متن
+    assert analysis.categories("topic") == ["علم", "سرگرمی"]
+    # ي عربی و حروف تکراری یکسان‌سازی می‌شوند
+    assert analysis.count("mood", "positive") == 2
+    assert analysis.has("mood") and not analysis.has("mood", "negative")
+    assert not analysis.has("unknown")
+    assert "عالی" in analysis.tokens
+
+    # کش: همان شیء برای ماژول‌های بعدی
+    assert analyzer.analyze("یه فیلم عالي دیدم، ریاضی هم خوببببب بود") is analysis
+    analyzer.analyze("متن دوم")
+    analyzer.analyze("متن سوم")
+    assert analyzer.analyze("یه فیلم عالي دیدم، ریاضی هم خوببببب بود") is not analysis
+    assert analyzer.stats == {"analyses": 4, "cache_hits": 1}
+
+    # ثبت دوباره واژه‌نامه کش را باطل می‌کند
+    analyzer.register("mood", {"negative": ["دیدم"]})
+    assert analyzer.analyze("یه فیلم عالي دیدم، ریاضی هم خوببببب بود").categories("mood") == ["negative"]
+
+    print("✅ TextAnalyzer test passed!")
+
+if __name__ == "__main__":
+    test_analyzer_brute_force()
+    test_analyzer()
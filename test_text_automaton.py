@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test Aho–Corasick Text Automaton
+"""
+import sys
+import random
+sys.path.append('.')
+
+from backend.core.text_automaton import AhoCorasick
+
+def test_matches_brute_force():
+    print("🔎 Testing Aho–Corasick against brute force")
+
+    rng = random.Random(7)
+    alphabet = "abسلامک "
+    for _ in range(300):
+        patterns = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5)))
+                    for _ in range(rng.randint(1, 30))]
+        automaton = AhoCorasick(patterns)
+
+        # حذف یک الگو و افزودن الگوی جدید بعد از ساخت (درج افزایشی)
+        automaton.build()
+        removed = rng.choice(patterns)
+        automaton.remove(removed)
+        patterns = [p for p in patterns if p != removed] + ["سلام"]
+        automaton.add("سلام")
+
+        for _ in range(10):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            expected = {p for p in patterns if p in text}
+            assert set(automaton.find_all(text)) == expected, (patterns, text)
+            assert automaton.contains_any(text) == bool(expected)
+
+    print("✅ Aho–Corasick test passed!")
+
+def test_values():
+    automaton = AhoCorasick()
+    automaton.add("hello", 1)
+    automaton.add("hell", 2)
+    automaton.add("hello", 3)
+
+    assert len(automaton) == 2
+    assert "hell" in automaton
+    assert automaton.find_all("oh hello there") == {"hell": 2, "hello": 3}
+    assert sorted(automaton.iter_matches("hello")) == [(3, "hell"), (4, "hello")]
+
+    # الگوهای در انتظار و الگوهای trie با هم
+    automaton.build()
+    automaton.add("lo")
+    assert automaton.find_all("hello") == {"hell": 2, "hello": 3, "lo": None}
+    automaton.remove("lo")
+    assert automaton.find_all("hello") == {"hell": 2, "hello": 3}
+
+def test_background_rebuild():
+    print("🔎 Testing background rebuild of pending patterns")
+
+    automaton = AhoCorasick(f"کلمه{i}" for i in range(1000))
+    automaton.build()
+    automaton.remove("کلمه5")
+    added = [f"تازه{i}" for i in range(AhoCorasick.pending_limit * 3)]
+    for pattern in added:
+        automaton.add(pattern)
+
+    # بیش از pending_limit در انتظار: جواب درست و بازسازی در پس‌زمینه
+    text = "کلمه5 کلمه7 تازه10 تازه150"
+    expected = {"کلمه7": None, "تازه10": None, "تازه1": None, "تازه15": None, "تازه150": None}
+    assert automaton.find_all(text) == expected
+    automaton.remove("تازه15")
+    automaton.wait_for_rebuild()
+    del expected["تازه15"]
+    assert automaton.find_all(text) == expected
+    assert automaton._pending == []
+
+    # حذف و افزودن دوباره بعد از ساخت
+    automaton.remove("کلمه7")
+    assert "کلمه7" not in automaton.find_all(text)
+    automaton.add("کلمه7", 1)
+    assert automaton.find_all(text)["کلمه7"] == 1
+
+    print("✅ Background rebuild test passed!")
+
+if __name__ == "__main__":
+    test_matches_brute_force()
+    test_values()
+    test_background_rebuild()
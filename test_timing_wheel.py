@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test Timing Wheel Reminders
+"""
+import os
+import sys
+import random
+import tempfile
+from datetime import datetime
+sys.path.append('.')
+
+from backend.core.timing_wheel import TimingWheel
+from backend.core.storage import save_json, load_json
+from backend.core.flush_scheduler import flush_scheduler
+
+def test_wheel_fires_in_order():
+    print("⏲️ Testing hierarchical timing wheel")
+
+    rng = random.Random(7)
+    start = 1_700_000_000
+    wheel = TimingWheel(now=start)
+    expected = {}
+    # همه سطوح: ثانیه‌ها تا چند روز بعد، به علاوه لغو
+    for key in range(3000):
+        when = start + rng.choice((rng.uniform(0, 120), rng.uniform(0, 5000), rng.uniform(0, 400_000)))
+        wheel.add(key, when, key)
+        expected[key] = when
+    for key in range(0, 3000, 10):
+        assert wheel.cancel(key) == key
+        del expected[key]
+    assert len(wheel) == len(expected)
+
+    now = start
+    fired = {}
+    # تیک به تیک، با چند پرش بلند وسطش
+    while now < start + 400_100:
+        previous = now
+        now += 1 if rng.random() < 0.9 else rng.choice((700, 9000))
+        for key, item in wheel.advance(now):
+            fired[key] = (previous, now)
+    assert set(fired) == set(expected)
+    for key, when in expected.items():
+        # در همان advanceی که زمانش را پوشش می‌دهد، نه زودتر و نه دیرتر
+        previous, fired_at = fired[key]
+        assert previous < when <= fired_at, key
+    assert len(wheel) == 0
+
+    print("✅ Timing wheel test passed!")
+
+def test_reminder_delivery_and_persistence():
+    print("⏰ Testing reminder engine")
+
+    from backend.core.proactive_assistant import ProactiveAssistant
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            # قالب قدیمی مهاجرت داده می‌شود (انجام شده‌ها دور ریخته می‌شوند)
+            past = datetime.fromtimestamp(datetime.now().timestamp() - 60).isoformat()
+            save_json("data/proactive/reminders.json", {"reminders": [
+                {"id": 1, "text": "قدیمی", "remind_time": past, "created": past, "completed": False},
+                {"id": 2, "text": "انجام شده", "remind_time": past, "created": past, "completed": True}]})
+            assistant = ProactiveAssistant()
+            now = datetime.now().timestamp()
+            soon = datetime.fromtimestamp(now + 30).isoformat()
+            assistant.add_reminder("جلسه", soon, "حامد")
+            assistant.add_reminder("دارو", soon, "مریم")
+            assistant.add_reminder("سال بعد", datetime.fromtimestamp(now + 86400 * 365).isoformat(), "حامد")
+
+            assert assistant.tick(now + 1) == 1
+            assert [r["text"] for r in assistant.check_reminders()] == ["قدیمی"]
+            assert assistant.tick(now + 31) == 2
+            assert sorted(assistant.fired_owners()) == ["", "حامد", "مریم"]
+            # فقط مال صاحب متصل (و بی‌صاحب‌ها) برداشته می‌شود
+            assert [r["text"] for r in assistant.take_fired(["حامد"])] == ["قدیمی", "جلسه"]
+            assert assistant.fired_owners() == ["مریم"]
+
+            assistant.save_reminders()
+            data = load_json("data/proactive/reminders.json")
+            assert data["version"] == 2 and sorted(data["text"]) == ["دارو", "سال بعد"]
+            flush_scheduler.unregister("proactive_reminders")
+
+            # تحویل نشده‌ها بعد از راه‌اندازی دوباره دوباره fire می‌شوند
+            reloaded = ProactiveAssistant()
+            assert reloaded.get_reminder_stats()["scheduled"] == 2
+            reloaded.tick(now + 60)
+            assert [(r["text"], r["owner"]) for r in reloaded.take_fired(["مریم"])] == [("دارو", "مریم")]
+            reloaded.add_reminder("تازه", soon, "حامد")
+            assert reloaded.cancel_reminder(4) and not reloaded.cancel_reminder(4)
+            flush_scheduler.unregister("proactive_reminders")
+        finally:
+            os.chdir(cwd)
+
+    print("✅ Reminder engine test passed!")
+
+if __name__ == "__main__":
+    test_wheel_fires_in_order()
+    test_reminder_delivery_and_persistence()
@@ -5,9 +5,10 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.requests import Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 import json
 import asyncio
+import time
 from backend.core.llm_engine import LLMEngine
 from backend.core.conversation import ConversationManager
 from backend.core.internet import InternetAccess
@@ -16,7 +17,7 @@ from backend.config.settings import settings
 from web.terminal import add_terminal_support
 from backend.core.personality import PersonalitySystem
 from backend.core.user_profile import UserProfile
-from backend.core.fox_learning import FoxLearningSystem
+from backend.core.fox_learning import learning_registry
 from backend.commands.api_commands import handle_api_command
 from backend.core.user_profiles import user_manager
 from backend.core.multi_ai_system import multi_ai_system
@@ -24,8 +25,17 @@ from backend.core.fox_scraper import fox_scraper
 from backend.core.smart_memory import smart_memory
 from backend.core.smart_notifications import smart_notifications
 from backend.core.analytics_dashboard import analytics_dashboard
+from backend.core.flush_scheduler import flush_scheduler
+from backend.core.storage import export_readable, get_storage_stats
+from backend.core.lazy import lazy_singleton, warm_up, get_init_report
+from backend.core.text_analyzer import text_analyzer
+from backend.core.latency import latency_tracker, WINDOWS
+from backend.core.metrics import metrics, HTTPMetricsMiddleware, CONTENT_TYPE
+from backend.core.memory import memory_cache_stats, ensure_search_index
+from backend.core.semantic_memory import semantic_memory
 
 app = FastAPI(title="Fox - Personal AI Assistant")
+app.add_middleware(HTTPMetricsMiddleware)
 
 # Static files and templates
 app.mount("/static", StaticFiles(directory="web/static"), name="static")
@@ -36,16 +46,136 @@ llm = LLMEngine(
     model_name=settings.default_model,
     host=settings.ollama_host
 )
-conversation_manager = ConversationManager()
+conversation_manager = lazy_singleton("conversation_manager", ConversationManager)
 internet = InternetAccess()
 ai_connector = AIConnector()
 personality = PersonalitySystem()
 
-# Initialize user profile and learning system
+text_analyzer.register("chat_intent", {
+    "introduction": ["اسم من", "نام من", "من هستم", "صدام کن"],
+    "web_search": ['جستجو کن', 'search', 'اینترنت', 'آخرین اخبار', 'خبر', 'وضعیت آب و هوا']
+})
+
+# Initialize user profile and learning system (در اولین استفاده)
 from backend.database.models import get_db
-db_session = next(get_db())
-user_profile = UserProfile(db_session)
-fox_learning = FoxLearningSystem(user_profile)
+user_profile = lazy_singleton("user_profile", lambda: UserProfile(next(get_db())))
+
+# متریک‌های Prometheus (/metrics)
+websocket_connections = metrics.gauge("fox_websocket_connections", "Open chat websocket connections")
+websocket_messages = metrics.counter("fox_websocket_messages_total", "Chat websocket messages by kind", ("kind",))
+metrics.register_callback(
+    "fox_cache_requests_total", "counter", "Cache lookups by cache and result",
+    lambda: {
+        ("text_analyzer", "hit"): text_analyzer.stats["cache_hits"],
+        ("text_analyzer", "miss"): text_analyzer.stats["analyses"],
+        ("learning_registry", "hit"): learning_registry.stats["hits"],
+        ("learning_registry", "miss"): learning_registry.stats["loads"],
+        ("memory_snapshot", "hit"): memory_cache_stats["hits"],
+        ("memory_snapshot", "miss"): memory_cache_stats["misses"],
+    },
+    ("cache", "result"))
+metrics.register_callback("fox_flush_writes_total", "counter", "Debounced JSON flushes written to disk",
+                          lambda: flush_scheduler.stats["writes"])
+metrics.register_callback("fox_flush_pending", "gauge", "Modules with unsaved changes",
+                          lambda: len(flush_scheduler.get_stats()["pending"]))
+
+def get_fox_learning():
+    """سیستم یادگیری کاربر فعلی از رجیستری مشترک"""
+    return learning_registry.get(user_profile)
+
+def generate_chat_response(context_messages) -> str:
+    """پاسخ LLM از مسیر stream (در thread، خارج از event loop)
+
+    با stream=True پاسخ از timed_stream می‌گذرد و llm_first_token هم برای چت وب
+    ثبت می‌شود؛ پاسخ یادگرفته شده یا پیام خطا همان رشته برگردانده می‌شود.
+    """
+    response = llm.chat(context_messages, stream=True, fox_learning=get_fox_learning())
+    if isinstance(response, str):
+        return response
+    try:
+        return "".join(chunk['message']['content'] for chunk in response
+                       if 'message' in chunk and 'content' in chunk['message'])
+    except Exception as e:
+        print(f"❌ LLM stream error: {e}")
+        return f"متأسفم، خطایی رخ داد: {str(e)}"
+
+# websocketهای چت متصل → نام کاربر (برای ارسال اعلان‌ها و یادآوری‌ها)
+active_websockets = {}
+
+async def deliver_notifications():
+    """ارسال اعلان‌های سررسیده به همه کلاینت‌های متصل
+    
+    تا سررسید نزدیک‌ترین اعلان می‌خوابد (حداکثر notification_poll_interval، چون
+    اعلان‌های جدید ممکن است زودتر سررسید شوند)؛ بدون کلاینت چیزی برداشته نمی‌شود.
+    """
+    last_compaction = time.monotonic()
+    while True:
+        delay = settings.notification_poll_interval
+        if active_websockets:
+            try:
+                for notification in smart_notifications.deliver_due():
+                    payload = json.dumps({
+                        "type": "notification",
+                        "id": notification.id,
+                        "title": notification.title,
+                        "message": notification.message,
+                        "priority": notification.priority
+                    })
+                    for websocket in list(active_websockets):
+                        try:
+                            await websocket.send_text(payload)
+                        except Exception:
+                            active_websockets.pop(websocket, None)
+                next_due = smart_notifications.next_due_in()
+                if next_due is not None:
+                    delay = min(delay, max(next_due, 1.0))
+            except Exception as e:
+                print(f"❌ خطا در ارسال اعلان‌ها: {e}")
+        if time.monotonic() - last_compaction >= 3600 and smart_notifications.is_initialized():
+            smart_notifications.compact()
+            last_compaction = time.monotonic()
+        await asyncio.sleep(delay)
+
+async def deliver_reminders():
+    """tick مشترک چرخ یادآوری‌ها و تحویل سررسیده‌ها به websocket صاحبشان
+    
+    یادآوری‌هایی که صاحبشان متصل نیست در صف می‌مانند و در اولین tick بعد از
+    اتصال او تحویل داده می‌شوند.
+    """
+    from backend.core.proactive_assistant import proactive_assistant
+    while True:
+        await asyncio.sleep(settings.reminder_tick)
+        try:
+            proactive_assistant.tick()
+            if not active_websockets or not proactive_assistant.fired_owners():
+                continue
+            for reminder in proactive_assistant.take_fired(set(active_websockets.values())):
+                payload = json.dumps({
+                    "type": "reminder",
+                    "id": reminder["id"],
+                    "message": reminder["text"],
+                    "remind_time": reminder["remind_time"]
+                })
+                for websocket, user in list(active_websockets.items()):
+                    if reminder["owner"] and user != reminder["owner"]:
+                        continue
+                    try:
+                        await websocket.send_text(payload)
+                    except Exception:
+                        active_websockets.pop(websocket, None)
+        except Exception as e:
+            print(f"❌ خطا در ارسال یادآوری‌ها: {e}")
+
+async def warm_up_singletons():
+    """ساخت نمونه‌های سراسری بعد از شروع به کار سرور"""
+    await asyncio.sleep(settings.warm_up_delay)
+    timings = await asyncio.to_thread(warm_up)
+    await asyncio.to_thread(get_fox_learning)
+    # ایندکس جستجوی پیام‌ها قبل از اولین پرسش کاربر (و بردارهای جا مانده پیام‌ها و مکالمه‌ها)
+    await asyncio.to_thread(ensure_search_index)
+    await asyncio.to_thread(smart_memory.backfill_vectors)
+    if timings:
+        print(f"🔥 warm-up: {len(timings)} نمونه در {sum(timings.values()) * 1000:.0f}ms ساخته شد")
 
 async def handle_web_command(command: str, websocket: WebSocket) -> str:
     """Handle web chat commands"""
@@ -78,6 +208,7 @@ async def handle_web_command(command: str, websocket: WebSocket) -> str:
 • /teach <کلید> <پاسخ> - آموزش پاسخ خاص
 • /learn <موضوع> <حقیقت> - آموزش دانش جدید
 • /learned - نمایش آمار یادگیری
+• /dedupe - گزارش و ادغام پاسخ‌های تقریباً تکراری
 • /recall <موضوع> - یادآوری مکالمات قبلی
 • /speak <متن> - گفتن متن با صدا
 • /voices - نمایش صداهای موجود
@@ -110,7 +241,10 @@ async def handle_web_command(command: str, websocket: WebSocket) -> str:
 🎮 بازی‌سازی:
 • /fox_status - وضعیت و سطح Fox
 • /challenge - چالش روزانه
-• /fox_mood - حالت Fox"""
+• /fox_mood - حالت Fox
+
+💽 داده‌ها:
+• /export_data - خروجی خوانا از پوشه data"""
     
     elif cmd == 'models':
         try:
@@ -320,7 +454,7 @@ async def handle_web_command(command: str, websocket: WebSocket) -> str:
             rest = command[6:].strip()
             if ' ' in rest:
                 trigger, response = rest.split(' ', 1)
-                return fox_learning.teach_response(trigger, response)
+                return get_fox_learning().teach_response(trigger, response)
         return "استفاده: /teach <کلید> <پاسخ>"
     
     elif cmd == 'learn':
@@ -328,16 +462,44 @@ async def handle_web_command(command: str, websocket: WebSocket) -> str:
             rest = command[6:].strip()
             if ' ' in rest:
                 topic, fact = rest.split(' ', 1)
-                return fox_learning.teach_fact(topic, fact)
+                return get_fox_learning().teach_fact(topic, fact)
         return "استفاده: /learn <موضوع> <حقیقت>"
     
     elif cmd == 'learned':
+        fox_learning = get_fox_learning()
         stats = fox_learning.get_learning_stats()
+        top_used = "".join(
+            f"\n   {item['usage_count']}× {item['trigger']}" for item in fox_learning.get_usage_ranking(5)
+        )
         return f"""📚 آمار یادگیری Fox:
 • پاسخهای آموزش داده شده: {stats['custom_responses']}
 • حقایق یادگیری شده: {stats['learned_facts']}
-• اطلاعات فرهنگی: {stats['cultural_knowledge']}"""
-    
+• اطلاعات فرهنگی: {stats['cultural_knowledge']}
+• دفعات استفاده: {stats['total_usage']}{top_used}"""
+
+    elif cmd == 'dedupe':
+        fox_learning = get_fox_learning()
+        if len(parts) > 1 and parts[1] == 'merge':
+            report = fox_learning.merge_near_duplicates()
+            learning_registry.refresh(fox_learning)
+            return f"""🧬 ادغام پاسخ‌های تقریباً تکراری:
+• حذف شده: {report['removed']} ({report['groups']} گروه)
+• پاسخ‌ها: {report['triggers_before']} → {report['triggers_after']}
+• حافظه: {report['memory_before_mb']}MB → {report['memory_after_mb']}MB
+• زمان جستجو: {report['lookup_us_before']}µs → {report['lookup_us_after']}µs ({report['speedup']}×)"""
+
+        groups = fox_learning.find_near_duplicates()
+        if not groups:
+            return "✅ پاسخ تقریباً تکراری پیدا نشد"
+        duplicates = sum(len(group["duplicates"]) for group in groups)
+        examples = "".join(
+            f"\n   {group['keep']} ← " + "، ".join(trigger for trigger, _ in group["duplicates"][:3])
+            for group in groups[:5]
+        )
+        return f"""🧬 {duplicates} پاسخ تقریباً تکراری در {len(groups)} گروه:{examples}
+
+برای ادغام: `/dedupe merge`"""
+
     elif cmd == 'mood':
         try:
             mood = personality.get_current_mood()
@@ -349,25 +511,19 @@ async def handle_web_command(command: str, websocket: WebSocket) -> str:
         if len(parts) > 1:
             search_term = ' '.join(parts[1:])
             try:
-                from backend.database.models import get_db, Message
-                from sqlalchemy import desc, or_
+                from datetime import datetime
                 
-                db = next(get_db())
-                # Search in recent messages (last 100)
-                messages = db.query(Message).filter(
-                    or_(
-                        Message.content.contains(search_term),
-                        Message.content.like(f'%{search_term}%')
-                    )
-                ).order_by(desc(Message.timestamp)).limit(10).all()
+                # مرتبط‌ترین تبادل‌ها در کل تاریخچه (BM25)؛ embed پرسش خارج از event loop
+                await asyncio.to_thread(semantic_memory.embed_query, search_term)
+                exchanges = conversation_manager.memory.search_relevant(search_term, limit=3)
                 
-                if messages:
+                if exchanges:
                     result = f"🧠 یادم هست! در مورد '{search_term}' صحبت کردیم:\n\n"
-                    for msg in reversed(messages[-3:]):  # Show last 3 matches
-                        time_str = msg.timestamp.strftime("%Y/%m/%d %H:%M")
-                        role = "شما" if msg.role == "user" else "Fox"
-                        content = msg.content[:100] + "..." if len(msg.content) > 100 else msg.content
-                        result += f"📅 {time_str} - {role}: {content}\n"
+                    for exchange in exchanges:
+                        time_str = datetime.fromisoformat(exchange["timestamp"]).strftime("%Y/%m/%d %H:%M")
+                        question = exchange["question"][:100] + "..." if len(exchange["question"]) > 100 else exchange["question"]
+                        answer = exchange["answer"][:100] + "..." if len(exchange["answer"]) > 100 else exchange["answer"]
+                        result += f"📅 {time_str} - شما: {question}\n   Fox: {answer}\n"
                     return result
                 else:
                     return f"🤔 متأسفانه چیزی در مورد '{search_term}' یادم نیست"
@@ -525,6 +681,7 @@ speechSynthesis.getVoices().forEach((voice, i) => {
 • {week_stats['conversations']} مکالمه ({week_stats['avg_daily']} روزانه)
 • روند: {week_stats.get('trend', 'نامشخص')}
 • موضوعات: {', '.join(list(week_stats['top_topics'].keys())[:3])}
+• زمان پاسخ: p50 {week_stats['latency'].get('total', {}).get('p50_ms', 0) / 1000:.1f}s، p95 {week_stats['latency'].get('total', {}).get('p95_ms', 0) / 1000:.1f}s
 
 📆 **ماه گذشته:**  
 • {month_stats['conversations']} مکالمه ({month_stats['avg_weekly']} هفتگی)
@@ -564,6 +721,7 @@ speechSynthesis.getVoices().forEach((voice, i) => {
         # مکالمات مرتبط
         if len(parts) > 1:
             query = ' '.join(parts[1:])
+            await asyncio.to_thread(semantic_memory.embed_query, query)
             relevant = smart_memory.get_relevant_context(query)
             
             if relevant:
@@ -679,7 +837,7 @@ speechSynthesis.getVoices().forEach((voice, i) => {
             else:
                 remind_time = datetime.now() + timedelta(minutes=int(time_str))
             
-            return proactive_assistant.add_reminder(text, remind_time.isoformat())
+            return proactive_assistant.add_reminder(text, remind_time.isoformat(), user_manager.current_user)
         except:
             return "❌ فرمت زمان نادرست"
     
@@ -695,11 +853,33 @@ speechSynthesis.getVoices().forEach((voice, i) => {
         from backend.core.fox_gamification import fox_game
         return fox_game.get_fox_mood()
     
+    elif cmd == 'export_data':
+        try:
+            flush_scheduler.flush()
+            result = export_readable("data", "data_export")
+            return f"💽 {result['exported']} فایل به صورت خوانا در {result['directory']} ذخیره شد"
+        except Exception as e:
+            return f"❌ خطا در خروجی گرفتن: {str(e)}"
+    
     return f"دستور '{cmd}' شناخته نشد. /help را امتحان کنید."
 
 # Add terminal support
 add_terminal_support(app)
 
+@app.on_event("startup")
+async def start_background_tasks():
+    # ذخیره‌سازی تأخیری فایل‌های JSON
+    asyncio.create_task(flush_scheduler.run())
+    asyncio.create_task(deliver_notifications())
+    asyncio.create_task(deliver_reminders())
+    
+    if settings.warm_up_on_start:
+        asyncio.create_task(warm_up_singletons())
+
+@app.on_event("shutdown")
+async def flush_pending_writes():
+    flush_scheduler.shutdown()
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
@@ -714,6 +894,8 @@ async def websocket_endpoint(websocket: WebSocket):
     
     # Start new conversation session
     session_id = conversation_manager.start_new_session()
+    websocket_connections.inc()
+    active_websockets[websocket] = user_manager.current_user
     
     try:
         while True:
@@ -724,16 +906,20 @@ async def websocket_endpoint(websocket: WebSocket):
             
             if not user_message.strip():
                 continue
+            websocket_messages.labels("command" if user_message.startswith('/') else "chat").inc()
                 
+            # یک تحلیل مشترک برای همه بررسی‌های این پیام (کش می‌شود)
+            analysis = text_analyzer.analyze(user_message)
+            
             # Check for new user introduction (فقط اگه واقعاً معرفی کردن)
             # فقط اگه پیام کوتاه باشه و شامل کلمات معرفی باشه
-            if (len(user_message.split()) <= 10 and 
-                any(pattern in user_message.lower() for pattern in ["اسم من", "نام من", "من هستم", "صدام کن"])):
+            if len(user_message.split()) <= 10 and analysis.has("chat_intent", "introduction"):
                 
                 potential_new_user = user_manager.detect_new_user(user_message)
                 if potential_new_user and potential_new_user != user_manager.current_user:
                     # Switch to new user
                     user_manager.switch_user(potential_new_user)
+                    active_websockets[websocket] = user_manager.current_user
                     
                     # Check if profile exists
                     profile = user_manager.get_user_profile(potential_new_user)
@@ -786,9 +972,10 @@ async def websocket_endpoint(websocket: WebSocket):
                         continue
                 
                 # Check if user is asking for web search
-                if any(keyword in user_message.lower() for keyword in ['جستجو کن', 'search', 'اینترنت', 'آخرین اخبار', 'خبر', 'وضعیت آب و هوا']):
+                if analysis.has("chat_intent", "web_search"):
                     # Add web search results to context
-                    web_results = internet.search_web(user_message, 3)
+                    with latency_tracker.track("web_search"):
+                        web_results = internet.search_web(user_message, 3)
                     if web_results:
                         web_context = "نتایج جستجو در اینترنت:\n"
                         for result in web_results:
@@ -797,21 +984,26 @@ async def websocket_endpoint(websocket: WebSocket):
                         conversation_manager.add_message("system", web_context)
                 
                 # Get enhanced context with memories
-                context_messages = conversation_manager.get_enhanced_context()
-                
-                # Add personality prompt
-                personality_prompt = personality.get_personality_prompt()
-                from backend.core.llm_engine import ChatMessage
-                context_messages.insert(0, ChatMessage("system", personality_prompt))
+                with latency_tracker.track("context_build"):
+                    # پیام یک بار و خارج از event loop embed می‌شود؛ جستجوهای
+                    # پیام‌ها و حافظه‌ها در ساخت context همان بردار را از کش می‌خوانند
+                    await asyncio.to_thread(semantic_memory.embed_query, user_message)
+                    context_messages = conversation_manager.get_enhanced_context()
+                    
+                    # Add personality prompt
+                    personality_prompt = personality.get_personality_prompt()
+                    from backend.core.llm_engine import ChatMessage
+                    context_messages.insert(0, ChatMessage("system", personality_prompt))
                 
                 # Get AI response
-                response = llm.chat(context_messages, fox_learning=fox_learning)
+                response = await asyncio.to_thread(generate_chat_response, context_messages)
+                post_processing_start = time.time()
                 
                 # اگر Multi-AI فعال باشه، بهبود پاسخ
                 try:
                     from backend.core.multi_ai_system import multi_ai_system
                     if multi_ai_system.is_enabled():
-                        enhanced_response = multi_ai_system.get_best_response(user_message)
+                        enhanced_response = await multi_ai_system.get_best_response_async(user_message)
                         if enhanced_response and enhanced_response != response:
                             response = enhanced_response
                 except:
@@ -861,6 +1053,8 @@ async def websocket_endpoint(websocket: WebSocket):
                 
                 # Apply personality styling
                 styled_response = personality.generate_response_style(response)
+                persistence_start = time.time()
+                latency_tracker.record("post_processing", (persistence_start - post_processing_start) * 1000)
                 
                 # ثبت مکالمه در سیستم‌های هوشمند
                 try:
@@ -868,20 +1062,21 @@ async def websocket_endpoint(websocket: WebSocket):
                     response_time = time.time() - start_time
                     
                     # تشخیص موضوع
-                    topic = smart_memory.detect_topic(message)
+                    topic = smart_memory.detect_topic(user_message)
                     
                     # ثبت در حافظه هوشمند
-                    smart_memory.add_conversation(message, styled_response, {"topic": topic})
+                    smart_memory.add_conversation(user_message, styled_response, {"topic": topic})
                     
                     # ثبت در آنالیتیکس
-                    analytics_dashboard.record_conversation(message, styled_response, response_time, topic)
+                    user_name = user_manager.current_user or None
+                    analytics_dashboard.record_conversation(user_message, styled_response, response_time, topic, user_name)
                     
                     # ایجاد follow-up notification
-                    if len(message.split()) > 10:  # سوالات طولانی
-                        smart_notifications.create_follow_up(message)
+                    if len(user_message.split()) > 10:  # سوالات طولانی
+                        smart_notifications.create_follow_up(user_message)
                         
                     # پیشنهاد یادگیری
-                    if any(word in message.lower() for word in ['یاد', 'آموزش', 'چطور', 'نحوه']):
+                    if any(word in user_message.lower() for word in ['یاد', 'آموزش', 'چطور', 'نحوه']):
                         smart_notifications.create_learning_reminder(topic)
                         
                 except Exception as e:
@@ -889,6 +1084,8 @@ async def websocket_endpoint(websocket: WebSocket):
                 
                 # Add AI response to conversation
                 conversation_manager.add_message("assistant", styled_response)
+                latency_tracker.record("persistence", (time.time() - persistence_start) * 1000)
+                latency_tracker.record("total", (time.time() - start_time) * 1000, llm.model_name)
                 
                 # Send response to client
                 await websocket.send_text(json.dumps({
@@ -905,6 +1102,9 @@ async def websocket_endpoint(websocket: WebSocket):
                 
     except WebSocketDisconnect:
         pass
+    finally:
+        websocket_connections.dec()
+        active_websockets.pop(websocket, None)
 
 @app.get("/health")
 async def health_check():
@@ -933,6 +1133,60 @@ async def get_memory():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/analytics/events")
+async def query_events(metric: str = "response_time", stat: str = "p95", group_by: str = "hour",
+                       days: int = 90, user: str = None, topic: str = None):
+    """Aggregate raw conversation events (e.g. p95 response time by hour)"""
+    try:
+        result = analytics_dashboard.query_events(metric, stat, None if group_by == "all" else group_by,
+                                                  days, user=user, topic=topic)
+        return {"metric": metric, "stat": stat, "group_by": group_by, "days": days, "result": result}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analytics/export")
+async def export_analytics(dataset: str = "events", format: str = "jsonl", start: str = None, end: str = None):
+    """Stream raw events or daily stats as JSONL/CSV (start/end: inclusive ISO dates)"""
+    try:
+        chunks = analytics_dashboard.stream_export(dataset, format, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    # تکه‌ها در threadpool ساخته می‌شوند؛ event loop آزاد می‌ماند
+    media_type = "application/x-ndjson" if format == "jsonl" else "text/csv; charset=utf-8"
+    filename = f"fox_{dataset}_{start or 'all'}_{end or 'now'}.{format}"
+    return StreamingResponse(chunks, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.get("/api/latency")
+async def get_latency(window: str = "hour", periods: int = 1, stage: str = None, model: str = None):
+    """Latency percentiles per pipeline stage (and model) over recent windows"""
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of {list(WINDOWS)}")
+    try:
+        stages = latency_tracker.get_percentiles(window, max(1, periods), stage, model)
+        return {"window": window, "periods": periods, "stages": stages}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/latency/timeline")
+async def get_latency_timeline(stage: str = "total", window: str = "minute", model: str = None):
+    """Per-window latency summaries of one stage (for charts)"""
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of {list(WINDOWS)}")
+    try:
+        return {"stage": stage, "window": window, "timeline": latency_tracker.get_timeline(stage, window, model)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text-format metrics"""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
 @app.get("/api/search")
 async def search_conversations(q: str):
     """Search in conversation history"""
@@ -995,3 +1249,21 @@ async def get_mood():
 @app.post("/api/mood")
 async def set_mood(emotion: str, value: float):
     """Set specific emotion"""
+
+@app.get("/api/storage/stats")
+async def get_storage_report():
+    """Get debounced write statistics"""
+    return {
+        "flush": flush_scheduler.get_stats(),
+        "storage": get_storage_stats()
+    }
+
+@app.get("/api/startup/report")
+async def get_startup_report():
+    """Get lazy singleton initialization times"""
+    return {"singletons": get_init_report()}
+
+@app.get("/api/learning/memory")
+async def get_learning_memory():
+    """Get resident learned stores and their memory"""
+    return learning_registry.get_stats()
@@ -305,6 +305,13 @@ class ChatApp {
                 this.hideTyping();
                 this.addMessage(data.message, 'assistant error');
                 break;
+            case 'notification':
+                this.addMessage(`${data.title}\n${data.message}`, 'assistant notification');
+                break;
+            case 'reminder':
+                this.addMessage(`⏰ یادآوری\n${data.message}`, 'assistant notification');
+                this.speakText(data.message);
+                break;
         }
     }
     
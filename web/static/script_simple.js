@@ -92,6 +92,10 @@ class ChatApp {
             const data = JSON.parse(event.data);
             if (data.type === 'message') {
                 this.addMessage(data.message, 'assistant');
+            } else if (data.type === 'notification') {
+                this.addMessage(`${data.title}\n${data.message}`, 'assistant');
+            } else if (data.type === 'reminder') {
+                this.addMessage(`⏰ یادآوری\n${data.message}`, 'assistant');
             }
         };
         